@@ -1,4 +1,4 @@
-from flask import Flask, g
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
@@ -8,6 +8,7 @@ from flask_limiter.util import get_remote_address
 from flask_migrate import Migrate
 from dotenv import load_dotenv
 import os
+import threading
 
 load_dotenv()
 
@@ -20,14 +21,101 @@ migrate = Migrate()
 # 라우트 데코레이터가 import 시점에 작동하도록 인스턴스 필요
 limiter = Limiter(key_func=get_remote_address)
 
-# OpenAI 서비스는 요청마다 g 객체에 캐시됨
+# OpenAI 서비스는 워커 프로세스당 하나만 생성되어 모든 요청 스레드가 공유
+# (HTTP keep-alive 연결 풀과 tiktoken 인코더 재사용)
+_openai_service = None
+_openai_service_lock = threading.Lock()
+
+# 비동기 채팅 실행기(이벤트 루프 스레드)도 워커 프로세스당 하나
+_chat_executor = None
+_chat_executor_lock = threading.Lock()
+
+# 백그라운드 요약 실행기(스레드 풀)도 워커 프로세스당 하나
+_summary_worker = None
+_summary_worker_lock = threading.Lock()
+
+# 비디오 이벤트 기록기(큐 + 기록 스레드)도 워커 프로세스당 하나
+_event_ingestor = None
+_event_ingestor_lock = threading.Lock()
+
+
+def _reset_openai_service():
+    """fork 이후 자식 프로세스에서 부모의 클라이언트/스레드/락을 버림"""
+    global _openai_service, _openai_service_lock, _chat_executor, _chat_executor_lock
+    global _summary_worker, _summary_worker_lock, _event_ingestor, _event_ingestor_lock
+    _openai_service = None
+    _openai_service_lock = threading.Lock()
+    _chat_executor = None
+    _chat_executor_lock = threading.Lock()
+    _summary_worker = None
+    _summary_worker_lock = threading.Lock()
+    _event_ingestor = None
+    _event_ingestor_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_openai_service)
+
+
 def get_openai_service():
-    """요청당 OpenAI 서비스 싱글턴"""
-    if 'openai_service' not in g:
-        from app.services.openai_service import OpenAIService
-        from flask import current_app
-        g.openai_service = OpenAIService(current_app.config)
-    return g.openai_service
+    """프로세스당 OpenAI 서비스 싱글턴 (스레드 안전, fork 안전)"""
+    global _openai_service
+    service = _openai_service
+    # register_at_fork가 없는 환경을 위해 PID도 확인
+    if service is None or service.pid != os.getpid():
+        with _openai_service_lock:
+            service = _openai_service
+            if service is None or service.pid != os.getpid():
+                from app.services.openai_service import OpenAIService
+                from flask import current_app
+                service = OpenAIService(current_app.config)
+                _openai_service = service
+    return service
+
+
+def get_chat_executor():
+    """프로세스당 비동기 채팅 실행기 싱글턴 (첫 사용 시 이벤트 루프 스레드 시작)"""
+    global _chat_executor
+    executor = _chat_executor
+    if executor is None or executor.pid != os.getpid():
+        with _chat_executor_lock:
+            executor = _chat_executor
+            if executor is None or executor.pid != os.getpid():
+                from app.services.chat_executor import ChatExecutor
+                from flask import current_app
+                executor = ChatExecutor(current_app._get_current_object(), get_openai_service())
+                _chat_executor = executor
+    return executor
+
+
+def get_summary_worker():
+    """프로세스당 백그라운드 요약 실행기 싱글턴"""
+    global _summary_worker
+    worker = _summary_worker
+    if worker is None or worker.pid != os.getpid():
+        with _summary_worker_lock:
+            worker = _summary_worker
+            if worker is None or worker.pid != os.getpid():
+                from app.services.summary_worker import SummaryWorker
+                from flask import current_app
+                worker = SummaryWorker(current_app._get_current_object(), get_openai_service())
+                _summary_worker = worker
+    return worker
+
+
+def get_event_ingestor():
+    """프로세스당 비디오 이벤트 기록기 싱글턴 (첫 사용 시 기록 스레드 시작)"""
+    global _event_ingestor
+    ingestor = _event_ingestor
+    if ingestor is None or ingestor.pid != os.getpid():
+        with _event_ingestor_lock:
+            ingestor = _event_ingestor
+            if ingestor is None or ingestor.pid != os.getpid():
+                from app.services.event_ingestor import EventIngestor
+                from flask import current_app
+                ingestor = EventIngestor(current_app._get_current_object())
+                _event_ingestor = ingestor
+    return ingestor
 
 
 def create_app(config_name=None):
@@ -52,7 +140,7 @@ def create_app(config_name=None):
     CORS(app, 
          origins=app.config['CORS_ORIGINS'],
          supports_credentials=app.config['CORS_SUPPORTS_CREDENTIALS'],
-         allow_headers=['Content-Type', 'Authorization'],
+         allow_headers=['Content-Type', 'Authorization', 'Idempotency-Key'],
          methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
     
     # Rate Limiter 초기화
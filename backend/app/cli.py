@@ -122,6 +122,279 @@ def health():
         click.echo("✅ 애플리케이션 상태: 정상")
 
 
+@cli.command('backfill-token-counts')
+@click.option('--batch-size', default=1000, show_default=True, help='한 번에 처리할 행 수')
+def backfill_token_counts(batch_size):
+    """
+    기존 채팅 메시지/세션 요약의 토큰 수 채우기
+    
+    token_count(메시지), summary_tokens(세션 요약)가 비어 있는 행만 처리하므로
+    여러 번 실행해도 안전합니다.
+    
+    사용 예시:
+        flask cli backfill-token-counts
+        flask cli backfill-token-counts --batch-size 5000
+    """
+    app = create_app()
+    
+    with app.app_context():
+        from app.models.chat_message import ChatMessage
+        from app.models.chat_session import ChatSession
+        from app.services.openai_service import OpenAIService
+        
+        openai_service = OpenAIService(app.config)
+        
+        # 채팅 메시지 (id 순으로 배치 처리)
+        updated_messages = 0
+        last_id = 0
+        while True:
+            rows = db.session.query(ChatMessage.id, ChatMessage.content).filter(
+                ChatMessage.token_count.is_(None),
+                ChatMessage.id > last_id
+            ).order_by(ChatMessage.id).limit(batch_size).all()
+            if not rows:
+                break
+            
+            counts = openai_service.count_tokens_batch([row.content for row in rows])
+            db.session.execute(
+                db.update(ChatMessage),
+                [{'id': row.id, 'token_count': count} for row, count in zip(rows, counts)]
+            )
+            db.session.commit()
+            
+            updated_messages += len(rows)
+            last_id = rows[-1].id
+            click.echo(f"  메시지 {updated_messages}개 처리됨 (마지막 ID: {last_id})")
+        
+        # 세션 요약
+        updated_sessions = 0
+        last_id = 0
+        while True:
+            rows = db.session.query(ChatSession.id, ChatSession.summary).filter(
+                ChatSession.summary.isnot(None),
+                ChatSession.summary_tokens.is_(None),
+                ChatSession.id > last_id
+            ).order_by(ChatSession.id).limit(batch_size).all()
+            if not rows:
+                break
+            
+            counts = openai_service.count_tokens_batch([row.summary for row in rows])
+            db.session.execute(
+                db.update(ChatSession),
+                [{'id': row.id, 'summary_tokens': count} for row, count in zip(rows, counts)]
+            )
+            db.session.commit()
+            
+            updated_sessions += len(rows)
+            last_id = rows[-1].id
+        
+        openai_service.close()
+        click.echo(f"✅ 토큰 수 백필 완료: 메시지 {updated_messages}개, 세션 요약 {updated_sessions}개")
+
+
+@cli.command('cleanup-idempotency-keys')
+def cleanup_idempotency_keys():
+    """
+    보관 기간이 지난 메시지 전송 Idempotency-Key 기록 삭제
+    
+    사용 예시 (cron 등으로 주기 실행):
+        flask cli cleanup-idempotency-keys
+    """
+    app = create_app()
+    
+    with app.app_context():
+        from app.services.idempotency import idempotency_guard
+        
+        deleted = idempotency_guard.cleanup_expired()
+        click.echo(f"✅ 만료된 Idempotency-Key {deleted}개 삭제됨")
+
+
+@cli.command('cleanup-token-reservations')
+def cleanup_token_reservations():
+    """
+    정산되지 않은 채 만료된 일일 토큰 예약 삭제 (워커 비정상 종료 등)
+    
+    만료된 예약은 한도 계산에서 이미 제외되므로, 남은 예약 행을 정리하는 용도입니다.
+    
+    사용 예시 (cron 등으로 주기 실행):
+        flask cli cleanup-token-reservations
+    """
+    app = create_app()
+    
+    with app.app_context():
+        from app.services.token_ledger import TokenLedger
+        
+        deleted = TokenLedger.cleanup_stale_reservations()
+        click.echo(f"✅ 만료된 토큰 예약 {deleted}건 삭제됨")
+
+
+@cli.command('rebuild-material-index')
+@click.option('--video-id', type=int, default=None, help='지정 시 해당 비디오만 재생성')
+def rebuild_material_index(video_id):
+    """
+    비디오 강의 자료 검색 청크 재생성 (청크 크기 변경 후 또는 마이그레이션 직후 1회)
+    
+    사용 예시:
+        flask cli rebuild-material-index
+        flask cli rebuild-material-index --video-id 3
+    """
+    app = create_app()
+    
+    with app.app_context():
+        from app.models.video import Video
+        from app.services.course_material import MaterialIndex
+        
+        query = Video.query.order_by(Video.id)
+        if video_id is not None:
+            query = query.filter_by(id=video_id)
+        
+        total = 0
+        videos = query.all()
+        for video in videos:
+            chunks = MaterialIndex.rebuild(video)
+            db.session.commit()
+            total += chunks
+            click.echo(f"  비디오 {video.id}: 청크 {chunks}개")
+        
+        click.echo(f"✅ 강의 자료 청크 재생성 완료: 비디오 {len(videos)}개, 청크 {total}개")
+
+
+@cli.command('create-event-partitions')
+@click.option('--months-ahead', type=int, default=None, help='미리 만들 미래 개월 수 (기본: EVENT_PARTITION_MONTHS_AHEAD)')
+def create_event_partitions(months_ahead):
+    """
+    event_logs 월별 파티션 미리 생성 (PostgreSQL, 매월 실행 권장)
+    
+    사용 예시:
+        flask cli create-event-partitions
+        flask cli create-event-partitions --months-ahead 6
+    """
+    app = create_app()
+    
+    with app.app_context():
+        from app.services.event_partitions import EventPartitions, DEFAULT_PARTITION
+        
+        if months_ahead is None:
+            months_ahead = app.config['EVENT_PARTITION_MONTHS_AHEAD']
+        
+        created, error = EventPartitions.ensure(months_ahead)
+        if error:
+            click.echo(f"❌ {error}")
+            sys.exit(1)
+        
+        partitions, error = EventPartitions.list_partitions()
+        if error:
+            click.echo(f"❌ {error}")
+            sys.exit(1)
+        
+        for partition in partitions:
+            click.echo(
+                f"  {partition['name']}: 약 {max(partition['estimated_rows'], 0)}행, "
+                f"{partition['size_bytes'] // 1024}KB"
+            )
+            if partition['name'] == DEFAULT_PARTITION and partition['estimated_rows'] > 0:
+                click.echo("  ⚠️  기본 파티션에 행이 있습니다. 해당 월 파티션을 만들려면 먼저 행을 옮겨야 합니다.")
+        
+        click.echo(f"✅ 파티션 {len(created)}개 생성" + (f": {', '.join(created)}" if created else ''))
+
+
+@cli.command('migrate-legacy-events')
+@click.option('--batch-size', type=int, default=10000, show_default=True, help='한 트랜잭션에서 옮길 행 수')
+def migrate_legacy_events(batch_size):
+    """
+    파티셔닝 전 이벤트(event_logs_legacy)를 월별 파티션으로 배치 이전 (PostgreSQL, 마이그레이션 직후 1회)
+    
+    파티셔닝 마이그레이션은 테이블 이름만 바꾸고 행을 옮기지 않으므로, 이 명령이 끝날 때까지
+    이전 이벤트는 조회되지 않습니다. 배치마다 커밋하므로 중단 후 다시 실행하면 이어서 옮깁니다.
+    
+    사용 예시:
+        flask cli migrate-legacy-events
+        flask cli migrate-legacy-events --batch-size 5000
+    """
+    app = create_app()
+    
+    with app.app_context():
+        from app.services.event_partitions import EventPartitions
+        
+        total = 0
+        while True:
+            result, error = EventPartitions.migrate_legacy(batch_size)
+            if error:
+                click.echo(f"❌ {error} (옮긴 행 {total}개)")
+                sys.exit(1)
+            if result['done']:
+                break
+            total += result['moved']
+            click.echo(f"  {total}행 이전")
+        
+        click.echo(f"✅ 기존 이벤트 이전 완료: {total}행")
+
+
+@cli.command('prune-event-partitions')
+@click.option('--retention-months', type=int, default=None, help='이번 달 포함 보관 개월 수 (기본: EVENT_RETENTION_MONTHS)')
+@click.option('--drop', is_flag=True, help='분리한 파티션(이전에 분리해 둔 것 포함)을 삭제')
+def prune_event_partitions(retention_months, drop):
+    """
+    보관 기간이 지난 event_logs 파티션 분리/삭제 (행 단위 DELETE 없이 파티션 단위로 정리)
+    
+    기본은 분리(DETACH)만 하므로 분리된 테이블을 백업한 뒤 --drop으로 다시 실행하여 삭제합니다.
+    
+    사용 예시:
+        flask cli prune-event-partitions --retention-months 12
+        flask cli prune-event-partitions --retention-months 12 --drop
+    """
+    app = create_app()
+    
+    with app.app_context():
+        from app.services.event_partitions import EventPartitions
+        
+        if retention_months is None:
+            retention_months = app.config['EVENT_RETENTION_MONTHS']
+        if retention_months <= 0:
+            click.echo("보관 기간이 설정되지 않아 정리하지 않습니다 (EVENT_RETENTION_MONTHS 또는 --retention-months)")
+            return
+        
+        result, error = EventPartitions.apply_retention(retention_months, drop=drop)
+        if error:
+            click.echo(f"❌ {error}")
+            sys.exit(1)
+        
+        for name in result['detached']:
+            click.echo(f"  분리: {name}")
+        for name in result['dropped']:
+            click.echo(f"  삭제: {name}")
+        click.echo(
+            f"✅ {result['cutoff']} 이전 파티션 정리 완료: "
+            f"분리 {len(result['detached'])}개, 삭제 {len(result['dropped'])}개"
+        )
+
+
+@cli.command('fake-openai')
+@click.option('--host', default='127.0.0.1', show_default=True, help='바인드 주소')
+@click.option('--port', default=8001, show_default=True, help='포트')
+@click.option('--latency-ms', type=int, help='비스트리밍 응답 지연 시간 (기본 300)')
+@click.option('--latency-jitter-ms', type=int, help='지연 시간 무작위 편차 최대값 (기본 0)')
+@click.option('--ttft-ms', type=int, help='스트리밍 첫 청크까지 지연 시간 (기본 200)')
+@click.option('--chunk-interval-ms', type=int, help='스트리밍 청크 간격 (기본 20)')
+@click.option('--chunk-tokens', type=int, help='청크당 토큰 수 (기본 3)')
+@click.option('--reply-tokens', type=int, help='응답 토큰 수 (기본 120)')
+@click.option('--error-rate', type=float, help='429 응답 주입 비율 0~1 (기본 0)')
+@click.option('--timeout-rate', type=float, help='응답 지연(타임아웃) 주입 비율 0~1 (기본 0)')
+@click.option('--timeout-seconds', type=float, help='타임아웃 주입 시 대기 시간 (기본 60)')
+@click.option('--tpm-limit', type=int, help='분당 토큰 한도, 0이면 제한 없음 (기본 0)')
+@click.option('--rpm-limit', type=int, help='분당 요청 한도, 0이면 제한 없음 (기본 0)')
+@click.option('--seed', type=int, help='오류/지연 주입용 난수 시드 (기본 0)')
+def fake_openai(host, port, **options):
+    """부하 테스트용 OpenAI 호환 가짜 서버 실행 (OPENAI_BASE_URL=http://HOST:PORT/v1)"""
+    from werkzeug.serving import run_simple
+    from app.devtools.fake_openai import FakeOpenAIConfig, create_fake_openai_app
+    
+    config = FakeOpenAIConfig.from_env(**options)
+    click.echo(f"Fake OpenAI server: http://{host}:{port}/v1")
+    click.echo(f"설정: {config}")
+    run_simple(host, port, create_fake_openai_app(config), threaded=True)
+
+
 @cli.command('init-admin')
 @click.option('--student-id', help='관리자 학번 (환경 변수 ADMIN_STUDENT_ID 또는 기본값 사용)')
 @click.option('--name', help='관리자 이름 (환경 변수 ADMIN_NAME 또는 기본값 사용)')
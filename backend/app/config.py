@@ -104,14 +104,92 @@ class Config:
         raise ValueError("OPENAI_API_KEY 환경 변수가 설정되지 않았습니다.")
     
     MODEL_NAME = os.getenv('MODEL_NAME', 'gpt-4o-mini')
+    
+    # 모델 라우팅 (짧은 대화/사실 확인은 빠른 모델, 긴 질문/개념 설명은 MODEL_NAME)
+    FAST_MODEL_NAME = os.getenv('FAST_MODEL_NAME', '')  # 비어 있으면 MODEL_NAME 사용 (라우팅 효과 없음)
+    MODEL_ROUTER = os.getenv('MODEL_ROUTER', 'heuristic')  # single, heuristic 또는 'package.module:ClassName'
+    ROUTER_SMALL_TALK_MAX_TOKENS = int(os.getenv('ROUTER_SMALL_TALK_MAX_TOKENS', 12))  # 인사/감사 판단 최대 토큰 수
+    ROUTER_FAST_MAX_TOKENS = int(os.getenv('ROUTER_FAST_MAX_TOKENS', 40))  # 빠른 모델로 보낼 질문의 최대 토큰 수
+    
     SUMMARY_TRIGGER_TOKENS = int(os.getenv('SUMMARY_TRIGGER_TOKENS', 3500))
-    MAX_TOKENS_PER_REQUEST = int(os.getenv('MAX_TOKENS_PER_REQUEST', 4000))
+    SUMMARY_TARGET_TOKENS = int(os.getenv('SUMMARY_TARGET_TOKENS', 2000))  # 요약 후 남길 컨텍스트 목표 토큰 수
+    CONTEXT_WINDOW_MESSAGES = int(os.getenv('CONTEXT_WINDOW_MESSAGES', 20))  # 컨텍스트 구성 시 조회할 최근 메시지 수
+    PROMPT_CACHE_VERSION_CHECK_SECONDS = int(os.getenv('PROMPT_CACHE_VERSION_CHECK_SECONDS', 30))  # 프롬프트 캐시 버전 확인 주기
+    SUMMARY_WORKERS = int(os.getenv('SUMMARY_WORKERS', 2))  # 백그라운드 요약 스레드 수 (워커 프로세스당)
+    MAX_TOKENS_PER_REQUEST = int(os.getenv('MAX_TOKENS_PER_REQUEST', 4000))  # 요청당 프롬프트(입력) 토큰 상한
+    CONTEXT_MESSAGE_MAX_TOKENS = int(os.getenv('CONTEXT_MESSAGE_MAX_TOKENS', 1000))  # 컨텍스트에 넣을 이전 메시지 하나의 토큰 상한
     MAX_TOKENS_OUTPUT = int(os.getenv('MAX_TOKENS_OUTPUT', 1000))
     OPENAI_TIMEOUT = int(os.getenv('OPENAI_TIMEOUT', 30))  # 초
-    OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', 3))
+    OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', 2))  # 첫 시도 외 재시도 횟수
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')  # OpenAI 호환 서버 주소 (없으면 기본 API)
+    TOKENIZER_THREADS = int(os.getenv('TOKENIZER_THREADS', 4))  # tiktoken 배치 인코딩 스레드 수
+    
+    # LLM 호출 스케줄러 (공급자 한도보다 약간 낮게 설정, 예산은 RATELIMIT_STORAGE_URL 저장소에서 공유)
+    LLM_RPM_LIMIT = int(os.getenv('LLM_RPM_LIMIT', 500))  # 분당 요청 수
+    LLM_TPM_LIMIT = int(os.getenv('LLM_TPM_LIMIT', 180000))  # 분당 토큰 수 (프롬프트 + 최대 출력)
+    LLM_BUDGET_WINDOW_SECONDS = int(os.getenv('LLM_BUDGET_WINDOW_SECONDS', 10))  # 분당 예산을 나눌 창 크기
+    LLM_BUDGET_STORAGE_URL = os.getenv('LLM_BUDGET_STORAGE_URL')  # 없으면 RATELIMIT_STORAGE_URL 사용
+    LLM_QUEUE_TIMEOUT_SECONDS = int(os.getenv('LLM_QUEUE_TIMEOUT_SECONDS', 60))  # 대기열 최대 대기 시간
+    
+    # OpenAI 서킷 브레이커 (워커 프로세스당, 최근 호출의 실패율/지연 시간 기준)
+    BREAKER_WINDOW_SECONDS = int(os.getenv('BREAKER_WINDOW_SECONDS', 60))  # 실패율 계산 구간
+    BREAKER_MIN_CALLS = int(os.getenv('BREAKER_MIN_CALLS', 10))  # 구간 내 최소 호출 수
+    BREAKER_FAILURE_RATE = float(os.getenv('BREAKER_FAILURE_RATE', 0.5))  # 타임아웃/연결 오류/5xx 비율
+    BREAKER_SLOW_CALL_SECONDS = float(os.getenv('BREAKER_SLOW_CALL_SECONDS', 15))  # 느린 호출 기준 (첫 응답까지)
+    BREAKER_SLOW_CALL_RATE = float(os.getenv('BREAKER_SLOW_CALL_RATE', 0.8))  # 느린 호출 비율
+    BREAKER_OPEN_SECONDS = int(os.getenv('BREAKER_OPEN_SECONDS', 30))  # 차단 유지 시간 (Retry-After)
+    BREAKER_HALF_OPEN_PROBES = int(os.getenv('BREAKER_HALF_OPEN_PROBES', 2))  # 복구 확인용 시험 호출 수
+    
+    # OpenAI HTTP 연결 풀 (워커 프로세스당 하나의 클라이언트가 공유)
+    OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', 20))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('OPENAI_MAX_KEEPALIVE_CONNECTIONS', 10))
+    OPENAI_KEEPALIVE_EXPIRY = int(os.getenv('OPENAI_KEEPALIVE_EXPIRY', 60))  # 초
+    
+    # 비동기 채팅 실행 (POST /api/chat/sessions/<id>/messages/async)
+    CHAT_ASYNC_MAX_INFLIGHT = int(os.getenv('CHAT_ASYNC_MAX_INFLIGHT', 200))  # 워커당 동시 LLM 호출 수
+    CHAT_ASYNC_DB_WORKERS = int(os.getenv('CHAT_ASYNC_DB_WORKERS', 4))  # 결과 저장용 DB 스레드 수
+    
+    # 첫 질문 답변 캐시 (같은 비디오의 맥락 없는 동일/유사 질문에 이전 답변 재사용)
+    ANSWER_CACHE_ENABLED = os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+    ANSWER_CACHE_TTL_SECONDS = int(os.getenv('ANSWER_CACHE_TTL_SECONDS', 86400))
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', 2000))  # 워커 프로세스당
+    ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv('ANSWER_CACHE_SIMILARITY_THRESHOLD', 0.85))  # 근사 중복 기준
+    ANSWER_CACHE_NEAR_MIN_CHARS = int(os.getenv('ANSWER_CACHE_NEAR_MIN_CHARS', 10))  # 이보다 짧은 질문은 정확히 일치할 때만 적중
+    ANSWER_CACHE_MAX_QUESTION_CHARS = int(os.getenv('ANSWER_CACHE_MAX_QUESTION_CHARS', 300))  # 이보다 긴 질문은 캐시하지 않음
+    ANSWER_CACHE_VERSION_CHECK_SECONDS = int(os.getenv('ANSWER_CACHE_VERSION_CHECK_SECONDS', 30))
+    
+    # 비디오 이벤트 기록 (요청은 큐에 넣기만 하고 백그라운드 스레드가 모아서 다중 행 INSERT)
+    EVENT_QUEUE_MAX_SIZE = int(os.getenv('EVENT_QUEUE_MAX_SIZE', 10000))  # 워커 프로세스당, 가득 차면 버림
+    EVENT_FLUSH_BATCH_SIZE = int(os.getenv('EVENT_FLUSH_BATCH_SIZE', 500))  # 한 번에 기록할 최대 이벤트 수
+    EVENT_FLUSH_INTERVAL_MS = int(os.getenv('EVENT_FLUSH_INTERVAL_MS', 1000))  # 첫 이벤트 후 기록까지 최대 대기 시간
+    EVENT_BATCH_MAX_BYTES = int(os.getenv('EVENT_BATCH_MAX_BYTES', 65536))  # 일괄 기록 요청 본문 상한 (sendBeacon 한도 64KB)
+    EVENT_CLIENT_TS_MAX_AGE_SECONDS = int(os.getenv('EVENT_CLIENT_TS_MAX_AGE_SECONDS', 86400))  # 이보다 오래된 클라이언트 시각은 서버 시각으로 대체
+    # 재생/일시정지/탐색 이벤트를 사용자·비디오별 시청 구간(watch_intervals)으로 병합
+    EVENT_COALESCE_ENABLED = os.getenv('EVENT_COALESCE_ENABLED', 'true').lower() == 'true'
+    EVENT_COALESCE_WINDOW_SECONDS = int(os.getenv('EVENT_COALESCE_WINDOW_SECONDS', 30))  # 일시정지 상태로 이 시간 동안 이벤트가 없으면 구간 종료
+    EVENT_COALESCE_MAX_INTERVAL_SECONDS = int(os.getenv('EVENT_COALESCE_MAX_INTERVAL_SECONDS', 3600))  # 구간 최대 길이 (재생 중 무응답 대기 상한)
+    EVENT_RAW_SAMPLE_RATE = float(os.getenv('EVENT_RAW_SAMPLE_RATE', 1.0))  # 병합한 이벤트 원본을 event_logs에 남길 비율 (0.1이면 10%)
+    # event_logs 월별 파티션 (PostgreSQL, `flask cli create-event-partitions` / `prune-event-partitions`를 cron으로 실행)
+    EVENT_PARTITION_MONTHS_AHEAD = int(os.getenv('EVENT_PARTITION_MONTHS_AHEAD', 3))  # 미리 만들 미래 파티션 개월 수
+    EVENT_RETENTION_MONTHS = int(os.getenv('EVENT_RETENTION_MONTHS', 0))  # 이번 달 포함 보관 개월 수 (0이면 정리하지 않음)
+    
+    # 강의 자료 검색 (비디오 자료를 청크로 나누어 질문마다 BM25 상위 청크만 프롬프트에 포함)
+    MATERIAL_CHUNK_TOKENS = int(os.getenv('MATERIAL_CHUNK_TOKENS', 200))  # 청크 하나의 최대 토큰 수
+    MATERIAL_TOP_K = int(os.getenv('MATERIAL_TOP_K', 4))  # 질문마다 포함할 최대 청크 수 (0이면 사용 안 함)
+    MATERIAL_MAX_TOKENS = int(os.getenv('MATERIAL_MAX_TOKENS', 800))  # 질문마다 포함할 자료 토큰 상한
+    MATERIAL_VERSION_CHECK_SECONDS = int(os.getenv('MATERIAL_VERSION_CHECK_SECONDS', 30))
+    
+    # 응답 생성 중지 (POST /api/chat/sessions/<id>/cancel, 다른 워커의 중지 요청 확인 주기, 0이면 같은 워커만)
+    CHAT_CANCEL_CHECK_SECONDS = float(os.getenv('CHAT_CANCEL_CHECK_SECONDS', 1.0))
+    
+    # 메시지 전송 Idempotency-Key (재전송/중복 클릭 시 LLM 재호출 방지)
+    IDEMPOTENCY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', 86400))  # 완료된 응답 보관 기간
+    IDEMPOTENCY_LOCK_SECONDS = int(os.getenv('IDEMPOTENCY_LOCK_SECONDS', 180))  # 처리 중 기록 유효 시간 (워커 비정상 종료 대비)
+    IDEMPOTENCY_WAIT_SECONDS = int(os.getenv('IDEMPOTENCY_WAIT_SECONDS', 120))  # 중복 요청이 처음 요청을 기다리는 최대 시간
     
     # 토큰 제한
     DAILY_TOKEN_LIMIT = int(os.getenv('DAILY_TOKEN_LIMIT', 50000))
+    TOKEN_RESERVATION_TTL_SECONDS = int(os.getenv('TOKEN_RESERVATION_TTL_SECONDS', 600))  # 예약 유효 시간 (정산 없이 종료된 워커의 예약은 이후 무시)
     
     # Rate Limiting
     RATELIMIT_STORAGE_URL = get_ratelimit_storage_url()
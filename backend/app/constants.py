@@ -21,6 +21,10 @@ API_ENDPOINTS = {
         'SESSIONS': '/chat/sessions',
         'SESSION_DETAIL': '/chat/sessions/{session_id}',
         'MESSAGES': '/chat/sessions/{session_id}/messages',
+        'MESSAGES_STREAM': '/chat/sessions/{session_id}/messages/stream',
+        'MESSAGES_ASYNC': '/chat/sessions/{session_id}/messages/async',
+        'JOB_DETAIL': '/chat/sessions/{session_id}/jobs/{job_id}',
+        'USAGE': '/chat/usage',
     },
     'ADMIN': {
         'USERS': '/admin/users',
@@ -33,11 +37,15 @@ API_ENDPOINTS = {
         'SCAFFOLDING_DETAIL': '/admin/scaffoldings/{scaffolding_id}',
         'PROMPTS': '/admin/prompts',
         'PROMPT_DETAIL': '/admin/prompts/{prompt_id}',
+        'ANSWER_CACHE': '/admin/answer-cache',
+        'SYSTEM_METRICS': '/admin/system/metrics',
     },
     'LOGS': {
         'EVENTS': '/logs/events',
         'EVENTS_EXPORT': '/logs/events/export',
         'CHAT_SESSIONS_EXPORT': '/logs/chat-sessions/export',
+        'ANSWER_CACHE_STATS': '/logs/answer-cache-stats',
+        'PROMPT_CACHE_STATS': '/logs/prompt-cache-stats',
         'STATS': '/logs/stats',
     }
 }
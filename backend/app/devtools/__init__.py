@@ -0,0 +1,4 @@
+"""
+개발/부하 테스트용 도구
+운영 요청 경로에서는 사용하지 않음
+"""
@@ -0,0 +1,325 @@
+"""
+OpenAI 호환 가짜 Chat Completions 서버
+실제 API 예산이나 네트워크 없이 채팅 경로를 부하 테스트하기 위한 로컬 대역 서버
+
+OpenAIService를 이 서버로 향하게 하려면 OPENAI_BASE_URL=http://127.0.0.1:8001/v1 로 설정합니다.
+"""
+from flask import Flask, Response, jsonify, request
+from dataclasses import dataclass, fields
+from collections import deque
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+
+# 결정적 응답 생성용 어휘
+_VOCABULARY = [
+    '학습', '개념', '예시', '질문', '설명', '영상', '핵심', '정리', '이해', '문제',
+    '방법', '단계', '결과', '원리', '내용', '중요', '복습', '적용', '비교', '요약'
+]
+
+
+@dataclass
+class FakeOpenAIConfig:
+    """가짜 서버 동작 설정 (환경 변수 FAKE_OPENAI_<필드명 대문자>로도 지정 가능)"""
+    latency_ms: int = 300  # 비스트리밍 응답 지연 시간
+    latency_jitter_ms: int = 0  # 지연 시간에 더할 무작위 편차 최대값
+    ttft_ms: int = 200  # 스트리밍 첫 청크까지 지연 시간
+    chunk_interval_ms: int = 20  # 스트리밍 청크 간격
+    chunk_tokens: int = 3  # 청크당 토큰 수
+    reply_tokens: int = 120  # 응답 토큰 수 (max_tokens가 더 작으면 max_tokens)
+    error_rate: float = 0.0  # 429 응답 주입 비율 (0~1)
+    timeout_rate: float = 0.0  # 응답 지연(타임아웃) 주입 비율 (0~1)
+    timeout_seconds: float = 60.0  # 타임아웃 주입 시 대기 시간
+    tpm_limit: int = 0  # 분당 토큰 한도 (0이면 제한 없음)
+    rpm_limit: int = 0  # 분당 요청 한도 (0이면 제한 없음)
+    seed: int = 0  # 오류/지연 주입용 난수 시드
+    
+    @classmethod
+    def from_env(cls, **overrides):
+        """환경 변수에서 설정 로드 (overrides가 우선)"""
+        values = {}
+        for field in fields(cls):
+            env_value = os.getenv(f'FAKE_OPENAI_{field.name.upper()}')
+            if env_value is not None:
+                values[field.name] = type(field.default)(env_value)
+        values.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**values)
+
+
+class _RateWindow:
+    """최근 60초 동안의 요청 수/토큰 수 (TPM/RPM 한도 판정용)"""
+    
+    def __init__(self):
+        self._events = deque()
+        self.tokens = 0
+    
+    def prune(self, now):
+        while self._events and now - self._events[0][0] >= 60:
+            _, tokens = self._events.popleft()
+            self.tokens -= tokens
+    
+    def add(self, now, tokens):
+        self._events.append((now, tokens))
+        self.tokens += tokens
+    
+    @property
+    def requests(self):
+        return len(self._events)
+    
+    def retry_after(self, now):
+        return max(1, int(60 - (now - self._events[0][0])) + 1) if self._events else 1
+
+
+class FakeOpenAIState:
+    """요청 간 공유 상태 (난수, 한도 창, 프롬프트 캐시, 통계)"""
+    
+    def __init__(self, config: FakeOpenAIConfig):
+        self.config = config
+        self._lock = threading.Lock()
+        self._random = random.Random(config.seed)
+        self._window = _RateWindow()
+        self._seen_prefixes = set()
+        self.stats = {
+            'requests': 0,
+            'streamed': 0,
+            'rate_limited': 0,
+            'injected_errors': 0,
+            'injected_timeouts': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'cached_tokens': 0,
+            'inflight': 0,
+            'max_inflight': 0
+        }
+    
+    def draw(self):
+        with self._lock:
+            return self._random.random()
+    
+    def jitter_ms(self):
+        if not self.config.latency_jitter_ms:
+            return 0
+        with self._lock:
+            return self._random.randint(0, self.config.latency_jitter_ms)
+    
+    def admit(self, tokens):
+        """
+        TPM/RPM 한도 확인 후 사용량 기록
+        
+        Returns:
+            (admitted, retry_after_seconds, limit_type)
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._window.prune(now)
+            if self.config.rpm_limit and self._window.requests + 1 > self.config.rpm_limit:
+                return False, self._window.retry_after(now), 'requests'
+            if self.config.tpm_limit and self._window.tokens + tokens > self.config.tpm_limit:
+                return False, self._window.retry_after(now), 'tokens'
+            self._window.add(now, tokens)
+            return True, 0, None
+    
+    def remaining(self):
+        with self._lock:
+            self._window.prune(time.monotonic())
+            return self._window.requests, self._window.tokens
+    
+    def cached_tokens(self, prefix_key, prefix_tokens):
+        """
+        같은 프롬프트 앞부분이 전에 보였으면 1024토큰 이상부터 128토큰 단위로 캐시 적중으로 간주
+        (OpenAI 프롬프트 캐싱 규칙 흉내)
+        """
+        with self._lock:
+            seen = prefix_key in self._seen_prefixes
+            self._seen_prefixes.add(prefix_key)
+        if not seen or prefix_tokens < 1024:
+            return 0
+        return prefix_tokens // 128 * 128
+    
+    def incr(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+            if key == 'inflight':
+                self.stats['max_inflight'] = max(self.stats['max_inflight'], self.stats['inflight'])
+    
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+
+def count_tokens(text):
+    """토큰 수 근사치 (단어/문장부호 단위, 한글은 글자 2개당 1토큰)"""
+    count = 0
+    for piece in re.findall(r'[가-힣]+|\w+|[^\w\s]', text or ''):
+        count += (len(piece) + 1) // 2 if re.match(r'[가-힣]', piece) else 1
+    return count
+
+
+def _prompt_tokens(messages):
+    # 메시지당 형식 오버헤드 4토큰 + 응답 프라이밍 3토큰 (tiktoken 가이드 기준)
+    return sum(4 + count_tokens(str(message.get('content') or '')) for message in messages) + 3
+
+
+def _reply_words(messages, reply_tokens):
+    """마지막 사용자 메시지 해시로 결정되는 응답 단어 목록"""
+    last_user = next(
+        (str(message.get('content') or '') for message in reversed(messages) if message.get('role') == 'user'),
+        ''
+    )
+    digest = hashlib.sha256(last_user.encode('utf-8')).digest()
+    words = []
+    for i in range(reply_tokens):
+        word = _VOCABULARY[digest[i % len(digest)] % len(_VOCABULARY)]
+        if i % len(digest) == len(digest) - 1:
+            digest = hashlib.sha256(digest).digest()
+        words.append(word)
+    return words
+
+
+def _error(message, error_type, code, status, retry_after=None):
+    response = jsonify({'error': {'message': message, 'type': error_type, 'param': None, 'code': code}})
+    response.status_code = status
+    if retry_after is not None:
+        response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def create_fake_openai_app(config: FakeOpenAIConfig = None):
+    """가짜 OpenAI 서버 Flask 앱 생성 (gunicorn 'app.devtools.fake_openai:create_fake_openai_app()'로도 실행 가능)"""
+    config = config or FakeOpenAIConfig.from_env()
+    state = FakeOpenAIState(config)
+    
+    fake_app = Flask(__name__)
+    fake_app.config['FAKE_OPENAI_STATE'] = state
+    
+    @fake_app.route('/v1/models', methods=['GET'])
+    def list_models():
+        return jsonify({'object': 'list', 'data': [{'id': 'gpt-4o-mini', 'object': 'model', 'owned_by': 'fake'}]})
+    
+    @fake_app.route('/stats', methods=['GET'])
+    def get_stats():
+        requests_in_window, tokens_in_window = state.remaining()
+        return jsonify({
+            **state.snapshot(),
+            'window_requests': requests_in_window,
+            'window_tokens': tokens_in_window,
+            'config': config.__dict__
+        })
+    
+    @fake_app.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        body = request.get_json(silent=True) or {}
+        messages = body.get('messages') or []
+        if not messages:
+            return _error("'messages' is required", 'invalid_request_error', None, 400)
+        
+        model = body.get('model', 'gpt-4o-mini')
+        stream = bool(body.get('stream'))
+        include_usage = bool((body.get('stream_options') or {}).get('include_usage'))
+        max_tokens = body.get('max_tokens') or body.get('max_completion_tokens')
+        reply_tokens = min(config.reply_tokens, max_tokens) if max_tokens else config.reply_tokens
+        
+        state.incr('requests')
+        prompt_tokens = _prompt_tokens(messages)
+        
+        # 한도 판정은 OpenAI와 같이 프롬프트 + 최대 출력 토큰 기준
+        admitted, retry_after, limit_type = state.admit(prompt_tokens + (max_tokens or reply_tokens))
+        if not admitted:
+            state.incr('rate_limited')
+            return _error(
+                f'Rate limit reached for {model} on {limit_type} per min (fake server).',
+                limit_type, 'rate_limit_exceeded', 429, retry_after
+            )
+        
+        if config.error_rate and state.draw() < config.error_rate:
+            state.incr('injected_errors')
+            return _error('Injected rate limit error (fake server).', 'requests', 'rate_limit_exceeded', 429, 1)
+        
+        if config.timeout_rate and state.draw() < config.timeout_rate:
+            state.incr('injected_timeouts')
+            time.sleep(config.timeout_seconds)
+        
+        # 첫 메시지(시스템 프롬프트)가 같으면 프롬프트 캐시 적중으로 간주
+        prefix = str(messages[0].get('content') or '')
+        cached_tokens = state.cached_tokens(
+            hashlib.sha256(prefix.encode('utf-8')).hexdigest(),
+            4 + count_tokens(prefix)
+        )
+        
+        words = _reply_words(messages, reply_tokens)
+        completion_tokens = len(words)
+        usage = {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+            'prompt_tokens_details': {'cached_tokens': cached_tokens}
+        }
+        state.incr('prompt_tokens', prompt_tokens)
+        state.incr('completion_tokens', completion_tokens)
+        state.incr('cached_tokens', cached_tokens)
+        
+        completion_id = 'chatcmpl-fake' + hashlib.sha256(json.dumps(messages, ensure_ascii=False).encode('utf-8')).hexdigest()[:24]
+        created = int(time.time())
+        finish_reason = 'length' if max_tokens and completion_tokens >= max_tokens else 'stop'
+        
+        if not stream:
+            state.incr('inflight')
+            try:
+                time.sleep((config.latency_ms + state.jitter_ms()) / 1000)
+            finally:
+                state.incr('inflight', -1)
+            return jsonify({
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': created,
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': ' '.join(words)},
+                    'finish_reason': finish_reason
+                }],
+                'usage': usage
+            })
+        
+        state.incr('streamed')
+        
+        def chunk(delta, finish=None, chunk_usage=None, with_choice=True):
+            payload = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish}] if with_choice else []
+            }
+            if include_usage:
+                payload['usage'] = chunk_usage
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+        
+        def generate():
+            state.incr('inflight')
+            try:
+                time.sleep((config.ttft_ms + state.jitter_ms()) / 1000)
+                yield chunk({'role': 'assistant', 'content': ''})
+                
+                step = max(1, config.chunk_tokens)
+                for i in range(0, len(words), step):
+                    if i:
+                        time.sleep(config.chunk_interval_ms / 1000)
+                    text = ' '.join(words[i:i + step])
+                    yield chunk({'content': text if i == 0 else ' ' + text})
+                
+                yield chunk({}, finish=finish_reason)
+                if include_usage:
+                    # include_usage 사용 시 마지막 청크는 choices가 비어 있고 usage만 포함
+                    yield chunk(None, chunk_usage=usage, with_choice=False)
+                yield 'data: [DONE]\n\n'
+            finally:
+                state.incr('inflight', -1)
+        
+        return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+    
+    return fake_app
@@ -1,18 +1,32 @@
 from app.models.user import User
 from app.models.video import Video
+from app.models.video_material_chunk import VideoMaterialChunk
 from app.models.chat_session import ChatSession
 from app.models.chat_message import ChatMessage
+from app.models.chat_job import ChatJob
 from app.models.chat_prompt_template import ChatPromptTemplate
 from app.models.event_log import EventLog
+from app.models.watch_interval import WatchInterval
+from app.models.cache_version import CacheVersion
+from app.models.token_usage_daily import TokenUsageDaily
+from app.models.token_usage_reservation import TokenUsageReservation
+from app.models.idempotency_key import IdempotencyKey
 from app.models.scaffolding import Scaffolding, ScaffoldingResponse
 
 __all__ = [
     'User',
     'Video',
+    'VideoMaterialChunk',
     'ChatSession',
     'ChatMessage',
+    'ChatJob',
     'ChatPromptTemplate',
     'EventLog',
+    'WatchInterval',
+    'CacheVersion',
+    'TokenUsageDaily',
+    'TokenUsageReservation',
+    'IdempotencyKey',
     'Scaffolding',
     'ScaffoldingResponse'
 ]
@@ -0,0 +1,53 @@
+from app import db
+from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+
+class CacheVersion(db.Model):
+    """
+    프로세스 내 캐시 무효화용 버전 (워커 프로세스 간 공유)
+    
+    데이터를 변경한 쪽이 version을 올리면 각 워커가 주기적으로 확인하여 캐시를 비웁니다.
+    """
+    __tablename__ = 'cache_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)  # 'prompt_templates', 'answer_cache:video:3'
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @staticmethod
+    def bump(name):
+        """
+        버전 증가 (호출 측 트랜잭션에 포함되어 데이터 변경과 함께 커밋됨)
+        
+        행이 없으면 만들고 있으면 올리는 한 문장 업서트이므로, 처음 bump가 동시에 일어나도
+        기본키 충돌 없이 둘 다 반영됩니다.
+        """
+        table = CacheVersion.__table__
+        now = datetime.utcnow()
+        dialect = db.session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(table).values(name=name, version=1, updated_at=now)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={'version': table.c.version + 1, 'updated_at': now}
+        ))
+    
+    @staticmethod
+    def current(name):
+        """현재 버전 조회 (행이 없으면 None)"""
+        return db.session.query(CacheVersion.version).filter_by(name=name).scalar()
+    
+    @staticmethod
+    def current_with_prefix(prefix):
+        """이름이 prefix로 시작하는 버전 전체 조회 (한 번의 조회로 {name: version})"""
+        rows = db.session.query(CacheVersion.name, CacheVersion.version).filter(
+            CacheVersion.name.startswith(prefix, autoescape=True)
+        )
+        return {name: version for name, version in rows}
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'version': self.version,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
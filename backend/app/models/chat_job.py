@@ -0,0 +1,30 @@
+from app import db
+from datetime import datetime
+
+class ChatJob(db.Model):
+    """비동기 채팅 실행 작업 (어느 워커에서든 상태 조회 가능하도록 DB에 기록)"""
+    __tablename__ = 'chat_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    session_id = db.Column(db.Integer, db.ForeignKey('chat_sessions.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, succeeded, failed, cancelled
+    assistant_message_id = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'session_id': self.session_id,
+            'status': self.status,
+            'assistant_message_id': self.assistant_message_id,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -9,23 +9,54 @@ class ChatMessage(db.Model):
     
     role = db.Column(db.String(20), nullable=False)  # 'user', 'assistant', 'system'
     content = db.Column(db.Text, nullable=False)
+    token_count = db.Column(db.Integer, nullable=True)  # content 토큰 수 (작성 시점에 저장, 컨텍스트 구성 시 재사용)
     
     # Token tracking
     prompt_tokens = db.Column(db.Integer, default=0)
     completion_tokens = db.Column(db.Integer, default=0)
     total_tokens = db.Column(db.Integer, default=0)
+    cached_tokens = db.Column(db.Integer, default=0)  # prompt_tokens 중 공급자 프롬프트 캐시 적중 토큰 (assistant only)
+    cost = db.Column(db.Float, nullable=True)  # 응답 비용 (USD, 응답 모델 가격 기준)
+    
+    # 모델 라우팅 (assistant only, 답변 캐시 적중은 None)
+    model = db.Column(db.String(50), nullable=True)
+    route_reason = db.Column(db.String(30), nullable=True)
+    
+    # Latency tracking (assistant messages only)
+    time_to_first_token_ms = db.Column(db.Integer, nullable=True)
+    latency_ms = db.Column(db.Integer, nullable=True)  # 요청부터 응답 완료까지
+    
+    # 답변 캐시에서 재사용한 응답 여부 (토큰 사용 없음)
+    answer_cache_hit = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    
+    # 중지/연결 끊김으로 생성 도중 끊긴 응답 여부 (받은 부분까지만 저장, 토큰은 부분 사용량)
+    cancelled = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # 컨텍스트 구성 시 세션별 최근 메시지 LIMIT 조회용 복합 인덱스
+    __table_args__ = (
+        db.Index('ix_chat_messages_session_id_created_at', 'session_id', 'created_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
             'session_id': self.session_id,
             'role': self.role,
             'content': self.content,
+            'token_count': self.token_count,
             'prompt_tokens': self.prompt_tokens,
             'completion_tokens': self.completion_tokens,
             'total_tokens': self.total_tokens,
+            'cached_tokens': self.cached_tokens,
+            'cost': self.cost,
+            'model': self.model,
+            'route_reason': self.route_reason,
+            'time_to_first_token_ms': self.time_to_first_token_ms,
+            'latency_ms': self.latency_ms,
+            'answer_cache_hit': self.answer_cache_hit,
+            'cancelled': self.cancelled,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
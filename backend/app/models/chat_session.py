@@ -11,17 +11,33 @@ class ChatSession(db.Model):
     # Summary carry-over
     summary = db.Column(db.Text)
     summary_updated_at = db.Column(db.DateTime)
+    summary_tokens = db.Column(db.Integer, nullable=True)  # summary 토큰 수
+    summary_message_id = db.Column(db.Integer, nullable=True)  # 요약에 포함된 마지막 메시지 ID (워터마크)
     
     # Token tracking
     total_tokens = db.Column(db.Integer, default=0)
     total_cost = db.Column(db.Float, default=0.0)
     
+    # 응답 생성 취소 요청 시각 (이 시각 이전에 시작된 생성은 다른 워커에서도 중단)
+    cancel_requested_at = db.Column(db.DateTime, nullable=True)
+    
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     messages = db.relationship('ChatMessage', backref='session', lazy=True, cascade='all, delete-orphan', order_by='ChatMessage.created_at')
+    jobs = db.relationship('ChatJob', backref='session', lazy=True, cascade='all, delete-orphan')
+    
+    # 사용자/비디오당 활성 세션은 하나 (get_or_create_session의 ON CONFLICT 대상)
+    __table_args__ = (
+        db.Index(
+            'uq_chat_sessions_active_user_video', 'user_id', 'video_id',
+            unique=True,
+            postgresql_where=db.text('is_active'),
+            sqlite_where=db.text('is_active')
+        ),
+    )
     
     def to_dict(self, include_messages=False):
         data = {
@@ -30,6 +46,8 @@ class ChatSession(db.Model):
             'video_id': self.video_id,
             'summary': self.summary,
             'summary_updated_at': self.summary_updated_at.isoformat() if self.summary_updated_at else None,
+            'summary_tokens': self.summary_tokens,
+            'summary_message_id': self.summary_message_id,
             'total_tokens': self.total_tokens,
             'total_cost': self.total_cost,
             'is_active': self.is_active,
@@ -1,7 +1,23 @@
 from app import db
 from datetime import datetime
+from sqlalchemy.dialects.postgresql import JSONB
+import json
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value
 
 class EventLog(db.Model):
+    """
+    비디오/채팅 이벤트 로그
+    
+    PostgreSQL에서는 created_at 기준 월별 범위 파티션 테이블이며 PK는 (id, created_at)입니다.
+    id는 시퀀스로 유일하므로 ORM 식별자는 id만 사용합니다.
+    created_at 범위 조건을 주면 해당 월의 파티션만 조회하며,
+    파티션 생성과 보관 기간 정리는 app.services.event_partitions가 담당합니다.
+    """
     __tablename__ = 'event_logs'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -9,12 +25,56 @@ class EventLog(db.Model):
     video_id = db.Column(db.Integer, db.ForeignKey('videos.id'), nullable=True, index=True)
     
     event_type = db.Column(db.String(50), nullable=False, index=True)  # video_view, video_seek, chat_message, etc.
-    event_data = db.Column(db.Text)  # JSON format
+    event_data = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'))  # PostgreSQL에서는 JSONB (GIN 인덱스)
+    
+    # 자주 조회하는 event_data 필드를 기록 시점에 꺼내 둔 컬럼 (promote 참고)
+    playback_position = db.Column(db.Float)  # 재생 위치 (초)
+    duration = db.Column(db.Float)  # 비디오 길이 (초)
+    scaffolding_id = db.Column(db.Integer)
     
     ip_address = db.Column(db.String(50))
     user_agent = db.Column(db.String(500))
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # 파티션 키
+    
+    __table_args__ = (
+        # 시간순으로 쌓이는 로그이므로 PostgreSQL에서는 작은 BRIN 인덱스 사용
+        db.Index('ix_event_logs_created_at', 'created_at', postgresql_using='brin'),
+        # "비디오 3에서 5분 이후로 탐색", "일시정지 시점 평균 위치" 같은 조회용
+        db.Index('ix_event_logs_video_type_position', 'video_id', 'event_type', 'playback_position'),
+        db.Index(
+            'ix_event_logs_scaffolding_id', 'scaffolding_id',
+            postgresql_where=db.text('scaffolding_id IS NOT NULL')
+        ),
+        # event_data @> '{...}' 포함 조회용 (PostgreSQL)
+        db.Index(
+            'ix_event_logs_event_data', 'event_data',
+            postgresql_using='gin', postgresql_ops={'event_data': 'jsonb_path_ops'}
+        ),
+    )
+    
+    @staticmethod
+    def promote(event_type: str, event_data: dict) -> dict:
+        """
+        event_data에서 승격 컬럼 값 추출
+        
+        재생 위치는 play/pause/complete의 timestamp, seek의 이동 후 위치(to_timestamp),
+        그 밖의 이벤트는 current_time을 사용합니다. 숫자가 아닌 값은 None입니다.
+        
+        Returns:
+            dict: {'playback_position', 'duration', 'scaffolding_id'}
+        """
+        data = event_data if isinstance(event_data, dict) else {}
+        position_key = 'to_timestamp' if event_type == 'video_seek' else 'timestamp'
+        position = _number(data.get(position_key))
+        if position is None:
+            position = _number(data.get('current_time'))
+        scaffolding_id = _number(data.get('scaffolding_id'))
+        return {
+            'playback_position': position,
+            'duration': _number(data.get('duration')),
+            'scaffolding_id': int(scaffolding_id) if scaffolding_id is not None else None
+        }
     
     def to_dict(self):
         return {
@@ -22,7 +82,11 @@ class EventLog(db.Model):
             'user_id': self.user_id,
             'video_id': self.video_id,
             'event_type': self.event_type,
-            'event_data': self.event_data,
+            # 기존 API와 같이 JSON 문자열로 반환
+            'event_data': json.dumps(self.event_data) if self.event_data is not None else None,
+            'playback_position': self.playback_position,
+            'duration': self.duration,
+            'scaffolding_id': self.scaffolding_id,
             'ip_address': self.ip_address,
             'user_agent': self.user_agent,
             'created_at': self.created_at.isoformat() if self.created_at else None
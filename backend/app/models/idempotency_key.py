@@ -0,0 +1,32 @@
+from app import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    """
+    메시지 전송 Idempotency-Key 기록 (워커 프로세스 간 중복 요청 판별)
+    
+    처음 요청한 쪽이 processing 행을 만들고, 응답을 저장한 뒤 completed로 바꿉니다.
+    expires_at은 processing이면 처리 잠금 만료 시각, completed면 재전송 응답 보관 만료 시각입니다.
+    """
+    __tablename__ = 'idempotency_keys'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    
+    session_id = db.Column(db.Integer, db.ForeignKey('chat_sessions.id', ondelete='CASCADE'), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)  # 세션 ID + 메시지 SHA-256
+    status = db.Column(db.String(20), nullable=False, default='processing')  # processing, completed
+    response = db.Column(db.Text)  # completed일 때 클라이언트에 돌려준 응답 (JSON)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'key': self.key,
+            'session_id': self.session_id,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
@@ -0,0 +1,21 @@
+from app import db
+from datetime import datetime
+
+class TokenUsageDaily(db.Model):
+    """사용자별 일일 토큰 사용량 원장 (진행 중인 예약은 TokenUsageReservation에 따로 기록)"""
+    __tablename__ = 'token_usage_daily'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    usage_date = db.Column(db.Date, primary_key=True)  # UTC 기준 날짜
+    
+    used_tokens = db.Column(db.Integer, nullable=False, default=0)  # 정산된 사용량
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'usage_date': self.usage_date.isoformat() if self.usage_date else None,
+            'used_tokens': self.used_tokens,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
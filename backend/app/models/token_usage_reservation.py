@@ -0,0 +1,27 @@
+from app import db
+from datetime import datetime
+
+class TokenUsageReservation(db.Model):
+    """진행 중인 LLM 호출의 토큰 예약 (예약마다 한 행, 정산/해제 시 삭제)"""
+    __tablename__ = 'token_reservations'
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    usage_date = db.Column(db.Date, nullable=False)  # 정산할 원장 날짜 (UTC)
+    tokens = db.Column(db.Integer, nullable=False)
+    
+    # TOKEN_RESERVATION_TTL_SECONDS가 지나면 정산되지 않은 예약(워커 비정상 종료)으로 보고 한도 계산에서 제외
+    reserved_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        db.Index('ix_token_reservations_user_date', 'user_id', 'usage_date'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'usage_date': self.usage_date.isoformat() if self.usage_date else None,
+            'tokens': self.tokens,
+            'reserved_at': self.reserved_at.isoformat() if self.reserved_at else None
+        }
@@ -19,6 +19,7 @@ class Video(db.Model):
     order_index = db.Column(db.Integer, default=0)
     survey_url = db.Column(db.String(500))  # 구글폼 등 설문조사 URL
     intro_text = db.Column(db.Text)  # 학습 시작 전 안내 텍스트
+    course_material = db.Column(db.Text)  # 강의 자료 (청크로 나누어 질문마다 관련 부분만 프롬프트에 포함)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -27,6 +28,7 @@ class Video(db.Model):
     scaffoldings = db.relationship('Scaffolding', backref='video', lazy=True, cascade='all, delete-orphan')
     chat_sessions = db.relationship('ChatSession', backref='video', lazy=True, cascade='all, delete-orphan')
     event_logs = db.relationship('EventLog', backref='video', lazy=True, cascade='all, delete-orphan')
+    material_chunks = db.relationship('VideoMaterialChunk', backref='video', lazy=True, cascade='all, delete-orphan')
     
     def to_dict(self):
         return {
@@ -43,6 +45,7 @@ class Video(db.Model):
             'order_index': self.order_index,
             'survey_url': self.survey_url,
             'intro_text': self.intro_text,
+            'course_material': self.course_material,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -0,0 +1,31 @@
+from app import db
+from datetime import datetime
+
+class VideoMaterialChunk(db.Model):
+    """
+    비디오 강의 자료 청크 (BM25 검색 단위)
+    
+    자료(course_material, description)를 저장할 때 비디오의 청크를 모두 지우고 다시 만듭니다.
+    """
+    __tablename__ = 'video_material_chunks'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    video_id = db.Column(db.Integer, db.ForeignKey('videos.id'), nullable=False, index=True)
+    
+    source = db.Column(db.String(20), nullable=False)  # 'course_material', 'description'
+    position = db.Column(db.Integer, nullable=False)  # 자료 안에서의 순서
+    content = db.Column(db.Text, nullable=False)
+    token_count = db.Column(db.Integer, nullable=False)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'video_id': self.video_id,
+            'source': self.source,
+            'position': self.position,
+            'content': self.content,
+            'token_count': self.token_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,51 @@
+from app import db
+from datetime import datetime
+
+class WatchInterval(db.Model):
+    """
+    시청 구간 (연속된 재생/일시정지/탐색 이벤트를 하나로 합친 기록)
+    
+    EventIngestor가 사용자·비디오별로 열린 구간에 이벤트를 합치고,
+    EVENT_COALESCE_WINDOW_SECONDS 동안 새 이벤트가 없거나 시청을 완료하면 구간을 닫아 기록합니다.
+    """
+    __tablename__ = 'watch_intervals'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    video_id = db.Column(db.Integer, db.ForeignKey('videos.id'), nullable=False, index=True)
+    
+    start_position = db.Column(db.Float)  # 구간 시작 시 재생 위치 (초)
+    end_position = db.Column(db.Float)  # 구간 마지막 이벤트의 재생 위치 (초)
+    watched_seconds = db.Column(db.Float, nullable=False, default=0)  # 재생 상태였던 시간 합계
+    
+    play_count = db.Column(db.Integer, nullable=False, default=0)
+    pause_count = db.Column(db.Integer, nullable=False, default=0)
+    seek_count = db.Column(db.Integer, nullable=False, default=0)
+    event_count = db.Column(db.Integer, nullable=False, default=0)  # 합친 원본 이벤트 수
+    completed = db.Column(db.Boolean, nullable=False, default=False)  # video_complete로 닫힌 구간
+    
+    started_at = db.Column(db.DateTime, nullable=False)  # 첫 이벤트 발생 시각
+    ended_at = db.Column(db.DateTime, nullable=False, index=True)  # 마지막 이벤트 발생 시각
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_watch_intervals_user_video_started', 'user_id', 'video_id', 'started_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'video_id': self.video_id,
+            'start_position': self.start_position,
+            'end_position': self.end_position,
+            'watched_seconds': self.watched_seconds,
+            'play_count': self.play_count,
+            'pause_count': self.pause_count,
+            'seek_count': self.seek_count,
+            'event_count': self.event_count,
+            'completed': self.completed,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'ended_at': self.ended_at.isoformat() if self.ended_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -4,11 +4,16 @@
 """
 from flask import Blueprint, request
 from flask_jwt_extended import get_jwt_identity
-from app import db
+from app import db, get_openai_service, get_chat_executor, get_summary_worker, get_event_ingestor
 from app.models.chat_prompt_template import ChatPromptTemplate
 from app.services.user_service import UserService
 from app.services.video_service import VideoService
 from app.services.scaffolding_service import ScaffoldingService
+from app.services.prompt_cache import PromptCache, prompt_cache
+from app.services.answer_cache import AnswerCache, answer_cache
+from app.services.course_material import material_index
+from app.services.idempotency import idempotency_guard
+from app.services.cancellation import generation_registry
 from app.utils import (
     admin_required, super_admin_required, validate_request,
     success_response, error_response
@@ -198,6 +203,7 @@ def create_video(current_user, *, validated_data: CreateVideoRequest):
         youtube_url=validated_data.youtube_url,
         youtube_id=validated_data.youtube_id,
         description=validated_data.description,
+        course_material=validated_data.course_material,
         duration=validated_data.duration,
         thumbnail_url=validated_data.thumbnail_url,
         scaffolding_mode=validated_data.scaffolding_mode,
@@ -317,7 +323,9 @@ def create_prompt(current_user, *, validated_data: CreatePromptRequest):
         )
         
         db.session.add(prompt)
+        PromptCache.bump_version()
         db.session.commit()
+        prompt_cache.invalidate()
         
         return success_response(prompt.to_dict(), status_code=201)
         
@@ -349,7 +357,9 @@ def update_prompt(current_user, prompt_id, *, validated_data: UpdatePromptReques
         
         prompt.version += 1
         
+        PromptCache.bump_version()
         db.session.commit()
+        prompt_cache.invalidate()
         
         return success_response(prompt.to_dict())
         
@@ -373,7 +383,9 @@ def delete_prompt(current_user, prompt_id):
             return error_response('기본 프롬프트는 삭제할 수 없습니다', 400)
         
         db.session.delete(prompt)
+        PromptCache.bump_version()
         db.session.commit()
+        prompt_cache.invalidate()
         
         return success_response({'message': '프롬프트가 삭제되었습니다'})
         
@@ -381,3 +393,49 @@ def delete_prompt(current_user, prompt_id):
         db.session.rollback()
         logger.error(f"Delete prompt error: {str(e)}")
         return error_response('프롬프트 삭제 중 오류가 발생했습니다', 500)
+
+
+# ==================== 답변 캐시 관리 ====================
+
+@admin_bp.route('/answer-cache', methods=['DELETE'])
+@admin_required
+def purge_answer_cache(current_user):
+    """답변 캐시 비우기 (video_id 지정 시 모든 워커에서 해당 비디오만 비움)"""
+    try:
+        video_id = request.args.get('video_id', type=int)
+        
+        AnswerCache.bump_version(video_id)
+        db.session.commit()
+        removed = answer_cache.purge(video_id)
+        
+        return success_response({
+            'message': '답변 캐시를 비웠습니다',
+            'removed': removed
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Purge answer cache error: {str(e)}")
+        return error_response('답변 캐시 비우기 중 오류가 발생했습니다', 500)
+
+
+# ==================== 시스템 모니터링 ====================
+
+@admin_bp.route('/system/metrics', methods=['GET'])
+@admin_required
+def get_system_metrics(current_user):
+    """워커 프로세스 런타임 지표 조회 (요청을 처리한 워커 기준)"""
+    return success_response({
+        'openai': get_openai_service().get_pool_stats(),
+        'llm_scheduler': get_openai_service().scheduler.get_stats(),
+        'circuit_breaker': get_openai_service().breaker.get_stats(),
+        'model_router': get_openai_service().router.get_stats(),
+        'chat_executor': get_chat_executor().get_stats(),
+        'summary_worker': get_summary_worker().get_stats(),
+        'event_ingestor': get_event_ingestor().get_stats(),
+        'prompt_cache': prompt_cache.get_stats(),
+        'answer_cache': answer_cache.get_stats(),
+        'material_index': material_index.get_stats(),
+        'idempotency': idempotency_guard.get_stats(),
+        'generations': generation_registry.get_stats()
+    })
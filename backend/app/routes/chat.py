@@ -1,10 +1,11 @@
 """
 채팅 관련 라우트
 """
-from flask import Blueprint, current_app
+from flask import Blueprint, Response, current_app, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import get_openai_service
+from app import get_openai_service, get_chat_executor
 from app.services.chat_service import ChatService
+from app.services.token_ledger import TokenLedger
 from app.utils import validate_request, success_response, error_response
 from app.validators import CreateSessionRequest, SendMessageRequest
 import logging
@@ -14,6 +15,28 @@ logger = logging.getLogger(__name__)
 chat_bp = Blueprint('chat', __name__)
 
 
+def _message_error_response(error):
+    """메시지 전송 에러 메시지를 HTTP 상태 코드로 변환"""
+    if '한도를 초과' in error:
+        return error_response(error, 429)
+    elif '찾을 수 없' in error:
+        return error_response(error, 404)
+    elif 'Idempotency-Key' in error:
+        # 형식 오류는 400, 다른 요청에 이미 쓰인 키는 422
+        return error_response(error, 422 if '이미 사용된' in error else 400)
+    elif '아직 처리 중' in error:
+        return error_response(error, 409)
+    elif '대기 시간이 초과' in error:
+        return error_response(error, 503)
+    elif '일시적으로 불안정' in error:
+        # 서킷 브레이커가 열린 경우: 다시 시도할 수 있는 시점을 알려줌
+        response, status_code = error_response(error, 503)
+        response.headers['Retry-After'] = str(get_openai_service().breaker.retry_after())
+        return response, status_code
+    else:
+        return error_response(error, 500)
+
+
 @chat_bp.route('/sessions', methods=['POST'])
 @jwt_required()
 @validate_request(CreateSessionRequest)
@@ -53,10 +76,10 @@ def get_session(session_id):
 @jwt_required()
 @validate_request(SendMessageRequest)
 def send_message(session_id, *, validated_data: SendMessageRequest):
-    """메시지 전송"""
+    """메시지 전송 (Idempotency-Key 헤더로 재전송 시 중복 LLM 호출 방지)"""
     user_id = int(get_jwt_identity())
     
-    # 요청당 캐시된 OpenAI 서비스 가져오기 (싱글턴 패턴)
+    # 워커 프로세스당 공유되는 OpenAI 서비스 가져오기 (싱글턴 패턴)
     openai_service = get_openai_service()
     
     # 메시지 전송
@@ -65,15 +88,111 @@ def send_message(session_id, *, validated_data: SendMessageRequest):
         user_id=user_id,
         message=validated_data.message,
         openai_service=openai_service,
-        daily_token_limit=current_app.config['DAILY_TOKEN_LIMIT']
+        daily_token_limit=current_app.config['DAILY_TOKEN_LIMIT'],
+        idempotency_key=request.headers.get('Idempotency-Key')
     )
     
     if error:
-        if '한도를 초과' in error:
-            return error_response(error, 429)
-        elif '찾을 수 없' in error:
-            return error_response(error, 404)
-        else:
-            return error_response(error, 500)
+        return _message_error_response(error)
     
     return success_response(response_data)
+
+
+@chat_bp.route('/sessions/<int:session_id>/messages/stream', methods=['POST'])
+@jwt_required()
+@validate_request(SendMessageRequest)
+def stream_message(session_id, *, validated_data: SendMessageRequest):
+    """메시지 전송 (Server-Sent Events 스트리밍 응답)"""
+    user_id = int(get_jwt_identity())
+    
+    openai_service = get_openai_service()
+    
+    event_stream, error = ChatService.stream_message(
+        session_id=session_id,
+        user_id=user_id,
+        message=validated_data.message,
+        openai_service=openai_service,
+        daily_token_limit=current_app.config['DAILY_TOKEN_LIMIT'],
+        idempotency_key=request.headers.get('Idempotency-Key')
+    )
+    
+    if error:
+        return _message_error_response(error)
+    
+    # 스트림이 끝날 때까지 요청 컨텍스트(DB 세션 등)를 유지
+    response = Response(
+        stream_with_context(event_stream),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Nginx 프록시 버퍼링 비활성화
+        }
+    )
+    # 첫 이벤트 전에 연결이 끊겨도 생성 등록/토큰 예약/멱등성 선점이 남지 않도록 해제
+    response.call_on_close(event_stream.close)
+    return response
+
+
+@chat_bp.route('/sessions/<int:session_id>/cancel', methods=['POST'])
+@jwt_required()
+def cancel_generation(session_id):
+    """진행 중인 AI 응답 생성 중지 (받은 부분까지 저장)"""
+    user_id = int(get_jwt_identity())
+    
+    result, error = ChatService.cancel_generation(session_id, user_id)
+    
+    if error:
+        if '권한' in error:
+            return error_response(error, 403)
+        return error_response(error, 404 if '찾을 수 없' in error else 500)
+    
+    return success_response(result)
+
+
+@chat_bp.route('/sessions/<int:session_id>/messages/async', methods=['POST'])
+@jwt_required()
+@validate_request(SendMessageRequest)
+def submit_message(session_id, *, validated_data: SendMessageRequest):
+    """메시지 비동기 전송 (LLM 호출을 이벤트 루프에 위임하고 즉시 202 반환)"""
+    user_id = int(get_jwt_identity())
+    
+    job, error = ChatService.submit_message(
+        session_id=session_id,
+        user_id=user_id,
+        message=validated_data.message,
+        openai_service=get_openai_service(),
+        chat_executor=get_chat_executor(),
+        daily_token_limit=current_app.config['DAILY_TOKEN_LIMIT']
+    )
+    
+    if error:
+        return _message_error_response(error)
+    
+    return success_response(job.to_dict(), status_code=202)
+
+
+@chat_bp.route('/sessions/<int:session_id>/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(session_id, job_id):
+    """비동기 메시지 전송 작업 상태 조회"""
+    user_id = int(get_jwt_identity())
+    
+    job_data, error = ChatService.get_job(job_id, user_id)
+    
+    if error or job_data['session_id'] != session_id:
+        return error_response(error or '작업을 찾을 수 없습니다', 404)
+    
+    # 아직 처리 중이면 202
+    status_code = 202 if job_data['status'] in ('pending', 'running') else 200
+    return success_response(job_data, status_code=status_code)
+
+
+@chat_bp.route('/usage', methods=['GET'])
+@jwt_required()
+def get_usage():
+    """오늘 남은 토큰 한도 조회"""
+    user_id = int(get_jwt_identity())
+    
+    usage = TokenLedger.get_usage_today(user_id, current_app.config['DAILY_TOKEN_LIMIT'])
+    
+    return success_response(usage)
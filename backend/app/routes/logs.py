@@ -3,15 +3,21 @@
 이벤트 로그 및 통계 조회
 """
 from flask import Blueprint, request, send_file
+from sqlalchemy.dialects.postgresql import JSONB
 from app import db
 from app.models.user import User
 from app.models.event_log import EventLog
+from app.models.watch_interval import WatchInterval
 from app.models.chat_session import ChatSession
 from app.models.chat_message import ChatMessage
+from app.models.video import Video
+from app.models.token_usage_daily import TokenUsageDaily
+from app.services.event_partitions import EventPartitions
 from app.utils import admin_required, success_response, error_response, paginated_response
 from datetime import datetime
 import csv
 import io
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,26 +25,80 @@ logger = logging.getLogger(__name__)
 logs_bp = Blueprint('logs', __name__)
 
 
+def _filter_event_logs(query):
+    """
+    이벤트 로그 공통 필터 (목록/내보내기)
+    
+    - event_type, user_id, video_id, start_date, end_date (기간을 주면 해당 월 파티션만 조회)
+    - position_min, position_max: 재생 위치(초) 범위 (video_id, event_type과 함께 복합 인덱스 사용)
+    - scaffolding_id: 스캐폴딩 ID
+    - data: event_data 포함 조건 JSON 객체 (예: {"step": 2}, PostgreSQL에서는 GIN 인덱스로 @> 조회)
+    
+    Raises:
+        ValueError: 필터 값 형식이 잘못된 경우
+    """
+    args = request.args
+    event_type = args.get('event_type')
+    user_id = args.get('user_id', type=int)
+    video_id = args.get('video_id', type=int)
+    scaffolding_id = args.get('scaffolding_id', type=int)
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    
+    if event_type:
+        query = query.filter_by(event_type=event_type)
+    if user_id:
+        query = query.filter_by(user_id=user_id)
+    if video_id:
+        query = query.filter_by(video_id=video_id)
+    if scaffolding_id:
+        query = query.filter_by(scaffolding_id=scaffolding_id)
+    if start_date:
+        query = query.filter(EventLog.created_at >= datetime.fromisoformat(start_date))
+    if end_date:
+        query = query.filter(EventLog.created_at <= datetime.fromisoformat(end_date))
+    if args.get('position_min'):
+        query = query.filter(EventLog.playback_position >= float(args['position_min']))
+    if args.get('position_max'):
+        query = query.filter(EventLog.playback_position <= float(args['position_max']))
+    
+    if args.get('data'):
+        data = json.loads(args['data'])
+        if not isinstance(data, dict) or not data:
+            raise ValueError('data는 JSON 객체여야 합니다')
+        if db.session.get_bind().dialect.name == 'postgresql':
+            query = query.filter(db.type_coerce(EventLog.event_data, JSONB).contains(data))
+        else:
+            # JSONB가 없는 DB는 최상위 스칼라 값만 비교
+            for key, value in data.items():
+                field = EventLog.event_data[key]
+                if isinstance(value, bool):
+                    query = query.filter(field.as_boolean() == value)
+                elif isinstance(value, int):
+                    query = query.filter(field.as_integer() == value)
+                elif isinstance(value, float):
+                    query = query.filter(field.as_float() == value)
+                elif isinstance(value, str):
+                    query = query.filter(field.as_string() == value)
+                else:
+                    raise ValueError('중첩된 값은 PostgreSQL에서만 조회할 수 있습니다')
+    
+    return query
+
+
 @logs_bp.route('/events', methods=['GET'])
 @admin_required
 def get_event_logs(current_user):
-    """이벤트 로그 조회 (페이지네이션)"""
+    """이벤트 로그 조회 (페이지네이션, 필터는 _filter_event_logs 참고)"""
     try:
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 50, type=int), 100)  # 최대 100개로 제한
-        event_type = request.args.get('event_type')
-        user_id = request.args.get('user_id', type=int)
-        video_id = request.args.get('video_id', type=int)
-        
-        query = EventLog.query
         
         # 필터링
-        if event_type:
-            query = query.filter_by(event_type=event_type)
-        if user_id:
-            query = query.filter_by(user_id=user_id)
-        if video_id:
-            query = query.filter_by(video_id=video_id)
+        try:
+            query = _filter_event_logs(EventLog.query)
+        except ValueError as e:
+            return error_response(f'잘못된 필터 값입니다: {str(e)}', 400)
         
         query = query.order_by(EventLog.created_at.desc())
         
@@ -60,27 +120,13 @@ def get_event_logs(current_user):
 @logs_bp.route('/events/export', methods=['GET'])
 @admin_required
 def export_event_logs(current_user):
-    """이벤트 로그 CSV 내보내기"""
+    """이벤트 로그 CSV 내보내기 (필터는 _filter_event_logs 참고)"""
     try:
-        event_type = request.args.get('event_type')
-        user_id = request.args.get('user_id', type=int)
-        video_id = request.args.get('video_id', type=int)
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        
-        query = EventLog.query
-        
         # 필터링
-        if event_type:
-            query = query.filter_by(event_type=event_type)
-        if user_id:
-            query = query.filter_by(user_id=user_id)
-        if video_id:
-            query = query.filter_by(video_id=video_id)
-        if start_date:
-            query = query.filter(EventLog.created_at >= datetime.fromisoformat(start_date))
-        if end_date:
-            query = query.filter(EventLog.created_at <= datetime.fromisoformat(end_date))
+        try:
+            query = _filter_event_logs(EventLog.query)
+        except ValueError as e:
+            return error_response(f'잘못된 필터 값입니다: {str(e)}', 400)
         
         # 최대 10000개로 제한
         logs = query.order_by(EventLog.created_at).limit(10000).all()
@@ -99,7 +145,7 @@ def export_event_logs(current_user):
                 log.user_id,
                 log.video_id,
                 log.event_type,
-                log.event_data,
+                json.dumps(log.event_data) if log.event_data is not None else '',
                 log.ip_address,
                 log.user_agent,
                 log.created_at.isoformat()
@@ -119,6 +165,41 @@ def export_event_logs(current_user):
         return error_response('로그 내보내기 중 오류가 발생했습니다', 500)
 
 
+@logs_bp.route('/watch-intervals', methods=['GET'])
+@admin_required
+def get_watch_intervals(current_user):
+    """시청 구간 조회 (재생/일시정지/탐색 이벤트를 병합한 기록, 페이지네이션)"""
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 50, type=int), 100)  # 최대 100개로 제한
+        user_id = request.args.get('user_id', type=int)
+        video_id = request.args.get('video_id', type=int)
+        
+        query = WatchInterval.query
+        
+        # 필터링
+        if user_id:
+            query = query.filter_by(user_id=user_id)
+        if video_id:
+            query = query.filter_by(video_id=video_id)
+        
+        query = query.order_by(WatchInterval.started_at.desc())
+        
+        # 페이지네이션
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        
+        return paginated_response(
+            items=[interval.to_dict() for interval in pagination.items],
+            total=pagination.total,
+            page=page,
+            per_page=per_page
+        )
+        
+    except Exception as e:
+        logger.error(f"Get watch intervals error: {str(e)}")
+        return error_response('시청 구간 조회 중 오류가 발생했습니다', 500)
+
+
 @logs_bp.route('/chat-messages', methods=['GET'])
 @admin_required
 def get_chat_messages(current_user):
@@ -339,6 +420,148 @@ def export_chat_sessions(current_user):
         return error_response('채팅 세션 내보내기 중 오류가 발생했습니다', 500)
 
 
+@logs_bp.route('/answer-cache-stats', methods=['GET'])
+@admin_required
+def get_answer_cache_stats(current_user):
+    """비디오별 답변 캐시 적중률 (저장된 AI 응답 기준)"""
+    try:
+        hit_count = db.func.sum(db.case((ChatMessage.answer_cache_hit.is_(True), 1), else_=0))
+        rows = db.session.query(
+            ChatSession.video_id,
+            Video.title,
+            db.func.count(ChatMessage.id).label('responses'),
+            hit_count.label('cache_hits')
+        ).join(
+            ChatSession, ChatMessage.session_id == ChatSession.id
+        ).outerjoin(
+            Video, ChatSession.video_id == Video.id
+        ).filter(
+            ChatMessage.role == 'assistant'
+        ).group_by(
+            ChatSession.video_id, Video.title
+        ).order_by(
+            ChatSession.video_id
+        ).all()
+        
+        videos = []
+        for row in rows:
+            cache_hits = int(row.cache_hits or 0)
+            videos.append({
+                'video_id': row.video_id,
+                'title': row.title,
+                'responses': row.responses,
+                'cache_hits': cache_hits,
+                'hit_rate': round(cache_hits / row.responses, 4) if row.responses else 0
+            })
+        
+        return success_response({'videos': videos})
+        
+    except Exception as e:
+        logger.error(f"Get answer cache stats error: {str(e)}")
+        return error_response('답변 캐시 통계 조회 중 오류가 발생했습니다', 500)
+
+
+@logs_bp.route('/prompt-cache-stats', methods=['GET'])
+@admin_required
+def get_prompt_cache_stats(current_user):
+    """비디오별 공급자 프롬프트 캐시 적중률과 적중 여부별 첫 토큰 지연 시간 (cached_tokens 기록 이후 응답 기준)"""
+    try:
+        cache_hit = ChatMessage.cached_tokens > 0
+        rows = db.session.query(
+            ChatSession.video_id,
+            Video.title,
+            db.func.count(ChatMessage.id).label('responses'),
+            db.func.sum(db.case((cache_hit, 1), else_=0)).label('prefix_hits'),
+            db.func.sum(ChatMessage.prompt_tokens).label('prompt_tokens'),
+            db.func.sum(ChatMessage.cached_tokens).label('cached_tokens'),
+            db.func.avg(db.case((cache_hit, ChatMessage.time_to_first_token_ms))).label('ttft_hit_ms'),
+            db.func.avg(db.case((~cache_hit, ChatMessage.time_to_first_token_ms))).label('ttft_miss_ms')
+        ).join(
+            ChatSession, ChatMessage.session_id == ChatSession.id
+        ).outerjoin(
+            Video, ChatSession.video_id == Video.id
+        ).filter(
+            ChatMessage.role == 'assistant',
+            ChatMessage.cached_tokens.isnot(None),
+            ChatMessage.answer_cache_hit.is_(False)
+        ).group_by(
+            ChatSession.video_id, Video.title
+        ).order_by(
+            ChatSession.video_id
+        ).all()
+        
+        videos = []
+        for row in rows:
+            prefix_hits = int(row.prefix_hits or 0)
+            prompt_tokens = int(row.prompt_tokens or 0)
+            cached_tokens = int(row.cached_tokens or 0)
+            videos.append({
+                'video_id': row.video_id,
+                'title': row.title,
+                'responses': row.responses,
+                'prefix_hits': prefix_hits,
+                'prefix_hit_rate': round(prefix_hits / row.responses, 4) if row.responses else 0,
+                'prompt_tokens': prompt_tokens,
+                'cached_tokens': cached_tokens,
+                'cached_token_ratio': round(cached_tokens / prompt_tokens, 4) if prompt_tokens else 0,
+                'avg_ttft_hit_ms': round(float(row.ttft_hit_ms), 1) if row.ttft_hit_ms is not None else None,
+                'avg_ttft_miss_ms': round(float(row.ttft_miss_ms), 1) if row.ttft_miss_ms is not None else None
+            })
+        
+        return success_response({'videos': videos})
+        
+    except Exception as e:
+        logger.error(f"Get prompt cache stats error: {str(e)}")
+        return error_response('프롬프트 캐시 통계 조회 중 오류가 발생했습니다', 500)
+
+
+@logs_bp.route('/model-stats', methods=['GET'])
+@admin_required
+def get_model_stats(current_user):
+    """모델/라우팅 이유별 응답 수, 지연 시간, 비용 (라우터 기준 조정용, 모델 기록 이후 응답 기준)"""
+    try:
+        rows = db.session.query(
+            ChatMessage.model,
+            ChatMessage.route_reason,
+            db.func.count(ChatMessage.id).label('responses'),
+            db.func.avg(ChatMessage.latency_ms).label('latency_ms'),
+            db.func.avg(ChatMessage.time_to_first_token_ms).label('ttft_ms'),
+            db.func.sum(ChatMessage.prompt_tokens).label('prompt_tokens'),
+            db.func.sum(ChatMessage.completion_tokens).label('completion_tokens'),
+            db.func.sum(ChatMessage.cost).label('cost'),
+            db.func.sum(db.case((ChatMessage.cancelled.is_(True), 1), else_=0)).label('cancelled')
+        ).filter(
+            ChatMessage.role == 'assistant',
+            ChatMessage.model.isnot(None)
+        ).group_by(
+            ChatMessage.model, ChatMessage.route_reason
+        ).order_by(
+            ChatMessage.model, ChatMessage.route_reason
+        ).all()
+        
+        routes = []
+        for row in rows:
+            cost = float(row.cost or 0)
+            routes.append({
+                'model': row.model,
+                'route_reason': row.route_reason,
+                'responses': row.responses,
+                'avg_latency_ms': round(float(row.latency_ms), 1) if row.latency_ms is not None else None,
+                'avg_ttft_ms': round(float(row.ttft_ms), 1) if row.ttft_ms is not None else None,
+                'prompt_tokens': int(row.prompt_tokens or 0),
+                'completion_tokens': int(row.completion_tokens or 0),
+                'total_cost': round(cost, 6),
+                'avg_cost': round(cost / row.responses, 6) if row.responses else 0,
+                'cancelled': int(row.cancelled or 0)
+            })
+        
+        return success_response({'routes': routes})
+        
+    except Exception as e:
+        logger.error(f"Get model stats error: {str(e)}")
+        return error_response('모델별 통계 조회 중 오류가 발생했습니다', 500)
+
+
 @logs_bp.route('/stats', methods=['GET'])
 @admin_required
 def get_stats(current_user):
@@ -350,7 +573,12 @@ def get_stats(current_user):
         
         # 토큰 통계 - User 테이블에서 집계
         total_tokens_from_users = db.session.query(db.func.sum(User.total_token_usage)).scalar() or 0
-        daily_tokens_from_users = db.session.query(db.func.sum(User.daily_token_usage)).scalar() or 0
+        # 오늘 일일 사용량은 토큰 원장에서 집계 (users.daily_token_usage는 마지막 사용일 기준 값)
+        daily_tokens_from_users = db.session.query(
+            db.func.sum(TokenUsageDaily.used_tokens)
+        ).filter(
+            TokenUsageDaily.usage_date == datetime.utcnow().date()
+        ).scalar() or 0
         
         # 토큰 통계 - ChatMessage 테이블에서 직접 집계 (더 정확함)
         total_tokens_from_messages = db.session.query(db.func.sum(ChatMessage.total_tokens)).scalar() or 0
@@ -371,8 +599,9 @@ def get_stats(current_user):
         total_sessions = ChatSession.query.count()
         total_messages = ChatMessage.query.count()
         
-        # 이벤트 통계
-        total_events = EventLog.query.count()
+        # 이벤트 통계 (파티션 테이블이면 전체 스캔 대신 파티션 통계의 추정치 사용)
+        estimated_events = EventPartitions.estimate_rows()
+        total_events = estimated_events if estimated_events is not None else EventLog.query.count()
         
         return success_response({
             'users': {
@@ -395,7 +624,8 @@ def get_stats(current_user):
                 'average_messages_per_session': round(total_messages / total_sessions, 2) if total_sessions > 0 else 0
             },
             'events': {
-                'total': total_events
+                'total': total_events,
+                'estimated': estimated_events is not None
             }
         })
         
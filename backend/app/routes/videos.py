@@ -1,12 +1,13 @@
 """
 비디오 관련 라우트
 """
-from flask import Blueprint, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, current_app, request
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request, decode_token
+from pydantic import ValidationError
 from app.services.video_service import VideoService
 from app.services.scaffolding_service import ScaffoldingService
 from app.utils import success_response, error_response, validate_request
-from app.validators import ScaffoldingResponseRequest
+from app.validators import ScaffoldingResponseRequest, VideoEventBatchRequest, VideoEventItem
 try:
     from app.validators import BulkScaffoldingResponseRequest
 except ImportError:
@@ -156,3 +157,74 @@ def log_video_event(video_id):
     )
     
     return success_response({'message': '이벤트가 기록되었습니다'})
+
+
+def _event_batch_user_id(access_token):
+    """
+    일괄 이벤트 요청 사용자 확인
+    
+    일반 요청은 Authorization 헤더로, 페이지를 떠날 때 navigator.sendBeacon으로 보낸 요청은
+    헤더를 지정할 수 없으므로 본문의 access_token으로 인증합니다.
+    """
+    try:
+        if request.headers.get('Authorization'):
+            verify_jwt_in_request()
+            return int(get_jwt_identity())
+        if access_token:
+            claims = decode_token(access_token)
+            if claims.get('type') == 'access':
+                return int(claims[current_app.config['JWT_IDENTITY_CLAIM']])
+    except Exception as e:
+        logger.info(f"Event batch authentication failed: {str(e)}")
+    return None
+
+
+@videos_bp.route('/events/batch', methods=['POST'])
+def log_video_events_batch():
+    """
+    비디오 이벤트 일괄 기록 (여러 비디오, 클라이언트 발생 시각 포함)
+    
+    sendBeacon 요청은 preflight가 필요 없도록 text/plain으로 오므로 Content-Type과 관계없이 JSON으로 읽습니다.
+    잘못된 이벤트만 건너뛰고 나머지는 기록하며, 건너뛴 항목은 rejected에 순번과 이유를 담아 돌려줍니다.
+    """
+    max_bytes = current_app.config.get('EVENT_BATCH_MAX_BYTES', 65536)
+    # 길이를 알 수 없는 본문(chunked 전송)은 읽기 전에 크기를 제한할 수 없으므로 Content-Length 요구
+    if request.content_length is None:
+        return error_response('Content-Length 헤더가 필요합니다', 411)
+    if request.content_length > max_bytes:
+        return error_response(f'요청 본문은 {max_bytes}바이트 이하여야 합니다', 413)
+    
+    data = request.get_json(force=True, silent=True)
+    if not isinstance(data, dict):
+        return error_response('요청 본문이 올바른 JSON이 아닙니다', 400)
+    
+    try:
+        batch = VideoEventBatchRequest(**data)
+    except ValidationError as e:
+        errors = [f"{' -> '.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()]
+        return error_response('입력 데이터가 올바르지 않습니다', 400, {'errors': errors})
+    
+    user_id = _event_batch_user_id(batch.access_token)
+    if user_id is None:
+        return error_response('인증이 필요합니다', 401)
+    
+    # 항목별 검증 (이벤트 타입, 데이터 크기)
+    items = []
+    rejected = []
+    for index, event in enumerate(batch.events):
+        try:
+            items.append((index, VideoEventItem.model_validate(event)))
+        except ValidationError as e:
+            rejected.append({'index': index, 'error': e.errors()[0]['msg']})
+    
+    result, error = VideoService.log_video_events(
+        user_id=user_id,
+        items=items,
+        ip_address=request.remote_addr,
+        user_agent=request.headers.get('User-Agent', '')
+    )
+    if error:
+        return error_response(error, 500)
+    
+    result['rejected'] = sorted(rejected + result['rejected'], key=lambda item: item['index'])
+    return success_response(result, status_code=202)
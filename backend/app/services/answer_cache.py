@@ -0,0 +1,323 @@
+"""
+첫 질문 답변 캐시
+같은 비디오에서 맥락 없이 들어온 (거의) 같은 질문에 LLM 호출 없이 이전 답변을 재사용
+"""
+from app import db
+from app.models.cache_version import CacheVersion
+from collections import OrderedDict
+from dataclasses import dataclass
+from flask import current_app
+from typing import Optional
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# MinHash 파라미터 (밴드 수 x 밴드당 행 수 = 해시 수)
+_NUM_BANDS = 16
+_ROWS_PER_BAND = 4
+_NUM_HASHES = _NUM_BANDS * _ROWS_PER_BAND
+_SHINGLE_SIZE = 3
+_MERSENNE_PRIME = (1 << 61) - 1
+_HASH_MAX = (1 << 32) - 1
+
+# 워커 간 결과가 같도록 고정 시드로 해시 계수 생성
+_rng = random.Random(20251017)
+_HASH_COEFFICIENTS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(_NUM_HASHES)
+]
+
+
+def normalize_question(text: str) -> str:
+    """질문 정규화: 유니코드 정규화, 소문자화, 문장부호 제거, 공백 정리"""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def minhash_signature(normalized: str) -> tuple:
+    """문자 3-gram 집합의 MinHash 서명"""
+    shingles = {
+        normalized[i:i + _SHINGLE_SIZE]
+        for i in range(max(1, len(normalized) - _SHINGLE_SIZE + 1))
+    }
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'big')
+        for shingle in shingles
+    ]
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME & _HASH_MAX for h in hashes)
+        for a, b in _HASH_COEFFICIENTS
+    )
+
+
+def _similarity(signature_a: tuple, signature_b: tuple) -> float:
+    """MinHash 서명으로 추정한 Jaccard 유사도"""
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / _NUM_HASHES
+
+
+@dataclass(frozen=True)
+class AnswerCacheKey:
+    """답변 캐시 키 (비디오, 시스템 프롬프트 버전, 정규화된 질문)"""
+    video_id: int
+    prompt_version: str
+    normalized: str
+    
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(
+            f'{self.video_id}|{self.prompt_version}|{self.normalized}'.encode('utf-8')
+        ).hexdigest()
+
+
+@dataclass
+class _Entry:
+    key: AnswerCacheKey
+    answer: str
+    signature: tuple
+    expires_at: float
+
+
+class AnswerCache:
+    """
+    프로세스 내 답변 캐시
+    
+    - 조회: 정확히 같은 정규화 질문(해시) → MinHash LSH 후보 중 유사도가 기준 이상인 질문
+    - 제거: TTL 만료 + 최대 항목 수 초과 시 가장 오래 사용하지 않은 항목(LRU)
+    - 비우기: 관리자가 purge하면 cache_versions의 버전을 올려 다른 워커도 다음 확인 시점에 같은 범위를 비움
+      (전체는 'answer_cache', 비디오 하나는 'answer_cache:video:<id>' 버전)
+    """
+    
+    VERSION_NAME = 'answer_cache'
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # digest -> _Entry (LRU 순서)
+        self._buckets = {}  # (video_id, prompt_version, band, band_hash) -> set(digest)
+        self._video_stats = {}
+        self._version = None
+        self._video_versions = {}  # video_id -> 마지막으로 확인한 비디오별 버전
+        self._checked_once = False
+        self._checked_at = 0.0
+    
+    def make_key(self, video_id: int, prompt_version: str, message: str) -> Optional[AnswerCacheKey]:
+        """캐시 키 생성 (캐시 대상이 아닌 질문이면 None)"""
+        if not current_app.config.get('ANSWER_CACHE_ENABLED', True):
+            return None
+        normalized = normalize_question(message)
+        if not normalized or len(normalized) > current_app.config.get('ANSWER_CACHE_MAX_QUESTION_CHARS', 300):
+            return None
+        return AnswerCacheKey(video_id=video_id, prompt_version=prompt_version, normalized=normalized)
+    
+    def lookup(self, key: AnswerCacheKey) -> Optional[str]:
+        """
+        캐시된 답변 조회
+        
+        Returns:
+            str: 캐시된 답변 (없으면 None)
+        """
+        self._check_version()
+        now = time.monotonic()
+        
+        with self._lock:
+            stats = self._stats_for(key.video_id)
+            stats['lookups'] += 1
+            
+            # 1. 정확히 같은 정규화 질문
+            entry = self._get_live(key.digest, now)
+            if entry is not None:
+                stats['exact_hits'] += 1
+                return entry.answer
+            
+            # 2. 근사 중복 (짧은 질문은 한두 글자 차이로 뜻이 달라질 수 있어 제외)
+            if len(key.normalized) < current_app.config.get('ANSWER_CACHE_NEAR_MIN_CHARS', 10):
+                return None
+            
+            threshold = current_app.config.get('ANSWER_CACHE_SIMILARITY_THRESHOLD', 0.85)
+            signature = minhash_signature(key.normalized)
+            best_entry, best_score = None, 0.0
+            for digest in self._candidates(key, signature):
+                candidate = self._get_live(digest, now, touch=False)
+                if candidate is None:
+                    continue
+                score = _similarity(signature, candidate.signature)
+                if score > best_score:
+                    best_entry, best_score = candidate, score
+            
+            if best_entry is not None and best_score >= threshold:
+                self._entries.move_to_end(best_entry.key.digest)
+                stats['near_hits'] += 1
+                return best_entry.answer
+        
+        return None
+    
+    def store(self, key: AnswerCacheKey, answer: str) -> None:
+        """답변 저장"""
+        if not answer:
+            return
+        ttl = current_app.config.get('ANSWER_CACHE_TTL_SECONDS', 86400)
+        max_entries = current_app.config.get('ANSWER_CACHE_MAX_ENTRIES', 2000)
+        signature = minhash_signature(key.normalized)
+        
+        with self._lock:
+            self._remove(key.digest)
+            self._entries[key.digest] = _Entry(
+                key=key,
+                answer=answer,
+                signature=signature,
+                expires_at=time.monotonic() + ttl
+            )
+            for bucket in self._bucket_keys(key, signature):
+                self._buckets.setdefault(bucket, set()).add(key.digest)
+            self._stats_for(key.video_id)['stores'] += 1
+            
+            while len(self._entries) > max_entries:
+                evicted = self._remove(next(iter(self._entries)))
+                self._stats_for(evicted.key.video_id)['evictions'] += 1
+    
+    def purge(self, video_id: Optional[int] = None) -> int:
+        """
+        이 프로세스의 캐시 비우기 (다른 워커에는 bump_version으로 전파)
+        
+        Args:
+            video_id: 지정 시 해당 비디오 항목만 제거
+        
+        Returns:
+            int: 제거된 항목 수
+        """
+        with self._lock:
+            return self._purge_locked(video_id)
+    
+    @staticmethod
+    def bump_version(video_id: Optional[int] = None):
+        """
+        공유 버전 증가 (다른 워커 프로세스는 다음 확인 시점에 같은 범위를 비움)
+        
+        Args:
+            video_id: 지정 시 해당 비디오 버전만 올림
+        """
+        CacheVersion.bump(AnswerCache._version_name(video_id))
+    
+    @staticmethod
+    def _version_name(video_id: Optional[int] = None) -> str:
+        if video_id is None:
+            return AnswerCache.VERSION_NAME
+        return f'{AnswerCache.VERSION_NAME}:video:{video_id}'
+    
+    def get_stats(self):
+        """캐시 상태 조회 (비디오별 적중률 포함)"""
+        with self._lock:
+            videos = {}
+            for video_id, stats in self._video_stats.items():
+                hits = stats['exact_hits'] + stats['near_hits']
+                videos[video_id] = {
+                    **stats,
+                    'hit_rate': round(hits / stats['lookups'], 4) if stats['lookups'] else 0
+                }
+            return {
+                'entries': len(self._entries),
+                'version': self._version,
+                'videos': videos
+            }
+    
+    def _stats_for(self, video_id):
+        return self._video_stats.setdefault(video_id, {
+            'lookups': 0,
+            'exact_hits': 0,
+            'near_hits': 0,
+            'stores': 0,
+            'evictions': 0
+        })
+    
+    def _get_live(self, digest, now, touch=True):
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(digest)
+            self._stats_for(entry.key.video_id)['evictions'] += 1
+            return None
+        if touch:
+            self._entries.move_to_end(digest)
+        return entry
+    
+    def _remove(self, digest):
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return None
+        for bucket in self._bucket_keys(entry.key, entry.signature):
+            members = self._buckets.get(bucket)
+            if members is not None:
+                members.discard(digest)
+                if not members:
+                    del self._buckets[bucket]
+        return entry
+
+    def _candidates(self, key, signature):
+        candidates = set()
+        for bucket in self._bucket_keys(key, signature):
+            candidates |= self._buckets.get(bucket, set())
+        return candidates
+    
+    @staticmethod
+    def _bucket_keys(key, signature):
+        for band in range(_NUM_BANDS):
+            rows = signature[band * _ROWS_PER_BAND:(band + 1) * _ROWS_PER_BAND]
+            yield (key.video_id, key.prompt_version, band, hash(rows))
+    
+    def _purge_locked(self, video_id=None):
+        digests = [
+            digest for digest, entry in self._entries.items()
+            if video_id is None or entry.key.video_id == video_id
+        ]
+        for digest in digests:
+            self._remove(digest)
+        return len(digests)
+    
+    def _check_version(self):
+        interval = current_app.config.get('ANSWER_CACHE_VERSION_CHECK_SECONDS', 30)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < interval:
+                return
+            self._checked_at = now
+        
+        try:
+            versions = CacheVersion.current_with_prefix(self.VERSION_NAME)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Answer cache version check error: {str(e)}")
+            return
+        
+        version = versions.pop(self.VERSION_NAME, None)
+        video_prefix = f'{self.VERSION_NAME}:video:'
+        video_versions = {
+            int(name[len(video_prefix):]): value
+            for name, value in versions.items()
+            if name.startswith(video_prefix) and name[len(video_prefix):].isdigit()
+        }
+        
+        with self._lock:
+            # 처음 확인할 때는 기준 버전만 기록 (행이 없다가 처음 생긴 버전도 변경으로 봄)
+            if self._checked_once:
+                if version != self._version:
+                    logger.info(f"Answer cache purged: version {self._version} -> {version}")
+                    self._purge_locked()
+                else:
+                    for video_id, value in video_versions.items():
+                        if self._video_versions.get(video_id) != value:
+                            removed = self._purge_locked(video_id)
+                            logger.info(f"Answer cache purged for video {video_id}: {removed} entries")
+            self._version = version
+            self._video_versions = video_versions
+            self._checked_once = True
+
+
+# 워커 프로세스당 하나의 캐시 (관리자 purge는 버전으로 전파)
+answer_cache = AnswerCache()
@@ -0,0 +1,136 @@
+"""
+진행 중인 AI 응답 생성 취소
+학생이 중지하거나 화면을 떠나면 공급자 스트림을 끊어 더 이상 읽지도, 비용을 내지도 않도록 함
+"""
+from app import db
+from app.models.chat_session import ChatSession
+from datetime import datetime
+from flask import current_app
+from typing import Callable, Optional
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Generation:
+    """
+    진행 중인 응답 생성 하나 (세션 단위)
+    
+    같은 워커의 취소 요청은 이벤트로 즉시 전달되고, 다른 워커에서 들어온 취소 요청은
+    chat_sessions.cancel_requested_at을 CHAT_CANCEL_CHECK_SECONDS마다 확인하여 감지합니다.
+    """
+    
+    def __init__(self, session_id: int, on_cancel: Optional[Callable[[], None]], check_seconds: float):
+        self.session_id = session_id
+        self.started_at = datetime.utcnow()
+        self._on_cancel = on_cancel
+        self._event = threading.Event()
+        self._check_seconds = check_seconds
+        self._checked_at = time.monotonic()
+    
+    def cancel(self) -> None:
+        """취소 (처음 한 번만 on_cancel 호출)"""
+        if self._event.is_set():
+            return
+        self._event.set()
+        if self._on_cancel is not None:
+            try:
+                self._on_cancel()
+            except Exception as e:
+                logger.error(f"Generation cancel callback error: session={self.session_id}, error={str(e)}")
+    
+    def is_cancelled(self) -> bool:
+        """
+        취소 여부 확인 (스트림 청크마다 호출해도 DB 조회는 확인 주기마다 한 번)
+        
+        요청 컨텍스트가 있는 스레드(스트리밍 응답 제너레이터)에서만 호출합니다.
+        """
+        if self._event.is_set():
+            return True
+        if self._check_seconds <= 0:
+            return False
+        
+        now = time.monotonic()
+        if now - self._checked_at < self._check_seconds:
+            return False
+        self._checked_at = now
+        
+        try:
+            requested_at = db.session.query(ChatSession.cancel_requested_at).filter_by(
+                id=self.session_id
+            ).scalar()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Cancel check error: session={self.session_id}, error={str(e)}")
+            return False
+        
+        if requested_at is not None and requested_at >= self.started_at:
+            self._event.set()
+        return self._event.is_set()
+
+
+class GenerationRegistry:
+    """워커 프로세스 내 진행 중인 응답 생성 목록 (세션 ID별)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generations = {}  # session_id -> set(Generation)
+        self._stats = {
+            'started': 0,
+            'cancelled': 0
+        }
+    
+    def register(self, session_id: int, on_cancel: Optional[Callable[[], None]] = None,
+                 check_seconds: Optional[float] = None) -> Generation:
+        """
+        응답 생성 시작 등록 (끝나면 반드시 unregister)
+        
+        Args:
+            session_id: 세션 ID
+            on_cancel: 취소 시 호출할 함수 (비동기 작업의 태스크 취소 등)
+            check_seconds: 다른 워커의 취소 요청 확인 주기 (없으면 CHAT_CANCEL_CHECK_SECONDS, 0이면 확인 안 함)
+        """
+        if check_seconds is None:
+            check_seconds = current_app.config.get('CHAT_CANCEL_CHECK_SECONDS', 1.0)
+        generation = Generation(session_id, on_cancel, check_seconds)
+        with self._lock:
+            self._generations.setdefault(session_id, set()).add(generation)
+            self._stats['started'] += 1
+        return generation
+    
+    def unregister(self, generation: Generation) -> None:
+        """응답 생성 종료"""
+        with self._lock:
+            generations = self._generations.get(generation.session_id)
+            if generations is None:
+                return
+            generations.discard(generation)
+            if not generations:
+                del self._generations[generation.session_id]
+    
+    def cancel(self, session_id: int) -> int:
+        """
+        이 프로세스에서 진행 중인 세션의 응답 생성 취소
+        
+        Returns:
+            int: 취소된 생성 수
+        """
+        with self._lock:
+            generations = list(self._generations.get(session_id, ()))
+            self._stats['cancelled'] += len(generations)
+        for generation in generations:
+            generation.cancel()
+        return len(generations)
+    
+    def get_stats(self):
+        """진행 현황 조회"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['inflight'] = sum(len(generations) for generations in self._generations.values())
+        return stats
+
+
+# 워커 프로세스당 하나 (다른 워커의 취소 요청은 chat_sessions.cancel_requested_at으로 전파)
+generation_registry = GenerationRegistry()
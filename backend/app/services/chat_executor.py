@@ -0,0 +1,158 @@
+"""
+비동기 채팅 실행기
+LLM 호출을 전용 asyncio 이벤트 루프에서 처리하여 gunicorn 요청 스레드를 점유하지 않음
+"""
+from app.services.chat_service import ChatService
+from app.services.cancellation import generation_registry
+from app.services.openai_service import OpenAIService
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ChatExecutor:
+    """
+    워커 프로세스당 하나의 이벤트 루프 스레드에서 LLM 호출을 실행하는 실행기
+    
+    - LLM 호출: AsyncOpenAI 클라이언트로 이벤트 루프 위에서 실행 (동시 실행 수는 세마포어로 제한)
+    - DB 작업: 작은 전용 스레드 풀에서 앱 컨텍스트와 함께 실행 (이벤트 루프를 막지 않음)
+    """
+    
+    def __init__(self, app, openai_service: OpenAIService):
+        """
+        Args:
+            app: Flask 애플리케이션 (DB 작업 시 앱 컨텍스트 생성용)
+            openai_service: 워커 공유 OpenAI 서비스
+        """
+        self.app = app
+        self.openai_service = openai_service
+        self.pid = os.getpid()
+        self.max_inflight = app.config.get('CHAT_ASYNC_MAX_INFLIGHT', 200)
+        
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'waiting': 0,
+            'inflight': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'cancelled': 0
+        }
+        
+        self._db_executor = ThreadPoolExecutor(
+            max_workers=app.config.get('CHAT_ASYNC_DB_WORKERS', 4),
+            thread_name_prefix='chat-db'
+        )
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(self.max_inflight)
+        self._thread = threading.Thread(target=self._run_loop, name='chat-executor', daemon=True)
+        self._thread.start()
+    
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+    
+    def submit(self, job_id: str, session_id: int, user_id: int, message: str, context: dict, reservation):
+        """
+        채팅 작업 제출 (즉시 반환)
+        
+        Args:
+            job_id: ChatJob ID
+            session_id: 세션 ID
+            user_id: 사용자 ID
+            message: 사용자 메시지
+            context: OpenAIService.build_messages로 미리 구성한 컨텍스트
+            reservation: 일일 토큰 예약 (완료 시 정산, 실패 시 해제)
+        
+        Returns:
+            concurrent.futures.Future: 작업 완료 Future
+        """
+        self._incr('submitted')
+        return asyncio.run_coroutine_threadsafe(
+            self._run_job(job_id, session_id, user_id, message, context, reservation),
+            self._loop
+        )
+    
+    async def _run_job(self, job_id, session_id, user_id, message, context, reservation):
+        # 중지 요청 시 이 태스크를 취소하여 대기열/API 호출을 바로 중단 (같은 워커의 요청만,
+        # 다른 워커에서 취소된 작업은 mark_job_running에서 건너뜀)
+        task = asyncio.current_task()
+        settling = False
+        
+        def cancel_task():
+            # 결과 저장/실패 기록을 시작한 뒤에는 취소하지 않음 (토큰 예약 이중 정산 방지)
+            if not settling:
+                task.cancel()
+        
+        generation = generation_registry.register(
+            session_id,
+            on_cancel=lambda: self._loop.call_soon_threadsafe(cancel_task),
+            check_seconds=0
+        )
+        self._incr('waiting')
+        waiting = True
+        try:
+            async with self._semaphore:
+                self._incr('waiting', -1)
+                waiting = False
+                self._incr('inflight')
+                try:
+                    if not await self._run_in_db(ChatService.mark_job_running, job_id, reservation):
+                        self._incr('cancelled')
+                        return
+                    response_data = await self.openai_service.achat_completion(context, queue_tag=job_id)
+                    settling = True
+                    await self._run_in_db(
+                        ChatService.complete_job, job_id, session_id, user_id, message, response_data,
+                        reservation, context.get('answer_cache_key')
+                    )
+                    self._incr('succeeded')
+                except Exception as e:
+                    settling = True
+                    logger.error(f"Chat job failed: job={job_id}, error={str(e)}")
+                    self._incr('failed')
+                    try:
+                        await self._run_in_db(ChatService.fail_job, job_id, str(e), reservation)
+                    except Exception as db_error:
+                        logger.error(f"Failed to record chat job failure: job={job_id}, error={str(db_error)}")
+                finally:
+                    self._incr('inflight', -1)
+        except asyncio.CancelledError:
+            # 비스트리밍 호출은 부분 응답이 없으므로 예약만 해제
+            if waiting:
+                self._incr('waiting', -1)
+            self._incr('cancelled')
+            logger.info(f"Chat job cancelled: job={job_id}")
+            try:
+                await self._run_in_db(ChatService.cancel_job, job_id, reservation)
+            except Exception as db_error:
+                logger.error(f"Failed to record chat job cancel: job={job_id}, error={str(db_error)}")
+        finally:
+            generation_registry.unregister(generation)
+    
+    async def _run_in_db(self, fn, *args):
+        """DB 작업을 전용 스레드 풀에서 앱 컨텍스트와 함께 실행"""
+        return await self._loop.run_in_executor(self._db_executor, self._call_with_app_context, fn, *args)
+    
+    def _call_with_app_context(self, fn, *args):
+        with self.app.app_context():
+            return fn(*args)
+    
+    def _incr(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+    
+    def get_stats(self):
+        """실행기 상태 조회"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            'pid': self.pid,
+            'max_inflight': self.max_inflight,
+            'loop_running': self._loop.is_running()
+        })
+        return stats
@@ -2,22 +2,68 @@
 채팅 서비스
 채팅 세션 및 메시지 관련 비즈니스 로직
 """
-from app import db
+from app import db, get_openai_service, get_summary_worker
 from app.models.user import User
 from app.models.video import Video
 from app.models.chat_session import ChatSession
 from app.models.chat_message import ChatMessage
-from app.models.chat_prompt_template import ChatPromptTemplate
+from app.models.chat_job import ChatJob
 from app.models.event_log import EventLog
 from app.services.openai_service import OpenAIService
+from app.services.prompt_cache import prompt_cache, ResolvedPrompt
+from app.services.token_ledger import TokenLedger, TokenReservation
+from app.services.answer_cache import answer_cache, AnswerCacheKey
+from app.services.course_material import material_index
+from app.services.idempotency import idempotency_guard
+from app.services.cancellation import generation_registry
+from app.utils import sse_event
 from datetime import datetime
-from typing import Optional, Tuple
+from flask import current_app
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import Iterator, Optional, Tuple
 import json
 import logging
+import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
 
+class ChatStream:
+    """
+    SSE 이벤트 스트림과 스트림 시작 전에 잡은 자원의 정리 함수
+    
+    제너레이터는 첫 이벤트를 꺼내기 전에 닫히면 finally가 실행되지 않으므로
+    (응답 전송 전 클라이언트 연결 끊김 등), 라우트가 Response.call_on_close(stream.close)로
+    정리 함수를 등록합니다. 정리 함수는 한 번만 실행되며 앱 컨텍스트 안에서 호출됩니다.
+    """
+    
+    def __init__(self, events: Iterator[str], on_close=None):
+        self._events = events
+        self._on_close = on_close
+        self._app = current_app._get_current_object() if on_close else None
+    
+    def __iter__(self):
+        return iter(self._events)
+    
+    def release(self) -> None:
+        """정리 함수 실행 (이미 실행되었으면 무시)"""
+        on_close, self._on_close = self._on_close, None
+        if on_close:
+            on_close()
+    
+    def close(self) -> None:
+        """스트림을 닫고 아직 해제되지 않은 자원 해제 (요청 컨텍스트 밖에서도 호출 가능)"""
+        if self._on_close is None:
+            if hasattr(self._events, 'close'):
+                self._events.close()
+            return
+        with self._app.app_context():
+            if hasattr(self._events, 'close'):
+                self._events.close()
+            self.release()
+
+
 class ChatService:
     """채팅 관련 서비스"""
     
@@ -26,46 +72,101 @@ class ChatService:
         """
         채팅 세션 조회 또는 생성
         
+        활성 세션은 (user_id, video_id)당 하나만 존재하도록 부분 유니크 인덱스로 보장되며,
+        비디오 확인, 생성, 기존 세션 조회를 한 문장(INSERT ... ON CONFLICT DO NOTHING RETURNING)으로 처리합니다.
+        같은 비디오를 동시에 연 탭들은 모두 같은 세션을 받습니다.
+        
         Args:
             user_id: 사용자 ID
             video_id: 비디오 ID
-            
+        
         Returns:
             (session, error): 성공 시 세션 객체, 실패 시 None과 에러 메시지
         """
         try:
-            # 비디오 존재 확인
-            video = Video.query.get(video_id)
-            if not video:
-                return None, '비디오를 찾을 수 없습니다'
-            
-            # 기존 활성 세션 확인
-            existing_session = ChatSession.query.filter_by(
-                user_id=user_id,
-                video_id=video_id,
-                is_active=True
-            ).first()
-            
-            if existing_session:
-                return existing_session, None
+            session, created = ChatService._upsert_active_session(user_id, video_id)
             
-            # 새 세션 생성
-            session = ChatSession(
-                user_id=user_id,
-                video_id=video_id
-            )
+            if session is None:
+                # 비디오가 없거나, 동시에 생성된 세션이 이 문장의 스냅샷 이후에 커밋된 경우
+                db.session.rollback()
+                session = ChatSession.query.filter_by(
+                    user_id=user_id,
+                    video_id=video_id,
+                    is_active=True
+                ).first()
+                if session is None:
+                    return None, '비디오를 찾을 수 없습니다'
+                return session, None
             
-            db.session.add(session)
             db.session.commit()
             
-            logger.info(f"New chat session created: user={user_id}, video={video_id}")
+            if created:
+                logger.info(f"New chat session created: user={user_id}, video={video_id}")
             return session, None
-            
+        
         except Exception as e:
             db.session.rollback()
             logger.error(f"Get or create session error: {str(e)}")
             return None, '세션 생성 중 오류가 발생했습니다'
     
+    @staticmethod
+    def _upsert_active_session(user_id: int, video_id: int) -> Tuple[Optional[ChatSession], bool]:
+        """
+        활성 세션 생성 (비디오가 있고 활성 세션이 없을 때만), 이미 있으면 기존 세션 조회
+        
+        PostgreSQL은 INSERT를 CTE로 감싸 기존 세션 조회까지 한 번에 처리하고,
+        CTE 안의 INSERT를 지원하지 않는 SQLite(테스트)는 INSERT 후 필요할 때만 조회합니다.
+        
+        Returns:
+            (session, created): 비디오가 없으면 (None, False)
+        """
+        now = datetime.utcnow()
+        table = ChatSession.__table__
+        dialect = db.session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        
+        # 비디오가 없으면 아무것도 넣지 않음 (FK를 검사하지 않는 SQLite에서도 동일하게 동작)
+        values = db.select(
+            db.literal(user_id), db.literal(video_id), db.literal(0), db.literal(0.0),
+            db.true(), db.literal(now), db.literal(now)
+        ).where(
+            db.select(Video.id).where(Video.id == video_id).exists()
+        )
+        inserted = insert(table).from_select(
+            ['user_id', 'video_id', 'total_tokens', 'total_cost', 'is_active', 'created_at', 'updated_at'],
+            values
+        ).on_conflict_do_nothing(
+            index_elements=['user_id', 'video_id'],
+            # 부분 인덱스 조건과 같은 식이어야 인덱스를 찾음 (uq_chat_sessions_active_user_video)
+            index_where=db.text('is_active')
+        ).returning(*table.c)
+        
+        existing = db.select(*table.c).where(
+            table.c.user_id == user_id,
+            table.c.video_id == video_id,
+            table.c.is_active.is_(True)
+        )
+        
+        if dialect == 'postgresql':
+            created_cte = inserted.cte('created')
+            statement = db.union_all(
+                db.select(*created_cte.c, db.literal(True).label('created')),
+                existing.add_columns(db.literal(False).label('created'))
+            ).limit(1)
+            row = db.session.execute(
+                db.select(ChatSession, db.column('created')).from_statement(statement)
+            ).first()
+            return (row[0], row[1]) if row else (None, False)
+        
+        session = db.session.execute(
+            db.select(ChatSession).from_statement(inserted)
+        ).scalar_one_or_none()
+        if session is not None:
+            return session, True
+        return db.session.execute(
+            db.select(ChatSession).from_statement(existing.limit(1))
+        ).scalar_one_or_none(), False
+    
     @staticmethod
     def get_session(session_id: int, user_id: int) -> Tuple[Optional[ChatSession], Optional[str]]:
         """
@@ -74,7 +175,7 @@ class ChatService:
         Args:
             session_id: 세션 ID
             user_id: 사용자 ID (권한 확인용)
-            
+        
         Returns:
             (session, error): 성공 시 세션 객체, 실패 시 None과 에러 메시지
         """
@@ -89,138 +190,660 @@ class ChatService:
                 return None, '세션 접근 권한이 없습니다'
             
             return session, None
-            
+        
         except Exception as e:
             logger.error(f"Get session error: {str(e)}")
             return None, '세션 조회 중 오류가 발생했습니다'
     
     @staticmethod
     def send_message(session_id: int, user_id: int, message: str, 
-                    openai_service: OpenAIService, daily_token_limit: int) -> Tuple[Optional[dict], Optional[str]]:
+                    openai_service: OpenAIService, daily_token_limit: int,
+                    idempotency_key: Optional[str] = None) -> Tuple[Optional[dict], Optional[str]]:
         """
         메시지 전송 및 AI 응답 생성
         
+        Idempotency-Key가 있으면 같은 키의 동시 요청은 하나만 처리하고, 재전송에는
+        저장된 응답을 돌려주어 LLM을 다시 호출하지 않습니다.
+        
         Args:
             session_id: 세션 ID
             user_id: 사용자 ID
             message: 사용자 메시지
             openai_service: OpenAI 서비스 인스턴스
             daily_token_limit: 일일 토큰 제한
-            
+            idempotency_key: 클라이언트가 보낸 Idempotency-Key (선택)
+        
         Returns:
             (response_data, error): 성공 시 응답 데이터, 실패 시 None과 에러 메시지
         """
+        if not idempotency_key:
+            return ChatService._send_message(
+                session_id, user_id, message, openai_service, daily_token_limit
+            )
+        
+        claim, replay, error = ChatService._begin_idempotent(session_id, user_id, message, idempotency_key)
+        if error:
+            return None, error
+        if replay is not None:
+            return replay, None
+        
+        response_data, error = None, None
         try:
-            # 세션 확인
-            session = ChatSession.query.get(session_id)
-            if not session or session.user_id != user_id:
-                return None, '세션을 찾을 수 없습니다'
-            
-            # 사용자 확인
-            user = User.query.get(user_id)
-            if not user:
-                return None, '사용자를 찾을 수 없습니다'
-            
-            # 일일 토큰 제한 확인
-            if user.daily_token_usage >= daily_token_limit:
-                logger.warning(f"Daily token limit exceeded: user={user_id}")
-                return None, '일일 토큰 한도를 초과했습니다'
-            
-            # 시스템 프롬프트 가져오기
-            system_prompt = ChatService._get_system_prompt(session.video_id, user.role)
-            
-            # OpenAI API 호출
-            response_data = openai_service.chat_completion(
-                session=session,
-                user_message=message,
-                system_prompt=system_prompt
+            response_data, error = ChatService._send_message(
+                session_id, user_id, message, openai_service, daily_token_limit
             )
+        finally:
+            if response_data is not None:
+                claim.complete(response_data)
+            else:
+                claim.abandon()
+        return response_data, error
+    
+    @staticmethod
+    def _send_message(session_id: int, user_id: int, message: str,
+                      openai_service: OpenAIService, daily_token_limit: int) -> Tuple[Optional[dict], Optional[str]]:
+        reservation = None
+        try:
+            session, user, prompt, error = ChatService._prepare_turn(session_id, user_id)
+            if error:
+                return None, error
             
-            # 사용자 메시지 저장
-            user_msg = ChatMessage(
-                session_id=session.id,
-                role='user',
-                content=message,
-                total_tokens=0
+            context, reservation, error = ChatService._build_context(
+                session, message, prompt, openai_service, daily_token_limit
             )
-            db.session.add(user_msg)
+            if error:
+                return None, error
             
-            # AI 응답 메시지 저장
-            assistant_msg = ChatMessage(
-                session_id=session.id,
-                role='assistant',
-                content=response_data['content'],
-                prompt_tokens=response_data['prompt_tokens'],
-                completion_tokens=response_data['completion_tokens'],
-                total_tokens=response_data['total_tokens']
-            )
-            db.session.add(assistant_msg)
+            # OpenAI API 호출 (답변 캐시 적중 시 생략)
+            if context['cached_answer'] is not None:
+                response_data = ChatService._cached_response(context, openai_service)
+            else:
+                response_data = openai_service.chat_completion(context)
             
-            # 세션 업데이트
-            session.total_tokens += response_data['total_tokens']
-            session.total_cost += response_data['cost']
+            result = ChatService._save_turn(
+                session, user, message, response_data, reservation, context['answer_cache_key']
+            )
             
-            if response_data.get('new_summary'):
-                session.summary = response_data['new_summary']
-                session.summary_updated_at = datetime.utcnow()
+            logger.info(f"Message sent: session={session_id}, tokens={response_data['total_tokens']}")
             
-            # 사용자 토큰 사용량 업데이트
-            user.daily_token_usage += response_data['total_tokens']
-            user.total_token_usage += response_data['total_tokens']
+            return result, None
+        
+        except Exception as e:
+            db.session.rollback()
+            if reservation:
+                TokenLedger.release(reservation)
+            logger.error(f"Send message error: {str(e)}")
+            return None, f'메시지 전송 중 오류가 발생했습니다: {str(e)}'
+    
+    @staticmethod
+    def stream_message(session_id: int, user_id: int, message: str,
+                       openai_service: OpenAIService, daily_token_limit: int,
+                       idempotency_key: Optional[str] = None) -> Tuple[Optional[ChatStream], Optional[str]]:
+        """
+        메시지 전송 및 AI 응답 스트리밍 (Server-Sent Events)
+        
+        세션/사용자/토큰 한도 확인은 스트림 시작 전에 수행하여 일반 에러 응답으로
+        돌려줄 수 있게 하고, 메시지 저장과 토큰 집계는 스트림이 끝난 뒤 수행합니다.
+        Idempotency-Key로 재전송된 요청에는 저장된 응답을 done 이벤트 하나로 보냅니다.
+        
+        스트림 시작 전에 잡은 생성 등록, 토큰 예약, 멱등성 선점은 스트림이 끝나거나
+        스트림을 읽기 전에 응답이 닫힐 때(ChatStream.close) 해제됩니다.
+        
+        Args:
+            session_id: 세션 ID
+            user_id: 사용자 ID
+            message: 사용자 메시지
+            openai_service: OpenAI 서비스 인스턴스
+            daily_token_limit: 일일 토큰 제한
+            idempotency_key: 클라이언트가 보낸 Idempotency-Key (선택)
+        
+        Returns:
+            (event_stream, error): 성공 시 SSE 문자열 스트림, 실패 시 None과 에러 메시지
+        """
+        claim = None
+        if idempotency_key:
+            claim, replay, error = ChatService._begin_idempotent(session_id, user_id, message, idempotency_key)
+            if error:
+                return None, error
+            if replay is not None:
+                return ChatStream(iter([sse_event('done', replay)])), None
+        
+        try:
+            session, user, prompt, error = ChatService._prepare_turn(session_id, user_id)
+            if not error:
+                context, reservation, error = ChatService._build_context(
+                    session, message, prompt, openai_service, daily_token_limit
+                )
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Stream message error: {str(e)}")
+            error = f'메시지 전송 중 오류가 발생했습니다: {str(e)}'
+        
+        if error:
+            if claim:
+                claim.abandon()
+            return None, error
+        
+        # 중지 요청(cancel_generation)을 받을 수 있도록 등록
+        generation = generation_registry.register(session.id)
+        settled = False
+        
+        def release():
+            generation_registry.unregister(generation)
+            # 실패하거나 저장할 내용 없이 끝난 경우 예약 해제
+            if not settled and reservation:
+                TokenLedger.release(reservation)
+            if not settled and claim:
+                claim.abandon()
+        
+        def generate():
+            nonlocal settled
+            chunks = None
+            content_parts = []
+            started_at = time.monotonic()
+            time_to_first_token_ms = None
+            try:
+                if context['cached_answer'] is not None:
+                    chunks = ChatService._cached_stream(context, openai_service)
+                else:
+                    chunks = openai_service.chat_completion_stream(context, should_cancel=generation.is_cancelled)
+                
+                for chunk in chunks:
+                    if chunk['type'] == 'queued':
+                        yield sse_event('queued', {'position': chunk['position']})
+                        continue
+                    if chunk['type'] == 'delta':
+                        if time_to_first_token_ms is None:
+                            time_to_first_token_ms = int((time.monotonic() - started_at) * 1000)
+                        content_parts.append(chunk['content'])
+                        yield sse_event('delta', {'content': chunk['content']})
+                        continue
+                    
+                    if chunk.get('cancelled') and not chunk['content']:
+                        # 답변이 시작되기 전에 중지됨: 저장할 내용 없음
+                        yield sse_event('cancelled', {})
+                        return
+                    
+                    result = ChatService._save_turn(
+                        session, user, message, chunk, reservation,
+                        None if chunk.get('cancelled') else context['answer_cache_key']
+                    )
+                    settled = True
+                    if claim:
+                        claim.complete(result)
+                    
+                    logger.info(
+                        f"Message streamed: session={session_id}, tokens={chunk['total_tokens']}, "
+                        f"ttft={chunk['time_to_first_token_ms']}ms, cancelled={chunk.get('cancelled', False)}"
+                    )
+                    yield sse_event('done', result)
             
+            except GeneratorExit:
+                # 클라이언트 연결이 끊김: 공급자 스트림을 닫아 생성을 멈추고 받은 부분까지 저장
+                if not settled and chunks is not None:
+                    chunks.close()
+                    if content_parts and context['cached_answer'] is None:
+                        settled = ChatService._save_partial_turn(
+                            session, user, message, reservation, claim, openai_service.partial_result(
+                                context, ''.join(content_parts), time_to_first_token_ms,
+                                latency_ms=int((time.monotonic() - started_at) * 1000)
+                            )
+                        )
+                raise
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Stream message error: {str(e)}")
+                yield sse_event('error', {'error': f'메시지 전송 중 오류가 발생했습니다: {str(e)}'})
+            finally:
+                stream.release()
+        
+        stream = ChatStream(generate(), on_close=release)
+        return stream, None
+    
+    @staticmethod
+    def cancel_generation(session_id: int, user_id: int) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        진행 중인 AI 응답 생성 중지
+        
+        이 워커에서 진행 중인 생성은 즉시, 다른 워커의 스트리밍 생성은 다음 취소 확인 시점
+        (CHAT_CANCEL_CHECK_SECONDS)에 공급자 스트림을 닫고 받은 부분까지 저장합니다.
+        아직 시작하지 않은 비동기 작업은 어느 워커에서든 시작하지 않습니다.
+        
+        Args:
+            session_id: 세션 ID
+            user_id: 사용자 ID (권한 확인용)
+        
+        Returns:
+            (result, error): 성공 시 취소 요청 정보, 실패 시 None과 에러 메시지
+        """
+        session, error = ChatService.get_session(session_id, user_id)
+        if error:
+            return None, error
+        
+        try:
+            now = datetime.utcnow()
+            ChatSession.query.filter_by(id=session.id).update({
+                'cancel_requested_at': now
+            }, synchronize_session=False)
+            cancelled_jobs = ChatJob.query.filter_by(session_id=session.id, status='pending').update({
+                'status': 'cancelled',
+                'finished_at': now
+            }, synchronize_session=False)
             db.session.commit()
             
-            logger.info(f"Message sent: session={session_id}, tokens={response_data['total_tokens']}")
+            cancelled_local = generation_registry.cancel(session.id)
             
+            logger.info(
+                f"Generation cancel requested: session={session_id}, "
+                f"local={cancelled_local}, pending_jobs={cancelled_jobs}"
+            )
             return {
-                'message': assistant_msg.to_dict(),
-                'session': {
-                    'total_tokens': session.total_tokens,
-                    'total_cost': session.total_cost,
-                    'summary_updated': response_data.get('new_summary') is not None
-                }
+                'session_id': session.id,
+                'cancel_requested_at': now.isoformat()
             }, None
+        
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Cancel generation error: {str(e)}")
+            return None, '응답 중지 중 오류가 발생했습니다'
+    
+    @staticmethod
+    def _save_partial_turn(session: ChatSession, user: User, message: str,
+                           reservation: Optional[TokenReservation], claim, partial: dict) -> bool:
+        """연결이 끊긴 스트림의 부분 응답 저장 (실패해도 예외를 전파하지 않음)"""
+        try:
+            result = ChatService._save_turn(session, user, message, partial, reservation)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Save partial answer error: session={session.id}, error={str(e)}")
+            return False
+        
+        if claim:
+            claim.complete(result)
+        logger.info(
+            f"Partial answer saved after disconnect: session={session.id}, "
+            f"completion_tokens={partial['completion_tokens']}"
+        )
+        return True
+    
+    @staticmethod
+    def submit_message(session_id: int, user_id: int, message: str,
+                       openai_service: OpenAIService, chat_executor,
+                       daily_token_limit: int) -> Tuple[Optional[ChatJob], Optional[str]]:
+        """
+        메시지 비동기 전송 (LLM 호출을 ChatExecutor 이벤트 루프에 위임)
+        
+        컨텍스트 구성까지만 요청 스레드에서 수행하고 즉시 반환합니다.
+        결과는 get_job으로 조회합니다.
+        
+        Args:
+            session_id: 세션 ID
+            user_id: 사용자 ID
+            message: 사용자 메시지
+            openai_service: OpenAI 서비스 인스턴스
+            chat_executor: 비동기 채팅 실행기
+            daily_token_limit: 일일 토큰 제한
+        
+        Returns:
+            (job, error): 성공 시 ChatJob 객체, 실패 시 None과 에러 메시지
+        """
+        reservation = None
+        try:
+            session, user, prompt, error = ChatService._prepare_turn(session_id, user_id)
+            if error:
+                return None, error
             
+            context, reservation, error = ChatService._build_context(
+                session, message, prompt, openai_service, daily_token_limit
+            )
+            if error:
+                return None, error
+            
+            # 답변 캐시 적중 시 이벤트 루프를 거치지 않고 바로 완료된 작업으로 기록
+            if context['cached_answer'] is not None:
+                result = ChatService._save_turn(
+                    session, user, message, ChatService._cached_response(context, openai_service), None
+                )
+                now = datetime.utcnow()
+                job = ChatJob(
+                    id=uuid.uuid4().hex,
+                    session_id=session.id,
+                    user_id=user_id,
+                    status='succeeded',
+                    assistant_message_id=result['message']['id'],
+                    started_at=now,
+                    finished_at=now
+                )
+                db.session.add(job)
+                db.session.commit()
+                
+                logger.info(f"Chat job answered from cache: job={job.id}, session={session_id}")
+                return job, None
+            
+            job = ChatJob(
+                id=uuid.uuid4().hex,
+                session_id=session.id,
+                user_id=user_id,
+                status='pending'
+            )
+            db.session.add(job)
+            db.session.commit()
+            
+            chat_executor.submit(job.id, session.id, user_id, message, context, reservation)
+            
+            logger.info(f"Chat job submitted: job={job.id}, session={session_id}")
+            return job, None
+        
         except Exception as e:
             db.session.rollback()
-            logger.error(f"Send message error: {str(e)}")
+            if reservation:
+                TokenLedger.release(reservation)
+            logger.error(f"Submit message error: {str(e)}")
             return None, f'메시지 전송 중 오류가 발생했습니다: {str(e)}'
     
     @staticmethod
-    def _get_system_prompt(video_id: int, user_role: str) -> str:
+    def get_job(job_id: str, user_id: int) -> Tuple[Optional[dict], Optional[str]]:
         """
-        시스템 프롬프트 가져오기
+        비동기 채팅 작업 상태 조회
         
-        우선순위: 비디오별 프롬프트 > 역할별 프롬프트 > 기본 프롬프트
+        Returns:
+            (job_data, error): 완료된 작업은 AI 응답 메시지, 대기 중인 작업은 대기 순서(queue_position)를 포함
         """
         try:
-            # 비디오별 프롬프트
-            prompt_template = ChatPromptTemplate.query.filter_by(
-                video_id=video_id,
-                is_active=True
-            ).first()
+            job = ChatJob.query.get(job_id)
+            if not job or job.user_id != user_id:
+                return None, '작업을 찾을 수 없습니다'
             
-            # 역할별 프롬프트
-            if not prompt_template:
-                prompt_template = ChatPromptTemplate.query.filter_by(
-                    user_role=user_role,
-                    is_active=True
-                ).first()
+            job_data = job.to_dict()
+            if job.status in ('pending', 'running'):
+                # 이 워커의 스케줄러 대기열에 있을 때만 알 수 있음 (다른 워커가 처리 중이면 None)
+                job_data['queue_position'] = get_openai_service().scheduler.position_of(job.id)
+            if job.status == 'succeeded' and job.assistant_message_id:
+                assistant_msg = ChatMessage.query.get(job.assistant_message_id)
+                job_data['message'] = assistant_msg.to_dict() if assistant_msg else None
             
-            # 기본 프롬프트
-            if not prompt_template:
-                prompt_template = ChatPromptTemplate.query.filter_by(
-                    is_default=True,
-                    is_active=True
-                ).first()
-            
-            if prompt_template:
-                return prompt_template.system_prompt
+            return job_data, None
+        
+        except Exception as e:
+            logger.error(f"Get job error: {str(e)}")
+            return None, '작업 조회 중 오류가 발생했습니다'
+    
+    @staticmethod
+    def mark_job_running(job_id: str, reservation: TokenReservation) -> bool:
+        """
+        작업 시작 기록 (ChatExecutor DB 스레드에서 호출)
+        
+        Returns:
+            bool: 시작 여부 (대기 중에 취소된 작업이면 토큰 예약을 해제하고 False)
+        """
+        started = ChatJob.query.filter_by(id=job_id, status='pending').update({
+            'status': 'running',
+            'started_at': datetime.utcnow()
+        })
+        db.session.commit()
+        
+        if not started:
+            TokenLedger.release(reservation)
+            logger.info(f"Chat job skipped (cancelled before start): job={job_id}")
+        return bool(started)
+    
+    @staticmethod
+    def complete_job(job_id: str, session_id: int, user_id: int, message: str,
+                     response_data: dict, reservation: TokenReservation,
+                     answer_cache_key: Optional[AnswerCacheKey] = None) -> None:
+        """작업 완료 처리: 메시지 저장 및 토큰 집계 (ChatExecutor DB 스레드에서 호출)"""
+        try:
+            session = ChatSession.query.get(session_id)
+            user = User.query.get(user_id)
+            result = ChatService._save_turn(session, user, message, response_data, reservation, answer_cache_key)
             
-            # 폴백 프롬프트
-            return "당신은 학습을 돕는 AI 조교입니다. 학생들의 질문에 친절하고 명확하게 답변해주세요."
+            ChatJob.query.filter_by(id=job_id).update({
+                'status': 'succeeded',
+                'assistant_message_id': result['message']['id'],
+                'finished_at': datetime.utcnow()
+            })
+            db.session.commit()
             
+            logger.info(f"Chat job completed: job={job_id}, tokens={response_data['total_tokens']}")
+        
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    @staticmethod
+    def fail_job(job_id: str, error: str, reservation: TokenReservation) -> None:
+        """작업 실패 기록 및 토큰 예약 해제 (ChatExecutor DB 스레드에서 호출)"""
+        TokenLedger.release(reservation)
+        ChatJob.query.filter_by(id=job_id).update({
+            'status': 'failed',
+            'error': f'메시지 전송 중 오류가 발생했습니다: {error}',
+            'finished_at': datetime.utcnow()
+        })
+        db.session.commit()
+    
+    @staticmethod
+    def cancel_job(job_id: str, reservation: TokenReservation) -> None:
+        """작업 취소 기록 및 토큰 예약 해제 (ChatExecutor DB 스레드에서 호출)"""
+        TokenLedger.release(reservation)
+        ChatJob.query.filter_by(id=job_id).update({
+            'status': 'cancelled',
+            'finished_at': datetime.utcnow()
+        })
+        db.session.commit()
+    
+    @staticmethod
+    def _begin_idempotent(session_id: int, user_id: int, message: str, idempotency_key: str):
+        """Idempotency-Key 처리 권한 획득 또는 저장된 응답 조회 (claim, replay, error)"""
+        try:
+            claim, replay, error = idempotency_guard.begin(user_id, idempotency_key, session_id, message)
         except Exception as e:
-            logger.error(f"Get system prompt error: {str(e)}")
-            return "당신은 학습을 돕는 AI 조교입니다. 학생들의 질문에 친절하고 명확하게 답변해주세요."
-
+            db.session.rollback()
+            logger.error(f"Idempotency key error: session={session_id}, error={str(e)}")
+            return None, None, f'메시지 전송 중 오류가 발생했습니다: {str(e)}'
+        
+        if replay is not None:
+            logger.info(f"Message replayed for idempotency key: session={session_id}, user={user_id}")
+        return claim, replay, error
+    
+    @staticmethod
+    def _prepare_turn(session_id: int,
+                      user_id: int) -> Tuple[Optional[ChatSession], Optional[User], Optional[ResolvedPrompt], Optional[str]]:
+        """
+        메시지 전송 전 세션/사용자 확인 및 시스템 프롬프트 조회
+        
+        Returns:
+            (session, user, prompt, error): 실패 시 error에 에러 메시지
+        """
+        # 세션 확인
+        session = ChatSession.query.get(session_id)
+        if not session or session.user_id != user_id:
+            return None, None, None, '세션을 찾을 수 없습니다'
+        
+        # 사용자 확인
+        user = User.query.get(user_id)
+        if not user:
+            return None, None, None, '사용자를 찾을 수 없습니다'
+        
+        # 시스템 프롬프트 가져오기 (프로세스 캐시, 적중 시 쿼리 없음)
+        prompt = prompt_cache.resolve(session.video_id, user.role)
+        
+        return session, user, prompt, None
+    
+    @staticmethod
+    def _build_context(session: ChatSession, message: str, prompt: ResolvedPrompt,
+                       openai_service: OpenAIService,
+                       daily_token_limit: int) -> Tuple[Optional[dict], Optional[TokenReservation], Optional[str]]:
+        """
+        API 컨텍스트 구성, 답변 캐시 조회 및 일일 토큰 예약
+        
+        예약량은 프롬프트 토큰 추정치와 최대 출력 토큰의 합이며, 응답 저장 시 실제 사용량으로 정산됩니다.
+        답변 캐시에 적중하면 context['cached_answer']에 답변이 담기고 예약하지 않습니다.
+        캐시에 없으면 모델 라우터가 고른 모델을 context['model']에 기록합니다.
+        
+        Returns:
+            (context, reservation, error): 한도 초과 시 error에 에러 메시지
+        """
+        # 강의 자료 전체 대신 질문과 관련된 청크만 포함
+        material = material_index.retrieve(session.video_id, message)
+        context = openai_service.build_messages(
+            session=session,
+            user_message=message,
+            system_prompt=prompt.text,
+            system_prompt_tokens=prompt.tokens,
+            material=material
+        )
+        
+        # 같은 비디오/프롬프트 버전의 요청은 시스템 프롬프트 앞부분이 같으므로 같은 프롬프트 캐시로 라우팅
+        context['prompt_cache_key'] = f'video-{session.video_id}-{prompt.version_key}'
+        
+        # 이전 대화가 없는 질문만 답변 캐시 대상 (적중 시 토큰 예약과 LLM 호출 생략)
+        context['answer_cache_key'] = None
+        context['cached_answer'] = None
+        if not context['has_history']:
+            # 자료가 바뀌면 이전 답변을 재사용하지 않도록 자료 내용 해시를 키에 포함
+            answer_version = f'{prompt.version_key}/{material.revision}' if material.revision else prompt.version_key
+            context['answer_cache_key'] = answer_cache.make_key(session.video_id, answer_version, message)
+            if context['answer_cache_key']:
+                context['cached_answer'] = answer_cache.lookup(context['answer_cache_key'])
+                if context['cached_answer'] is not None:
+                    return context, None, None
+        
+        # 공급자 장애로 브레이커가 열려 있으면 토큰 예약 없이 바로 실패 (캐시 적중은 계속 응답)
+        openai_service.breaker.ensure_closed()
+        
+        # 질문 복잡도에 따라 응답 모델 선택 (캐시 적중은 모델을 호출하지 않으므로 라우팅하지 않음)
+        openai_service.route_model(message, context)
+        
+        reservation, error = TokenLedger.reserve(
+            session.user_id,
+            context['prompt_tokens_estimate'] + openai_service.max_tokens_output,
+            daily_token_limit
+        )
+        if error:
+            return None, None, error
+        
+        return context, reservation, None
+    
+    @staticmethod
+    def _cached_response(context: dict, openai_service: OpenAIService) -> dict:
+        """답변 캐시 적중 시 응답 데이터 (토큰 사용 없음)"""
+        return {
+            'content': context['cached_answer'],
+            'content_tokens': openai_service.count_tokens(context['cached_answer']),
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'total_tokens': 0,
+            'cached_tokens': 0,
+            'cost': 0.0,
+            'summarize_through_id': None,
+            'user_message_tokens': context['user_message_tokens'],
+            'time_to_first_token_ms': 0,
+            'answer_cache_hit': True
+        }
+    
+    @staticmethod
+    def _cached_stream(context: dict, openai_service: OpenAIService) -> Iterator[dict]:
+        """답변 캐시 적중 시 chat_completion_stream과 같은 형식의 이벤트"""
+        yield {'type': 'delta', 'content': context['cached_answer']}
+        yield {'type': 'done', **ChatService._cached_response(context, openai_service)}
+    
+    @staticmethod
+    def _save_turn(session: ChatSession, user: User, message: str, response_data: dict,
+                   reservation: Optional[TokenReservation],
+                   answer_cache_key: Optional[AnswerCacheKey] = None) -> dict:
+        """
+        사용자/AI 메시지 저장 및 세션/사용자 토큰 사용량 업데이트
+        
+        누적 사용량은 SQL 증감으로, 일일 사용량은 토큰 원장 정산으로 갱신하여
+        동시 요청 간 갱신 손실이 없습니다.
+        
+        Returns:
+            dict: 클라이언트에 반환할 응답 데이터
+                (session.summary_updated: 직전 응답 이후 백그라운드 요약이 실제로 반영되었는지,
+                 session.summary_scheduled: 이번 턴에서 새 요약 작업을 제출했는지)
+        """
+        # 직전 응답 이후 요약이 반영되었는지 판단하기 위해 저장 전에 조회
+        previous_message_at = db.session.query(db.func.max(ChatMessage.created_at)).filter(
+            ChatMessage.session_id == session.id
+        ).scalar()
+        summary_updated_at = db.session.query(ChatSession.summary_updated_at).filter(
+            ChatSession.id == session.id
+        ).scalar()
+        summary_updated = bool(
+            summary_updated_at and previous_message_at and summary_updated_at > previous_message_at
+        )
+        
+        # 사용자 메시지 저장
+        user_msg = ChatMessage(
+            session_id=session.id,
+            role='user',
+            content=message,
+            token_count=response_data.get('user_message_tokens'),
+            total_tokens=0
+        )
+        db.session.add(user_msg)
+        
+        # AI 응답 메시지 저장
+        assistant_msg = ChatMessage(
+            session_id=session.id,
+            role='assistant',
+            content=response_data['content'],
+            token_count=response_data.get('content_tokens', response_data['completion_tokens']),
+            prompt_tokens=response_data['prompt_tokens'],
+            completion_tokens=response_data['completion_tokens'],
+            total_tokens=response_data['total_tokens'],
+            time_to_first_token_ms=response_data.get('time_to_first_token_ms'),
+            latency_ms=response_data.get('latency_ms'),
+            cached_tokens=response_data.get('cached_tokens', 0),
+            cost=response_data['cost'],
+            model=response_data.get('model'),
+            route_reason=response_data.get('route_reason'),
+            answer_cache_hit=response_data.get('answer_cache_hit', False),
+            cancelled=response_data.get('cancelled', False)
+        )
+        db.session.add(assistant_msg)
+        
+        total_tokens = response_data['total_tokens']
+        
+        # 세션 업데이트
+        ChatSession.query.filter_by(id=session.id).update({
+            'total_tokens': ChatSession.total_tokens + total_tokens,
+            'total_cost': ChatSession.total_cost + response_data['cost']
+        }, synchronize_session=False)
+        
+        # 사용자 토큰 사용량 업데이트 (daily_token_usage는 관리자 화면 표시용, 날짜가 바뀌면 새로 시작)
+        now = datetime.utcnow()
+        new_day = User.last_token_reset < now.replace(hour=0, minute=0, second=0, microsecond=0)
+        User.query.filter_by(id=user.id).update({
+            'total_token_usage': User.total_token_usage + total_tokens,
+            'daily_token_usage': db.case((new_day, total_tokens), else_=User.daily_token_usage + total_tokens),
+            'last_token_reset': db.case((new_day, now), else_=User.last_token_reset)
+        }, synchronize_session=False)
+        
+        # 일일 한도 원장 정산
+        if reservation:
+            TokenLedger.reconcile(reservation, total_tokens)
+        
+        db.session.commit()
+        
+        # 첫 질문의 새 답변은 같은 비디오의 다음 학생을 위해 캐시
+        if answer_cache_key and not response_data.get('answer_cache_hit'):
+            answer_cache.store(answer_cache_key, response_data['content'])
+        
+        # 요약은 응답 저장 후 백그라운드에서 생성 (다음 턴부터 반영)
+        summary_scheduled = False
+        if response_data.get('summarize_through_id'):
+            try:
+                summary_scheduled = get_summary_worker().submit(session.id, response_data['summarize_through_id'])
+            except Exception as e:
+                logger.error(f"Failed to schedule summary: session={session.id}, error={str(e)}")
+        
+        return {
+            'message': assistant_msg.to_dict(),
+            'session': {
+                'total_tokens': session.total_tokens,
+                'total_cost': session.total_cost,
+                'summary_updated': summary_updated,
+                'summary_scheduled': summary_scheduled
+            }
+        }
@@ -0,0 +1,205 @@
+"""
+OpenAI 호출 서킷 브레이커
+공급자 장애 시 모든 요청이 타임아웃까지 기다리지 않도록 최근 오류율/지연 시간을 보고 호출을 차단
+"""
+from collections import deque
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_OPEN_ERROR = 'AI 서비스가 일시적으로 불안정합니다. 잠시 후 다시 시도해주세요.'
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    워커 프로세스당 하나의 서킷 브레이커 (모든 요청 스레드와 ChatExecutor 이벤트 루프가 공유)
+    
+    - closed: 정상. 최근 BREAKER_WINDOW_SECONDS 동안의 호출이 BREAKER_MIN_CALLS 이상이고
+      실패율 또는 느린 호출 비율이 기준을 넘으면 open
+    - open: BREAKER_OPEN_SECONDS 동안 호출하지 않고 바로 실패 (503 + Retry-After)
+    - half_open: 최대 BREAKER_HALF_OPEN_PROBES개의 시험 호출만 허용하여 모두 성공하면 closed,
+      하나라도 실패하면 다시 open
+    """
+    
+    def __init__(self, config):
+        """
+        Args:
+            config: Flask 설정 객체
+        """
+        self.pid = os.getpid()
+        self.window_seconds = config.get('BREAKER_WINDOW_SECONDS', 60)
+        self.min_calls = config.get('BREAKER_MIN_CALLS', 10)
+        self.failure_rate_threshold = config.get('BREAKER_FAILURE_RATE', 0.5)
+        self.slow_call_seconds = config.get('BREAKER_SLOW_CALL_SECONDS', 15)
+        self.slow_rate_threshold = config.get('BREAKER_SLOW_CALL_RATE', 0.8)
+        self.open_seconds = config.get('BREAKER_OPEN_SECONDS', 30)
+        self.half_open_probes = config.get('BREAKER_HALF_OPEN_PROBES', 2)
+        
+        self._lock = threading.Lock()
+        self._calls = deque()  # (끝난 시각, 실패 여부, 느린 호출 여부)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_inflight = 0
+        self._probes_succeeded = 0
+        self._stats = {
+            'opened': 0,
+            'rejected': 0,
+            'successes': 0,
+            'failures': 0,
+            'slow_calls': 0
+        }
+    
+    def ensure_closed(self):
+        """
+        호출 가능 여부만 확인 (시험 호출 자리를 차지하지 않음)
+        
+        Raises:
+            Exception: open 상태인 경우
+        """
+        with self._lock:
+            if self._current_state() == OPEN:
+                self._stats['rejected'] += 1
+                raise Exception(CIRCUIT_OPEN_ERROR)
+    
+    def before_call(self) -> bool:
+        """
+        API 호출 직전 확인 (half_open이면 시험 호출 자리를 차지)
+        
+        Returns:
+            bool: 시험 호출이면 True (결과를 record_success/record_failure에 전달)
+        
+        Raises:
+            Exception: open 상태이거나 시험 호출 자리가 없는 경우
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return False
+            if state == HALF_OPEN and self._probes_inflight + self._probes_succeeded < self.half_open_probes:
+                self._probes_inflight += 1
+                return True
+            self._stats['rejected'] += 1
+            raise Exception(CIRCUIT_OPEN_ERROR)
+    
+    def record_success(self, latency_seconds: float, probe: bool = False):
+        """호출 성공 기록 (공급자가 응답했으면 4xx도 성공으로 봄)"""
+        slow = latency_seconds >= self.slow_call_seconds
+        with self._lock:
+            self._stats['successes'] += 1
+            if slow:
+                self._stats['slow_calls'] += 1
+            
+            if probe and self._state == HALF_OPEN:
+                self._probes_inflight -= 1
+                if slow:
+                    self._trip('slow probe')
+                    return
+                self._probes_succeeded += 1
+                if self._probes_succeeded >= self.half_open_probes:
+                    self._close()
+                return
+            
+            self._record(False, slow)
+    
+    def record_failure(self, latency_seconds: float, probe: bool = False):
+        """호출 실패 기록 (타임아웃, 연결 오류, 5xx)"""
+        with self._lock:
+            self._stats['failures'] += 1
+            
+            if probe and self._state == HALF_OPEN:
+                self._probes_inflight -= 1
+                self._trip('failed probe')
+                return
+            
+            self._record(True, latency_seconds >= self.slow_call_seconds)
+    
+    def cancel_probe(self, probe: bool):
+        """결과 없이 취소된 호출 정리 (시험 호출 자리만 반환)"""
+        if not probe:
+            return
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes_inflight > 0:
+                self._probes_inflight -= 1
+    
+    def retry_after(self) -> int:
+        """다시 시도할 수 있을 때까지 남은 시간 (초, Retry-After 헤더용)"""
+        with self._lock:
+            if self._current_state() != OPEN:
+                return 1
+            return max(1, math.ceil(self._opened_at + self.open_seconds - time.monotonic()))
+    
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+    
+    def get_stats(self):
+        """브레이커 상태 조회"""
+        with self._lock:
+            state = self._current_state()
+            self._prune(time.monotonic())
+            calls = len(self._calls)
+            failures = sum(1 for _, failed, _ in self._calls if failed)
+            slow = sum(1 for _, _, is_slow in self._calls if is_slow)
+            stats = dict(self._stats)
+            stats.update({
+                'pid': self.pid,
+                'state': state,
+                'window_calls': calls,
+                'window_failure_rate': round(failures / calls, 4) if calls else 0,
+                'window_slow_rate': round(slow / calls, 4) if calls else 0,
+                'open_remaining_seconds': (
+                    max(0.0, round(self._opened_at + self.open_seconds - time.monotonic(), 1))
+                    if state == OPEN else 0
+                )
+            })
+        return stats
+    
+    def _current_state(self):
+        # open 유지 시간이 지나면 half_open으로 전환 (락을 잡은 상태에서 호출)
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes_inflight = 0
+            self._probes_succeeded = 0
+            logger.info("Circuit breaker half-open: probing OpenAI API")
+        return self._state
+    
+    def _record(self, failed, slow):
+        now = time.monotonic()
+        self._calls.append((now, failed, slow))
+        self._prune(now)
+        
+        if self._state != CLOSED or len(self._calls) < self.min_calls:
+            return
+        
+        calls = len(self._calls)
+        failure_rate = sum(1 for _, is_failed, _ in self._calls if is_failed) / calls
+        slow_rate = sum(1 for _, _, is_slow in self._calls if is_slow) / calls
+        if failure_rate >= self.failure_rate_threshold:
+            self._trip(f'failure rate {failure_rate:.0%} over {calls} calls')
+        elif slow_rate >= self.slow_rate_threshold:
+            self._trip(f'slow call rate {slow_rate:.0%} over {calls} calls')
+    
+    def _prune(self, now):
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+    
+    def _trip(self, reason):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._calls.clear()
+        self._stats['opened'] += 1
+        logger.error(f"Circuit breaker opened ({reason}), rejecting OpenAI calls for {self.open_seconds}s")
+    
+    def _close(self):
+        self._state = CLOSED
+        self._calls.clear()
+        logger.info("Circuit breaker closed: OpenAI API recovered")
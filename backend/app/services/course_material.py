@@ -0,0 +1,316 @@
+"""
+비디오별 강의 자료 검색 (BM25)
+자료를 저장할 때 청크로 나누어 두고, 질문마다 관련 있는 청크만 토큰 예산 안에서 프롬프트에 넣음
+"""
+from app import db, get_openai_service
+from app.models.cache_version import CacheVersion
+from app.models.video_material_chunk import VideoMaterialChunk
+from collections import Counter
+from dataclasses import dataclass
+from flask import current_app
+from typing import List, Tuple
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# 청크로 나눌 비디오 필드 (순서대로 position 부여)
+MATERIAL_SOURCES = ('course_material', 'description')
+
+MATERIAL_HEADER = '질문과 관련된 강의 자료 발췌 (답변에 필요한 경우에만 참고):'
+
+# BM25 파라미터
+_K1 = 1.2
+_B = 0.75
+
+_TERM_PATTERN = re.compile(r'[가-힣]+|[a-z0-9]+')
+_PARAGRAPH_PATTERN = re.compile(r'\n\s*\n')
+_SENTENCE_PATTERN = re.compile(r'(?<=[.!?。])\s+|\n')
+
+
+def tokenize_terms(text: str) -> List[str]:
+    """
+    검색어 추출
+    
+    형태소 분석기 없이 조사가 붙은 한국어 단어도 맞도록 한글은 글자 2-gram,
+    영문/숫자는 단어 단위로 나눕니다. ('원리가' → '원리', '리가')
+    """
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    terms = []
+    for word in _TERM_PATTERN.findall(text):
+        if not ('가' <= word[0] <= '힣'):
+            terms.append(word)
+        elif len(word) == 1:
+            terms.append(word)
+        else:
+            terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def split_chunks(text: str, max_tokens: int) -> List[Tuple[str, int]]:
+    """
+    자료를 max_tokens 이하의 청크로 분할 (문단 → 문장 → 글자 순으로 나눔)
+    
+    Returns:
+        list: (청크 내용, 토큰 수) 목록
+    """
+    openai_service = get_openai_service()
+    pieces = []
+    for paragraph in _PARAGRAPH_PATTERN.split(text or ''):
+        paragraph = paragraph.strip()
+        if paragraph:
+            pieces.append(paragraph)
+    if not pieces:
+        return []
+    
+    # 긴 문단은 문장 단위로, 그래도 긴 문장은 글자 수 비율로 자름
+    units = []
+    for paragraph, tokens in zip(pieces, openai_service.count_tokens_batch(pieces)):
+        if tokens <= max_tokens:
+            units.append((paragraph, tokens, True))
+            continue
+        sentences = [s.strip() for s in _SENTENCE_PATTERN.split(paragraph) if s.strip()]
+        for sentence, sentence_tokens in zip(sentences, openai_service.count_tokens_batch(sentences)):
+            if sentence_tokens <= max_tokens:
+                units.append((sentence, sentence_tokens, False))
+                continue
+            step = max(1, len(sentence) * max_tokens // sentence_tokens)
+            parts = [sentence[i:i + step] for i in range(0, len(sentence), step)]
+            for part, part_tokens in zip(parts, openai_service.count_tokens_batch(parts)):
+                units.append((part, part_tokens, False))
+    
+    # 순서대로 이어 붙여 max_tokens에 가깝게 채움 (문단 경계는 빈 줄로 유지)
+    chunks = []
+    current, current_tokens = [], 0
+    for unit, tokens, paragraph in units:
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(('\n\n' if paragraph else ' ', unit))
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    
+    texts = [''.join(sep + unit for sep, unit in chunk).strip() for chunk in chunks]
+    return list(zip(texts, openai_service.count_tokens_batch(texts)))
+
+
+@dataclass(frozen=True)
+class RetrievedMaterial:
+    """질문과 관련된 자료 (chunk_ids가 비어 있으면 프롬프트에 넣지 않음)"""
+    text: str
+    tokens: int
+    chunk_ids: tuple
+    revision: str  # 자료 내용 해시 (답변 캐시 키에 포함, 자료가 없으면 빈 문자열)
+
+
+class _VideoIndex:
+    """비디오 하나의 역색인 (term → [(청크 번호, 출현 횟수)])"""
+    
+    def __init__(self, rows):
+        self.chunks = rows  # (id, position, content, token_count)
+        self.revision = hashlib.sha1(
+            '\x00'.join(row.content for row in rows).encode('utf-8')
+        ).hexdigest()[:12] if rows else ''
+        self.postings = {}
+        self.lengths = []
+        for i, row in enumerate(rows):
+            counts = Counter(tokenize_terms(row.content))
+            self.lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                self.postings.setdefault(term, []).append((i, count))
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+    
+    def search(self, query_terms):
+        """BM25 점수 내림차순 (청크 번호, 점수) 목록 (점수 0 제외)"""
+        n = len(self.chunks)
+        scores = {}
+        for term in set(query_terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for i, count in postings:
+                norm = 1 - _B + _B * self.lengths[i] / self.avg_length if self.avg_length else 1
+                scores[i] = scores.get(i, 0.0) + idf * count * (_K1 + 1) / (count + _K1 * norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+class MaterialIndex:
+    """
+    비디오별 강의 자료 BM25 검색기
+    
+    - 색인: 자료를 저장하면 rebuild가 video_material_chunks를 다시 만들고 cache_versions 버전을 올림
+    - 검색: 비디오별 역색인을 처음 검색할 때 청크 테이블에서 만들어 프로세스 메모리에 보관하고,
+      MATERIAL_VERSION_CHECK_SECONDS마다 버전을 확인하여 바뀌었으면 비움
+    - 선택: 점수 상위 MATERIAL_TOP_K개 중 MATERIAL_MAX_TOKENS 안에 들어가는 청크를 자료 순서대로 합침
+    """
+    
+    VERSION_NAME = 'video_material'
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = {}  # video_id -> _VideoIndex
+        self._version = None
+        self._generation = 0
+        self._checked_at = 0.0
+        self._stats = {
+            'queries': 0,
+            'hits': 0,
+            'loads': 0,
+            'chunks_selected': 0,
+            'tokens_selected': 0
+        }
+    
+    @staticmethod
+    def rebuild(video) -> int:
+        """
+        비디오 자료 청크 재생성 (호출 측 트랜잭션에 포함되어 자료 변경과 함께 커밋됨)
+        
+        Args:
+            video: 자료를 저장한 Video (id가 있어야 함)
+        
+        Returns:
+            int: 만든 청크 수
+        """
+        max_tokens = current_app.config.get('MATERIAL_CHUNK_TOKENS', 200)
+        VideoMaterialChunk.query.filter_by(video_id=video.id).delete(synchronize_session=False)
+        
+        position = 0
+        for source in MATERIAL_SOURCES:
+            for content, tokens in split_chunks(getattr(video, source), max_tokens):
+                db.session.add(VideoMaterialChunk(
+                    video_id=video.id,
+                    source=source,
+                    position=position,
+                    content=content,
+                    token_count=tokens
+                ))
+                position += 1
+        
+        CacheVersion.bump(MaterialIndex.VERSION_NAME)
+        logger.info(f"Material index rebuilt: video={video.id}, chunks={position}")
+        return position
+    
+    def retrieve(self, video_id: int, query: str) -> RetrievedMaterial:
+        """
+        질문과 관련된 자료 검색
+        
+        Args:
+            video_id: 비디오 ID
+            query: 사용자 질문
+        """
+        top_k = current_app.config.get('MATERIAL_TOP_K', 4)
+        max_tokens = current_app.config.get('MATERIAL_MAX_TOKENS', 800)
+        
+        index = self._get_index(video_id)
+        results = index.search(tokenize_terms(query)) if index.chunks and top_k > 0 else []
+        
+        selected = []
+        used = 0
+        for i, _ in results[:top_k]:
+            tokens = index.chunks[i].token_count
+            if used + tokens > max_tokens:
+                continue
+            selected.append(index.chunks[i])
+            used += tokens
+        selected.sort(key=lambda row: row.position)
+        
+        with self._lock:
+            self._stats['queries'] += 1
+            if selected:
+                self._stats['hits'] += 1
+                self._stats['chunks_selected'] += len(selected)
+                self._stats['tokens_selected'] += used
+        
+        if not selected:
+            return RetrievedMaterial(text='', tokens=0, chunk_ids=(), revision=index.revision)
+        
+        text = MATERIAL_HEADER + ''.join(f'\n\n{row.content}' for row in selected)
+        return RetrievedMaterial(
+            text=text,
+            tokens=used + get_openai_service().count_tokens(MATERIAL_HEADER) + len(selected),
+            chunk_ids=tuple(row.id for row in selected),
+            revision=index.revision
+        )
+    
+    def invalidate(self):
+        """이 프로세스의 색인을 즉시 비움 (다음 검색 시 버전도 다시 확인)"""
+        with self._lock:
+            self._indexes.clear()
+            self._generation += 1
+            self._checked_at = 0.0
+    
+    def get_stats(self):
+        """검색 현황 조회"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'videos': len(self._indexes),
+                'chunks': sum(len(index.chunks) for index in self._indexes.values()),
+                'version': self._version,
+                'hit_rate': round(stats['hits'] / stats['queries'], 4) if stats['queries'] else 0
+            })
+        return stats
+    
+    def _get_index(self, video_id):
+        self._check_version()
+        with self._lock:
+            index = self._indexes.get(video_id)
+            generation = self._generation
+        if index is not None:
+            return index
+        
+        try:
+            rows = db.session.query(
+                VideoMaterialChunk.id,
+                VideoMaterialChunk.position,
+                VideoMaterialChunk.content,
+                VideoMaterialChunk.token_count
+            ).filter_by(video_id=video_id).order_by(VideoMaterialChunk.position).all()
+        except Exception as e:
+            # 자료 없이 응답하도록 빈 색인 사용 (저장하지 않음)
+            db.session.rollback()
+            logger.error(f"Material index load error: video={video_id}, error={str(e)}")
+            return _VideoIndex([])
+        
+        index = _VideoIndex(rows)
+        with self._lock:
+            self._stats['loads'] += 1
+            # 불러오는 도중 무효화되었으면 이전 자료일 수 있으므로 저장하지 않음
+            if generation == self._generation:
+                self._indexes[video_id] = index
+        return index
+    
+    def _check_version(self):
+        interval = current_app.config.get('MATERIAL_VERSION_CHECK_SECONDS', 30)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < interval:
+                return
+            # 다른 스레드가 동시에 확인하지 않도록 먼저 갱신
+            self._checked_at = now
+        
+        try:
+            version = CacheVersion.current(self.VERSION_NAME)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Material index version check error: {str(e)}")
+            return
+        
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    logger.info(f"Material index invalidated: version {self._version} -> {version}")
+                self._indexes.clear()
+                self._generation += 1
+                self._version = version
+
+
+# 워커 프로세스당 하나의 색인 (자료 변경은 버전으로 전파)
+material_index = MaterialIndex()
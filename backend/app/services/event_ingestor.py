@@ -0,0 +1,236 @@
+"""
+비디오 이벤트 버퍼링 기록기
+요청 경로에서는 큐에 넣기만 하고, 백그라운드 스레드가 모아서 여러 행을 한 번에 INSERT
+"""
+from app import db
+from app.models.event_log import EventLog
+from app.models.watch_interval import WatchInterval
+from app.services.playback_coalescer import PlaybackCoalescer, COALESCED_EVENT_TYPES, CLOSING_EVENT_TYPES
+from datetime import datetime
+import atexit
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class EventIngestor:
+    """
+    워커 프로세스당 하나의 이벤트 기록기
+    
+    - enqueue: 큐(EVENT_QUEUE_MAX_SIZE)에 넣고 즉시 반환, 가득 차면 버림 (요청은 기다리지 않음)
+    - 기록: EVENT_FLUSH_BATCH_SIZE개가 모이거나 첫 이벤트 후 EVENT_FLUSH_INTERVAL_MS가 지나면
+      한 번의 다중 행 INSERT와 COMMIT으로 기록
+    - 구간 병합: 재생/일시정지/탐색 이벤트는 사용자·비디오별 시청 구간(watch_intervals)으로 합쳐
+      닫힌 구간을 이벤트와 같은 트랜잭션에 기록하고, 원본 이벤트는 EVENT_RAW_SAMPLE_RATE 비율만 남김
+    - 종료: 워커 프로세스가 끝날 때(atexit) 남은 이벤트와 열린 구간을 모두 기록
+    """
+    
+    def __init__(self, app):
+        """
+        Args:
+            app: Flask 애플리케이션 (DB 작업 시 앱 컨텍스트 생성용)
+        """
+        self.app = app
+        self.pid = os.getpid()
+        self.max_queue_size = app.config.get('EVENT_QUEUE_MAX_SIZE', 10000)
+        self.batch_size = app.config.get('EVENT_FLUSH_BATCH_SIZE', 500)
+        self.flush_interval = app.config.get('EVENT_FLUSH_INTERVAL_MS', 1000) / 1000
+        self.raw_sample_rate = app.config.get('EVENT_RAW_SAMPLE_RATE', 1.0)
+        self._coalescer = PlaybackCoalescer(
+            window_seconds=app.config.get('EVENT_COALESCE_WINDOW_SECONDS', 30),
+            max_interval_seconds=app.config.get('EVENT_COALESCE_MAX_INTERVAL_SECONDS', 3600)
+        ) if app.config.get('EVENT_COALESCE_ENABLED', True) else None
+        
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {
+            'enqueued': 0,
+            'dropped': 0,
+            'written': 0,
+            'failed': 0,
+            'flushes': 0,
+            'coalesced': 0,
+            'sampled_out': 0,
+            'intervals_written': 0,
+            'intervals_failed': 0
+        }
+        self._flush_total_ms = 0
+        self._flush_max_ms = 0
+        self._flush_last_ms = None
+        
+        self._thread = threading.Thread(target=self._run, name='event-ingestor', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def enqueue(self, user_id: int, video_id: int, event_type: str, event_data: dict,
+                ip_address: str, user_agent: str, created_at: datetime = None) -> bool:
+        """
+        이벤트 기록 요청 (즉시 반환)
+        
+        Args:
+            event_data: 이벤트 데이터 (재생 위치 등 자주 조회하는 필드는 별도 컬럼으로 승격)
+            created_at: 발생 시각 (없으면 지금)
+        
+        Returns:
+            bool: 큐에 넣었는지 여부 (가득 찼거나 종료 중이면 False)
+        """
+        if self._stopping.is_set():
+            self._incr('dropped')
+            return False
+        
+        row = {
+            'user_id': user_id,
+            'video_id': video_id,
+            'event_type': event_type,
+            'event_data': event_data,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'created_at': created_at or datetime.utcnow(),
+            **EventLog.promote(event_type, event_data)
+        }
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._incr('dropped')
+            return False
+        self._incr('enqueued')
+        return True
+    
+    def close(self, timeout: float = 10.0) -> None:
+        """남은 이벤트를 기록하고 스레드 종료 (여러 번 호출해도 안전)"""
+        if self._stopping.is_set() or self.pid != os.getpid():
+            return
+        self._stopping.set()
+        try:
+            # 다음 이벤트를 기다리는 기록 스레드를 바로 깨움 (큐가 가득 찼으면 이미 깨어 있음)
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error(f"Event ingestor did not finish flushing: queued={self._queue.qsize()}")
+    
+    def _run(self):
+        while True:
+            try:
+                # 종료 중에는 기다리지 않고 남은 이벤트만 꺼냄
+                if self._stopping.is_set():
+                    first = self._queue.get_nowait()
+                else:
+                    first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # 이벤트가 없어도 기한이 지난 구간은 닫아서 기록 (종료 중이면 모두 닫음)
+                if self._coalescer is not None:
+                    intervals = self._coalescer.sweep(force=self._stopping.is_set())
+                    if intervals:
+                        self._flush([], intervals)
+                if self._stopping.is_set():
+                    return
+                continue
+            if first is None:
+                # close()가 넣은 종료 신호
+                continue
+            
+            # 첫 이벤트 이후 배치 크기나 시간 기준에 닿을 때까지 모음 (종료 중이면 기다리지 않음)
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0 or self._stopping.is_set():
+                        row = self._queue.get_nowait()
+                    else:
+                        row = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is not None:
+                    batch.append(row)
+            
+            self._flush(*self._coalesce(batch))
+    
+    def _coalesce(self, batch):
+        """재생 이벤트를 구간에 합치고 (기록할 이벤트, 닫힌 구간) 반환"""
+        if self._coalescer is None:
+            return batch, []
+        
+        events, intervals = [], []
+        coalesced = sampled_out = 0
+        for row in batch:
+            event_type = row['event_type']
+            if event_type in COALESCED_EVENT_TYPES or event_type in CLOSING_EVENT_TYPES:
+                intervals.extend(self._coalescer.add(row))
+                coalesced += 1
+                if event_type in COALESCED_EVENT_TYPES and random.random() >= self.raw_sample_rate:
+                    sampled_out += 1
+                    continue
+            events.append(row)
+        intervals.extend(self._coalescer.sweep())
+        
+        with self._lock:
+            self._stats['coalesced'] += coalesced
+            self._stats['sampled_out'] += sampled_out
+        return events, intervals
+    
+    def _flush(self, events, intervals):
+        if not events and not intervals:
+            return
+        
+        started_at = time.monotonic()
+        try:
+            with self.app.app_context():
+                try:
+                    # executemany는 다중 행 INSERT로 묶여 한 번에 전송됨 (insertmanyvalues)
+                    if events:
+                        db.session.execute(db.insert(EventLog), events)
+                    if intervals:
+                        db.session.execute(db.insert(WatchInterval), intervals)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+        except Exception as e:
+            logger.error(f"Event flush error: events={len(events)}, intervals={len(intervals)}, error={str(e)}")
+            with self._lock:
+                self._stats['failed'] += len(events)
+                self._stats['intervals_failed'] += len(intervals)
+            return
+        
+        latency_ms = int((time.monotonic() - started_at) * 1000)
+        with self._lock:
+            self._stats['written'] += len(events)
+            self._stats['intervals_written'] += len(intervals)
+            self._stats['flushes'] += 1
+            self._flush_total_ms += latency_ms
+            self._flush_max_ms = max(self._flush_max_ms, latency_ms)
+            self._flush_last_ms = latency_ms
+    
+    def _incr(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+    
+    def get_stats(self):
+        """기록기 상태 조회 (큐 깊이, 버린 이벤트 수, 병합/표본 추출 현황, 기록 지연 시간)"""
+        with self._lock:
+            stats = dict(self._stats)
+            flushes = stats['flushes']
+            stats.update({
+                'pid': self.pid,
+                'queued': self._queue.qsize(),
+                'max_queue_size': self.max_queue_size,
+                'batch_size': self.batch_size,
+                'flush_interval_ms': int(self.flush_interval * 1000),
+                'coalesce_enabled': self._coalescer is not None,
+                'open_intervals': self._coalescer.open_count if self._coalescer is not None else 0,
+                'raw_sample_rate': self.raw_sample_rate,
+                'avg_batch': round(stats['written'] / flushes, 1) if flushes else None,
+                'flush_latency_avg_ms': int(self._flush_total_ms / flushes) if flushes else None,
+                'flush_latency_max_ms': self._flush_max_ms if flushes else None,
+                'flush_latency_last_ms': self._flush_last_ms
+            })
+        return stats
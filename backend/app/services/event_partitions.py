@@ -0,0 +1,282 @@
+"""
+event_logs 월별 파티션 관리 (PostgreSQL 선언적 파티셔닝)
+미래 파티션을 미리 만들고, 보관 기간이 지난 파티션은 DELETE 대신 분리(DETACH)하거나 통째로 삭제
+"""
+from app import db
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = 'event_logs'
+DEFAULT_PARTITION = 'event_logs_default'
+LEGACY_TABLE = 'event_logs_legacy'  # 파티셔닝 마이그레이션 전의 테이블 (migrate_legacy로 옮긴 뒤 삭제)
+_COLUMNS = (
+    'id, user_id, video_id, event_type, event_data, playback_position, duration, scaffolding_id, '
+    'ip_address, user_agent, created_at'
+)
+_PARTITION_PATTERN = re.compile(r'^event_logs_p(\d{4})_(\d{2})$')
+
+
+def month_start(value) -> date:
+    """해당 시각이 속한 달의 1일"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """월 단위 이동 (month는 1일)"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """월별 파티션 이름 (event_logs_p2026_03)"""
+    return f'{PARENT_TABLE}_p{month.year:04d}_{month.month:02d}'
+
+
+def _partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_PATTERN.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def retention_cutoff(retention_months: int, now: datetime) -> date:
+    """보관할 가장 오래된 달 (이번 달 포함 retention_months개월)"""
+    return add_months(month_start(now), -(retention_months - 1))
+
+
+def expired_partitions(names, cutoff: date) -> List[str]:
+    """월 파티션 이름 중 cutoff보다 이전 달의 것 (오래된 순, 기본 파티션 등 다른 이름은 제외)"""
+    return sorted(name for name in names if _partition_month(name) and _partition_month(name) < cutoff)
+
+
+class EventPartitions:
+    """
+    event_logs 파티션 관리
+    
+    - ensure: 이번 달부터 months_ahead개월 뒤까지 월별 파티션 생성 (이미 있으면 건너뜀)
+    - apply_retention: 보관 기간(retention_months)보다 오래된 파티션을 분리하고, drop이면 삭제
+    - 범위 밖 시각의 이벤트는 기본 파티션(event_logs_default)에 들어가므로 기록은 실패하지 않지만,
+      기본 파티션에 행이 있으면 그 범위의 월 파티션을 만들 수 없으므로 list로 확인
+    
+    PostgreSQL 전용이며, 다른 DB에서는 에러 메시지를 반환합니다.
+    """
+    
+    @staticmethod
+    def is_supported() -> bool:
+        """event_logs가 파티션 테이블인지 여부"""
+        if db.session.get_bind().dialect.name != 'postgresql':
+            return False
+        return bool(db.session.execute(db.text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"
+        ), {'table': PARENT_TABLE}).scalar())
+    
+    @staticmethod
+    def list_partitions() -> Tuple[Optional[List[dict]], Optional[str]]:
+        """
+        연결된 파티션 목록 (월 순서, 기본 파티션은 마지막)
+        
+        Returns:
+            (partitions, error): [{'name', 'month', 'estimated_rows', 'size_bytes'}]
+                estimated_rows는 통계 기반 추정치 (ANALYZE 전에는 -1 또는 0)
+        """
+        try:
+            if not EventPartitions.is_supported():
+                return None, 'event_logs 파티션은 PostgreSQL에서 마이그레이션 후에만 지원됩니다'
+            
+            rows = db.session.execute(db.text("""
+                SELECT c.relname AS name, c.reltuples::bigint AS estimated_rows,
+                       pg_total_relation_size(c.oid) AS size_bytes
+                FROM pg_inherits AS i
+                JOIN pg_class AS c ON c.oid = i.inhrelid
+                WHERE i.inhparent = to_regclass(:table)
+            """), {'table': PARENT_TABLE}).all()
+            
+            partitions = []
+            for row in rows:
+                month = _partition_month(row.name)
+                partitions.append({
+                    'name': row.name,
+                    'month': month.strftime('%Y-%m') if month else None,
+                    'estimated_rows': row.estimated_rows,
+                    'size_bytes': row.size_bytes
+                })
+            partitions.sort(key=lambda p: (p['month'] is None, p['month'] or '', p['name']))
+            return partitions, None
+        
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"List event partitions error: {str(e)}")
+            return None, '파티션 조회 중 오류가 발생했습니다'
+    
+    @staticmethod
+    def ensure(months_ahead: int, now: datetime = None) -> Tuple[Optional[List[str]], Optional[str]]:
+        """
+        이번 달부터 months_ahead개월 뒤까지 월별 파티션 생성
+        
+        Args:
+            months_ahead: 미리 만들 미래 개월 수
+            now: 기준 시각 (없으면 지금, UTC)
+        
+        Returns:
+            (created, error): 새로 만든 파티션 이름 목록
+        """
+        try:
+            if not EventPartitions.is_supported():
+                return None, 'event_logs 파티션은 PostgreSQL에서 마이그레이션 후에만 지원됩니다'
+            
+            existing = {
+                row.relname for row in db.session.execute(db.text("""
+                    SELECT c.relname FROM pg_inherits AS i
+                    JOIN pg_class AS c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = to_regclass(:table)
+                """), {'table': PARENT_TABLE}).all()
+            }
+            
+            created = []
+            first = month_start(now or datetime.utcnow())
+            for offset in range(months_ahead + 1):
+                month = add_months(first, offset)
+                name = partition_name(month)
+                if name in existing:
+                    continue
+                # 인덱스(BRIN 포함)는 부모 테이블의 파티션 인덱스에서 자동으로 만들어짐
+                db.session.execute(db.text(
+                    f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                ))
+                db.session.commit()
+                created.append(name)
+                logger.info(f"Event partition created: {name}")
+            
+            return created, None
+        
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Ensure event partitions error: {str(e)}")
+            return None, f'파티션 생성 중 오류가 발생했습니다 (기본 파티션에 해당 월의 행이 있는지 확인): {str(e)}'
+    
+    @staticmethod
+    def apply_retention(retention_months: int, drop: bool = False,
+                        now: datetime = None) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        보관 기간이 지난 월 파티션 분리/삭제 (행 단위 DELETE 없음)
+        
+        이번 달을 포함해 retention_months개월만 남기고 그 이전 달의 파티션을 분리합니다.
+        분리된 테이블은 백업(pg_dump -t) 후 drop=True로 다시 실행하면 삭제됩니다.
+        
+        Args:
+            retention_months: 보관할 개월 수 (1 이상)
+            drop: True면 분리한 파티션과 이전에 분리해 둔 테이블까지 삭제
+            now: 기준 시각 (없으면 지금, UTC)
+        
+        Returns:
+            (result, error): {'cutoff', 'detached': [...], 'dropped': [...]}
+        """
+        if retention_months < 1:
+            return None, '보관 기간은 1개월 이상이어야 합니다'
+        
+        try:
+            if not EventPartitions.is_supported():
+                return None, 'event_logs 파티션은 PostgreSQL에서 마이그레이션 후에만 지원됩니다'
+            
+            cutoff = retention_cutoff(retention_months, now or datetime.utcnow())
+            rows = db.session.execute(db.text("""
+                SELECT c.relname AS name, c.relispartition AS attached
+                FROM pg_class AS c
+                JOIN pg_namespace AS n ON n.oid = c.relnamespace
+                WHERE c.relkind IN ('r', 'p') AND n.nspname = current_schema()
+                  AND c.relname LIKE :pattern
+            """), {'pattern': f'{PARENT_TABLE}\\_p%'}).all()
+            
+            attached = {row.name: row.attached for row in rows}
+            
+            detached, dropped = [], []
+            for name in expired_partitions(attached, cutoff):
+                if attached[name]:
+                    # 부모 테이블 잠금을 오래 기다려 기록을 막지 않도록 제한
+                    db.session.execute(db.text("SET LOCAL lock_timeout = '5s'"))
+                    db.session.execute(db.text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+                    db.session.commit()
+                    detached.append(name)
+                    logger.info(f"Event partition detached: {name}")
+                if drop:
+                    db.session.execute(db.text(f"DROP TABLE {name}"))
+                    db.session.commit()
+                    dropped.append(name)
+                    logger.info(f"Event partition dropped: {name}")
+            
+            return {'cutoff': cutoff.isoformat(), 'detached': detached, 'dropped': dropped}, None
+        
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Event partition retention error: {str(e)}")
+            return None, f'파티션 정리 중 오류가 발생했습니다: {str(e)}'
+    
+    @staticmethod
+    def migrate_legacy(batch_size: int) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        파티셔닝 마이그레이션 전 테이블(event_logs_legacy)의 행을 한 배치만 파티션 테이블로 이동
+        
+        id 순으로 batch_size개를 지우면서 같은 문장에서 옮기고 배치마다 커밋하므로,
+        중간에 멈춰도 다시 실행하면 남은 행부터 이어서 옮깁니다. 남은 행이 없으면 테이블을 삭제합니다.
+        
+        Args:
+            batch_size: 한 번에 옮길 행 수
+        
+        Returns:
+            (result, error): {'moved': 옮긴 행 수, 'done': 기존 테이블을 삭제했는지 여부}
+        """
+        try:
+            if not EventPartitions.is_supported():
+                return None, 'event_logs 파티션은 PostgreSQL에서 마이그레이션 후에만 지원됩니다'
+            if db.session.execute(db.text("SELECT to_regclass(:table)"), {'table': LEGACY_TABLE}).scalar() is None:
+                return {'moved': 0, 'done': True}, None
+            
+            # created_at이 없는 과거 행은 옮기는 시각으로 채움 (파티션 키는 NOT NULL)
+            moved = db.session.execute(db.text(f"""
+                WITH batch AS (
+                    DELETE FROM {LEGACY_TABLE}
+                    WHERE id IN (SELECT id FROM {LEGACY_TABLE} ORDER BY id LIMIT :limit)
+                    RETURNING {_COLUMNS}
+                )
+                INSERT INTO {PARENT_TABLE} ({_COLUMNS})
+                SELECT id, user_id, video_id, event_type, event_data, playback_position, duration, scaffolding_id,
+                       ip_address, user_agent, COALESCE(created_at, (now() AT TIME ZONE 'utc'))
+                FROM batch
+            """), {'limit': batch_size}).rowcount
+            db.session.commit()
+            
+            if moved:
+                return {'moved': moved, 'done': False}, None
+            
+            db.session.execute(db.text(f"DROP TABLE {LEGACY_TABLE}"))
+            db.session.execute(db.text(f"ANALYZE {PARENT_TABLE}"))
+            db.session.commit()
+            logger.info(f"Legacy event table migrated and dropped: {LEGACY_TABLE}")
+            return {'moved': 0, 'done': True}, None
+        
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Legacy event migration error: {str(e)}")
+            return None, f'기존 이벤트 이전 중 오류가 발생했습니다: {str(e)}'
+    
+    @staticmethod
+    def estimate_rows() -> Optional[int]:
+        """
+        event_logs 전체 행 수 추정치 (파티션 통계 합계, 전체 스캔 없음)
+        
+        Returns:
+            int: 추정 행 수, 파티션 테이블이 아니거나 통계가 없으면 None
+        """
+        if not EventPartitions.is_supported():
+            return None
+        total = db.session.execute(db.text("""
+            SELECT SUM(GREATEST(c.reltuples, 0))::bigint, BOOL_AND(c.reltuples >= 0)
+            FROM pg_inherits AS i
+            JOIN pg_class AS c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:table)
+        """), {'table': PARENT_TABLE}).one()
+        # 한 번도 ANALYZE되지 않은 파티션이 있으면(reltuples = -1) 추정치를 쓰지 않음
+        return int(total[0]) if total[0] is not None and total[1] else None
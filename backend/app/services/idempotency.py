@@ -0,0 +1,266 @@
+"""
+메시지 전송 멱등성 처리
+같은 Idempotency-Key로 다시 들어온 요청은 LLM을 다시 호출하지 않고 처음 요청의 응답을 돌려줌
+"""
+from app import db
+from app.models.idempotency_key import IdempotencyKey
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from typing import Optional, Tuple
+import hashlib
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENCY_KEY_ERROR = 'Idempotency-Key가 올바르지 않습니다'
+IDEMPOTENCY_MISMATCH_ERROR = '다른 요청에 이미 사용된 Idempotency-Key입니다'
+IDEMPOTENCY_IN_PROGRESS_ERROR = '같은 요청을 아직 처리 중입니다. 잠시 후 다시 시도해주세요.'
+
+# 다른 워커 프로세스가 처리 중인 요청의 완료 여부 확인 주기 (초)
+_POLL_SECONDS = 0.25
+
+
+def request_hash(session_id: int, message: str) -> str:
+    """같은 키로 다른 내용을 보냈는지 확인하기 위한 요청 해시"""
+    return hashlib.sha256(f'{session_id}|{message}'.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class _Flight:
+    request_hash: str
+    started_at: float = field(default_factory=time.monotonic)
+    done: threading.Event = field(default_factory=threading.Event)
+    response: Optional[dict] = None
+
+
+class IdempotencyClaim:
+    """처음 들어온 요청이 가진 처리 권한 (complete 또는 abandon을 한 번만 호출)"""
+    
+    def __init__(self, guard, user_id: int, key: str, flight: _Flight):
+        self._guard = guard
+        self.user_id = user_id
+        self.key = key
+        self._flight = flight
+        self._finished = False
+    
+    def complete(self, response: dict) -> None:
+        """응답 저장 (보관 기간 동안 같은 키의 재요청에 그대로 반환)"""
+        if not self._finished:
+            self._finished = True
+            self._guard._complete(self, response)
+    
+    def abandon(self) -> None:
+        """처리 실패: 기록을 지워 같은 키로 다시 시도할 수 있게 함"""
+        if not self._finished:
+            self._finished = True
+            self._guard._abandon(self)
+
+
+class IdempotencyGuard:
+    """
+    Idempotency-Key 처리기
+    
+    - 같은 프로세스의 동시 중복 요청: 처음 요청의 완료를 기다려 같은 응답을 받음 (single-flight)
+    - 다른 워커 프로세스의 중복 요청: idempotency_keys 행을 먼저 만든 쪽만 처리하고,
+      나머지는 행이 completed가 될 때까지 기다렸다가 저장된 응답을 받음
+    - 완료 후 재전송: IDEMPOTENCY_TTL_SECONDS 동안 저장된 응답을 반환
+    - 실패한 요청은 기록을 지워 같은 키로 다시 시도할 수 있음
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}  # (user_id, key) -> _Flight
+        self._stats = {
+            'claimed': 0,
+            'coalesced': 0,
+            'replayed': 0,
+            'conflicts': 0,
+            'timeouts': 0
+        }
+    
+    def begin(self, user_id: int, key: str, session_id: int,
+              message: str) -> Tuple[Optional[IdempotencyClaim], Optional[dict], Optional[str]]:
+        """
+        요청 처리 권한 획득 또는 저장된 응답 조회
+        
+        같은 키의 요청이 처리 중이면 끝날 때까지 (최대 IDEMPOTENCY_WAIT_SECONDS) 기다립니다.
+        
+        Returns:
+            (claim, response, error): 처음 요청이면 claim, 이미 처리된 요청이면 저장된 응답,
+            실패 시 에러 메시지
+        """
+        key = (key or '').strip()
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return None, None, IDEMPOTENCY_KEY_ERROR
+        
+        fingerprint = request_hash(session_id, message)
+        lock_seconds = current_app.config.get('IDEMPOTENCY_LOCK_SECONDS', 180)
+        deadline = time.monotonic() + current_app.config.get('IDEMPOTENCY_WAIT_SECONDS', 120)
+        flight_key = (user_id, key)
+        
+        while True:
+            # 1. 같은 프로세스에서 처리 중이면 그 결과를 기다림
+            with self._lock:
+                flight = self._flights.get(flight_key)
+                # 시작되지 않은 채 버려진 스트림 등으로 끝나지 않은 기록은 잠금 시간이 지나면 무시
+                if flight is not None and time.monotonic() - flight.started_at > lock_seconds:
+                    flight = None
+                leader = flight is None
+                if leader:
+                    flight = _Flight(request_hash=fingerprint)
+                    self._flights[flight_key] = flight
+            
+            if not leader:
+                if flight.request_hash != fingerprint:
+                    return None, None, self._conflict(user_id, key)
+                if not flight.done.wait(max(0.0, deadline - time.monotonic())):
+                    return None, None, self._timeout(user_id, key)
+                if flight.response is not None:
+                    self._count('coalesced')
+                    return None, flight.response, None
+                # 처음 요청이 실패했으면 이 요청이 다시 처리
+                continue
+            
+            # 2. 다른 워커 프로세스의 기록 확인 후 처리 권한 획득
+            try:
+                claimed, response, error = self._claim_row(
+                    user_id, key, session_id, fingerprint, lock_seconds, deadline
+                )
+            except Exception:
+                self._finish(flight_key, flight, None)
+                raise
+            
+            if claimed:
+                self._count('claimed')
+                return IdempotencyClaim(self, user_id, key, flight), None, None
+            
+            # 같은 프로세스에서 기다리던 요청도 같은 결과를 받도록 전달
+            self._finish(flight_key, flight, response)
+            return None, response, error
+    
+    def cleanup_expired(self) -> int:
+        """
+        보관 기간이 지난 기록 삭제
+        
+        Returns:
+            int: 삭제된 행 수
+        """
+        deleted = IdempotencyKey.query.filter(
+            IdempotencyKey.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+    
+    def get_stats(self):
+        """처리 현황 조회"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['inflight'] = len(self._flights)
+        return stats
+    
+    def _claim_row(self, user_id, key, session_id, fingerprint, lock_seconds, deadline):
+        while True:
+            now = datetime.utcnow()
+            row = db.session.query(
+                IdempotencyKey.request_hash,
+                IdempotencyKey.status,
+                IdempotencyKey.response,
+                IdempotencyKey.expires_at
+            ).filter_by(user_id=user_id, key=key).first()
+            
+            if row is None or row.expires_at <= now:
+                if row is not None:
+                    # 보관 기간이 지났거나 처리하던 워커가 응답 없이 종료된 기록
+                    IdempotencyKey.query.filter_by(user_id=user_id, key=key).filter(
+                        IdempotencyKey.expires_at <= now
+                    ).delete(synchronize_session=False)
+                db.session.add(IdempotencyKey(
+                    user_id=user_id,
+                    key=key,
+                    session_id=session_id,
+                    request_hash=fingerprint,
+                    status='processing',
+                    expires_at=now + timedelta(seconds=lock_seconds)
+                ))
+                try:
+                    db.session.commit()
+                    return True, None, None
+                except IntegrityError:
+                    # 다른 워커가 먼저 만든 경우 그 기록을 다시 확인
+                    db.session.rollback()
+                    continue
+            
+            if row.request_hash != fingerprint:
+                return False, None, self._conflict(user_id, key)
+            
+            if row.status == 'completed':
+                self._count('replayed')
+                return False, json.loads(row.response), None
+            
+            # 다른 워커 프로세스가 처리 중
+            if time.monotonic() >= deadline:
+                return False, None, self._timeout(user_id, key)
+            # 트랜잭션을 끝내 다음 조회에서 최신 커밋을 보도록 함
+            db.session.rollback()
+            time.sleep(_POLL_SECONDS)
+    
+    def _complete(self, claim, response):
+        ttl = current_app.config.get('IDEMPOTENCY_TTL_SECONDS', 86400)
+        try:
+            IdempotencyKey.query.filter_by(user_id=claim.user_id, key=claim.key).update({
+                'status': 'completed',
+                'response': json.dumps(response, ensure_ascii=False),
+                'expires_at': datetime.utcnow() + timedelta(seconds=ttl)
+            }, synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Idempotency key complete error: user={claim.user_id}, error={str(e)}")
+        finally:
+            self._finish((claim.user_id, claim.key), claim._flight, response)
+    
+    def _abandon(self, claim):
+        try:
+            db.session.rollback()
+            IdempotencyKey.query.filter_by(
+                user_id=claim.user_id,
+                key=claim.key,
+                status='processing'
+            ).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Idempotency key release error: user={claim.user_id}, error={str(e)}")
+        finally:
+            self._finish((claim.user_id, claim.key), claim._flight, None)
+    
+    def _finish(self, flight_key, flight, response):
+        with self._lock:
+            if self._flights.get(flight_key) is flight:
+                del self._flights[flight_key]
+        flight.response = response
+        flight.done.set()
+    
+    def _conflict(self, user_id, key):
+        self._count('conflicts')
+        logger.warning(f"Idempotency key reused with different request: user={user_id}, key={key}")
+        return IDEMPOTENCY_MISMATCH_ERROR
+    
+    def _timeout(self, user_id, key):
+        self._count('timeouts')
+        logger.warning(f"Idempotency key wait timed out: user={user_id}, key={key}")
+        return IDEMPOTENCY_IN_PROGRESS_ERROR
+    
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+
+# 워커 프로세스당 하나 (프로세스 간 중복은 idempotency_keys 테이블로 판별)
+idempotency_guard = IdempotencyGuard()
@@ -0,0 +1,362 @@
+"""
+LLM 호출 스케줄러
+공급자의 분당 요청 수(RPM)/토큰 수(TPM) 예산 안에서만 호출을 내보내고,
+예산을 넘는 요청은 사용자별 대기열에 넣어 라운드 로빈으로 공정하게 처리
+"""
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from limits import RateLimitItemPerSecond
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from typing import Callable, Optional
+import asyncio
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+QUEUE_TIMEOUT_ERROR = '요청이 많아 AI 응답 대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.'
+
+# 사용자 없이 호출하는 작업(대화 요약 등)의 대기열 키
+SYSTEM_LANE = 'system'
+
+
+@dataclass(frozen=True)
+class LLMRequest:
+    """스케줄러에 제출할 LLM 호출 정보"""
+    user_id: Optional[int]
+    tokens: int  # 프롬프트 추정치 + 최대 출력 토큰 (공급자 TPM 계산 방식과 같음)
+    tag: Optional[str] = None  # 대기 순서 조회용 식별자 (예: ChatJob ID)
+    
+    @property
+    def lane(self):
+        return self.user_id if self.user_id is not None else SYSTEM_LANE
+
+
+class Ticket:
+    """대기열 항목 (허가되면 wait()가 True를 반환)"""
+    
+    def __init__(self, request: LLMRequest, on_grant: Optional[Callable[[], None]] = None):
+        self.request = request
+        self.enqueued_at = time.monotonic()
+        self.granted_at = None
+        self._event = threading.Event()
+        self._on_grant = on_grant
+    
+    @property
+    def granted(self):
+        return self._event.is_set()
+    
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+    
+    def _grant(self):
+        self.granted_at = time.monotonic()
+        self._event.set()
+        if self._on_grant:
+            self._on_grant()
+
+
+class LLMScheduler:
+    """
+    공급자 예산 기반 LLM 호출 스케줄러
+    
+    - 예산: LLM_BUDGET_WINDOW_SECONDS 단위 고정 창으로 나눈 RPM/TPM 예산을 Flask-Limiter와 같은
+      저장소(운영 환경은 Redis)에 기록하므로 워커 프로세스와 인스턴스가 하나의 예산을 나눠 씀
+    - 공정성: 사용자별 FIFO 대기열을 라운드 로빈으로 돌며 허가 (한 사용자가 여러 요청을 보내도
+      다른 사용자의 요청이 그 뒤로 밀리지 않음)
+    - 공급자 429: 요청 스레드에서 잠자는 대신 스케줄러 전체를 잠시 멈추고 요청을 대기열 맨 앞에 다시 넣음
+    """
+    
+    def __init__(self, config):
+        """
+        Args:
+            config: Flask 설정 객체
+        """
+        self.pid = os.getpid()
+        self.window_seconds = max(1, config.get('LLM_BUDGET_WINDOW_SECONDS', 10))
+        self.rpm_limit = config.get('LLM_RPM_LIMIT', 500)
+        self.tpm_limit = config.get('LLM_TPM_LIMIT', 200000)
+        self.queue_timeout = config.get('LLM_QUEUE_TIMEOUT_SECONDS', 60)
+        
+        # 분당 예산을 짧은 창으로 나눠 창 경계에서 한꺼번에 몰리는 양을 줄임
+        self._request_item = RateLimitItemPerSecond(
+            max(1, self.rpm_limit * self.window_seconds // 60), self.window_seconds
+        )
+        self._token_item = RateLimitItemPerSecond(
+            max(1, self.tpm_limit * self.window_seconds // 60), self.window_seconds
+        )
+        storage_url = config.get('LLM_BUDGET_STORAGE_URL') or config.get('RATELIMIT_STORAGE_URL') or 'memory://'
+        self._limiter = FixedWindowRateLimiter(storage_from_string(storage_url))
+        
+        self._cond = threading.Condition()
+        self._lanes = OrderedDict()  # lane -> deque(Ticket), 맨 앞 lane이 다음 차례
+        self._tags = {}  # tag -> Ticket
+        self._paused_until = 0.0
+        self._budget_wait_until = 0.0  # 예산 부족으로 거절된 뒤 다음 창까지 차감을 다시 시도하지 않음
+        self._thread = None
+        self._stats = {
+            'admitted': 0,
+            'queued': 0,
+            'timeouts': 0,
+            'provider_rate_limits': 0,
+            'budget_errors': 0
+        }
+        self._wait_total_ms = 0.0
+        self._wait_max_ms = 0.0
+    
+    def enqueue(self, request: LLMRequest, front=False, on_grant=None) -> Ticket:
+        """
+        대기열에 요청 추가 (즉시 반환)
+        
+        Args:
+            request: LLM 호출 정보
+            front: True면 해당 사용자 대기열과 라운드 로빈 순서의 맨 앞에 추가 (429 후 재시도)
+            on_grant: 허가 시 디스패처 스레드에서 호출할 콜백
+        """
+        ticket = Ticket(request, on_grant)
+        with self._cond:
+            self._ensure_dispatcher()
+            lane = self._lanes.setdefault(request.lane, deque())
+            if front:
+                lane.appendleft(ticket)
+                self._lanes.move_to_end(request.lane, last=False)
+            else:
+                lane.append(ticket)
+            if request.tag:
+                self._tags[request.tag] = ticket
+            # 앞선 대기 요청이 있거나 일시 정지 중이면 바로 나가지 못함
+            if len(self._lanes) > 1 or len(lane) > 1 or self._blocked_for(time.monotonic()):
+                self._stats['queued'] += 1
+            self._cond.notify()
+        return ticket
+    
+    def cancel(self, ticket: Ticket) -> bool:
+        """
+        대기 중인 요청 취소
+        
+        Returns:
+            bool: 취소되었으면 True (이미 허가된 경우 False)
+        """
+        with self._cond:
+            if ticket.granted:
+                return False
+            self._remove(ticket)
+            return True
+    
+    def acquire(self, request: LLMRequest, front=False) -> Ticket:
+        """
+        예산이 허락할 때까지 대기 (요청 스레드용)
+        
+        Raises:
+            Exception: LLM_QUEUE_TIMEOUT_SECONDS 안에 허가되지 않은 경우
+        """
+        ticket = self.enqueue(request, front=front)
+        if not ticket.wait(self.queue_timeout):
+            self.timeout(ticket)
+        return ticket
+    
+    async def aacquire(self, request: LLMRequest, front=False) -> Ticket:
+        """
+        예산이 허락할 때까지 대기 (ChatExecutor 이벤트 루프용, 루프를 막지 않음)
+        
+        Raises:
+            Exception: LLM_QUEUE_TIMEOUT_SECONDS 안에 허가되지 않은 경우
+        """
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+        
+        def on_grant():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+        
+        ticket = self.enqueue(request, front=front, on_grant=on_grant)
+        try:
+            await asyncio.wait_for(granted, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timeout(ticket)
+        except asyncio.CancelledError:
+            # 작업이 취소된 경우 대기열 자리를 남기지 않음
+            self.cancel(ticket)
+            raise
+        return ticket
+    
+    def timeout(self, ticket: Ticket):
+        """
+        대기 시간 초과 처리 (시간 초과와 허가가 동시에 일어난 경우 허가된 것으로 처리)
+        
+        Raises:
+            Exception: 대기열에서 제거된 경우
+        """
+        if not self.cancel(ticket):
+            return
+        with self._cond:
+            self._stats['timeouts'] += 1
+        logger.warning(f"LLM queue timeout: lane={ticket.request.lane}, tokens={ticket.request.tokens}")
+        raise Exception(QUEUE_TIMEOUT_ERROR)
+    
+    def position(self, ticket: Ticket) -> int:
+        """
+        대기 순서 (1이면 다음 차례, 0이면 허가되었거나 대기열에 없음)
+        
+        라운드 로빈이므로 사용자 대기열의 k번째 요청은 k번째 라운드에 처리되며,
+        그 앞에는 각 사용자가 그 라운드까지 보낼 수 있는 요청들이 있습니다.
+        """
+        with self._cond:
+            lane = self._lanes.get(ticket.request.lane)
+            if ticket.granted or not lane or ticket not in lane:
+                return 0
+            
+            rounds = lane.index(ticket)
+            position = rounds + 1
+            before = True
+            for key, other in self._lanes.items():
+                if key == ticket.request.lane:
+                    before = False
+                    continue
+                position += min(len(other), rounds + 1 if before else rounds)
+            return position
+    
+    def position_of(self, tag: str) -> Optional[int]:
+        """태그로 대기 순서 조회 (이 프로세스의 대기열에 없으면 None)"""
+        with self._cond:
+            ticket = self._tags.get(tag)
+        if ticket is None:
+            return None
+        return self.position(ticket)
+    
+    def pause(self, seconds: float):
+        """공급자 429 수신 시 모든 호출을 잠시 멈춤 (429 폭주 방지)"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._stats['provider_rate_limits'] += 1
+            self._cond.notify()
+        logger.warning(f"LLM scheduler paused for {seconds:.1f}s after provider rate limit")
+    
+    def get_stats(self):
+        """스케줄러 상태 조회"""
+        with self._cond:
+            stats = dict(self._stats)
+            waiting = sum(len(lane) for lane in self._lanes.values())
+            admitted = stats['admitted']
+            stats.update({
+                'pid': self.pid,
+                'rpm_limit': self.rpm_limit,
+                'tpm_limit': self.tpm_limit,
+                'window_seconds': self.window_seconds,
+                'waiting': waiting,
+                'waiting_users': len(self._lanes),
+                'paused_for_ms': max(0, int((self._paused_until - time.monotonic()) * 1000)),
+                'queue_wait_avg_ms': round(self._wait_total_ms / admitted, 1) if admitted else 0,
+                'queue_wait_max_ms': round(self._wait_max_ms, 1)
+            })
+        
+        # 현재 창의 남은 예산 (저장소 오류 시 생략)
+        try:
+            stats['remaining_requests'] = self._limiter.get_window_stats(self._request_item, 'llm-requests').remaining
+            stats['remaining_tokens'] = self._limiter.get_window_stats(self._token_item, 'llm-tokens').remaining
+        except Exception as e:
+            logger.debug(f"LLM budget stats unavailable: {e}")
+        return stats
+    
+    def _ensure_dispatcher(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='llm-scheduler', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                ticket = self._next_ticket()
+            
+            # 예산 저장소(Redis 등) 호출 중에도 enqueue/cancel/position이 막히지 않도록 락 밖에서 차감
+            delay = self._consume(ticket.request.tokens)
+            
+            with self._cond:
+                if delay:
+                    self._budget_wait_until = time.monotonic() + delay
+                else:
+                    self._grant(ticket)
+    
+    def _next_ticket(self):
+        """
+        다음 차례(라운드 로빈 맨 앞 lane의 첫 요청)가 나갈 수 있을 때까지 대기 (락을 잡은 상태에서 호출)
+        
+        Returns:
+            Ticket: 예산을 차감할 요청 (대기열에서는 허가할 때 제거)
+        """
+        while True:
+            if not self._lanes:
+                self._cond.wait()
+                continue
+            delay = self._blocked_for(time.monotonic())
+            if delay:
+                self._cond.wait(delay)
+                continue
+            lane = next(iter(self._lanes.values()))
+            return lane[0]
+    
+    def _blocked_for(self, now):
+        """일시 정지/예산 부족으로 더 기다려야 하는 시간 (초, 없으면 0)"""
+        return max(self._paused_until - now, self._budget_wait_until - now, 0)
+    
+    def _grant(self, ticket):
+        """
+        예산을 차감한 요청 허가 (락을 잡은 상태에서 호출)
+        
+        차감하는 동안 취소/시간 초과로 대기열에서 빠진 요청이면 허가하지 않습니다
+        (이미 차감한 예산은 한 요청 이내이므로 되돌리지 않음).
+        """
+        lane_key = ticket.request.lane
+        lane = self._lanes.get(lane_key)
+        if lane is None or ticket not in lane:
+            return
+        self._remove(ticket)
+        if lane_key in self._lanes:
+            self._lanes.move_to_end(lane_key)
+        
+        wait_ms = (time.monotonic() - ticket.enqueued_at) * 1000
+        self._stats['admitted'] += 1
+        self._wait_total_ms += wait_ms
+        self._wait_max_ms = max(self._wait_max_ms, wait_ms)
+        ticket._grant()
+    
+    def _consume(self, tokens):
+        """
+        공유 예산에서 요청 1건과 토큰 차감 (락 밖에서 호출)
+        
+        test 없이 hit만 호출하므로 확인과 차감 사이에 다른 프로세스가 끼어들지 않습니다.
+        거절된 hit도 카운터를 올리지만, 이미 한도를 넘은 창이라 다음 창부터는 영향이 없습니다.
+        요청 수를 먼저 차감하므로 토큰이 부족해 거절될 때 버려지는 예산은 요청 1건입니다.
+        
+        Returns:
+            float: 예산이 부족하면 현재 창이 끝날 때까지 남은 시간 (초), 차감했으면 None
+        """
+        # 한 창의 예산보다 큰 요청도 언젠가는 나갈 수 있도록 창 예산으로 제한
+        cost = max(1, min(tokens, self._token_item.amount))
+        try:
+            if not self._limiter.hit(self._request_item, 'llm-requests'):
+                return self._reset_delay(self._request_item, 'llm-requests')
+            if not self._limiter.hit(self._token_item, 'llm-tokens', cost=cost):
+                return self._reset_delay(self._token_item, 'llm-tokens')
+        except Exception as e:
+            # 예산 저장소 장애 시 채팅을 막지 않도록 허가 (공급자 429는 pause로 처리)
+            with self._cond:
+                self._stats['budget_errors'] += 1
+            logger.error(f"LLM budget storage error: {str(e)}")
+        return None
+    
+    def _reset_delay(self, item, key):
+        reset_time = self._limiter.get_window_stats(item, key).reset_time
+        return min(max(reset_time - time.time(), 0.05), self.window_seconds)
+    
+    def _remove(self, ticket):
+        lane_key = ticket.request.lane
+        lane = self._lanes.get(lane_key)
+        if lane is not None and ticket in lane:
+            lane.remove(ticket)
+            if not lane:
+                del self._lanes[lane_key]
+        if ticket.request.tag and self._tags.get(ticket.request.tag) is ticket:
+            del self._tags[ticket.request.tag]
@@ -0,0 +1,167 @@
+"""
+모델 라우터
+질문의 복잡도에 따라 빠른 모델(FAST_MODEL_NAME)과 성능이 좋은 모델(MODEL_NAME) 중 하나를 고름
+"""
+from dataclasses import dataclass
+import importlib
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+FAST = 'fast'
+CAPABLE = 'capable'
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    """라우팅 결과"""
+    model: str
+    tier: str  # fast, capable
+    reason: str  # 선택 이유 (응답 메시지에 기록되어 모델별 통계에서 라우터 조정에 사용)
+
+
+class ModelRouter:
+    """
+    라우터 기본 클래스
+    
+    MODEL_ROUTER 설정에 'module.path:ClassName'을 지정하면 이 클래스를 상속한 라우터로 교체할 수 있습니다.
+    하위 클래스는 route만 구현하면 되고, 오류 처리와 선택 횟수 집계는 select가 담당합니다.
+    """
+    
+    def __init__(self, config):
+        """
+        Args:
+            config: Flask 설정 객체
+        """
+        self.capable_model = config['MODEL_NAME']
+        self.fast_model = config.get('FAST_MODEL_NAME') or self.capable_model
+        self._lock = threading.Lock()
+        self._counts = {}  # (model, reason) -> 선택 횟수
+    
+    def route(self, message: str, context: dict) -> ModelRoute:
+        """
+        모델 선택
+        
+        Args:
+            message: 사용자 메시지
+            context: OpenAIService.build_messages로 구성한 컨텍스트 (user_message_tokens, has_history 등)
+        """
+        raise NotImplementedError
+    
+    def select(self, message: str, context: dict) -> ModelRoute:
+        """모델 선택 (라우터 오류 시 MODEL_NAME 사용)"""
+        try:
+            route = self.route(message, context)
+        except Exception as e:
+            logger.error(f"Model router error, falling back to {self.capable_model}: {str(e)}")
+            route = self.capable('router_error')
+        
+        with self._lock:
+            key = (route.model, route.reason)
+            self._counts[key] = self._counts.get(key, 0) + 1
+        return route
+    
+    def fast(self, reason: str) -> ModelRoute:
+        return ModelRoute(model=self.fast_model, tier=FAST, reason=reason)
+    
+    def capable(self, reason: str) -> ModelRoute:
+        return ModelRoute(model=self.capable_model, tier=CAPABLE, reason=reason)
+    
+    def get_stats(self):
+        """라우터 설정과 이 프로세스의 선택 횟수 조회"""
+        with self._lock:
+            routes = [
+                {'model': model, 'reason': reason, 'count': count}
+                for (model, reason), count in sorted(self._counts.items())
+            ]
+        return {
+            'router': type(self).__name__,
+            'fast_model': self.fast_model,
+            'capable_model': self.capable_model,
+            'routes': routes
+        }
+
+
+class SingleModelRouter(ModelRouter):
+    """라우팅하지 않고 항상 MODEL_NAME 사용"""
+    
+    def route(self, message, context):
+        return self.capable('single')
+
+
+class HeuristicRouter(ModelRouter):
+    """
+    규칙 기반 라우터
+    
+    - 감사/맞장구 같은 짧은 대화, 짧은 사실 확인 질문 → 빠른 모델
+    - 긴 질문, 여러 부분으로 된 질문, 이유/원리/비교를 묻는 개념 질문, 코드/수식 → 성능이 좋은 모델
+    """
+    
+    SMALL_TALK = re.compile(
+        r'^(감사|고마|ㄱㅅ|ㅇㅋ|오케이|알겠|알았|네|넵|응|좋아|굿|thanks|thank you|thx|ok|okay|got it)',
+        re.IGNORECASE
+    )
+    CONCEPTUAL_KEYWORDS = (
+        '왜', '어떻게', '원리', '이유', '차이', '비교', '설명', '분석', '장단점', '관계', '증명', '예시', '예를 들',
+        'why', 'how', 'explain', 'compare', 'difference', 'prove'
+    )
+    CODE_OR_MATH = re.compile(r'```|\bdef |\bclass |[=<>]{2}|\d\s*[+\-*/^]\s*\d|\\frac|\\sum')
+    
+    def __init__(self, config):
+        super().__init__(config)
+        self.small_talk_max_tokens = config.get('ROUTER_SMALL_TALK_MAX_TOKENS', 12)
+        self.fast_max_tokens = config.get('ROUTER_FAST_MAX_TOKENS', 40)
+    
+    def route(self, message, context):
+        text = message.strip().lower()
+        tokens = context['user_message_tokens']
+        
+        if tokens <= self.small_talk_max_tokens and self.SMALL_TALK.match(text):
+            return self.fast('small_talk')
+        if tokens > self.fast_max_tokens:
+            return self.capable('long')
+        if text.count('?') >= 2 or '\n' in text:
+            return self.capable('multi_part')
+        if self.CODE_OR_MATH.search(text):
+            return self.capable('code_or_math')
+        if any(keyword in text for keyword in self.CONCEPTUAL_KEYWORDS):
+            return self.capable('conceptual')
+        return self.fast('short_factual')
+
+
+ROUTERS = {
+    'single': SingleModelRouter,
+    'heuristic': HeuristicRouter
+}
+
+
+def load_router(config) -> ModelRouter:
+    """
+    MODEL_ROUTER 설정으로 라우터 생성
+    
+    'single', 'heuristic' 또는 ModelRouter를 상속한 클래스 경로('package.module:ClassName')
+    
+    Raises:
+        ValueError: 설정한 라우터를 찾을 수 없거나 ModelRouter 하위 클래스가 아닌 경우
+    """
+    name = config.get('MODEL_ROUTER') or 'heuristic'
+    router_class = ROUTERS.get(name)
+    if router_class is None:
+        module_name, _, class_name = name.partition(':')
+        try:
+            router_class = getattr(importlib.import_module(module_name), class_name) if class_name else None
+        except (ImportError, AttributeError):
+            router_class = None
+        if not (isinstance(router_class, type) and issubclass(router_class, ModelRouter)):
+            raise ValueError(
+                f"MODEL_ROUTER '{name}'를 찾을 수 없습니다. "
+                "'single', 'heuristic' 또는 ModelRouter를 상속한 클래스 경로('package.module:ClassName')를 지정해주세요."
+            )
+    
+    router = router_class(config)
+    logger.info(
+        f"Model router: {type(router).__name__} (fast={router.fast_model}, capable={router.capable_model})"
+    )
+    return router
@@ -1,29 +1,105 @@
-from openai import OpenAI, APIError, APITimeoutError, RateLimitError
+from openai import (
+    OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient, DEFAULT_CONNECTION_LIMITS,
+    APIError, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+)
 from app.models.chat_message import ChatMessage
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.llm_scheduler import LLMRequest, LLMScheduler
+from app.services.model_router import load_router
+from datetime import datetime
+import asyncio
 import tiktoken
 import logging
+import os
+import threading
 import time
 
 logger = logging.getLogger(__name__)
 
+# 모델별 100만 토큰당 가격 (USD): 입력, 캐시 적중 입력, 출력
+MODEL_PRICING = {
+    'gpt-4o-mini': (0.15, 0.075, 0.60),
+    'gpt-4o': (2.50, 1.25, 10.00),
+    'gpt-4.1-nano': (0.10, 0.025, 0.40),
+    'gpt-4.1-mini': (0.40, 0.10, 1.60),
+    'gpt-4.1': (2.00, 0.50, 8.00)
+}
+DEFAULT_MODEL_PRICING = MODEL_PRICING['gpt-4o-mini']
+
 
 class OpenAIService:
+    # 요약 시 항상 원문으로 남길 최소 메시지 수 (직전 질문/답변 한 쌍)
+    SUMMARY_MIN_KEEP_MESSAGES = 2
+    
+    # 스트리밍 요청이 스케줄러 대기열에서 대기 순서를 확인하는 주기 (초)
+    QUEUE_POSITION_INTERVAL_SECONDS = 1.0
+    
+    # Chat Completions 메시지 하나당 형식 토큰 (role 등) 및 응답 시작 토큰
+    MESSAGE_OVERHEAD_TOKENS = 4
+    REPLY_PRIMING_TOKENS = 3
+    
+    # 너무 긴 메시지를 잘라낼 때 붙이는 표시
+    TRUNCATION_MARKER = '\n...(이하 생략)'
+    
     def __init__(self, config):
         """
         OpenAI 서비스 초기화
         
+        워커 프로세스당 한 번 생성되어 모든 요청 스레드가 공유합니다
+        (app.get_openai_service 참고). OpenAI/httpx 클라이언트와 tiktoken
+        인코더는 스레드 안전하므로 keep-alive 연결과 인코더를 재사용합니다.
+        
         Args:
             config: Flask 설정 객체
         """
-        self.client = OpenAI(
-            api_key=config['OPENAI_API_KEY'],
-            timeout=config.get('OPENAI_TIMEOUT', 30),
-            max_retries=config.get('OPENAI_MAX_RETRIES', 3)
+        self.pid = os.getpid()
+        self.created_at = datetime.utcnow()
+        
+        # 요청 수 집계 (httpx 이벤트 훅에서 증가)
+        self._stats_lock = threading.Lock()
+        self._requests_total = 0
+        
+        # SDK가 사용하는 HTTP 라이브러리의 Limits 클래스 (httpx를 직접 import하지 않아 SDK 버전과 어긋나지 않음)
+        self.limits = type(DEFAULT_CONNECTION_LIMITS)(
+            max_connections=config.get('OPENAI_MAX_CONNECTIONS', 20),
+            max_keepalive_connections=config.get('OPENAI_MAX_KEEPALIVE_CONNECTIONS', 10),
+            keepalive_expiry=config.get('OPENAI_KEEPALIVE_EXPIRY', 60)
         )
+        self.http_client = DefaultHttpxClient(
+            limits=self.limits,
+            event_hooks={'request': [self._on_request]}
+        )
+        self._client_options = {
+            'api_key': config['OPENAI_API_KEY'],
+            'timeout': config.get('OPENAI_TIMEOUT', 30),
+            # 재시도는 _create_completion에서만 수행 (SDK 재시도와 겹치면 시도 횟수가 곱해짐)
+            'max_retries': 0
+        }
+        self.max_retries = config.get('OPENAI_MAX_RETRIES', 2)
+        if config.get('OPENAI_BASE_URL'):
+            # OpenAI 호환 서버 사용 (예: 부하 테스트용 `python -m app.cli fake-openai`)
+            self._client_options['base_url'] = config['OPENAI_BASE_URL']
+        self.client = OpenAI(http_client=self.http_client, **self._client_options)
+        
+        # 비동기 클라이언트는 ChatExecutor 이벤트 루프에서 처음 사용할 때 생성
+        self._async_client = None
         self.model_name = config['MODEL_NAME']
         self.summary_trigger_tokens = config['SUMMARY_TRIGGER_TOKENS']
+        self.summary_target_tokens = config.get('SUMMARY_TARGET_TOKENS', self.summary_trigger_tokens // 2)
+        self.context_window_messages = config.get('CONTEXT_WINDOW_MESSAGES', 20)
         self.max_tokens_per_request = config['MAX_TOKENS_PER_REQUEST']
+        self.context_message_max_tokens = config.get('CONTEXT_MESSAGE_MAX_TOKENS', self.max_tokens_per_request // 4)
         self.max_tokens_output = config['MAX_TOKENS_OUTPUT']
+        self.tokenizer_threads = config.get('TOKENIZER_THREADS', 4)
+        
+        # 공급자 RPM/TPM 예산 안에서 사용자별로 공정하게 호출을 내보내는 스케줄러
+        self.scheduler = LLMScheduler(config)
+        
+        # 공급자 장애 시 타임아웃까지 기다리지 않고 바로 실패시키는 서킷 브레이커
+        self.breaker = CircuitBreaker(config)
+        
+        # 질문 복잡도에 따라 빠른 모델/성능이 좋은 모델을 고르는 라우터
+        self.router = load_router(config)
         
         # Token encoding
         try:
@@ -36,50 +112,493 @@ class OpenAIService:
         """Count tokens in a text string"""
         return len(self.encoding.encode(text))
     
-    def chat_completion(self, session, user_message, system_prompt):
+    def count_tokens_batch(self, texts):
+        """
+        여러 텍스트의 토큰 수를 한 번에 계산
+        
+        tiktoken의 멀티스레드 배치 인코더를 사용하므로 개별 count_tokens 호출보다 빠릅니다.
+        """
+        if not texts:
+            return []
+        encoded = self.encoding.encode_ordinary_batch(list(texts), num_threads=self.tokenizer_threads)
+        return [len(tokens) for tokens in encoded]
+    
+    def close(self):
+        """HTTP 연결 풀 종료"""
+        self.client.close()
+    
+    @property
+    def async_client(self):
+        """
+        비동기 OpenAI 클라이언트
+        
+        httpx 비동기 클라이언트는 하나의 이벤트 루프에 묶이므로
+        ChatExecutor 이벤트 루프 스레드에서만 사용해야 합니다.
+        """
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                http_client=DefaultAsyncHttpxClient(
+                    limits=self.limits,
+                    event_hooks={'request': [self._on_async_request]}
+                ),
+                **self._client_options
+            )
+        return self._async_client
+    
+    async def _on_async_request(self, request):
+        """httpx 비동기 요청 훅: 요청 수 집계"""
+        self._on_request(request)
+    
+    def _on_request(self, request):
+        """httpx 요청 훅: 요청 수 집계"""
+        with self._stats_lock:
+            self._requests_total += 1
+    
+    def get_pool_stats(self):
+        """
+        HTTP 연결 풀 상태 조회
+        
+        Returns:
+            dict: 풀 설정, 누적 요청 수, 현재 연결 수 (전체/유휴/사용 중)
+        """
+        stats = {
+            'pid': self.pid,
+            'created_at': self.created_at.isoformat(),
+            'model': self.model_name,
+            'fast_model': self.router.fast_model,
+            'encoding': self.encoding.name,
+            'max_connections': self.limits.max_connections,
+            'max_keepalive_connections': self.limits.max_keepalive_connections,
+            'keepalive_expiry': self.limits.keepalive_expiry,
+            'requests_total': self._requests_total,
+            'connections': None
+        }
+        
+        # httpcore 내부 풀 상태 (비공개 API이므로 실패해도 무시)
+        try:
+            connections = list(self.http_client._transport._pool.connections)
+            idle = sum(1 for conn in connections if conn.is_idle())
+            stats['connections'] = {
+                'total': len(connections),
+                'idle': idle,
+                'active': len(connections) - idle
+            }
+        except Exception as e:
+            logger.debug(f"Connection pool stats unavailable: {e}")
+        
+        return stats
+    
+    @staticmethod
+    def calculate_cost(prompt_tokens, completion_tokens, cached_tokens=0, model=None):
+        """
+        토큰 사용량 기반 비용 계산 (MODEL_PRICING, 날짜가 붙은 모델 이름은 기본 이름의 가격 사용)
+        
+        가격을 모르는 모델은 gpt-4o-mini 가격($0.15/$0.60 per 1M tokens, 캐시 적중 입력은 $0.075)으로 계산합니다.
+        """
+        input_price, cached_price, output_price = OpenAIService._pricing(model)
+        return (
+            ((prompt_tokens - cached_tokens) / 1_000_000 * input_price)
+            + (cached_tokens / 1_000_000 * cached_price)
+            + (completion_tokens / 1_000_000 * output_price)
+        )
+    
+    @staticmethod
+    def _pricing(model):
+        if not model:
+            return DEFAULT_MODEL_PRICING
+        if model in MODEL_PRICING:
+            return MODEL_PRICING[model]
+        # 'gpt-4o-mini-2024-07-18' → 'gpt-4o-mini' (가장 긴 접두어)
+        prefixes = [name for name in MODEL_PRICING if model.startswith(name + '-')]
+        if prefixes:
+            return MODEL_PRICING[max(prefixes, key=len)]
+        return DEFAULT_MODEL_PRICING
+    
+    def route_model(self, message, context):
+        """
+        이번 질문에 사용할 모델 선택 (context['model'], context['route_reason']에 기록)
+        
+        Args:
+            message: 사용자 메시지
+            context: build_messages로 구성한 컨텍스트
+        """
+        route = self.router.select(message, context)
+        context['model'] = route.model
+        context['route_reason'] = route.reason
+        logger.info(f"Model routed: model={route.model}, tier={route.tier}, reason={route.reason}")
+        return route
+    
+    def chat_completion(self, context):
+        """
+        채팅 완성 처리
+        
+        Args:
+            context: build_messages로 구성한 컨텍스트
+        
+        Returns:
+            dict: 응답 데이터 (content, tokens, cost, summarize_through_id, time_to_first_token_ms)
+        
+        Raises:
+            Exception: API 호출 실패 시
+        """
+        started_at = time.monotonic()
+        response = self._create_completion(
+            context['messages'],
+            self._llm_request(context),
+            **self._request_options(context)
+        )
+        
+        return self._build_result(response, context, started_at)
+    
+    async def achat_completion(self, context, queue_tag=None):
+        """
+        비동기 채팅 완성 처리 (ChatExecutor 이벤트 루프에서 실행)
+        
+        DB 접근이 필요한 컨텍스트 구성(build_messages)은 호출 측에서 미리 수행하고,
+        여기서는 API 호출만 이벤트 루프 위에서 비동기로 처리합니다.
+        
+        Args:
+            context: build_messages로 구성한 컨텍스트
+            queue_tag: 스케줄러 대기 순서 조회용 식별자 (ChatJob ID)
+        
+        Returns:
+            dict: chat_completion과 같은 형식의 응답 데이터
+        
+        Raises:
+            Exception: API 호출 실패 시
+        """
+        started_at = time.monotonic()
+        response = await self._acreate_completion(
+            context['messages'],
+            self._llm_request(context, queue_tag),
+            **self._request_options(context)
+        )
+        
+        return self._build_result(response, context, started_at)
+    
+    def _llm_request(self, context, tag=None):
+        """스케줄러에 제출할 호출 정보 (공급자와 같이 프롬프트와 최대 출력 토큰을 함께 계산)"""
+        return LLMRequest(
+            user_id=context.get('user_id'),
+            tokens=context['prompt_tokens_estimate'] + self.max_tokens_output,
+            tag=tag
+        )
+    
+    def _request_options(self, context):
+        """
+        컨텍스트별 API 파라미터
+        
+        - model: 라우터가 고른 모델 (route_model을 거치지 않았으면 MODEL_NAME)
+        - prompt_cache_key: 같은 프롬프트 앞부분을 공유하는 요청이 같은 캐시로 라우팅되도록 지정
+        """
+        options = {'model': self._model(context)}
+        if context.get('prompt_cache_key'):
+            options['prompt_cache_key'] = context['prompt_cache_key']
+        return options
+    
+    def _model(self, context):
+        return context.get('model') or self.model_name
+    
+    @staticmethod
+    def _cached_tokens(usage):
+        """usage에서 프롬프트 캐시 적중 토큰 수 추출 (없으면 0)"""
+        details = getattr(usage, 'prompt_tokens_details', None)
+        return getattr(details, 'cached_tokens', None) or 0
+    
+    def _build_result(self, response, context, started_at):
+        """API 응답 객체를 응답 데이터 dict로 변환"""
+        # Extract response
+        assistant_message = response.choices[0].message.content
+        prompt_tokens = response.usage.prompt_tokens
+        completion_tokens = response.usage.completion_tokens
+        total_tokens = response.usage.total_tokens
+        cached_tokens = self._cached_tokens(response.usage)
+        model = self._model(context)
+        latency_ms = int((time.monotonic() - started_at) * 1000)
+        
+        return {
+            'content': assistant_message,
+            'model': model,
+            'route_reason': context.get('route_reason'),
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': total_tokens,
+            'cached_tokens': cached_tokens,
+            'cost': self.calculate_cost(prompt_tokens, completion_tokens, cached_tokens, model),
+            'summarize_through_id': context['summarize_through_id'],
+            'user_message_tokens': context['user_message_tokens'],
+            # 비스트리밍 응답은 전체 완성 시점에 첫 토큰이 보이므로 전체 지연 시간과 같음
+            'time_to_first_token_ms': latency_ms,
+            'latency_ms': latency_ms
+        }
+    
+    def chat_completion_stream(self, context, should_cancel=None):
+        """
+        스트리밍 채팅 완성 처리
+        
+        스케줄러 대기열에서 기다리는 동안에는 queued 이벤트로 대기 순서를 알리고,
+        토큰이 도착하는 대로 delta 이벤트를 내보내고, 스트림이 끝나면
+        chat_completion과 같은 형식의 결과를 담은 done 이벤트를 내보냅니다.
+        
+        should_cancel()이 True가 되면 공급자 스트림을 닫아 생성을 중단하고,
+        받은 부분까지의 결과를 cancelled=True인 done 이벤트로 내보냅니다.
+        
+        Args:
+            context: build_messages로 구성한 컨텍스트
+            should_cancel: 취소 여부를 돌려주는 함수 (대기 중/청크마다 호출)
+        
+        Yields:
+            dict: {'type': 'queued', 'position': int}, {'type': 'delta', 'content': str}
+                또는 {'type': 'done', **응답 데이터}
+        
+        Raises:
+            Exception: API 호출 실패 또는 대기 시간 초과 시
         """
-        채팅 완성 처리 (요약 전달 전략 포함)
+        started_at = time.monotonic()
+        request = self._llm_request(context)
+        
+        # 브레이커가 열려 있으면 대기열에 들어가지 않고 바로 실패
+        self.breaker.ensure_closed()
+        ticket = self.scheduler.enqueue(request)
+        try:
+            last_position = None
+            while not ticket.wait(self.QUEUE_POSITION_INTERVAL_SECONDS):
+                if should_cancel and should_cancel() and self.scheduler.cancel(ticket):
+                    # 호출 전에 취소되어 사용한 토큰 없음
+                    yield self.partial_result(context, called=False)
+                    return
+                if time.monotonic() - ticket.enqueued_at >= self.scheduler.queue_timeout:
+                    self.scheduler.timeout(ticket)
+                    break
+                position = self.scheduler.position(ticket)
+                if position and position != last_position:
+                    last_position = position
+                    yield {'type': 'queued', 'position': position}
+        except GeneratorExit:
+            # 대기 중 클라이언트 연결이 끊긴 경우
+            self.scheduler.cancel(ticket)
+            raise
+        
+        stream = self._create_completion(
+            context['messages'],
+            request,
+            admitted=True,
+            stream=True,
+            stream_options={'include_usage': True},
+            **self._request_options(context)
+        )
+        
+        content_parts = []
+        time_to_first_token_ms = None
+        usage = None
+        cancelled = False
+        
+        try:
+            for chunk in stream:
+                if should_cancel and should_cancel():
+                    # 스트림을 닫으면 공급자 연결이 끊겨 생성이 중단됨 (finally)
+                    cancelled = True
+                    break
+                # include_usage 옵션 사용 시 마지막 청크에만 usage가 포함되고 choices는 비어 있음
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                
+                if time_to_first_token_ms is None:
+                    time_to_first_token_ms = int((time.monotonic() - started_at) * 1000)
+                    logger.info(f"Time to first token: {time_to_first_token_ms}ms")
+                
+                content_parts.append(delta)
+                yield {'type': 'delta', 'content': delta}
+        except APIError as e:
+            logger.error(f"Stream interrupted: {e}")
+            self.breaker.record_failure(time.monotonic() - started_at)
+            raise Exception('OpenAI API 응답 스트림이 중단되었습니다.')
+        finally:
+            stream.close()
+        
+        assistant_message = ''.join(content_parts)
+        
+        if cancelled:
+            logger.info(f"Stream cancelled after {len(content_parts)} chunks")
+            yield self.partial_result(
+                context, assistant_message, time_to_first_token_ms,
+                latency_ms=int((time.monotonic() - started_at) * 1000)
+            )
+            return
+        
+        if usage is not None:
+            prompt_tokens = usage.prompt_tokens
+            completion_tokens = usage.completion_tokens
+            cached_tokens = self._cached_tokens(usage)
+        else:
+            # usage 청크를 받지 못한 경우 로컬 토큰 계산으로 대체
+            logger.warning("Stream finished without usage data, counting tokens locally")
+            prompt_tokens = context['prompt_tokens_estimate']
+            completion_tokens = self.count_tokens(assistant_message)
+            cached_tokens = 0
+        
+        model = self._model(context)
+        yield {
+            'type': 'done',
+            'content': assistant_message,
+            'model': model,
+            'route_reason': context.get('route_reason'),
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+            'cached_tokens': cached_tokens,
+            'cost': self.calculate_cost(prompt_tokens, completion_tokens, cached_tokens, model),
+            'summarize_through_id': context['summarize_through_id'],
+            'user_message_tokens': context['user_message_tokens'],
+            'time_to_first_token_ms': time_to_first_token_ms,
+            'latency_ms': int((time.monotonic() - started_at) * 1000)
+        }
+    
+    def partial_result(self, context, content='', time_to_first_token_ms=None, called=True, latency_ms=None):
+        """
+        생성 도중 끊긴 응답의 결과 (chat_completion과 같은 형식, cancelled=True)
+        
+        공급자는 끊긴 스트림의 usage를 보내지 않으므로 프롬프트는 추정치로,
+        컴플리션은 받은 내용의 토큰 수로 계산합니다.
+        
+        Args:
+            context: build_messages로 구성한 컨텍스트
+            content: 끊기기 전까지 받은 응답
+            time_to_first_token_ms: 첫 토큰까지 걸린 시간 (받지 못했으면 None)
+            called: API를 호출했는지 여부 (대기열에서 취소되었으면 False, 사용량 0)
+            latency_ms: 요청부터 끊길 때까지 걸린 시간
+        """
+        if called:
+            prompt_tokens = context['prompt_tokens_estimate']
+            completion_tokens = self.count_tokens(content)
+        else:
+            prompt_tokens = completion_tokens = 0
+        model = self._model(context)
+        
+        return {
+            'type': 'done',
+            'content': content,
+            'model': model,
+            'route_reason': context.get('route_reason'),
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+            'cached_tokens': 0,
+            'cost': self.calculate_cost(prompt_tokens, completion_tokens, 0, model),
+            'summarize_through_id': context['summarize_through_id'],
+            'user_message_tokens': context['user_message_tokens'],
+            'time_to_first_token_ms': time_to_first_token_ms,
+            'latency_ms': latency_ms,
+            'cancelled': True
+        }
+    
+    def build_messages(self, session, user_message, system_prompt, system_prompt_tokens=None, material=None):
+        """
+        API 요청용 메시지 목록 구성 (요약 필요 여부 판단)
+        
+        요약은 워터마크(session.summary_message_id) 이후의 메시지와 요약을 합친 실제 컨텍스트가
+        SUMMARY_TRIGGER_TOKENS를 넘거나 최근 CONTEXT_WINDOW_MESSAGES개 창 밖으로 밀려난
+        메시지가 있을 때만 필요하며, SUMMARY_TARGET_TOKENS 안에 들어가는
+        최근 메시지를 제외하고 새로 밀려난 메시지만 기존 요약에 누적합니다.
+        요약 생성은 SummaryWorker가 응답 저장 후 백그라운드에서 수행합니다.
+        
+        프롬프트 크기는 MAX_TOKENS_PER_REQUEST로 제한됩니다 (_pack_history 참고).
+        단, 현재 사용자 메시지는 자르지 않으므로 SendMessageRequest의 길이 제한(2000자)으로만
+        제한되며, 이전 대화는 그만큼 줄어든 예산 안에서 채워집니다.
+        질문과 관련된 강의 자료(material)는 현재 질문 바로 앞에 넣어 앞부분의 프롬프트 캐시를 깨지 않습니다.
         
         Args:
             session: 채팅 세션
             user_message: 사용자 메시지
             system_prompt: 시스템 프롬프트
-            
+            system_prompt_tokens: 시스템 프롬프트 토큰 수 (미리 계산된 경우, 없으면 여기서 계산)
+            material: 질문과 관련된 강의 자료 (RetrievedMaterial, 없으면 None)
+        
         Returns:
-            dict: 응답 데이터 (content, tokens, cost, new_summary)
-            
-        Raises:
-            Exception: API 호출 실패 시
+            dict: 컨텍스트
+                - messages: API 메시지 목록
+                - summarize_through_id: 백그라운드 요약에 포함할 마지막 메시지 ID (요약 불필요 시 None)
+                - user_message_tokens: 현재 사용자 메시지의 토큰 수
+                - prompt_tokens_estimate: 메시지 목록 전체의 토큰 수 추정치
+                - has_history: 이전 대화(메시지 또는 요약)가 있는지 여부
+                - user_id: 세션 사용자 ID (스케줄러 공정 대기열 키)
+                - material_tokens: 포함한 강의 자료 토큰 수
         """
+        # 워터마크 이후 최근 CONTEXT_WINDOW_MESSAGES개만 조회 (창 밖에 더 있는지 확인용으로 1개 더)
         try:
-            # Get recent messages
-            recent_messages = session.messages[-8:] if len(session.messages) > 8 else session.messages
+            window_desc = self._load_recent_messages(session, self.context_window_messages + 1)
         except Exception as e:
             logger.error(f"Failed to get recent messages: {e}")
-            recent_messages = []
+            window_desc = []
+        has_older = len(window_desc) > self.context_window_messages
+        unsummarized = list(reversed(window_desc[:self.context_window_messages]))
+        
+        # Count tokens: 저장된 토큰 수를 사용하고, 없는 것만 한 번에 배치 인코딩
+        self.fill_token_counts(unsummarized)
+        recent_messages = unsummarized
+        recent_tokens = sum(msg.token_count for msg in unsummarized)
         
-        # Count tokens in recent messages
-        recent_tokens = sum([self.count_tokens(msg.content) for msg in recent_messages])
-        summary_tokens = self.count_tokens(session.summary) if session.summary else 0
-        system_tokens = self.count_tokens(system_prompt)
-        user_tokens = self.count_tokens(user_message)
+        texts = [user_message]
+        if system_prompt_tokens is None:
+            texts.append(system_prompt)
+        if session.summary and session.summary_tokens is None:
+            texts.append(session.summary)
+        counts = self.count_tokens_batch(texts)
+        user_tokens = counts[0]
+        system_tokens = counts[1] if system_prompt_tokens is None else system_prompt_tokens
+        if session.summary and session.summary_tokens is None:
+            session.summary_tokens = counts[-1]
+        summary_tokens = session.summary_tokens or 0
         
         total_context_tokens = system_tokens + summary_tokens + recent_tokens + user_tokens
         
-        # Check if we need to create a summary
-        new_summary = None
-        if session.total_tokens + total_context_tokens > self.summary_trigger_tokens:
-            # Generate summary of all messages except the most recent ones
-            messages_to_summarize = session.messages[:-5] if len(session.messages) > 5 else []
+        # 실제 컨텍스트가 예산을 넘거나 창 밖으로 밀려난 메시지가 있을 때만 요약 대상으로 지정
+        # 요약 자체는 응답 이후 SummaryWorker가 백그라운드에서 생성하고, 이번 응답은
+        # 현재 요약과 워터마크 이후 메시지로 바로 생성함
+        summarize_through_id = None
+        over_budget = total_context_tokens > self.summary_trigger_tokens and len(unsummarized) > self.SUMMARY_MIN_KEEP_MESSAGES
+        if over_budget or has_older:
+            # 최근 메시지부터 목표 예산(SUMMARY_TARGET_TOKENS)까지만 원문으로 남기고 나머지를 요약에 누적
+            # (트리거와 목표 사이 여유분만큼 다음 요약까지 여러 턴이 지나감)
+            # 창의 절반 이하만 남겨 메시지 수 기준으로도 다음 요약까지 여유를 둠
+            budget = self.summary_target_tokens - system_tokens - summary_tokens - user_tokens
+            max_keep = len(unsummarized) if has_older else len(unsummarized) - 1
+            max_keep = min(max_keep, max(self.SUMMARY_MIN_KEEP_MESSAGES, self.context_window_messages // 2))
+            keep = min(self.SUMMARY_MIN_KEEP_MESSAGES, max_keep)
+            kept_tokens = sum(msg.token_count for msg in unsummarized[len(unsummarized) - keep:])
+            while keep < max_keep:
+                next_tokens = unsummarized[-keep - 1].token_count
+                if kept_tokens + next_tokens > budget:
+                    break
+                kept_tokens += next_tokens
+                keep += 1
             
-            if messages_to_summarize:
-                new_summary = self._generate_summary(messages_to_summarize, session.summary)
-                summary_tokens = self.count_tokens(new_summary)
-                
-                # Update recent messages to only include last 5 turns
-                recent_messages = session.messages[-5:]
+            # 창 밖의 오래된 메시지는 여기서 읽지 않고 SummaryWorker가 요약할 때만 조회
+            # 요약 대상 메시지도 요약이 실제로 반영되기 전까지는 원문으로 보냄 (요약 실패 시 맥락 유실 방지)
+            summarize_through_id = window_desc[keep].id
+        
+        # 시스템 프롬프트, 요약, 강의 자료, 현재 질문은 항상 포함하고 남은 예산(MAX_TOKENS_PER_REQUEST)에
+        # 최근 대화를 최신순으로 채움 (프롬프트 크기 상한이 일정하게 유지됨)
+        material_tokens = material.tokens if material and material.chunk_ids else 0
+        fixed_tokens = (
+            system_tokens + summary_tokens + material_tokens + user_tokens + self.REPLY_PRIMING_TOKENS
+            + self.MESSAGE_OVERHEAD_TOKENS * (2 + bool(session.summary) + bool(material_tokens))
+        )
+        history, history_tokens = self._pack_history(
+            recent_messages,
+            max(0, self.max_tokens_per_request - fixed_tokens)
+        )
         
         # Build messages for API
+        # 공급자 프롬프트 캐시는 앞부분이 바이트 단위로 같아야 적중하므로
+        # 자주 바뀌지 않는 내용부터 배치: 시스템 프롬프트((비디오, 프롬프트 버전)마다 동일)
+        # → 최근 대화(요약 전까지 뒤에만 추가됨) → 요약(요약될 때마다 바뀜) → 강의 자료(질문마다 바뀜) → 현재 질문
         messages = []
         
         # System prompt
@@ -88,23 +607,21 @@ class OpenAIService:
             "content": system_prompt
         })
         
+        # Add recent messages
+        messages.extend(history)
+        
         # Add summary if exists
-        if new_summary:
+        if session.summary:
             messages.append({
                 "role": "system",
-                "content": f"이전 대화 요약:\n{new_summary}"
-            })
-        elif session.summary:
-            messages.append({
-                "role": "system",
-                "content": f"이전 대화 요약:\n{session.summary}"
+                "content": f"위 대화 이전에 나눈 대화 요약:\n{session.summary}"
             })
         
-        # Add recent messages
-        for msg in recent_messages:
+        # Add retrieved course material
+        if material_tokens:
             messages.append({
-                "role": msg.role,
-                "content": msg.content
+                "role": "system",
+                "content": material.text
             })
         
         # Add current user message
@@ -113,63 +630,246 @@ class OpenAIService:
             "content": user_message
         })
         
-        # Call OpenAI API with retry logic
-        max_retries = 3
-        for attempt in range(max_retries):
+        return {
+            'messages': messages,
+            'summarize_through_id': summarize_through_id,
+            'user_message_tokens': user_tokens,
+            'prompt_tokens_estimate': fixed_tokens + history_tokens,
+            'has_history': bool(unsummarized or session.summary),
+            'user_id': session.user_id,
+            'material_tokens': material_tokens
+        }
+    
+    def _pack_history(self, history, budget):
+        """
+        최근 대화를 토큰 예산 안에 최신순으로 채움 (저장된 token_count 사용, 재인코딩 없음)
+        
+        - CONTEXT_MESSAGE_MAX_TOKENS를 넘는 메시지는 앞부분만 남기고 잘라냄
+        - 예산에 들어가지 않는 메시지를 만나면 그보다 오래된 메시지는 모두 제외 (대화 순서에 빈틈 없음)
+        
+        Args:
+            history: 최근 메시지 목록 (오래된 순, token_count가 채워진 ChatMessage)
+            budget: 최근 대화에 쓸 수 있는 토큰 수
+        
+        Returns:
+            (messages, tokens): API 메시지 목록 (오래된 순)과 형식 토큰을 포함한 토큰 수
+        """
+        packed = []
+        used = 0
+        for msg in reversed(history):
+            content, tokens = msg.content, msg.token_count
+            if tokens > self.context_message_max_tokens:
+                content, tokens = self._truncate(content, self.context_message_max_tokens)
+            
+            cost = tokens + self.MESSAGE_OVERHEAD_TOKENS
+            if used + cost > budget:
+                break
+            packed.append({
+                "role": msg.role,
+                "content": content
+            })
+            used += cost
+        
+        if len(packed) < len(history):
+            logger.info(f"Context packed: kept {len(packed)}/{len(history)} messages, {used}/{budget} tokens")
+        
+        packed.reverse()
+        return packed, used
+    
+    def _truncate(self, text, max_tokens):
+        """
+        텍스트를 max_tokens 이내로 자르고 생략 표시를 붙임
+        
+        Returns:
+            (text, tokens): 잘라낸 텍스트와 토큰 수
+        """
+        marker_tokens = self.count_tokens(self.TRUNCATION_MARKER)
+        keep = max(0, max_tokens - marker_tokens)
+        return self.encoding.decode(self.encoding.encode(text)[:keep]) + self.TRUNCATION_MARKER, keep + marker_tokens
+    
+    @staticmethod
+    def _load_recent_messages(session, limit):
+        """
+        요약 워터마크 이후 메시지 중 최신 limit개를 최신순으로 조회
+        
+        (session_id, created_at) 복합 인덱스를 타는 LIMIT 쿼리로, 세션 길이와 무관하게
+        턴당 조회량이 일정합니다.
+        """
+        query = ChatMessage.query.filter(ChatMessage.session_id == session.id)
+        if session.summary_message_id is not None:
+            query = query.filter(ChatMessage.id > session.summary_message_id)
+        return query.order_by(
+            ChatMessage.created_at.desc(),
+            ChatMessage.id.desc()
+        ).limit(limit).all()
+    
+    def fill_token_counts(self, chat_messages):
+        """
+        token_count가 비어 있는 ChatMessage의 토큰 수를 배치 인코딩으로 채움
+        
+        채운 값은 호출 측 DB 세션이 커밋될 때 함께 저장되어 다음 턴부터 재사용됩니다.
+        """
+        missing = [msg for msg in chat_messages if msg.token_count is None]
+        if not missing:
+            return
+        for msg, count in zip(missing, self.count_tokens_batch([msg.content for msg in missing])):
+            msg.token_count = count
+    
+    def _create_completion(self, messages, request, admitted=False, **kwargs):
+        """
+        스케줄러 허가, 서킷 브레이커와 재시도 로직을 포함한 Chat Completions API 호출
+        
+        재시도는 여기서만 OPENAI_MAX_RETRIES회까지 수행합니다. 공급자 429를 받으면
+        요청 스레드에서 잠자는 대신 스케줄러 전체를 멈추고 대기열 맨 앞에서 다시 허가를 기다리며,
+        브레이커가 열리면 남은 재시도 없이 바로 실패합니다.
+        
+        Args:
+            messages: API 메시지 목록
+            request: 스케줄러에 제출할 호출 정보 (LLMRequest)
+            admitted: 호출 측에서 이미 허가를 받았으면 True
+            **kwargs: 추가 API 파라미터 (model, stream 등, model이 없으면 MODEL_NAME)
+        
+        Returns:
+            API 응답 객체 (stream=True인 경우 스트림 객체)
+        
+        Raises:
+            Exception: API 호출 실패, 대기 시간 초과 또는 브레이커가 열린 경우
+        """
+        kwargs.setdefault('model', self.model_name)
+        attempts = self.max_retries + 1
+        retry_front = False
+        for attempt in range(attempts):
+            self.breaker.ensure_closed()
+            if not admitted:
+                self.scheduler.acquire(request, front=retry_front)
+            admitted = False
+            
+            probe = self.breaker.before_call()
+            started_at = time.monotonic()
             try:
-                logger.info(f"OpenAI API call attempt {attempt + 1}/{max_retries}")
+                logger.info(f"OpenAI API call attempt {attempt + 1}/{attempts}")
                 response = self.client.chat.completions.create(
-                    model=self.model_name,
                     messages=messages,
                     max_tokens=self.max_tokens_output,
-                    temperature=0.7
+                    temperature=0.7,
+                    **kwargs
                 )
-                break
-                
-            except RateLimitError as e:
-                logger.warning(f"Rate limit error on attempt {attempt + 1}: {e}")
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt  # Exponential backoff
-                    logger.info(f"Waiting {wait_time} seconds before retry")
-                    time.sleep(wait_time)
+            except Exception as e:
+                self._record_outcome(e, time.monotonic() - started_at, probe)
+                # 이번 실패로 브레이커가 열렸으면 재시도 대기 없이 바로 실패
+                self.breaker.ensure_closed()
+                if isinstance(e, RateLimitError):
+                    self.scheduler.pause(self._retry_delay(e, attempt, attempts))
                 else:
-                    raise Exception('OpenAI API 속도 제한을 초과했습니다. 잠시 후 다시 시도해주세요.')
+                    time.sleep(self._retry_delay(e, attempt, attempts))
+                retry_front = True
+                continue
             
-            except APITimeoutError as e:
-                logger.error(f"Timeout error on attempt {attempt + 1}: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(1)
-                else:
-                    raise Exception('OpenAI API 응답 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.')
+            self.breaker.record_success(time.monotonic() - started_at, probe)
+            return response
+    
+    async def _acreate_completion(self, messages, request, **kwargs):
+        """
+        스케줄러 허가, 서킷 브레이커와 재시도 로직을 포함한 비동기 Chat Completions API 호출
+        
+        허가 대기와 재시도 대기 모두 이벤트 루프를 막지 않습니다.
+        """
+        kwargs.setdefault('model', self.model_name)
+        attempts = self.max_retries + 1
+        retry_front = False
+        for attempt in range(attempts):
+            self.breaker.ensure_closed()
+            await self.scheduler.aacquire(request, front=retry_front)
             
-            except APIError as e:
-                logger.error(f"API error on attempt {attempt + 1}: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(1)
+            probe = self.breaker.before_call()
+            started_at = time.monotonic()
+            try:
+                logger.info(f"OpenAI async API call attempt {attempt + 1}/{attempts}")
+                response = await self.async_client.chat.completions.create(
+                    messages=messages,
+                    max_tokens=self.max_tokens_output,
+                    temperature=0.7,
+                    **kwargs
+                )
+            except asyncio.CancelledError:
+                # 작업 취소로 요청이 중단된 경우 (공급자 장애 아님)
+                self.breaker.cancel_probe(probe)
+                raise
+            except Exception as e:
+                self._record_outcome(e, time.monotonic() - started_at, probe)
+                # 이번 실패로 브레이커가 열렸으면 재시도 대기 없이 바로 실패
+                self.breaker.ensure_closed()
+                if isinstance(e, RateLimitError):
+                    self.scheduler.pause(self._retry_delay(e, attempt, attempts))
                 else:
-                    raise Exception('OpenAI API 호출 중 오류가 발생했습니다.')
+                    await asyncio.sleep(self._retry_delay(e, attempt, attempts))
+                retry_front = True
+                continue
             
-            except Exception as e:
-                logger.error(f"Unexpected error on attempt {attempt + 1}: {e}")
-                raise Exception(f'예상치 못한 오류가 발생했습니다: {str(e)}')
+            self.breaker.record_success(time.monotonic() - started_at, probe)
+            return response
+    
+    def _record_outcome(self, error, latency_seconds, probe):
+        """브레이커에 실패한 호출 기록 (타임아웃/연결 오류/5xx만 공급자 장애로 계산)"""
+        if isinstance(error, (APIConnectionError, InternalServerError)):
+            self.breaker.record_failure(latency_seconds, probe)
+        else:
+            # 429/4xx는 공급자가 응답한 것이므로 장애로 보지 않음 (429는 스케줄러가 처리)
+            self.breaker.record_success(latency_seconds, probe)
+    
+    def _retry_delay(self, error, attempt, max_retries):
+        """
+        API 오류에 대한 재시도 대기 시간 결정
         
-        # Extract response
-        assistant_message = response.choices[0].message.content
-        prompt_tokens = response.usage.prompt_tokens
-        completion_tokens = response.usage.completion_tokens
-        total_tokens = response.usage.total_tokens
+        Args:
+            error: 발생한 예외
+            attempt: 현재 시도 횟수 (0부터 시작)
+            max_retries: 최대 시도 횟수
         
-        # Calculate cost (gpt-4o-mini pricing: $0.15/$0.60 per 1M tokens)
-        cost = (prompt_tokens / 1_000_000 * 0.15) + (completion_tokens / 1_000_000 * 0.60)
+        Returns:
+            float: 재시도 전 대기 시간 (초)
         
-        return {
-            'content': assistant_message,
-            'prompt_tokens': prompt_tokens,
-            'completion_tokens': completion_tokens,
-            'total_tokens': total_tokens,
-            'cost': cost,
-            'new_summary': new_summary
-        }
+        Raises:
+            Exception: 재시도하지 않는 오류이거나 마지막 시도인 경우
+        """
+        is_last_attempt = attempt >= max_retries - 1
+        
+        if isinstance(error, RateLimitError):
+            logger.warning(f"Rate limit error on attempt {attempt + 1}: {error}")
+            if is_last_attempt:
+                raise Exception('OpenAI API 속도 제한을 초과했습니다. 잠시 후 다시 시도해주세요.')
+            # 공급자가 알려준 Retry-After 우선, 없으면 지수 백오프
+            wait_time = self._retry_after(error) or 2 ** attempt
+            logger.info(f"Waiting {wait_time} seconds before retry")
+            return wait_time
+        
+        if isinstance(error, APITimeoutError):
+            logger.error(f"Timeout error on attempt {attempt + 1}: {error}")
+            if is_last_attempt:
+                raise Exception('OpenAI API 응답 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.')
+            return 1
+        
+        if isinstance(error, APIError):
+            logger.error(f"API error on attempt {attempt + 1}: {error}")
+            if is_last_attempt:
+                raise Exception('OpenAI API 호출 중 오류가 발생했습니다.')
+            return 1
+        
+        logger.error(f"Unexpected error on attempt {attempt + 1}: {error}")
+        raise Exception(f'예상치 못한 오류가 발생했습니다: {str(error)}')
+    
+    @staticmethod
+    def _retry_after(error):
+        """429 응답의 Retry-After 헤더 (초, 없으면 None)"""
+        try:
+            headers = error.response.headers
+            if headers.get('retry-after-ms'):
+                return float(headers['retry-after-ms']) / 1000
+            if headers.get('retry-after'):
+                return float(headers['retry-after'])
+        except (AttributeError, ValueError):
+            pass
+        return None
     
     def _generate_summary(self, messages, previous_summary=None):
         """
@@ -178,9 +878,12 @@ class OpenAIService:
         Args:
             messages: 요약할 메시지 목록
             previous_summary: 이전 요약 (있는 경우)
-            
+        
         Returns:
             str: 생성된 요약
+        
+        Raises:
+            Exception: API 호출 실패 시
         """
         try:
             conversation_text = ""
@@ -208,19 +911,30 @@ class OpenAIService:
         ]
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=summary_messages,
-                max_tokens=300,
-                temperature=0.5
-            )
+            # 요약도 공급자 예산을 쓰므로 사용자 요청과 같은 스케줄러를 거침 (시스템 대기열)
+            self.scheduler.acquire(LLMRequest(
+                user_id=None,
+                tokens=self.count_tokens(conversation_text) + 300
+            ))
+            probe = self.breaker.before_call()
+            started_at = time.monotonic()
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=summary_messages,
+                    max_tokens=300,
+                    temperature=0.5
+                )
+            except Exception as e:
+                self._record_outcome(e, time.monotonic() - started_at, probe)
+                raise
+            self.breaker.record_success(time.monotonic() - started_at, probe)
             
             summary = response.choices[0].message.content
             logger.info("Summary generated successfully")
             return summary
-            
+        
         except Exception as e:
             logger.error(f"Failed to generate summary: {e}")
-            # 요약 생성 실패 시 fallback
-            return "이전 대화 내용이 요약되었습니다."
-
+            # 실패 시 워터마크를 유지해 다음 턴에 다시 요약하도록 예외 전파
+            raise
@@ -0,0 +1,155 @@
+"""
+재생 이벤트 구간 병합
+스크럽 중 쏟아지는 재생/일시정지/탐색 이벤트를 사용자·비디오별 시청 구간(watch_intervals) 하나로 합침
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+# 시청 구간으로 합치는 이벤트 (원본 기록은 EVENT_RAW_SAMPLE_RATE로 표본 추출)
+COALESCED_EVENT_TYPES = ('video_play', 'video_pause', 'video_seek')
+# 구간을 닫는 이벤트 (구간에 합치지만 원본은 항상 기록)
+CLOSING_EVENT_TYPES = ('video_complete',)
+
+
+def _position(data: dict, key: str) -> Optional[float]:
+    value = data.get(key)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+@dataclass
+class _OpenInterval:
+    user_id: int
+    video_id: int
+    started_at: datetime
+    last_event_at: datetime
+    start_position: Optional[float] = None
+    end_position: Optional[float] = None
+    playing: bool = False
+    playing_since: Optional[datetime] = None
+    watched_seconds: float = 0.0
+    counts: dict = field(default_factory=lambda: {'video_play': 0, 'video_pause': 0, 'video_seek': 0})
+    event_count: int = 0
+    completed: bool = False
+    
+    def to_row(self):
+        return {
+            'user_id': self.user_id,
+            'video_id': self.video_id,
+            'start_position': self.start_position,
+            'end_position': self.end_position,
+            'watched_seconds': round(self.watched_seconds, 3),
+            'play_count': self.counts['video_play'],
+            'pause_count': self.counts['video_pause'],
+            'seek_count': self.counts['video_seek'],
+            'event_count': self.event_count,
+            'completed': self.completed,
+            'started_at': self.started_at,
+            'ended_at': self.last_event_at,
+            'created_at': datetime.utcnow()
+        }
+
+
+class PlaybackCoalescer:
+    """
+    사용자·비디오별로 열린 시청 구간을 메모리에 두고 이벤트를 합침
+    
+    - 일시정지 상태에서 window_seconds 동안 새 이벤트가 없으면 구간을 닫음
+      (재생 중에는 이벤트 없이 계속 볼 수 있으므로 max_interval_seconds까지 기다림)
+    - 구간 길이가 max_interval_seconds를 넘거나 video_complete가 오면 닫음
+    - 재생 위치는 play/pause의 timestamp, seek의 from_timestamp/to_timestamp를 사용하고,
+      watched_seconds는 재생 상태였던 이벤트 사이 시간을 더한 값
+    
+    EventIngestor의 기록 스레드에서만 사용하므로 잠금이 없습니다.
+    같은 사용자의 이벤트가 다른 워커 프로세스로 나뉘어 들어오면 구간도 워커별로 나뉘어 기록됩니다.
+    """
+    
+    def __init__(self, window_seconds: float, max_interval_seconds: float):
+        self.window_seconds = window_seconds
+        self.max_interval_seconds = max_interval_seconds
+        self._open = {}  # (user_id, video_id) -> _OpenInterval
+    
+    @property
+    def open_count(self) -> int:
+        return len(self._open)
+    
+    def add(self, row: dict) -> List[dict]:
+        """
+        이벤트를 구간에 합침
+        
+        Args:
+            row: EventIngestor 큐의 이벤트 행
+        
+        Returns:
+            list: 이 이벤트로 닫힌 구간 행 목록 (watch_intervals INSERT용)
+        """
+        closed = []
+        key = (row['user_id'], row['video_id'])
+        event_type = row['event_type']
+        at = row['created_at']
+        data = row['event_data'] if isinstance(row['event_data'], dict) else {}
+        
+        interval = self._open.get(key)
+        if interval is not None and self._expired(interval, at):
+            closed.append(self._close(key))
+            interval = None
+        
+        if event_type == 'video_seek':
+            before, after = _position(data, 'from_timestamp'), _position(data, 'to_timestamp')
+        else:
+            before = after = _position(data, 'timestamp')
+        
+        if interval is None:
+            interval = _OpenInterval(user_id=key[0], video_id=key[1], started_at=at, last_event_at=at)
+            interval.start_position = before
+            self._open[key] = interval
+        
+        # 배치 요청은 순서가 섞여 올 수 있으므로 시간이 거꾸로 가면 시청 시간에 더하지 않음
+        if interval.playing and interval.playing_since is not None and at > interval.playing_since:
+            interval.watched_seconds += (at - interval.playing_since).total_seconds()
+        
+        if event_type == 'video_play':
+            interval.playing = True
+        elif event_type == 'video_pause' or event_type in CLOSING_EVENT_TYPES:
+            interval.playing = False
+        if event_type in interval.counts:
+            interval.counts[event_type] += 1
+        
+        interval.playing_since = at if interval.playing else None
+        if after is not None:
+            interval.end_position = after
+            if interval.start_position is None:
+                interval.start_position = before if before is not None else after
+        interval.last_event_at = max(interval.last_event_at, at)
+        interval.event_count += 1
+        
+        if event_type in CLOSING_EVENT_TYPES:
+            interval.completed = True
+            closed.append(self._close(key))
+        return closed
+    
+    def sweep(self, now: datetime = None, force: bool = False) -> List[dict]:
+        """
+        새 이벤트 없이 기한이 지난 구간을 닫음
+        
+        Args:
+            now: 기준 시각 (없으면 지금)
+            force: True면 열린 구간을 모두 닫음 (종료 시)
+        
+        Returns:
+            list: 닫힌 구간 행 목록
+        """
+        now = now or datetime.utcnow()
+        keys = [key for key, interval in self._open.items() if force or self._expired(interval, now)]
+        return [self._close(key) for key in keys]
+    
+    def _expired(self, interval, at):
+        if (at - interval.started_at).total_seconds() > self.max_interval_seconds:
+            return True
+        idle = (at - interval.last_event_at).total_seconds()
+        return idle > (self.max_interval_seconds if interval.playing else self.window_seconds)
+    
+    def _close(self, key):
+        return self._open.pop(key).to_row()
@@ -0,0 +1,184 @@
+"""
+시스템 프롬프트 캐시
+(video_id, role)별로 해석된 시스템 프롬프트와 토큰 수를 프로세스 메모리에 보관
+"""
+from app import db, get_openai_service
+from app.models.cache_version import CacheVersion
+from app.models.chat_prompt_template import ChatPromptTemplate
+from dataclasses import dataclass
+from flask import current_app
+from typing import Optional
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_SYSTEM_PROMPT = "당신은 학습을 돕는 AI 조교입니다. 학생들의 질문에 친절하고 명확하게 답변해주세요."
+
+
+@dataclass(frozen=True)
+class ResolvedPrompt:
+    """해석된 시스템 프롬프트"""
+    text: str
+    tokens: int
+    template_id: Optional[int] = None
+    template_version: Optional[int] = None
+    
+    @property
+    def version_key(self) -> str:
+        """템플릿 ID와 버전으로 만든 식별자 (템플릿이 바뀌면 달라짐, 폴백은 'fallback')"""
+        if self.template_id is None:
+            return 'fallback'
+        return f'{self.template_id}:{self.template_version}'
+
+
+class PromptCache:
+    """
+    해석된 시스템 프롬프트 캐시
+    
+    - 조회: 캐시 적중 시 DB 쿼리 없음
+    - 무효화: 관리자가 템플릿을 변경하면 cache_versions의 버전을 올리고(bump_version),
+      각 워커는 PROMPT_CACHE_VERSION_CHECK_SECONDS마다 한 번만 버전을 확인하여 바뀌었으면 캐시를 비움
+    """
+    
+    VERSION_NAME = 'prompt_templates'
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._version = None
+        self._generation = 0
+        self._checked_at = 0.0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0
+        }
+    
+    def resolve(self, video_id: int, user_role: str) -> ResolvedPrompt:
+        """
+        시스템 프롬프트 조회
+        
+        우선순위: 비디오별 프롬프트 > 역할별 프롬프트 > 기본 프롬프트 > 폴백 프롬프트
+        """
+        self._check_version()
+        
+        key = (video_id, user_role)
+        with self._lock:
+            entry = self._entries.get(key)
+            generation = self._generation
+            if entry is not None:
+                self._stats['hits'] += 1
+                return entry
+            self._stats['misses'] += 1
+        
+        try:
+            entry = self._load(video_id, user_role)
+        except Exception as e:
+            # 일시적인 DB 오류로 폴백 프롬프트가 캐시에 남지 않도록 저장하지 않음
+            logger.error(f"Get system prompt error: {str(e)}")
+            return self._fallback()
+        
+        with self._lock:
+            # 조회 도중 무효화되었으면 이전 템플릿일 수 있으므로 저장하지 않음
+            if generation == self._generation:
+                self._entries[key] = entry
+        return entry
+    
+    def invalidate(self):
+        """이 프로세스의 캐시를 즉시 비움 (다음 조회 시 버전도 다시 확인)"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._checked_at = 0.0
+            self._stats['invalidations'] += 1
+    
+    @staticmethod
+    def bump_version():
+        """
+        공유 버전 증가 (호출 측 트랜잭션에 포함되어 템플릿 변경과 함께 커밋됨)
+        
+        다른 워커 프로세스는 다음 버전 확인 시점에 캐시를 비웁니다.
+        """
+        CacheVersion.bump(PromptCache.VERSION_NAME)
+    
+    def get_stats(self):
+        """캐시 상태 조회"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'entries': len(self._entries),
+                'version': self._version
+            })
+        return stats
+    
+    def _check_version(self):
+        interval = current_app.config.get('PROMPT_CACHE_VERSION_CHECK_SECONDS', 30)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < interval:
+                return
+            # 다른 스레드가 동시에 확인하지 않도록 먼저 갱신
+            self._checked_at = now
+        
+        try:
+            version = CacheVersion.current(self.VERSION_NAME)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Prompt cache version check error: {str(e)}")
+            return
+        
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    logger.info(f"Prompt cache invalidated: version {self._version} -> {version}")
+                    self._stats['invalidations'] += 1
+                self._entries.clear()
+                self._generation += 1
+                self._version = version
+    
+    @staticmethod
+    def _load(video_id, user_role):
+        # 비디오별 프롬프트
+        prompt_template = ChatPromptTemplate.query.filter_by(
+            video_id=video_id,
+            is_active=True
+        ).first()
+        
+        # 역할별 프롬프트
+        if not prompt_template:
+            prompt_template = ChatPromptTemplate.query.filter_by(
+                user_role=user_role,
+                is_active=True
+            ).first()
+        
+        # 기본 프롬프트
+        if not prompt_template:
+            prompt_template = ChatPromptTemplate.query.filter_by(
+                is_default=True,
+                is_active=True
+            ).first()
+        
+        if not prompt_template:
+            return PromptCache._fallback()
+        
+        text = prompt_template.system_prompt
+        return ResolvedPrompt(
+            text=text,
+            tokens=get_openai_service().count_tokens(text),
+            template_id=prompt_template.id,
+            template_version=prompt_template.version
+        )
+    
+    @staticmethod
+    def _fallback():
+        # 폴백 프롬프트
+        return ResolvedPrompt(
+            text=FALLBACK_SYSTEM_PROMPT,
+            tokens=get_openai_service().count_tokens(FALLBACK_SYSTEM_PROMPT)
+        )
+
+
+# 워커 프로세스당 하나의 캐시 (템플릿 변경은 버전으로 전파)
+prompt_cache = PromptCache()
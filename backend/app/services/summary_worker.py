@@ -0,0 +1,186 @@
+"""
+백그라운드 대화 요약 실행기
+응답 생성 경로에서 요약 LLM 호출을 분리하여 학생이 요약 생성을 기다리지 않도록 함
+"""
+from app import db
+from app.models.chat_session import ChatSession
+from app.models.chat_message import ChatMessage
+from app.services.openai_service import OpenAIService
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryWorker:
+    """
+    워커 프로세스당 하나의 스레드 풀에서 세션 요약을 생성하는 실행기
+    
+    - 같은 세션의 요약은 프로세스 안에서 동시에 하나만 실행 (진행 중 세션 집합)
+    - 여러 워커 프로세스 간에는 워터마크(summary_message_id) 조건부 UPDATE로
+      먼저 끝난 요약만 반영하고 뒤늦은 요약은 버림
+    """
+    
+    def __init__(self, app, openai_service: OpenAIService):
+        """
+        Args:
+            app: Flask 애플리케이션 (DB 작업 시 앱 컨텍스트 생성용)
+            openai_service: 워커 공유 OpenAI 서비스
+        """
+        self.app = app
+        self.openai_service = openai_service
+        self.pid = os.getpid()
+        self.max_workers = app.config.get('SUMMARY_WORKERS', 2)
+        
+        self._lock = threading.Lock()
+        self._inflight_sessions = set()
+        self._stats = {
+            'submitted': 0,
+            'queued': 0,
+            'running': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'skipped_duplicate': 0,
+            'discarded_stale': 0
+        }
+        self._latency_total_ms = 0
+        self._latency_max_ms = 0
+        self._latency_last_ms = None
+        self._queue_wait_total_ms = 0
+        
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='chat-summary')
+    
+    def submit(self, session_id: int, through_message_id: int) -> bool:
+        """
+        세션 요약 작업 제출 (즉시 반환)
+        
+        Args:
+            session_id: 세션 ID
+            through_message_id: 요약에 포함할 마지막 메시지 ID (새 워터마크)
+        
+        Returns:
+            bool: 제출 여부 (같은 세션의 요약이 이미 진행 중이면 False)
+        """
+        with self._lock:
+            if session_id in self._inflight_sessions:
+                self._stats['skipped_duplicate'] += 1
+                return False
+            self._inflight_sessions.add(session_id)
+            self._stats['submitted'] += 1
+            self._stats['queued'] += 1
+        
+        try:
+            self._executor.submit(self._run_job, session_id, through_message_id, time.monotonic())
+        except Exception:
+            with self._lock:
+                self._inflight_sessions.discard(session_id)
+                self._stats['queued'] -= 1
+            raise
+        return True
+    
+    def _run_job(self, session_id, through_message_id, submitted_at):
+        started_at = time.monotonic()
+        with self._lock:
+            self._stats['queued'] -= 1
+            self._stats['running'] += 1
+            self._queue_wait_total_ms += int((started_at - submitted_at) * 1000)
+        
+        status = 'failed'
+        try:
+            with self.app.app_context():
+                status = self._summarize(session_id, through_message_id)
+        except Exception as e:
+            logger.error(f"Summary job failed: session={session_id}, error={str(e)}")
+        finally:
+            latency_ms = int((time.monotonic() - started_at) * 1000)
+            with self._lock:
+                self._inflight_sessions.discard(session_id)
+                self._stats['running'] -= 1
+                self._stats[status] += 1
+                self._latency_total_ms += latency_ms
+                self._latency_max_ms = max(self._latency_max_ms, latency_ms)
+                self._latency_last_ms = latency_ms
+    
+    def _summarize(self, session_id, through_message_id):
+        """
+        워터마크 이후 ~ through_message_id 메시지를 기존 요약에 누적
+        
+        Returns:
+            str: 결과 상태 (succeeded, discarded_stale)
+        """
+        try:
+            session = ChatSession.query.get(session_id)
+            if not session:
+                return 'discarded_stale'
+            
+            previous_watermark = session.summary_message_id
+            if previous_watermark is not None and previous_watermark >= through_message_id:
+                return 'discarded_stale'
+            
+            # role/content 행만 조회 (트랜잭션 종료 후에도 ORM 갱신 없이 사용 가능)
+            query = db.session.query(ChatMessage.role, ChatMessage.content).filter(
+                ChatMessage.session_id == session_id,
+                ChatMessage.id <= through_message_id
+            )
+            if previous_watermark is not None:
+                query = query.filter(ChatMessage.id > previous_watermark)
+            messages = query.order_by(ChatMessage.created_at, ChatMessage.id).all()
+            if not messages:
+                return 'discarded_stale'
+            
+            previous_summary = session.summary
+            # LLM 호출 동안 DB 연결을 잡고 있지 않도록 트랜잭션 종료
+            db.session.rollback()
+            
+            summary = self.openai_service._generate_summary(messages, previous_summary)
+            summary_tokens = self.openai_service.count_tokens(summary)
+            
+            # 워터마크가 그대로일 때만 반영 (다른 프로세스가 먼저 요약했으면 버림)
+            watermark_unchanged = (
+                ChatSession.summary_message_id.is_(None) if previous_watermark is None
+                else ChatSession.summary_message_id == previous_watermark
+            )
+            updated = ChatSession.query.filter(
+                ChatSession.id == session_id,
+                watermark_unchanged
+            ).update({
+                'summary': summary,
+                'summary_tokens': summary_tokens,
+                'summary_message_id': through_message_id,
+                'summary_updated_at': datetime.utcnow()
+            }, synchronize_session=False)
+            db.session.commit()
+            
+            if not updated:
+                logger.info(f"Summary discarded (watermark moved): session={session_id}")
+                return 'discarded_stale'
+            
+            logger.info(f"Summary updated: session={session_id}, through_message={through_message_id}")
+            return 'succeeded'
+        
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            db.session.remove()
+    
+    def get_stats(self):
+        """요약 실행기 상태 조회 (큐 깊이, 작업 지연 시간)"""
+        with self._lock:
+            stats = dict(self._stats)
+            finished = stats['succeeded'] + stats['failed'] + stats['discarded_stale']
+            started = finished + stats['running']
+            stats.update({
+                'pid': self.pid,
+                'max_workers': self.max_workers,
+                'queue_depth': stats['queued'],
+                'latency_avg_ms': int(self._latency_total_ms / finished) if finished else None,
+                'latency_max_ms': self._latency_max_ms if finished else None,
+                'latency_last_ms': self._latency_last_ms,
+                'queue_wait_avg_ms': int(self._queue_wait_total_ms / started) if started else None
+            })
+        return stats
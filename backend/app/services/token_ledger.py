@@ -0,0 +1,186 @@
+"""
+토큰 사용량 원장 서비스
+사용자별 일일 토큰 한도를 원장 행(token_usage_daily)과 예약마다 한 행(token_reservations)으로 관리 (users 행 잠금 없음)
+"""
+from app import db
+from app.models.token_usage_daily import TokenUsageDaily
+from app.models.token_usage_reservation import TokenUsageReservation
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from flask import current_app
+from typing import Optional, Tuple
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TokenReservation:
+    """LLM 호출 전 예약한 토큰 (정산 시 예약 행을 지우고 같은 날짜 원장에 반영)"""
+    id: str
+    user_id: int
+    usage_date: date
+    tokens: int
+
+
+class TokenLedger:
+    """
+    일일 토큰 원장
+    
+    - reserve: 호출 전 예상 토큰을 예약 (token_reservations에 예약마다 한 행)
+    - reconcile: 호출 후 예약 행을 지우고 실제 사용량을 원장에 반영 (호출 측 트랜잭션에 포함)
+    - release: 호출 실패 시 예약 해제
+    - 예약 후 TOKEN_RESERVATION_TTL_SECONDS가 지난 행은 정산되지 않은 것(워커 비정상 종료)으로
+      보고 한도 계산과 조회에서 제외하며, cleanup_stale_reservations로 삭제
+    """
+    
+    @staticmethod
+    def reserve(user_id: int, tokens: int, daily_limit: int) -> Tuple[Optional[TokenReservation], Optional[str]]:
+        """
+        토큰 예약
+        
+        오늘 사용량 + 만료되지 않은 예약량의 합 + 이번 예약량이 한도 이하일 때만 예약합니다.
+        먼저 오늘 원장 행을 업서트해 행 잠금을 잡으므로, 같은 사용자의 동시 예약은 앞선 예약이
+        커밋된 뒤 그 예약까지 합산해 확인합니다.
+        
+        Args:
+            user_id: 사용자 ID
+            tokens: 예약할 토큰 수 (프롬프트 추정치 + 최대 출력 토큰)
+            daily_limit: 일일 토큰 한도
+        
+        Returns:
+            (reservation, error): 성공 시 TokenReservation, 한도 초과 시 None과 에러 메시지
+        """
+        now = datetime.utcnow()
+        usage_date = now.date()
+        daily = TokenUsageDaily.__table__
+        
+        stmt = TokenLedger._insert(daily).values(
+            user_id=user_id,
+            usage_date=usage_date,
+            used_tokens=0,
+            updated_at=now
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[daily.c.user_id, daily.c.usage_date],
+            set_={'updated_at': now}
+        )
+        db.session.execute(stmt)
+        
+        used_tokens, reserved_tokens = TokenLedger._usage(user_id, usage_date, now)
+        if used_tokens + reserved_tokens + tokens > daily_limit:
+            db.session.rollback()
+            logger.warning(f"Daily token limit exceeded: user={user_id}, tokens={tokens}")
+            return None, '일일 토큰 한도를 초과했습니다'
+        
+        reservation_id = uuid.uuid4().hex
+        db.session.execute(TokenUsageReservation.__table__.insert().values(
+            id=reservation_id,
+            user_id=user_id,
+            usage_date=usage_date,
+            tokens=tokens,
+            reserved_at=now
+        ))
+        db.session.commit()
+        
+        return TokenReservation(id=reservation_id, user_id=user_id, usage_date=usage_date, tokens=tokens), None
+    
+    @staticmethod
+    def reconcile(reservation: TokenReservation, used_tokens: int) -> None:
+        """예약을 실제 사용량으로 정산 (커밋은 호출 측에서 수행)"""
+        TokenLedger._delete_reservation(reservation)
+        if not used_tokens:
+            return
+        daily = TokenUsageDaily.__table__
+        db.session.execute(
+            daily.update().where(
+                daily.c.user_id == reservation.user_id,
+                daily.c.usage_date == reservation.usage_date
+            ).values(
+                used_tokens=daily.c.used_tokens + used_tokens,
+                updated_at=datetime.utcnow()
+            )
+        )
+    
+    @staticmethod
+    def release(reservation: TokenReservation) -> None:
+        """호출 실패 시 예약 해제 (별도로 커밋)"""
+        try:
+            TokenLedger._delete_reservation(reservation)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Release token reservation error: user={reservation.user_id}, error={str(e)}")
+    
+    @staticmethod
+    def get_usage_today(user_id: int, daily_limit: int) -> dict:
+        """
+        오늘 토큰 사용 현황 (만료된 예약 제외)
+        
+        Returns:
+            dict: daily_limit, used_tokens, reserved_tokens, remaining_tokens
+        """
+        now = datetime.utcnow()
+        used_tokens, reserved_tokens = TokenLedger._usage(user_id, now.date(), now)
+        return {
+            'daily_limit': daily_limit,
+            'used_tokens': used_tokens,
+            'reserved_tokens': reserved_tokens,
+            'remaining_tokens': max(daily_limit - used_tokens - reserved_tokens, 0)
+        }
+    
+    @staticmethod
+    def cleanup_stale_reservations(now: datetime = None) -> int:
+        """
+        만료된 예약 행 삭제 (지난 날짜 포함)
+        
+        Returns:
+            int: 삭제된 예약 수
+        """
+        table = TokenUsageReservation.__table__
+        result = db.session.execute(
+            table.delete().where(table.c.reserved_at < TokenLedger._live_since(now or datetime.utcnow()))
+        )
+        db.session.commit()
+        return result.rowcount
+    
+    @staticmethod
+    def _usage(user_id: int, usage_date: date, now: datetime) -> Tuple[int, int]:
+        """(정산된 사용량, 만료되지 않은 예약량 합계) 조회"""
+        daily = TokenUsageDaily.__table__
+        reservations = TokenUsageReservation.__table__
+        reserved = db.select(db.func.coalesce(db.func.sum(reservations.c.tokens), 0)).where(
+            reservations.c.user_id == user_id,
+            reservations.c.usage_date == usage_date,
+            reservations.c.reserved_at >= TokenLedger._live_since(now)
+        ).scalar_subquery()
+        used = db.select(daily.c.used_tokens).where(
+            daily.c.user_id == user_id,
+            daily.c.usage_date == usage_date
+        ).scalar_subquery()
+        row = db.session.execute(db.select(db.func.coalesce(used, 0), reserved)).one()
+        return int(row[0]), int(row[1])
+    
+    @staticmethod
+    def _delete_reservation(reservation: TokenReservation) -> None:
+        """예약 행 삭제 (만료 후 이미 정리된 예약이면 아무 것도 하지 않음)"""
+        table = TokenUsageReservation.__table__
+        db.session.execute(table.delete().where(table.c.id == reservation.id))
+    
+    @staticmethod
+    def _live_since(now: datetime) -> datetime:
+        """이 시각 이후의 예약만 유효 (TOKEN_RESERVATION_TTL_SECONDS)"""
+        return now - timedelta(seconds=current_app.config.get('TOKEN_RESERVATION_TTL_SECONDS', 600))
+    
+    @staticmethod
+    def _insert(table):
+        """DB 방언별 INSERT ... ON CONFLICT 구문"""
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise NotImplementedError(f'지원하지 않는 DB입니다: {dialect}')
+        return insert(table)
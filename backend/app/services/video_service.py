@@ -2,14 +2,15 @@
 비디오 관리 서비스
 비디오 및 스캐폴딩 관련 비즈니스 로직
 """
-from app import db
+from app import db, get_event_ingestor
 from app.models.video import Video
 from app.models.scaffolding import Scaffolding, ScaffoldingResponse
-from app.models.event_log import EventLog
+from app.services.course_material import MATERIAL_SOURCES, MaterialIndex, material_index
+from datetime import datetime, timedelta
+from flask import current_app
 from sqlalchemy.orm import joinedload
 from typing import List, Optional, Tuple
 import logging
-import json
 
 logger = logging.getLogger(__name__)
 
@@ -129,7 +130,7 @@ class VideoService:
             title: 제목
             youtube_url: YouTube URL
             youtube_id: YouTube ID
-            **kwargs: 추가 옵션 (description, duration, thumbnail_url, scaffolding_mode, order_index)
+            **kwargs: 추가 옵션 (description, course_material, duration, thumbnail_url, scaffolding_mode, order_index)
             
         Returns:
             (video, error): 성공 시 비디오 객체, 실패 시 None과 에러 메시지
@@ -145,6 +146,7 @@ class VideoService:
                 youtube_url=youtube_url,
                 youtube_id=youtube_id,
                 description=kwargs.get('description'),
+                course_material=kwargs.get('course_material'),
                 duration=kwargs.get('duration'),
                 thumbnail_url=thumbnail_url,
                 scaffolding_mode=kwargs.get('scaffolding_mode', 'both'),
@@ -152,7 +154,12 @@ class VideoService:
             )
             
             db.session.add(video)
+            if video.description or video.course_material:
+                # 강의 자료 청크는 비디오 ID가 필요하므로 flush 후 같은 트랜잭션에서 생성
+                db.session.flush()
+                MaterialIndex.rebuild(video)
             db.session.commit()
+            material_index.invalidate()
             
             logger.info(f"Video created: {video.id} - {title}")
             return video, None
@@ -181,12 +188,19 @@ class VideoService:
                 return None, '비디오를 찾을 수 없습니다'
             
             # 업데이트 가능한 필드
-            allowed_fields = ['title', 'description', 'scaffolding_mode', 'is_active', 'learning_enabled', 'order_index', 'survey_url']
+            allowed_fields = ['title', 'description', 'course_material', 'scaffolding_mode', 'is_active', 'learning_enabled', 'order_index', 'survey_url']
             for field in allowed_fields:
                 if field in kwargs:
                     setattr(video, field, kwargs[field])
             
+            # 강의 자료가 바뀌었으면 검색용 청크를 다시 만듦 (다른 워커는 버전 확인 후 색인을 비움)
+            material_changed = any(source in kwargs for source in MATERIAL_SOURCES)
+            if material_changed:
+                MaterialIndex.rebuild(video)
+            
             db.session.commit()
+            if material_changed:
+                material_index.invalidate()
             
             logger.info(f"Video updated: {video_id}")
             return video, None
@@ -228,7 +242,7 @@ class VideoService:
     def log_video_event(user_id: int, video_id: int, event_type: str, 
                        event_data: dict, ip_address: str, user_agent: str) -> None:
         """
-        비디오 이벤트 로그 기록
+        비디오 이벤트 로그 기록 (큐에 넣고 즉시 반환, 기록은 EventIngestor가 모아서 수행)
         
         Args:
             user_id: 사용자 ID
@@ -239,18 +253,75 @@ class VideoService:
             user_agent: User Agent
         """
         try:
-            event_log = EventLog(
+            get_event_ingestor().enqueue(
                 user_id=user_id,
                 video_id=video_id,
                 event_type=event_type,
-                event_data=json.dumps(event_data),
+                event_data=event_data,
                 ip_address=ip_address,
                 user_agent=user_agent
             )
-            db.session.add(event_log)
-            db.session.commit()
             
         except Exception as e:
-            db.session.rollback()
             logger.error(f"Log video event error: {str(e)}")
-
+    
+    @staticmethod
+    def log_video_events(user_id: int, items: list, ip_address: str,
+                         user_agent: str) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        여러 비디오의 이벤트 일괄 기록 (큐에 넣고 즉시 반환)
+        
+        비디오 존재 여부는 한 번의 조회로 확인하고, 없는 비디오의 이벤트만 건너뜁니다.
+        클라이언트 발생 시각(client_ts)이 허용 범위(EVENT_CLIENT_TS_MAX_AGE_SECONDS) 밖이면 서버 시각을 사용합니다.
+        
+        Args:
+            user_id: 사용자 ID
+            items: (요청 내 순번, 검증된 VideoEventItem) 목록
+            ip_address: IP 주소
+            user_agent: User Agent
+        
+        Returns:
+            (result, error): 성공 시 {'accepted': int, 'rejected': [{'index', 'error'}]}
+        """
+        try:
+            rejected = []
+            video_ids = {item.video_id for _, item in items}
+            existing = {
+                row.id for row in db.session.query(Video.id).filter(Video.id.in_(video_ids)).all()
+            } if video_ids else set()
+            
+            now = datetime.utcnow()
+            max_age = timedelta(seconds=current_app.config.get('EVENT_CLIENT_TS_MAX_AGE_SECONDS', 86400))
+            ingestor = get_event_ingestor()
+            accepted = 0
+            for index, item in items:
+                if item.video_id not in existing:
+                    rejected.append({'index': index, 'error': '비디오를 찾을 수 없습니다'})
+                    continue
+                
+                created_at = now
+                if item.client_ts is not None:
+                    client_time = datetime.utcfromtimestamp(item.client_ts / 1000)
+                    # 시계가 크게 틀린 클라이언트의 시각은 무시 (미래는 1분까지 허용)
+                    if now - max_age <= client_time <= now + timedelta(minutes=1):
+                        created_at = client_time
+                
+                if not ingestor.enqueue(
+                    user_id=user_id,
+                    video_id=item.video_id,
+                    event_type=item.event_type,
+                    event_data=item.event_data,
+                    ip_address=ip_address,
+                    user_agent=user_agent,
+                    created_at=created_at
+                ):
+                    rejected.append({'index': index, 'error': '이벤트 기록 대기열이 가득 찼습니다'})
+                    continue
+                accepted += 1
+            
+            return {'accepted': accepted, 'rejected': rejected}, None
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Log video events error: {str(e)}")
+            return None, '이벤트 기록 중 오류가 발생했습니다'
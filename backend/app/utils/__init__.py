@@ -3,7 +3,7 @@
 """
 from .decorators import admin_required, super_admin_required, validate_request
 from .error_handlers import register_error_handlers
-from .responses import success_response, error_response, paginated_response
+from .responses import success_response, error_response, paginated_response, sse_event
 from .logger import setup_logger
 
 __all__ = [
@@ -14,6 +14,7 @@ __all__ = [
     'success_response',
     'error_response',
     'paginated_response',
+    'sse_event',
     'setup_logger',
 ]
 
@@ -3,6 +3,7 @@
 """
 from flask import jsonify
 from typing import Any, Dict, Optional
+import json
 
 
 def success_response(data: Any = None, message: str = None, status_code: int = 200):
@@ -74,3 +75,14 @@ def paginated_response(items: list, total: int, page: int, per_page: int, status
     
     return jsonify(response), status_code
 
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    Server-Sent Events 메시지 포맷
+    
+    Args:
+        event: 이벤트 이름
+        data: JSON 직렬화 가능한 이벤트 데이터
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
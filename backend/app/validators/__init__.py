@@ -4,7 +4,7 @@ Pydantic을 사용한 요청 데이터 검증
 """
 from .auth_schemas import RegisterRequest, LoginRequest, ChangePasswordRequest
 from .chat_schemas import CreateSessionRequest, SendMessageRequest
-from .video_schemas import CreateVideoRequest, UpdateVideoRequest
+from .video_schemas import CreateVideoRequest, UpdateVideoRequest, VideoEventBatchRequest, VideoEventItem
 from .scaffolding_schemas import (
     CreateScaffoldingRequest, UpdateScaffoldingRequest, 
     ScaffoldingResponseRequest, BulkScaffoldingResponseRequest
@@ -23,6 +23,8 @@ __all__ = [
     'SendMessageRequest',
     'CreateVideoRequest',
     'UpdateVideoRequest',
+    'VideoEventBatchRequest',
+    'VideoEventItem',
     'CreateScaffoldingRequest',
     'UpdateScaffoldingRequest',
     'ScaffoldingResponseRequest',
@@ -3,6 +3,7 @@
 """
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional
+import json
 
 
 class CreateVideoRequest(BaseModel):
@@ -11,6 +12,7 @@ class CreateVideoRequest(BaseModel):
     youtube_url: str = Field(..., min_length=1, max_length=500)
     youtube_id: str = Field(..., min_length=1, max_length=50)
     description: Optional[str] = Field(None, max_length=2000)
+    course_material: Optional[str] = Field(None, max_length=200000)
     duration: Optional[int] = Field(None, ge=0)
     thumbnail_url: Optional[str] = Field(None, max_length=500)
     scaffolding_mode: str = Field(default='both', pattern='^(none|prompt|chat|both)$')
@@ -28,6 +30,7 @@ class UpdateVideoRequest(BaseModel):
     """비디오 업데이트 요청 검증"""
     title: Optional[str] = Field(None, min_length=1, max_length=200)
     description: Optional[str] = Field(None, max_length=2000)
+    course_material: Optional[str] = Field(None, max_length=200000)
     scaffolding_mode: Optional[str] = Field(None, pattern='^(none|prompt|chat|both)$')
     is_active: Optional[bool] = None
     learning_enabled: Optional[bool] = None
@@ -40,3 +43,43 @@ class UpdateVideoRequest(BaseModel):
             return v.strip()
         return v
 
+
+
+# 클라이언트가 보낼 수 있는 비디오 이벤트 타입 (일괄 기록 엔드포인트)
+CLIENT_EVENT_TYPES = {
+    'video_play', 'video_pause', 'video_seek', 'video_complete',
+    'step_navigation', 'survey_modal_shown', 'survey_opened', 'survey_completed'
+}
+EVENT_DATA_MAX_BYTES = 2048
+
+
+class VideoEventItem(BaseModel):
+    """일괄 기록할 비디오 이벤트 하나"""
+    video_id: int = Field(..., gt=0)
+    event_type: str
+    event_data: dict = Field(default_factory=dict)
+    client_ts: Optional[int] = Field(None, ge=0)  # 클라이언트 발생 시각 (epoch ms)
+    
+    @field_validator('event_type')
+    @classmethod
+    def validate_event_type(cls, v):
+        if v not in CLIENT_EVENT_TYPES:
+            raise ValueError('지원하지 않는 이벤트 타입입니다')
+        return v
+    
+    @field_validator('event_data')
+    @classmethod
+    def validate_event_data(cls, v):
+        if len(json.dumps(v, ensure_ascii=False).encode('utf-8')) > EVENT_DATA_MAX_BYTES:
+            raise ValueError(f'이벤트 데이터는 {EVENT_DATA_MAX_BYTES}바이트 이하여야 합니다')
+        return v
+
+
+class VideoEventBatchRequest(BaseModel):
+    """
+    비디오 이벤트 일괄 기록 요청 검증 (항목별 검증은 VideoEventItem)
+    
+    navigator.sendBeacon은 헤더를 지정할 수 없으므로 토큰을 본문(access_token)으로 받습니다.
+    """
+    events: list = Field(..., min_length=1, max_length=200)
+    access_token: Optional[str] = None
@@ -0,0 +1,43 @@
+"""Unique active chat session per user and video
+
+Revision ID: 2b8e5f1c7a94
+Revises: 9e4b7c2a5d31
+Create Date: 2026-10-17 23:02:51.204816
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b8e5f1c7a94'
+down_revision = '9e4b7c2a5d31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 동시 요청으로 생긴 중복 활성 세션은 기존 코드가 돌려주던 가장 오래된 세션만 남기고 비활성화
+    op.execute(sa.text("""
+        UPDATE chat_sessions SET is_active = false
+        WHERE is_active = true AND EXISTS (
+            SELECT 1 FROM chat_sessions AS older
+            WHERE older.user_id = chat_sessions.user_id
+              AND older.video_id = chat_sessions.video_id
+              AND older.is_active = true
+              AND older.id < chat_sessions.id
+        )
+    """))
+
+    with op.batch_alter_table('chat_sessions', schema=None) as batch_op:
+        batch_op.create_index(
+            'uq_chat_sessions_active_user_video', ['user_id', 'video_id'],
+            unique=True,
+            postgresql_where=sa.text('is_active'),
+            sqlite_where=sa.text('is_active')
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('chat_sessions', schema=None) as batch_op:
+        batch_op.drop_index('uq_chat_sessions_active_user_video')
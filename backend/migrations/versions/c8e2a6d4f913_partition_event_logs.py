@@ -0,0 +1,125 @@
+"""Partition event_logs by month
+
+Revision ID: c8e2a6d4f913
+Revises: 7d3a1f8c5b62
+Create Date: 2026-10-18 00:21:37.518204
+
+"""
+from alembic import op
+from datetime import date, datetime
+from flask import current_app
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e2a6d4f913'
+down_revision = '7d3a1f8c5b62'
+branch_labels = None
+depends_on = None
+
+INDEXES = ('created_at', 'event_type', 'user_id', 'video_id')
+
+COLUMNS = 'id, user_id, video_id, event_type, event_data, ip_address, user_agent, created_at'
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade():
+    # 선언적 파티셔닝은 PostgreSQL 전용 (SQLite 등에서는 일반 테이블 유지)
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # 기존 테이블은 event_logs_legacy로 이름만 바꿔 두고 행은 옮기지 않음
+    # (`flask cli migrate-legacy-events`가 배치 단위로 옮긴 뒤 삭제, 시퀀스는 새 테이블이 이어서 사용)
+    op.execute('ALTER TABLE event_logs RENAME TO event_logs_legacy')
+    op.execute('ALTER SEQUENCE event_logs_id_seq OWNED BY NONE')
+    op.execute('ALTER TABLE event_logs_legacy RENAME CONSTRAINT event_logs_pkey TO event_logs_legacy_pkey')
+    for index in INDEXES:
+        op.execute(f'ALTER INDEX ix_event_logs_{index} RENAME TO ix_event_logs_legacy_{index}')
+
+    # 파티션 키(created_at)가 PK에 포함되어야 하므로 PK는 (id, created_at)
+    op.execute("""
+        CREATE TABLE event_logs (
+            id INTEGER NOT NULL DEFAULT nextval('event_logs_id_seq'),
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            video_id INTEGER REFERENCES videos (id),
+            event_type VARCHAR(50) NOT NULL,
+            event_data TEXT,
+            ip_address VARCHAR(50),
+            user_agent VARCHAR(500),
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            CONSTRAINT event_logs_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute('ALTER SEQUENCE event_logs_id_seq OWNED BY event_logs.id')
+
+    # 부모에 만든 인덱스는 모든 파티션(이후 생성분 포함)에 자동으로 만들어짐
+    # created_at은 시간순으로 쌓이므로 B-tree 대신 작은 BRIN으로 범위 조회
+    op.execute('CREATE INDEX ix_event_logs_created_at ON event_logs USING brin (created_at)')
+    op.execute('CREATE INDEX ix_event_logs_event_type ON event_logs (event_type)')
+    op.execute('CREATE INDEX ix_event_logs_user_id ON event_logs (user_id)')
+    op.execute('CREATE INDEX ix_event_logs_video_id ON event_logs (video_id)')
+
+    # 기존 데이터가 있는 달부터 이번 달 + EVENT_PARTITION_MONTHS_AHEAD까지 월 파티션 생성
+    # (옮겨 올 행이 기본 파티션이 아닌 월 파티션에 들어가도록, MIN은 created_at 인덱스로 조회)
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text('SELECT MIN(created_at) FROM event_logs_legacy')).scalar()
+    now = datetime.utcnow()
+    month = date((oldest or now).year, (oldest or now).month, 1)
+    last = _add_months(date(now.year, now.month, 1), current_app.config['EVENT_PARTITION_MONTHS_AHEAD'])
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE event_logs_p{month.year:04d}_{month.month:02d} PARTITION OF event_logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    # 범위 밖 시각(파티션 생성 누락, 먼 미래)의 이벤트도 기록이 실패하지 않도록 기본 파티션 사용
+    op.execute('CREATE TABLE event_logs_default PARTITION OF event_logs DEFAULT')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # 일반 테이블로 되돌림 (분리해 둔 파티션의 데이터는 포함되지 않음)
+    bind = op.get_bind()
+    legacy = bind.execute(sa.text("SELECT to_regclass('event_logs_legacy') IS NOT NULL")).scalar()
+    op.execute('ALTER TABLE event_logs RENAME TO event_logs_partitioned')
+    op.execute('ALTER SEQUENCE event_logs_id_seq OWNED BY NONE')
+    op.execute('ALTER TABLE event_logs_partitioned RENAME CONSTRAINT event_logs_pkey TO event_logs_partitioned_pkey')
+    for index in INDEXES:
+        op.execute(f'DROP INDEX ix_event_logs_{index}')
+
+    if legacy:
+        # 아직 옮기지 않은 행이 있는 기존 테이블을 되살리고 새 테이블의 행을 합침
+        op.execute('ALTER TABLE event_logs_legacy RENAME TO event_logs')
+        op.execute('ALTER TABLE event_logs RENAME CONSTRAINT event_logs_legacy_pkey TO event_logs_pkey')
+        for index in INDEXES:
+            op.execute(f'ALTER INDEX ix_event_logs_legacy_{index} RENAME TO ix_event_logs_{index}')
+    else:
+        op.execute("""
+            CREATE TABLE event_logs (
+                id INTEGER NOT NULL DEFAULT nextval('event_logs_id_seq'),
+                user_id INTEGER NOT NULL REFERENCES users (id),
+                video_id INTEGER REFERENCES videos (id),
+                event_type VARCHAR(50) NOT NULL,
+                event_data TEXT,
+                ip_address VARCHAR(50),
+                user_agent VARCHAR(500),
+                created_at TIMESTAMP WITHOUT TIME ZONE,
+                CONSTRAINT event_logs_pkey PRIMARY KEY (id)
+            )
+        """)
+    op.execute('ALTER SEQUENCE event_logs_id_seq OWNED BY event_logs.id')
+    op.execute(f'INSERT INTO event_logs ({COLUMNS}) SELECT {COLUMNS} FROM event_logs_partitioned')
+    op.execute('DROP TABLE event_logs_partitioned')
+
+    if not legacy:
+        with op.batch_alter_table('event_logs', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_event_logs_created_at'), ['created_at'], unique=False)
+            batch_op.create_index(batch_op.f('ix_event_logs_event_type'), ['event_type'], unique=False)
+            batch_op.create_index(batch_op.f('ix_event_logs_user_id'), ['user_id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_event_logs_video_id'), ['video_id'], unique=False)
@@ -0,0 +1,124 @@
+"""Store event_data as JSONB with promoted columns
+
+Revision ID: e5b9c3a7d240
+Revises: c8e2a6d4f913
+Create Date: 2026-10-18 01:04:52.773190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b9c3a7d240'
+down_revision = 'c8e2a6d4f913'
+branch_labels = None
+depends_on = None
+
+# 파티셔닝 마이그레이션 후 아직 옮기지 않은 기존 테이블 (flask cli migrate-legacy-events)
+LEGACY_TABLE = 'event_logs_legacy'
+
+def _pg_number(path):
+    return f"CASE WHEN jsonb_typeof(event_data -> '{path}') = 'number' THEN (event_data ->> '{path}')::float8 END"
+
+
+def _sqlite_number(path):
+    return (
+        f"CASE WHEN json_type(event_data, '$.{path}') IN ('integer', 'real') "
+        f"THEN json_extract(event_data, '$.{path}') END"
+    )
+
+
+def _backfill(number, table='event_logs'):
+    # EventLog.promote와 같은 규칙 (seek은 이동 후 위치, 그 밖은 timestamp, 없으면 current_time)
+    return f"""
+        UPDATE {table} SET
+            playback_position = COALESCE(
+                CASE WHEN event_type = 'video_seek' THEN {number('to_timestamp')} ELSE {number('timestamp')} END,
+                {number('current_time')}
+            ),
+            duration = {number('duration')},
+            scaffolding_id = CAST({number('scaffolding_id')} AS INTEGER)
+        WHERE event_data IS NOT NULL
+    """
+
+
+def _pg_event_tables():
+    tables = ['event_logs']
+    if op.get_bind().execute(sa.text('SELECT to_regclass(:table)'), {'table': LEGACY_TABLE}).scalar() is not None:
+        tables.append(LEGACY_TABLE)
+    return tables
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # JSON이 아닌 기존 값(NaN 등)은 마이그레이션을 멈추지 않도록 {"raw": 원문}으로 보존
+        op.execute("""
+            CREATE FUNCTION pg_temp.event_data_to_jsonb(value text) RETURNS jsonb AS $$
+            BEGIN
+                RETURN NULLIF(value, '')::jsonb;
+            EXCEPTION WHEN others THEN
+                RETURN jsonb_build_object('raw', value);
+            END
+            $$ LANGUAGE plpgsql IMMUTABLE
+        """)
+        # 파티션 테이블에 실행하면 모든 파티션에 적용됨. 남은 기존 테이블도 같은 형태로 바꿔야
+        # migrate-legacy-events가 그대로 옮길 수 있음 (앱이 읽지 않는 테이블이므로 조회를 막지 않음)
+        for table in _pg_event_tables():
+            op.execute(
+                f'ALTER TABLE {table} ALTER COLUMN event_data TYPE JSONB '
+                'USING pg_temp.event_data_to_jsonb(event_data)'
+            )
+            op.add_column(table, sa.Column('playback_position', sa.Float(), nullable=True))
+            op.add_column(table, sa.Column('duration', sa.Float(), nullable=True))
+            op.add_column(table, sa.Column('scaffolding_id', sa.Integer(), nullable=True))
+            op.execute(_backfill(_pg_number, table))
+
+        op.create_index(
+            'ix_event_logs_video_type_position', 'event_logs',
+            ['video_id', 'event_type', 'playback_position'], unique=False
+        )
+        op.create_index(
+            'ix_event_logs_scaffolding_id', 'event_logs', ['scaffolding_id'], unique=False,
+            postgresql_where=sa.text('scaffolding_id IS NOT NULL')
+        )
+        op.create_index(
+            'ix_event_logs_event_data', 'event_logs', ['event_data'], unique=False,
+            postgresql_using='gin', postgresql_ops={'event_data': 'jsonb_path_ops'}
+        )
+        op.execute('ANALYZE event_logs')
+        return
+
+    with op.batch_alter_table('event_logs', schema=None) as batch_op:
+        batch_op.alter_column('event_data', existing_type=sa.Text(), type_=sa.JSON(), existing_nullable=True)
+        batch_op.add_column(sa.Column('playback_position', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('duration', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('scaffolding_id', sa.Integer(), nullable=True))
+        batch_op.create_index(
+            'ix_event_logs_video_type_position', ['video_id', 'event_type', 'playback_position'], unique=False
+        )
+        batch_op.create_index('ix_event_logs_scaffolding_id', ['scaffolding_id'], unique=False)
+
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute(_backfill(_sqlite_number))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_event_logs_event_data', table_name='event_logs')
+        op.drop_index('ix_event_logs_scaffolding_id', table_name='event_logs')
+        op.drop_index('ix_event_logs_video_type_position', table_name='event_logs')
+        for table in _pg_event_tables():
+            op.drop_column(table, 'scaffolding_id')
+            op.drop_column(table, 'duration')
+            op.drop_column(table, 'playback_position')
+            op.execute(f'ALTER TABLE {table} ALTER COLUMN event_data TYPE TEXT USING event_data::text')
+        return
+
+    with op.batch_alter_table('event_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_event_logs_scaffolding_id')
+        batch_op.drop_index('ix_event_logs_video_type_position')
+        batch_op.drop_column('scaffolding_id')
+        batch_op.drop_column('duration')
+        batch_op.drop_column('playback_position')
+        batch_op.alter_column('event_data', existing_type=sa.JSON(), type_=sa.Text(), existing_nullable=True)
@@ -0,0 +1,162 @@
+"""
+테스트 공용 픽스처
+
+- Config는 import 시점에 필수 환경 변수를 확인하므로 app을 import하기 전에 설정
+- tiktoken 인코딩은 네트워크에서 내려받으므로 테스트에서는 단순 토크나이저로 대체
+- DB는 테스트마다 임시 SQLite 파일 (스레드에서 같은 DB를 보도록 :memory: 대신 파일)
+"""
+import os
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+os.environ.setdefault('OPENAI_API_KEY', 'test-openai-key')
+
+import re
+import threading
+
+import pytest
+import tiktoken
+from werkzeug.serving import make_server
+
+import app as app_module
+from app import create_app, db
+from app.config import TestingConfig
+from app.devtools.fake_openai import FakeOpenAIConfig, create_fake_openai_app
+from app.services.answer_cache import answer_cache
+from app.services.course_material import material_index
+from app.services.prompt_cache import prompt_cache
+
+
+class FakeEncoding:
+    """단어/기호 하나를 토큰 하나로 세는 테스트용 인코딩"""
+    name = 'fake'
+    _pattern = re.compile(r'\w+|[^\w\s]')
+
+    def encode(self, text, **kwargs):
+        return self._pattern.findall(text or '')
+
+    def encode_ordinary(self, text):
+        return self.encode(text)
+
+    def encode_ordinary_batch(self, texts, num_threads=8):
+        return [self.encode(text) for text in texts]
+
+    def encode_batch(self, texts, num_threads=8, **kwargs):
+        return [self.encode(text) for text in texts]
+
+    def decode(self, tokens):
+        return ' '.join(tokens)
+
+
+@pytest.fixture(autouse=True)
+def fake_encoding(monkeypatch):
+    encoding = FakeEncoding()
+    monkeypatch.setattr(tiktoken, 'encoding_for_model', lambda name: encoding)
+    monkeypatch.setattr(tiktoken, 'get_encoding', lambda name: encoding)
+    return encoding
+
+
+def _close_singletons():
+    # 프로세스 전역 캐시는 테스트마다 새 DB를 쓰므로 비움
+    prompt_cache.__init__()
+    answer_cache.__init__()
+    material_index.__init__()
+    if app_module._event_ingestor is not None:
+        app_module._event_ingestor.close()
+    if app_module._openai_service is not None:
+        app_module._openai_service.close()
+    app_module._reset_openai_service()
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """설정을 덮어쓴 테스트 앱 생성 (테이블 생성 포함)"""
+    created = []
+
+    def factory(**overrides):
+        monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path}/test.db')
+        for key, value in overrides.items():
+            monkeypatch.setattr(TestingConfig, key, value, raising=False)
+        flask_app = create_app('testing')
+        with flask_app.app_context():
+            db.create_all()
+        created.append(flask_app)
+        return flask_app
+
+    _close_singletons()
+    yield factory
+    _close_singletons()
+    for flask_app in created:
+        with flask_app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def start_fake_openai():
+    """가짜 OpenAI 서버를 띄우고 (base_url, 상태 객체)를 반환하는 함수 (기본은 지연 없음)"""
+    servers = []
+
+    def start(**overrides):
+        settings = {'latency_ms': 0, 'ttft_ms': 0, 'chunk_interval_ms': 0, 'reply_tokens': 20, **overrides}
+        fake_app = create_fake_openai_app(FakeOpenAIConfig(**settings))
+        server = make_server('127.0.0.1', 0, fake_app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        servers.append((server, thread))
+        return f'http://127.0.0.1:{server.server_port}/v1', fake_app.config['FAKE_OPENAI_STATE']
+
+    yield start
+    for server, thread in servers:
+        server.shutdown()
+        thread.join(timeout=5)
+
+
+@pytest.fixture
+def fake_openai(start_fake_openai):
+    return start_fake_openai()
+
+
+@pytest.fixture
+def user(app):
+    from app.models import User
+    with app.app_context():
+        account = User(student_id=2024000001, name='테스트', password_hash='x')
+        db.session.add(account)
+        db.session.commit()
+        return account.id
+
+
+@pytest.fixture
+def video(app):
+    from app.models import Video
+    with app.app_context():
+        item = Video(title='테스트 영상', youtube_url='https://youtu.be/test', youtube_id='test')
+        db.session.add(item)
+        db.session.commit()
+        return item.id
+
+
+@pytest.fixture
+def auth_headers(app, user):
+    from flask_jwt_extended import create_access_token
+    with app.app_context():
+        token = create_access_token(identity=str(user))
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def admin_headers(app):
+    from flask_jwt_extended import create_access_token
+    from app.models import User
+    with app.app_context():
+        account = User(student_id=2024000999, name='관리자', password_hash='x', role='admin')
+        db.session.add(account)
+        db.session.commit()
+        token = create_access_token(identity=str(account.id))
+    return {'Authorization': f'Bearer {token}'}
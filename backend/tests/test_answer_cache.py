@@ -0,0 +1,159 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import db, get_openai_service
+from app.models.chat_message import ChatMessage
+from app.models.user import User
+from app.services import answer_cache as answer_cache_module
+from app.services.answer_cache import AnswerCache
+
+QUESTION = '파이썬에서 리스트와 튜플의 차이는 무엇인가요'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(answer_cache_module, 'time', fake)
+    return fake
+
+
+@pytest.fixture
+def cache(app, clock):
+    with app.app_context():
+        yield AnswerCache()
+
+
+def test_exact_hit_after_normalization(cache):
+    cache.store(cache.make_key(1, 'fallback', QUESTION), '캐시된 답변')
+
+    assert cache.lookup(cache.make_key(1, 'fallback', f'  {QUESTION}?! ')) == '캐시된 답변'
+    assert cache.get_stats()['videos'][1]['exact_hits'] == 1
+
+
+def test_near_duplicate_hit_and_dissimilar_miss(cache):
+    cache.store(cache.make_key(1, 'fallback', QUESTION), '캐시된 답변')
+    cache.store(cache.make_key(1, 'fallback', '재귀 함수의 종료 조건은 왜 필요한가요'), '재귀 답변')
+
+    # 오타 하나 (추정 유사도 0.95)
+    assert cache.lookup(cache.make_key(1, 'fallback', '파이썬에서 리스트와 튜플의 차이는 무엇인가여')) == '캐시된 답변'
+    # 조사 하나 차이지만 추정 유사도 0.70으로 기준(0.85) 미만
+    assert cache.lookup(cache.make_key(1, 'fallback', '재귀 함수에서 종료 조건은 왜 필요한가요')) is None
+    assert cache.get_stats()['videos'][1]['near_hits'] == 1
+
+
+def test_short_questions_need_exact_match(cache):
+    cache.store(cache.make_key(1, 'fallback', '변수란'), '짧은 답변')
+
+    assert cache.lookup(cache.make_key(1, 'fallback', '변수란?')) == '짧은 답변'
+    assert cache.lookup(cache.make_key(1, 'fallback', '변수는')) is None
+
+
+def test_entries_are_scoped_by_video_and_prompt_version(cache):
+    cache.store(cache.make_key(1, '3:1', QUESTION), '캐시된 답변')
+
+    assert cache.lookup(cache.make_key(2, '3:1', QUESTION)) is None
+    assert cache.lookup(cache.make_key(1, '3:2', QUESTION)) is None
+
+
+def test_entries_expire_after_ttl(app, cache, clock):
+    cache.store(cache.make_key(1, 'fallback', QUESTION), '캐시된 답변')
+
+    clock.now += app.config['ANSWER_CACHE_TTL_SECONDS'] + 1
+
+    assert cache.lookup(cache.make_key(1, 'fallback', QUESTION)) is None
+    assert cache.get_stats()['entries'] == 0
+
+
+def test_lru_eviction_keeps_recently_used(make_app, clock):
+    flask_app = make_app(ANSWER_CACHE_MAX_ENTRIES=2)
+    cache = AnswerCache()
+    with flask_app.app_context():
+        first, second, third = (cache.make_key(1, 'fallback', f'{QUESTION} {index}번') for index in range(3))
+        cache.store(first, '1')
+        cache.store(second, '2')
+        assert cache.lookup(first) == '1'
+        cache.store(third, '3')
+
+        assert cache.lookup(second) is None
+        assert cache.lookup(first) == '1'
+        assert cache.get_stats()['videos'][1]['evictions'] == 1
+
+
+def test_first_turn_answer_is_reused_for_next_student(app, user, video, auth_headers, monkeypatch):
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='리스트는 변경 가능합니다'))],
+            usage=SimpleNamespace(prompt_tokens=30, completion_tokens=5, total_tokens=35)
+        )
+
+    with app.app_context():
+        monkeypatch.setattr(get_openai_service().client.chat, 'completions', SimpleNamespace(create=create))
+        other = User(student_id=2024000002, name='다른 학생', password_hash='x')
+        db.session.add(other)
+        db.session.commit()
+        from flask_jwt_extended import create_access_token
+        other_headers = {'Authorization': f'Bearer {create_access_token(identity=str(other.id))}'}
+
+    client = app.test_client()
+    answers = []
+    for headers in (auth_headers, other_headers):
+        session_id = client.post('/api/chat/sessions', json={'video_id': video}, headers=headers).get_json()['id']
+        response = client.post(f'/api/chat/sessions/{session_id}/messages', json={'message': QUESTION}, headers=headers)
+        assert response.status_code == 200
+        answers.append(response.get_json()['message'])
+
+    assert len(calls) == 1
+    assert answers[0]['content'] == answers[1]['content'] == '리스트는 변경 가능합니다'
+    assert answers[1]['answer_cache_hit'] is True
+    with app.app_context():
+        hit = db.session.get(ChatMessage, answers[1]['id'])
+        assert hit.total_tokens == 0
+
+
+@pytest.fixture
+def workers(make_app, clock):
+    """같은 DB를 쓰는 두 워커 프로세스의 캐시 (버전은 조회마다 확인)"""
+    flask_app = make_app(ANSWER_CACHE_VERSION_CHECK_SECONDS=0)
+    with flask_app.app_context():
+        first, second = AnswerCache(), AnswerCache()
+        for cache in (first, second):
+            cache.lookup(cache.make_key(1, 'fallback', QUESTION))
+            for video_id in (1, 2):
+                cache.store(cache.make_key(video_id, 'fallback', QUESTION), f'비디오 {video_id} 답변')
+        yield first, second
+
+
+def test_video_purge_reaches_other_workers_for_that_video_only(workers):
+    first, second = workers
+
+    AnswerCache.bump_version(1)
+    db.session.commit()
+    assert first.purge(1) == 1
+
+    assert second.lookup(second.make_key(1, 'fallback', QUESTION)) is None
+    assert second.lookup(second.make_key(2, 'fallback', QUESTION)) == '비디오 2 답변'
+    assert first.lookup(first.make_key(2, 'fallback', QUESTION)) == '비디오 2 답변'
+
+
+def test_first_full_purge_reaches_other_workers(workers):
+    first, second = workers
+
+    # 버전 행이 아직 없던 상태에서의 첫 purge도 변경으로 전파
+    AnswerCache.bump_version()
+    db.session.commit()
+    first.purge()
+
+    assert second.lookup(second.make_key(2, 'fallback', QUESTION)) is None
+    assert second.get_stats()['entries'] == 0
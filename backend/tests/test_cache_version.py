@@ -0,0 +1,26 @@
+from app import db
+from app.models.cache_version import CacheVersion
+
+
+def test_bump_creates_then_increments(app):
+    with app.app_context():
+        assert CacheVersion.current('answer_cache') is None
+
+        CacheVersion.bump('answer_cache')
+        db.session.commit()
+        assert CacheVersion.current('answer_cache') == 1
+
+        CacheVersion.bump('answer_cache')
+        CacheVersion.bump('answer_cache')
+        db.session.commit()
+        assert CacheVersion.current('answer_cache') == 3
+
+
+def test_bump_rolls_back_with_caller_transaction(app):
+    with app.app_context():
+        CacheVersion.bump('prompt_templates')
+        db.session.commit()
+
+        CacheVersion.bump('prompt_templates')
+        db.session.rollback()
+        assert CacheVersion.current('prompt_templates') == 1
@@ -0,0 +1,133 @@
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app import db, get_openai_service
+from app.models.chat_message import ChatMessage
+from app.models.chat_session import ChatSession
+from app.services.cancellation import generation_registry
+from app.services.chat_service import ChatService
+from app.services.token_ledger import TokenLedger
+
+PIECES = ['첫 부분', ' 두 번째 부분', ' 세 번째 부분', ' 마지막 부분']
+
+
+class FakeStream:
+    """공급자 스트림 대체 (청크를 하나씩 내보내고 close 여부를 기록)"""
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.sent = 0
+        self.closed = False
+
+    def __iter__(self):
+        for piece in self.pieces:
+            self.sent += 1
+            yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+        yield SimpleNamespace(
+            usage=SimpleNamespace(prompt_tokens=20, completion_tokens=8, total_tokens=28),
+            choices=[]
+        )
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def stream(app, monkeypatch):
+    fake = FakeStream(PIECES)
+    with app.app_context():
+        monkeypatch.setattr(
+            get_openai_service().client.chat, 'completions', SimpleNamespace(create=lambda **kwargs: fake)
+        )
+    return fake
+
+
+@pytest.fixture
+def session_id(app, user, video):
+    with app.app_context():
+        session, error = ChatService.get_or_create_session(user, video)
+        assert error is None
+        return session.id
+
+
+def _open_stream(client, session_id, headers):
+    response = client.post(
+        f'/api/chat/sessions/{session_id}/messages/stream',
+        json={'message': '긴 답변이 필요한 질문'},
+        headers=headers,
+        buffered=False
+    )
+    assert response.status_code == 200
+    return response, iter(response.response)
+
+
+def _assert_partial_answer_settled(app, user, session_id):
+    with app.app_context():
+        saved = ChatMessage.query.filter_by(session_id=session_id, role='assistant').one()
+        assert saved.cancelled is True
+        assert saved.content == PIECES[0]
+        assert saved.completion_tokens == 2
+        # 예약은 받은 부분까지의 사용량으로 정산됨
+        usage = TokenLedger.get_usage_today(user, app.config['DAILY_TOKEN_LIMIT'])
+        assert usage['used_tokens'] == saved.total_tokens
+        assert usage['reserved_tokens'] == 0
+
+
+def test_cancel_in_same_worker_stops_stream_and_saves_partial_answer(app, user, session_id, auth_headers, stream):
+    client = app.test_client()
+    response, events = _open_stream(client, session_id, auth_headers)
+    assert next(events).startswith(b'event: delta')
+
+    cancelled = client.post(f'/api/chat/sessions/{session_id}/cancel', headers=auth_headers)
+    assert cancelled.status_code == 200
+
+    rest = b''.join(events)
+    response.close()
+
+    assert b'event: done' in rest
+    # 다음 청크에서 바로 멈추고 공급자 스트림을 닫음
+    assert stream.closed
+    assert stream.sent == 2
+    assert generation_registry.get_stats()['inflight'] == 0
+    _assert_partial_answer_settled(app, user, session_id)
+
+
+def test_cancel_flag_from_other_worker_stops_stream(app, user, session_id, auth_headers, stream, monkeypatch):
+    monkeypatch.setitem(app.config, 'CHAT_CANCEL_CHECK_SECONDS', 0.001)
+    cancelled_before = generation_registry.get_stats()['cancelled']
+    client = app.test_client()
+    response, events = _open_stream(client, session_id, auth_headers)
+    next(events)
+
+    # 다른 워커가 받은 취소 요청: 이 프로세스의 레지스트리는 거치지 않고 DB 플래그만 남음
+    with app.app_context():
+        ChatSession.query.filter_by(id=session_id).update({'cancel_requested_at': datetime.utcnow()})
+        db.session.commit()
+    time.sleep(0.01)
+
+    rest = b''.join(events)
+    response.close()
+
+    assert b'event: done' in rest
+    assert stream.closed
+    assert generation_registry.get_stats()['cancelled'] == cancelled_before
+    _assert_partial_answer_settled(app, user, session_id)
+
+
+def test_earlier_cancel_flag_does_not_stop_new_stream(app, user, session_id, auth_headers, stream, monkeypatch):
+    monkeypatch.setitem(app.config, 'CHAT_CANCEL_CHECK_SECONDS', 0.001)
+    client = app.test_client()
+    assert client.post(f'/api/chat/sessions/{session_id}/cancel', headers=auth_headers).status_code == 200
+    time.sleep(0.01)
+
+    response, events = _open_stream(client, session_id, auth_headers)
+    b''.join(events)
+    response.close()
+
+    with app.app_context():
+        saved = ChatMessage.query.filter_by(session_id=session_id, role='assistant').one()
+        assert saved.cancelled is False
+        assert saved.content == ''.join(PIECES)
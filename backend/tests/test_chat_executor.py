@@ -0,0 +1,183 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import db, get_chat_executor, get_openai_service
+from app.models.chat_job import ChatJob
+from app.models.chat_message import ChatMessage
+from app.models.user import User
+from app.services.chat_service import ChatService
+from app.services.token_ledger import TokenLedger
+
+
+class FakeAsyncCompletions:
+    """AsyncOpenAI chat.completions 대체 (error를 지정하면 호출 시 예외 발생, release가 풀릴 때까지 응답 지연)"""
+
+    def __init__(self):
+        self.error = None
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        while not self.release.is_set():
+            await asyncio.sleep(0.01)
+        if self.error:
+            raise self.error
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='비동기 답변'))],
+            usage=SimpleNamespace(prompt_tokens=12, completion_tokens=4, total_tokens=16)
+        )
+
+
+@pytest.fixture
+def completions(app, monkeypatch):
+    fake = FakeAsyncCompletions()
+    with app.app_context():
+        monkeypatch.setattr(get_openai_service().async_client.chat, 'completions', fake)
+    return fake
+
+
+@pytest.fixture
+def session_id(app, user, video):
+    with app.app_context():
+        session, error = ChatService.get_or_create_session(user, video)
+        assert error is None
+        return session.id
+
+
+def _submit(client, session_id, headers, message='비동기 질문'):
+    return client.post(
+        f'/api/chat/sessions/{session_id}/messages/async', json={'message': message}, headers=headers
+    )
+
+
+def _wait_until(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('condition not met')
+        time.sleep(0.02)
+
+
+def _other_student(app, video):
+    with app.app_context():
+        account = User(student_id=2024000002, name='다른 학생', password_hash='x')
+        db.session.add(account)
+        db.session.commit()
+        session, error = ChatService.get_or_create_session(account.id, video)
+        assert error is None
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(account.id))}'}
+        return account.id, session.id, headers
+
+
+def _poll(client, session_id, job_id, headers, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get(f'/api/chat/sessions/{session_id}/jobs/{job_id}', headers=headers)
+        if response.status_code != 202:
+            return response
+        time.sleep(0.02)
+    raise AssertionError('chat job did not finish')
+
+
+def test_async_message_completes_through_polling(app, user, completions, session_id, auth_headers):
+    client = app.test_client()
+
+    submitted = _submit(client, session_id, auth_headers)
+    assert submitted.status_code == 202
+    assert submitted.get_json()['status'] == 'pending'
+
+    finished = _poll(client, session_id, submitted.get_json()['id'], auth_headers)
+    assert finished.status_code == 200
+    body = finished.get_json()
+    assert body['status'] == 'succeeded'
+    assert body['message']['content'] == '비동기 답변'
+    with app.app_context():
+        assert ChatMessage.query.filter_by(session_id=session_id).count() == 2
+        assert get_chat_executor().get_stats()['succeeded'] == 1
+        # 예약은 실제 사용량으로 정산됨
+        usage = TokenLedger.get_usage_today(user, app.config['DAILY_TOKEN_LIMIT'])
+        assert usage['used_tokens'] == 16
+        assert usage['reserved_tokens'] == 0
+
+
+def test_failed_job_releases_reservation(app, user, completions, session_id, auth_headers):
+    completions.error = RuntimeError('provider down')
+    client = app.test_client()
+
+    submitted = _submit(client, session_id, auth_headers)
+    finished = _poll(client, session_id, submitted.get_json()['id'], auth_headers)
+
+    body = finished.get_json()
+    assert body['status'] == 'failed'
+    assert 'provider down' in body['error']
+    with app.app_context():
+        assert ChatMessage.query.filter_by(session_id=session_id).count() == 0
+        assert get_chat_executor().get_stats()['failed'] == 1
+        # 실패한 작업의 예약은 해제됨
+        usage = TokenLedger.get_usage_today(user, app.config['DAILY_TOKEN_LIMIT'])
+        assert usage['used_tokens'] == 0
+        assert usage['reserved_tokens'] == 0
+
+
+@pytest.fixture
+def queued_job(app, user, video, completions, session_id, auth_headers, monkeypatch):
+    """동시 실행 1개를 첫 작업이 점유한 상태에서 다른 학생의 작업을 대기시킴"""
+    monkeypatch.setitem(app.config, 'CHAT_ASYNC_MAX_INFLIGHT', 1)
+    completions.release.clear()
+    client = app.test_client()
+    running_id = _submit(client, session_id, auth_headers).get_json()['id']
+    _wait_until(lambda: completions.calls == 1)
+
+    other_user, other_session_id, other_headers = _other_student(app, video)
+    queued_id = _submit(client, other_session_id, other_headers, message='대기하는 질문').get_json()['id']
+    with app.app_context():
+        usage = TokenLedger.get_usage_today(other_user, app.config['DAILY_TOKEN_LIMIT'])
+        assert usage['reserved_tokens'] > 0
+    return SimpleNamespace(
+        running_id=running_id, id=queued_id, user=other_user, session_id=other_session_id, headers=other_headers
+    )
+
+
+def _reserved(app, user_id):
+    with app.app_context():
+        return TokenLedger.get_usage_today(user_id, app.config['DAILY_TOKEN_LIMIT'])['reserved_tokens']
+
+
+def test_cancel_while_queued_releases_reservation(app, completions, session_id, auth_headers, queued_job):
+    client = app.test_client()
+
+    cancelled = client.post(f'/api/chat/sessions/{queued_job.session_id}/cancel', headers=queued_job.headers)
+    assert cancelled.status_code == 200
+    _wait_until(lambda: _reserved(app, queued_job.user) == 0)
+    completions.release.set()
+
+    assert _poll(client, session_id, queued_job.running_id, auth_headers).get_json()['status'] == 'succeeded'
+    assert _poll(client, queued_job.session_id, queued_job.id, queued_job.headers).get_json()['status'] == 'cancelled'
+    # 대기 중에 취소된 작업은 API를 호출하지 않음
+    assert completions.calls == 1
+    with app.app_context():
+        assert get_chat_executor().get_stats()['cancelled'] == 1
+        assert TokenLedger.get_usage_today(queued_job.user, app.config['DAILY_TOKEN_LIMIT'])['used_tokens'] == 0
+
+
+def test_pending_job_cancelled_by_other_worker_is_skipped(app, completions, session_id, auth_headers, queued_job):
+    client = app.test_client()
+
+    # 다른 워커가 받은 취소 요청: 이 프로세스의 태스크는 그대로 두고 DB 상태만 바뀜
+    with app.app_context():
+        ChatJob.query.filter_by(id=queued_job.id).update({'status': 'cancelled'})
+        db.session.commit()
+    completions.release.set()
+
+    assert _poll(client, session_id, queued_job.running_id, auth_headers).get_json()['status'] == 'succeeded'
+    with app.app_context():
+        _wait_until(lambda: get_chat_executor().get_stats()['cancelled'] == 1)
+    assert completions.calls == 1
+    assert _reserved(app, queued_job.user) == 0
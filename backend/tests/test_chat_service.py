@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from app import db
+from app.models.chat_session import ChatSession
+from app.models.user import User
+from app.services.chat_service import ChatService
+from app.services.token_ledger import TokenLedger
+
+
+def _response(content):
+    return {
+        'content': content,
+        'prompt_tokens': 10,
+        'completion_tokens': 5,
+        'total_tokens': 15,
+        'cost': 0.0,
+        'summarize_through_id': None
+    }
+
+
+def _save_turn(session, account, message, content):
+    reservation, error = TokenLedger.reserve(account.id, 100, 10000)
+    assert error is None
+    return ChatService._save_turn(session, account, message, _response(content), reservation)
+
+
+def test_summary_updated_only_after_summary_lands(app, user, video):
+    with app.app_context():
+        session = ChatSession(user_id=user, video_id=video)
+        db.session.add(session)
+        db.session.commit()
+        account = db.session.get(User, user)
+
+        first = _save_turn(session, account, '질문 1', '답변 1')
+        assert first['session']['summary_updated'] is False
+        assert first['session']['summary_scheduled'] is False
+
+        # 두 턴 사이에 백그라운드 요약이 반영됨
+        ChatSession.query.filter_by(id=session.id).update({
+            'summary': '요약', 'summary_updated_at': datetime.utcnow()
+        })
+        db.session.commit()
+
+        second = _save_turn(session, account, '질문 2', '답변 2')
+        assert second['session']['summary_updated'] is True
+
+        third = _save_turn(session, account, '질문 3', '답변 3')
+        assert third['session']['summary_updated'] is False
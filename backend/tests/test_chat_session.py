@@ -0,0 +1,63 @@
+import threading
+
+from app import db
+from app.models.chat_session import ChatSession
+from app.services.chat_service import ChatService
+
+
+def test_get_or_create_returns_same_active_session(app, user, video):
+    with app.app_context():
+        first, error = ChatService.get_or_create_session(user, video)
+        assert error is None
+        second, error = ChatService.get_or_create_session(user, video)
+        assert error is None
+
+        assert first.id == second.id
+        assert ChatSession.query.filter_by(user_id=user, video_id=video).count() == 1
+
+
+def test_missing_video_creates_nothing(app, user):
+    with app.app_context():
+        session, error = ChatService.get_or_create_session(user, 9999)
+
+        assert session is None
+        assert error == '비디오를 찾을 수 없습니다'
+        assert ChatSession.query.count() == 0
+
+
+def test_inactive_session_does_not_block_new_one(app, user, video):
+    with app.app_context():
+        old, _ = ChatService.get_or_create_session(user, video)
+        old.is_active = False
+        db.session.commit()
+
+        new, error = ChatService.get_or_create_session(user, video)
+
+        assert error is None
+        assert new.id != old.id
+        assert new.is_active
+
+
+def test_concurrent_opens_share_one_session(app, user, video):
+    results = []
+    lock = threading.Lock()
+    start = threading.Barrier(6)
+
+    def open_session():
+        with app.app_context():
+            start.wait()
+            session, error = ChatService.get_or_create_session(user, video)
+            with lock:
+                results.append((session.id if session else None, error))
+
+    threads = [threading.Thread(target=open_session) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert len(results) == 6
+    assert {error for _, error in results} == {None}
+    assert len({session_id for session_id, _ in results}) == 1
+    with app.app_context():
+        assert ChatSession.query.filter_by(user_id=user, video_id=video, is_active=True).count() == 1
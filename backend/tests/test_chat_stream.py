@@ -0,0 +1,48 @@
+from app import db
+from app.services.cancellation import generation_registry
+from app.services.chat_service import ChatService
+from app.services.token_ledger import TokenLedger
+
+
+def _open_stream(app, session_id, headers, key, message):
+    """스트림 응답을 만들기만 하고 본문은 읽지 않음 (첫 이벤트 전에 연결이 끊긴 경우)"""
+    with app.test_request_context(
+        f'/api/chat/sessions/{session_id}/messages/stream',
+        method='POST',
+        json={'message': message},
+        headers={**headers, 'Idempotency-Key': key}
+    ):
+        return app.full_dispatch_request()
+
+
+def _session_id(app, user, video):
+    with app.app_context():
+        session, error = ChatService.get_or_create_session(user, video)
+        assert error is None
+        return session.id
+
+
+def test_stream_closed_before_first_event_releases_resources(app, user, video, auth_headers):
+    session_id = _session_id(app, user, video)
+    message = '연결이 바로 끊기는 질문'
+    inflight_before = generation_registry.get_stats()['inflight']
+
+    response = _open_stream(app, session_id, auth_headers, 'stream-close-before-read', message)
+    assert response.status_code == 200
+    assert generation_registry.get_stats()['inflight'] == inflight_before + 1
+    with app.app_context():
+        assert TokenLedger.get_usage_today(user, app.config['DAILY_TOKEN_LIMIT'])['reserved_tokens'] > 0
+
+    # WSGI 서버가 본문을 읽기 전에 응답을 닫음
+    response.close()
+
+    assert generation_registry.get_stats()['inflight'] == inflight_before
+    with app.app_context():
+        assert TokenLedger.get_usage_today(user, app.config['DAILY_TOKEN_LIMIT'])['reserved_tokens'] == 0
+        # 선점이 해제되어 같은 키로 다시 처리할 수 있음
+        claim, replay, error = ChatService._begin_idempotent(
+            session_id, user, message, 'stream-close-before-read'
+        )
+        assert error is None and replay is None and claim is not None
+        claim.abandon()
+        db.session.remove()
@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import circuit_breaker
+from app.services.circuit_breaker import CIRCUIT_OPEN_ERROR, CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(circuit_breaker, 'time', SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker({
+        'BREAKER_WINDOW_SECONDS': 60,
+        'BREAKER_MIN_CALLS': 4,
+        'BREAKER_FAILURE_RATE': 0.5,
+        'BREAKER_SLOW_CALL_SECONDS': 10,
+        'BREAKER_SLOW_CALL_RATE': 0.8,
+        'BREAKER_OPEN_SECONDS': 30,
+        'BREAKER_HALF_OPEN_PROBES': 2
+    })
+
+
+def _trip(breaker):
+    for _ in range(4):
+        breaker.record_failure(1.0)
+
+
+def test_stays_closed_below_min_calls(breaker):
+    for _ in range(3):
+        breaker.record_failure(1.0)
+
+    assert breaker.state == CLOSED
+    assert breaker.before_call() is False
+
+
+def test_failure_rate_opens_and_rejects(breaker):
+    breaker.record_success(1.0)
+    breaker.record_success(1.0)
+    breaker.record_failure(1.0)
+    assert breaker.state == CLOSED
+    breaker.record_failure(1.0)
+
+    assert breaker.state == OPEN
+    with pytest.raises(Exception, match=CIRCUIT_OPEN_ERROR):
+        breaker.before_call()
+    with pytest.raises(Exception, match=CIRCUIT_OPEN_ERROR):
+        breaker.ensure_closed()
+    assert breaker.retry_after() == 30
+    assert breaker.get_stats()['rejected'] == 2
+
+
+def test_slow_calls_open(breaker):
+    for _ in range(4):
+        breaker.record_success(12.0)
+
+    assert breaker.state == OPEN
+
+
+def test_old_calls_leave_the_window(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure(1.0)
+    clock.value += 61
+    breaker.record_failure(1.0)
+
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probes_close_after_successes(breaker, clock):
+    _trip(breaker)
+    clock.value += 30
+
+    assert breaker.state == HALF_OPEN
+    first = breaker.before_call()
+    second = breaker.before_call()
+    assert first is True and second is True
+    # 시험 호출 자리가 모두 찼으면 나머지는 거절
+    with pytest.raises(Exception, match=CIRCUIT_OPEN_ERROR):
+        breaker.before_call()
+
+    breaker.record_success(1.0, probe=first)
+    assert breaker.state == HALF_OPEN
+    breaker.record_success(1.0, probe=second)
+    assert breaker.state == CLOSED
+    assert breaker.before_call() is False
+
+
+def test_failed_probe_reopens(breaker, clock):
+    _trip(breaker)
+    clock.value += 30
+
+    probe = breaker.before_call()
+    breaker.record_failure(1.0, probe=probe)
+
+    assert breaker.state == OPEN
+    assert breaker.get_stats()['opened'] == 2
+
+def test_cancelled_probe_frees_slot(breaker, clock):
+    _trip(breaker)
+    clock.value += 30
+
+    first = breaker.before_call()
+    breaker.before_call()
+    breaker.cancel_probe(first)
+
+    assert breaker.before_call() is True
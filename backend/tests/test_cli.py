@@ -0,0 +1,41 @@
+import pytest
+from click.testing import CliRunner
+
+from app import db
+from app.cli import cli
+from app.models.chat_message import ChatMessage
+from app.models.chat_session import ChatSession
+
+
+@pytest.fixture
+def cli_app(app, monkeypatch):
+    # CLI 명령은 create_app()으로 앱을 직접 만들므로 테스트 설정을 쓰도록 지정
+    monkeypatch.setenv('FLASK_ENV', 'testing')
+    return app
+
+
+def test_backfill_token_counts_fills_missing_rows_in_batches(cli_app, user, video):
+    with cli_app.app_context():
+        session = ChatSession(user_id=user, video_id=video, summary='요약 내용 입니다')
+        db.session.add(session)
+        db.session.flush()
+        db.session.add_all([
+            ChatMessage(session_id=session.id, role='user', content='첫 질문'),
+            ChatMessage(session_id=session.id, role='assistant', content='첫 답변 입니다'),
+            ChatMessage(session_id=session.id, role='user', content='이미 센 질문', token_count=42)
+        ])
+        db.session.commit()
+        session_id = session.id
+
+    result = CliRunner().invoke(cli, ['backfill-token-counts', '--batch-size', '1'])
+    assert result.exit_code == 0, result.output
+    assert '메시지 2개, 세션 요약 1개' in result.output
+
+    with cli_app.app_context():
+        counts = [message.token_count for message in ChatMessage.query.order_by(ChatMessage.id)]
+        assert counts == [2, 3, 42]
+        assert db.session.get(ChatSession, session_id).summary_tokens == 3
+
+    # 비어 있는 행만 처리하므로 다시 실행해도 바뀌지 않음
+    result = CliRunner().invoke(cli, ['backfill-token-counts'])
+    assert '메시지 0개, 세션 요약 0개' in result.output
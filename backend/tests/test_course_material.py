@@ -0,0 +1,118 @@
+from types import SimpleNamespace
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import db, get_openai_service
+from app.models.user import User
+from app.models.video_material_chunk import VideoMaterialChunk
+from app.services.course_material import MATERIAL_HEADER, material_index, tokenize_terms
+from app.services.video_service import VideoService
+
+# 문단마다 청크 하나 (각 9, 7, 6토큰)
+MATERIAL = (
+    '리스트는 값을 바꿀 수 있는 순서가 있는 자료형입니다.\n\n'
+    '튜플은 값을 바꿀 수 없는 자료형입니다.\n\n'
+    '딕셔너리는 키와 값의 쌍을 저장합니다.'
+)
+
+
+@pytest.fixture
+def material_app(make_app):
+    return make_app(MATERIAL_CHUNK_TOKENS=12, MATERIAL_TOP_K=1)
+
+
+@pytest.fixture
+def material_video(material_app, video):
+    with material_app.app_context():
+        _, error = VideoService.update_video(video, course_material=MATERIAL)
+        assert error is None
+    return video
+
+
+def test_tokenize_terms_uses_korean_bigrams():
+    assert tokenize_terms('원리가 Python3!') == ['원리', '리가', 'python3']
+
+
+def test_update_rebuilds_chunks_per_paragraph(material_app, material_video):
+    with material_app.app_context():
+        chunks = VideoMaterialChunk.query.filter_by(video_id=material_video).order_by(VideoMaterialChunk.position).all()
+
+        assert [chunk.content for chunk in chunks] == MATERIAL.split('\n\n')
+        assert [chunk.token_count for chunk in chunks] == [9, 7, 6]
+        assert {chunk.source for chunk in chunks} == {'course_material'}
+
+
+def test_retrieve_ranks_chunks_by_bm25(material_app, material_video):
+    with material_app.app_context():
+        tuple_material = material_index.retrieve(material_video, '튜플은 무엇인가요')
+        dict_material = material_index.retrieve(material_video, '딕셔너리에 쌍을 저장하는 방법')
+        unrelated = material_index.retrieve(material_video, '반복문')
+
+    assert tuple_material.text == f'{MATERIAL_HEADER}\n\n튜플은 값을 바꿀 수 없는 자료형입니다.'
+    assert dict_material.text.endswith('딕셔너리는 키와 값의 쌍을 저장합니다.')
+    assert unrelated.chunk_ids == () and unrelated.text == ''
+
+
+def test_retrieve_keeps_selection_within_token_budget(make_app, video):
+    flask_app = make_app(MATERIAL_CHUNK_TOKENS=12, MATERIAL_TOP_K=3, MATERIAL_MAX_TOKENS=10)
+    with flask_app.app_context():
+        VideoService.update_video(video, course_material=MATERIAL)
+        # 리스트/튜플 문단이 모두 맞지만 둘을 합치면(16토큰) 예산을 넘으므로 점수가 높은 튜플만 포함
+        material = material_index.retrieve(video, '튜플은 값을 바꿀 수 없나요')
+        header_tokens = get_openai_service().count_tokens(MATERIAL_HEADER)
+
+    assert len(material.chunk_ids) == 1
+    assert '튜플은' in material.text and '리스트는' not in material.text
+    assert material.tokens == 7 + header_tokens + 1
+
+
+def test_revision_follows_material_content(material_app, material_video):
+    with material_app.app_context():
+        first = material_index.retrieve(material_video, '튜플').revision
+        assert material_index.retrieve(material_video, '리스트').revision == first
+
+        VideoService.update_video(material_video, course_material=MATERIAL + '\n\n집합은 중복을 허용하지 않습니다.')
+        assert material_index.retrieve(material_video, '튜플').revision not in ('', first)
+
+        VideoService.update_video(material_video, course_material=MATERIAL)
+        assert material_index.retrieve(material_video, '튜플').revision == first
+
+
+def test_material_change_is_part_of_answer_cache_key(material_app, material_video, monkeypatch):
+    sent = []
+
+    def create(**kwargs):
+        sent.append(kwargs['messages'])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f'답변 {len(sent)}'))],
+            usage=SimpleNamespace(prompt_tokens=30, completion_tokens=5, total_tokens=35)
+        )
+
+    with material_app.app_context():
+        monkeypatch.setattr(get_openai_service().client.chat, 'completions', SimpleNamespace(create=create))
+
+    client = material_app.test_client()
+
+    def ask(student_id):
+        with material_app.app_context():
+            account = User(student_id=student_id, name=f'학생 {student_id}', password_hash='x')
+            db.session.add(account)
+            db.session.commit()
+            headers = {'Authorization': f'Bearer {create_access_token(identity=str(account.id))}'}
+        session_id = client.post('/api/chat/sessions', json={'video_id': material_video}, headers=headers).get_json()['id']
+        response = client.post(
+            f'/api/chat/sessions/{session_id}/messages', json={'message': '튜플은 값을 바꿀 수 있나요'}, headers=headers
+        )
+        return response.get_json()['message']['content']
+
+    assert ask(2024000101) == '답변 1'
+    # 관련 자료는 현재 질문 바로 앞에 들어감
+    assert sent[0][-2]['content'].startswith(MATERIAL_HEADER)
+    assert ask(2024000102) == '답변 1'
+
+    with material_app.app_context():
+        VideoService.update_video(material_video, course_material=MATERIAL.replace('없는', '없는 불변'))
+
+    assert ask(2024000103) == '답변 2'
+    assert len(sent) == 2
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from app.models.event_log import EventLog
+from app.services.event_ingestor import EventIngestor
+
+
+@pytest.fixture
+def start_ingestor(make_app, user, video):
+    """설정을 덮어쓴 앱으로 EventIngestor 시작 (테스트가 끝나면 종료)"""
+    ingestors = []
+
+    def start(**overrides):
+        flask_app = make_app(**overrides)
+        ingestor = EventIngestor(flask_app)
+        ingestors.append(ingestor)
+        return flask_app, ingestor
+
+    yield start
+    for ingestor in ingestors:
+        ingestor.close()
+
+
+def _enqueue(ingestor, user, video, count):
+    return [
+        ingestor.enqueue(user, video, 'play', {'index': index}, '127.0.0.1', 'pytest')
+        for index in range(count)
+    ]
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('condition not met')
+        time.sleep(0.01)
+
+
+def _stored(flask_app):
+    with flask_app.app_context():
+        return EventLog.query.count()
+
+
+def test_flushes_when_batch_is_full(start_ingestor, user, video):
+    # 시간 기준(10초)보다 훨씬 먼저 배치 크기로 기록됨
+    flask_app, ingestor = start_ingestor(EVENT_FLUSH_BATCH_SIZE=3, EVENT_FLUSH_INTERVAL_MS=10000)
+
+    _enqueue(ingestor, user, video, 3)
+
+    _wait_until(lambda: ingestor.get_stats()['written'] == 3, timeout=2.0)
+    assert ingestor.get_stats()['flushes'] == 1
+    assert _stored(flask_app) == 3
+
+
+def test_flushes_partial_batch_after_interval(start_ingestor, user, video):
+    flask_app, ingestor = start_ingestor(EVENT_FLUSH_BATCH_SIZE=100, EVENT_FLUSH_INTERVAL_MS=50)
+
+    _enqueue(ingestor, user, video, 2)
+
+    _wait_until(lambda: ingestor.get_stats()['written'] == 2)
+    stats = ingestor.get_stats()
+    assert stats['flushes'] == 1
+    assert stats['avg_batch'] == 2
+    assert _stored(flask_app) == 2
+
+
+def test_full_queue_drops_without_blocking(start_ingestor, user, video, monkeypatch):
+    flask_app, ingestor = start_ingestor(
+        EVENT_QUEUE_MAX_SIZE=2, EVENT_FLUSH_BATCH_SIZE=1, EVENT_FLUSH_INTERVAL_MS=10
+    )
+    # 첫 기록이 끝나지 않은 동안 큐가 가득 차도록 기록을 붙잡아 둠
+    flushing = threading.Event()
+    release = threading.Event()
+    flush = ingestor._flush
+
+    def slow_flush(*args):
+        flushing.set()
+        release.wait(5)
+        flush(*args)
+
+    monkeypatch.setattr(ingestor, '_flush', slow_flush)
+    _enqueue(ingestor, user, video, 1)
+    assert flushing.wait(2)
+
+    started_at = time.monotonic()
+    accepted = _enqueue(ingestor, user, video, 4)
+
+    assert time.monotonic() - started_at < 0.5
+    assert accepted == [True, True, False, False]
+    assert ingestor.get_stats()['dropped'] == 2
+    release.set()
+    _wait_until(lambda: ingestor.get_stats()['written'] == 3)
+    assert _stored(flask_app) == 3
+
+
+def test_close_drains_queue_without_waiting_for_interval(start_ingestor, user, video):
+    flask_app, ingestor = start_ingestor(EVENT_FLUSH_BATCH_SIZE=100, EVENT_FLUSH_INTERVAL_MS=10000)
+    _enqueue(ingestor, user, video, 5)
+
+    started_at = time.monotonic()
+    ingestor.close()
+
+    assert time.monotonic() - started_at < 2.0
+    assert not ingestor._thread.is_alive()
+    assert _stored(flask_app) == 5
+    # 종료 후에는 받지 않음
+    assert _enqueue(ingestor, user, video, 1) == [False]
+    assert ingestor.get_stats()['dropped'] == 1
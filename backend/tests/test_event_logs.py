@@ -0,0 +1,68 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models.event_log import EventLog
+
+
+@pytest.fixture
+def events(app, user, video):
+    rows = [
+        ('video_seek', {'from_timestamp': 10.0, 'to_timestamp': 320.0}),
+        ('video_seek', {'from_timestamp': 400.0, 'to_timestamp': 120.0}),
+        ('video_pause', {'timestamp': 350.5, 'duration': 600}),
+        ('step_navigation', {'step': 2, 'scaffolding_id': 7, 'direction': 'next', 'skipped': False}),
+        ('step_navigation', {'step': 3, 'scaffolding_id': 7, 'direction': 'prev', 'skipped': True}),
+    ]
+    with app.app_context():
+        for index, (event_type, data) in enumerate(rows):
+            db.session.add(EventLog(
+                user_id=user, video_id=video, event_type=event_type, event_data=data,
+                created_at=datetime(2026, 3, 1, 12, index), **EventLog.promote(event_type, data)
+            ))
+        db.session.commit()
+
+
+def _list(client, headers, **params):
+    response = client.get('/api/logs/events', query_string=params, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return [json.loads(item['event_data']) for item in response.get_json()['items']]
+
+
+def test_promote_picks_position_by_event_type():
+    assert EventLog.promote('video_seek', {'from_timestamp': 1, 'to_timestamp': 2.5})['playback_position'] == 2.5
+    assert EventLog.promote('video_pause', {'timestamp': 3, 'current_time': 9})['playback_position'] == 3
+    assert EventLog.promote('quiz_open', {'current_time': 9})['playback_position'] == 9
+    # 숫자가 아닌 값과 bool은 승격하지 않음
+    promoted = EventLog.promote('video_play', {'timestamp': '10', 'duration': True, 'scaffolding_id': 4.0})
+    assert promoted == {'playback_position': None, 'duration': None, 'scaffolding_id': 4}
+
+
+def test_position_and_scaffolding_filters(app, events, admin_headers):
+    client = app.test_client()
+
+    seeks = _list(client, admin_headers, event_type='video_seek', position_min=300)
+    assert seeks == [{'from_timestamp': 10.0, 'to_timestamp': 320.0}]
+    assert len(_list(client, admin_headers, position_min=300, position_max=400)) == 2
+    assert [item['step'] for item in _list(client, admin_headers, scaffolding_id=7)] == [3, 2]
+
+
+def test_data_filter_falls_back_to_scalar_comparison_on_sqlite(app, events, admin_headers):
+    client = app.test_client()
+
+    assert [item['step'] for item in _list(client, admin_headers, data='{"step": 2}')] == [2]
+    assert [item['step'] for item in _list(client, admin_headers, data='{"direction": "prev"}')] == [3]
+    assert [item['step'] for item in _list(client, admin_headers, data='{"skipped": true}')] == [3]
+    assert _list(client, admin_headers, data='{"to_timestamp": 120.0}') == [{'from_timestamp': 400.0, 'to_timestamp': 120.0}]
+    # 여러 키는 모두 만족해야 함
+    assert _list(client, admin_headers, data='{"step": 2, "direction": "prev"}') == []
+
+
+@pytest.mark.parametrize('data', ['[1, 2]', '{}', 'not json', '{"nested": {"step": 2}}'])
+def test_malformed_data_filter_is_rejected(app, events, admin_headers, data):
+    response = app.test_client().get('/api/logs/events', query_string={'data': data}, headers=admin_headers)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('잘못된 필터 값입니다')
@@ -0,0 +1,40 @@
+from datetime import date, datetime
+
+from app.services.event_partitions import (
+    EventPartitions, add_months, expired_partitions, month_start, partition_name, retention_cutoff
+)
+
+
+def test_month_helpers():
+    assert month_start(datetime(2026, 3, 17, 8, 30)) == date(2026, 3, 1)
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partition_name(date(2026, 3, 1)) == 'event_logs_p2026_03'
+
+
+def test_retention_keeps_current_month_and_previous_ones():
+    now = datetime(2026, 3, 17)
+
+    assert retention_cutoff(1, now) == date(2026, 3, 1)
+    assert retention_cutoff(3, now) == date(2026, 1, 1)
+    assert retention_cutoff(15, now) == date(2025, 1, 1)
+
+
+def test_expired_partitions_selects_only_old_monthly_partitions():
+    names = [
+        'event_logs_p2026_01', 'event_logs_p2025_11', 'event_logs_p2025_12',
+        'event_logs_p2026_03', 'event_logs_default', 'event_logs_legacy', 'event_logs_p2026_02'
+    ]
+
+    assert expired_partitions(names, date(2026, 1, 1)) == ['event_logs_p2025_11', 'event_logs_p2025_12']
+    assert expired_partitions(names, date(2025, 1, 1)) == []
+
+
+def test_retention_requires_postgres_partitions(app):
+    with app.app_context():
+        assert EventPartitions.apply_retention(0) == (None, '보관 기간은 1개월 이상이어야 합니다')
+        result, error = EventPartitions.apply_retention(3)
+        assert result is None and 'PostgreSQL' in error
+        assert EventPartitions.estimate_rows() is None
+        result, error = EventPartitions.migrate_legacy(1000)
+        assert result is None and 'PostgreSQL' in error
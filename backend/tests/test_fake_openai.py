@@ -0,0 +1,77 @@
+import time
+
+import pytest
+from openai import APITimeoutError, OpenAI
+
+from app.devtools.fake_openai import FakeOpenAIConfig, create_fake_openai_app
+
+MESSAGES = [{'role': 'user', 'content': '안녕하세요'}]
+
+
+def _client(config):
+    fake_app = create_fake_openai_app(config)
+    return fake_app.test_client(), fake_app.config['FAKE_OPENAI_STATE']
+
+
+def _post(client, **body):
+    return client.post('/v1/chat/completions', json={'model': 'gpt-4o-mini', 'messages': MESSAGES, **body})
+
+
+def test_completion_reports_usage_and_cached_prefix():
+    client, state = _client(FakeOpenAIConfig(latency_ms=0, reply_tokens=5))
+    # 1024토큰 이상의 같은 시스템 프롬프트는 두 번째 요청부터 캐시 적중
+    messages = [{'role': 'system', 'content': '개념 ' * 1100}, *MESSAGES]
+
+    first = client.post('/v1/chat/completions', json={'messages': messages}).get_json()
+    second = client.post('/v1/chat/completions', json={'messages': messages}).get_json()
+
+    assert first['usage']['completion_tokens'] == 5
+    assert first['usage']['prompt_tokens_details']['cached_tokens'] == 0
+    assert second['usage']['prompt_tokens_details']['cached_tokens'] == 1024
+    assert second['choices'][0]['message']['content'] == first['choices'][0]['message']['content']
+    assert state.snapshot()['requests'] == 2
+
+
+def test_error_injection_returns_429_with_retry_after():
+    client, state = _client(FakeOpenAIConfig(latency_ms=0, error_rate=1.0))
+
+    response = _post(client)
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json()['error']['code'] == 'rate_limit_exceeded'
+    assert state.snapshot()['injected_errors'] == 1
+
+
+def test_tpm_limit_counts_prompt_and_max_tokens():
+    client, state = _client(FakeOpenAIConfig(latency_ms=0, tpm_limit=100))
+
+    assert _post(client, max_tokens=60).status_code == 200
+    limited = _post(client, max_tokens=60)
+
+    assert limited.status_code == 429
+    assert limited.get_json()['error']['type'] == 'tokens'
+    assert int(limited.headers['Retry-After']) >= 1
+    assert state.snapshot()['rate_limited'] == 1
+    # 한도 안의 작은 요청은 계속 허용
+    assert _post(client, max_tokens=10).status_code == 200
+
+
+def test_rpm_limit():
+    client, _ = _client(FakeOpenAIConfig(latency_ms=0, rpm_limit=1))
+
+    assert _post(client).status_code == 200
+    assert _post(client).get_json()['error']['type'] == 'requests'
+
+
+def test_timeout_injection_trips_client_timeout(start_fake_openai):
+    base_url, state = start_fake_openai(timeout_rate=1.0, timeout_seconds=1.0)
+    client = OpenAI(api_key='test', base_url=base_url, timeout=0.2, max_retries=0)
+
+    started_at = time.monotonic()
+    with pytest.raises(APITimeoutError):
+        client.chat.completions.create(model='gpt-4o-mini', messages=MESSAGES)
+
+    assert time.monotonic() - started_at < 1.0
+    assert state.snapshot()['injected_timeouts'] == 1
+    client.close()
@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+
+from app import db
+from app.models.chat_session import ChatSession
+from app.services.idempotency import (
+    IDEMPOTENCY_IN_PROGRESS_ERROR, IDEMPOTENCY_KEY_ERROR, IDEMPOTENCY_MISMATCH_ERROR, IdempotencyGuard
+)
+
+
+@pytest.fixture
+def session_id(app, user, video):
+    with app.app_context():
+        session = ChatSession(user_id=user, video_id=video)
+        db.session.add(session)
+        db.session.commit()
+        return session.id
+
+
+def _begin_in_thread(app, guard, user, session_id, message, key='key-1'):
+    result = {}
+
+    def run():
+        with app.app_context():
+            result['value'] = guard.begin(user, key, session_id, message)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, result
+
+
+def test_concurrent_duplicate_waits_for_first_response(app, user, session_id):
+    guard = IdempotencyGuard()
+    with app.app_context():
+        claim, replay, error = guard.begin(user, 'key-1', session_id, '질문')
+        assert claim is not None and replay is None and error is None
+
+        thread, result = _begin_in_thread(app, guard, user, session_id, '질문')
+        thread.join(0.3)
+        assert thread.is_alive()  # 처음 요청이 끝날 때까지 대기
+
+        claim.complete({'message': {'content': '답변'}})
+        thread.join(5)
+
+    assert result['value'] == (None, {'message': {'content': '답변'}}, None)
+    stats = guard.get_stats()
+    assert stats['claimed'] == 1
+    assert stats['coalesced'] == 1
+    assert stats['inflight'] == 0
+
+
+def test_completed_response_is_replayed_from_db(app, user, session_id):
+    with app.app_context():
+        claim, _, _ = IdempotencyGuard().begin(user, 'key-1', session_id, '질문')
+        claim.complete({'answer': 1})
+
+        # 다른 워커 프로세스(별도 guard)도 저장된 응답을 받음
+        other = IdempotencyGuard()
+        assert other.begin(user, 'key-1', session_id, '질문') == (None, {'answer': 1}, None)
+        assert other.get_stats()['replayed'] == 1
+
+
+def test_other_worker_waits_for_processing_row(make_app, user, session_id):
+    flask_app = make_app(IDEMPOTENCY_WAIT_SECONDS=5)
+    leader = IdempotencyGuard()
+    with flask_app.app_context():
+        claim, _, _ = leader.begin(user, 'key-1', session_id, '질문')
+
+    thread, result = _begin_in_thread(flask_app, IdempotencyGuard(), user, session_id, '질문')
+    thread.join(0.5)
+    assert thread.is_alive()
+
+    with flask_app.app_context():
+        claim.complete({'answer': 2})
+    thread.join(5)
+
+    assert result['value'] == (None, {'answer': 2}, None)
+
+
+def test_other_worker_times_out_while_processing(make_app, user, session_id):
+    flask_app = make_app(IDEMPOTENCY_WAIT_SECONDS=0)
+    with flask_app.app_context():
+        claim, _, _ = IdempotencyGuard().begin(user, 'key-1', session_id, '질문')
+
+        assert IdempotencyGuard().begin(user, 'key-1', session_id, '질문') == (
+            None, None, IDEMPOTENCY_IN_PROGRESS_ERROR
+        )
+        claim.abandon()
+
+
+def test_abandoned_key_can_be_claimed_again(app, user, session_id):
+    guard = IdempotencyGuard()
+    with app.app_context():
+        claim, _, _ = guard.begin(user, 'key-1', session_id, '질문')
+        claim.abandon()
+
+        again, replay, error = guard.begin(user, 'key-1', session_id, '질문')
+        assert again is not None and replay is None and error is None
+        again.abandon()
+
+
+def test_key_reuse_with_different_message_conflicts(app, user, session_id):
+    guard = IdempotencyGuard()
+    with app.app_context():
+        claim, _, _ = guard.begin(user, 'key-1', session_id, '질문')
+
+        assert guard.begin(user, 'key-1', session_id, '다른 질문') == (None, None, IDEMPOTENCY_MISMATCH_ERROR)
+        claim.complete({'answer': 3})
+        assert IdempotencyGuard().begin(user, 'key-1', session_id, '다른 질문') == (
+            None, None, IDEMPOTENCY_MISMATCH_ERROR
+        )
+
+
+def test_invalid_key_is_rejected(app, user, session_id):
+    with app.app_context():
+        assert IdempotencyGuard().begin(user, '  ', session_id, '질문') == (None, None, IDEMPOTENCY_KEY_ERROR)
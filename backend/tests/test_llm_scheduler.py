@@ -0,0 +1,172 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.llm_scheduler import QUEUE_TIMEOUT_ERROR, SYSTEM_LANE, LLMRequest, LLMScheduler
+
+
+def _scheduler(**overrides):
+    config = {
+        'LLM_RPM_LIMIT': 60000,
+        'LLM_TPM_LIMIT': 10 ** 8,
+        'LLM_BUDGET_WINDOW_SECONDS': 10,
+        'LLM_QUEUE_TIMEOUT_SECONDS': 5,
+        'LLM_BUDGET_STORAGE_URL': 'memory://'
+    }
+    config.update(overrides)
+    return LLMScheduler(config)
+
+
+def test_lanes_are_served_round_robin():
+    scheduler = _scheduler()
+    order = []
+    lock = threading.Lock()
+    done = threading.Event()
+    requests = [
+        LLMRequest(user_id=1, tokens=10, tag='a1'),
+        LLMRequest(user_id=1, tokens=10, tag='a2'),
+        LLMRequest(user_id=1, tokens=10, tag='a3'),
+        LLMRequest(user_id=2, tokens=10, tag='b1'),
+        LLMRequest(user_id=None, tokens=10, tag='s1')
+    ]
+
+    def recorder(tag):
+        def on_grant():
+            with lock:
+                order.append(tag)
+                if len(order) == len(requests):
+                    done.set()
+        return on_grant
+
+    # 일시 정지 동안 모두 대기열에 넣은 뒤 한꺼번에 허가되는 순서 확인
+    scheduler.pause(0.3)
+    tickets = {request.tag: scheduler.enqueue(request, on_grant=recorder(request.tag)) for request in requests}
+
+    assert scheduler.position(tickets['a1']) == 1
+    assert scheduler.position(tickets['b1']) == 2
+    assert scheduler.position(tickets['s1']) == 3
+    assert scheduler.position(tickets['a3']) == 5
+    assert scheduler.get_stats()['waiting_users'] == 3
+
+    assert done.wait(5)
+    assert order == ['a1', 'b1', 's1', 'a2', 'a3']
+    assert all(ticket.granted for ticket in tickets.values())
+    assert scheduler.position_of('a3') is None
+
+
+def test_front_requeue_goes_first():
+    scheduler = _scheduler()
+    order = []
+    scheduler.pause(0.2)
+    scheduler.enqueue(LLMRequest(user_id=1, tokens=1), on_grant=lambda: order.append('first'))
+    last = scheduler.enqueue(LLMRequest(user_id=2, tokens=1), front=True, on_grant=lambda: order.append('retry'))
+
+    assert last.wait(5)
+    assert order[0] == 'retry'
+
+
+def test_token_budget_holds_requests_until_next_window():
+    # 창(10초) 예산 = 600 TPM * 10 / 60 = 100 토큰
+    scheduler = _scheduler(LLM_TPM_LIMIT=600)
+
+    first = scheduler.acquire(LLMRequest(user_id=1, tokens=80))
+    second = scheduler.enqueue(LLMRequest(user_id=2, tokens=80))
+
+    assert first.granted
+    assert not second.wait(0.3)
+    assert scheduler.cancel(second)
+    assert scheduler.get_stats()['waiting'] == 0
+
+
+def test_queue_timeout_removes_ticket():
+    scheduler = _scheduler(LLM_QUEUE_TIMEOUT_SECONDS=0.2)
+    scheduler.pause(5)
+
+    with pytest.raises(Exception, match=QUEUE_TIMEOUT_ERROR):
+        scheduler.acquire(LLMRequest(user_id=None, tokens=1))
+
+    stats = scheduler.get_stats()
+    assert stats['timeouts'] == 1
+    assert stats['waiting'] == 0
+    assert LLMRequest(user_id=None, tokens=1).lane == SYSTEM_LANE
+
+
+class SlowLimiter:
+    """예산 저장소 대체 (release가 풀릴 때까지 hit가 멈추고, allow가 False면 10초 창이 끝날 때까지 거절)"""
+
+    def __init__(self):
+        self.hits = []
+        self.allow = True
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def hit(self, item, key, cost=1):
+        self.hits.append(key)
+        self.entered.set()
+        assert self.release.wait(5)
+        return self.allow
+
+    def get_window_stats(self, item, key):
+        return SimpleNamespace(remaining=0, reset_time=time.time() + 10)
+
+
+@pytest.fixture
+def slow_scheduler():
+    scheduler = _scheduler()
+    scheduler._limiter = SlowLimiter()
+    return scheduler
+
+
+def test_budget_storage_is_called_outside_the_lock(slow_scheduler):
+    limiter = slow_scheduler._limiter
+    first = slow_scheduler.enqueue(LLMRequest(user_id=1, tokens=10))
+    assert limiter.entered.wait(5)
+
+    # 차감이 멈춰 있어도 다른 스레드의 대기열 조작은 바로 끝남
+    finished = threading.Event()
+
+    def other_thread():
+        second = slow_scheduler.enqueue(LLMRequest(user_id=2, tokens=10))
+        slow_scheduler.position(second)
+        slow_scheduler.get_stats()
+        finished.set()
+
+    threading.Thread(target=other_thread, daemon=True).start()
+    assert finished.wait(1)
+    assert not first.granted
+
+    limiter.release.set()
+    assert first.wait(5)
+    # 확인(test) 없이 예산마다 hit 한 번
+    assert limiter.hits[:2] == ['llm-requests', 'llm-tokens']
+
+
+def test_refused_hit_waits_for_next_window_without_retrying(slow_scheduler):
+    limiter = slow_scheduler._limiter
+    limiter.allow = False
+    limiter.release.set()
+
+    ticket = slow_scheduler.enqueue(LLMRequest(user_id=1, tokens=10))
+    assert limiter.entered.wait(5)
+    # 거절 후 새 요청이 들어와도 창이 끝나기 전에는 다시 차감하지 않음
+    slow_scheduler.enqueue(LLMRequest(user_id=2, tokens=10))
+
+    assert not ticket.wait(0.3)
+    assert limiter.hits == ['llm-requests']
+    assert slow_scheduler.get_stats()['waiting'] == 2
+
+
+def test_ticket_cancelled_during_hit_is_not_granted(slow_scheduler):
+    limiter = slow_scheduler._limiter
+    cancelled = slow_scheduler.enqueue(LLMRequest(user_id=1, tokens=10))
+    assert limiter.entered.wait(5)
+    waiting = slow_scheduler.enqueue(LLMRequest(user_id=2, tokens=10))
+
+    assert slow_scheduler.cancel(cancelled)
+    limiter.release.set()
+
+    assert waiting.wait(5)
+    assert not cancelled.granted
+    assert slow_scheduler.get_stats()['admitted'] == 1
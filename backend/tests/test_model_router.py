@@ -0,0 +1,72 @@
+import pytest
+
+from app.services.model_router import (
+    CAPABLE, FAST, HeuristicRouter, ModelRouter, SingleModelRouter, load_router
+)
+
+CONFIG = {'MODEL_NAME': 'gpt-4o', 'FAST_MODEL_NAME': 'gpt-4o-mini'}
+
+
+class FailingRouter(ModelRouter):
+    def route(self, message, context):
+        raise RuntimeError('broken router')
+
+
+def _route(message, tokens=None):
+    router = HeuristicRouter(CONFIG)
+    if tokens is None:
+        tokens = len(message.split())
+    return router.select(message, {'user_message_tokens': tokens, 'has_history': False})
+
+
+@pytest.mark.parametrize('message, tier, reason', [
+    ('감사합니다!', FAST, 'small_talk'),
+    ('ok got it', FAST, 'small_talk'),
+    ('리스트의 첫 인덱스는 몇 번인가요', FAST, 'short_factual'),
+    ('재귀 함수는 왜 종료 조건이 필요한가요', CAPABLE, 'conceptual'),
+    ('리스트와 튜플은 뭐가 다른가요? 언제 무엇을 쓰나요?', CAPABLE, 'multi_part'),
+    ('첫 줄은 이해했어요\n두 번째 줄은 무슨 뜻인가요', CAPABLE, 'multi_part'),
+    ('3 * 4 결과가 뭐예요', CAPABLE, 'code_or_math'),
+    ('def add(a, b): 이 코드가 맞나요', CAPABLE, 'code_or_math'),
+])
+def test_heuristic_router_tiers(message, tier, reason):
+    route = _route(message)
+
+    assert (route.tier, route.reason) == (tier, reason)
+    assert route.model == ('gpt-4o-mini' if tier == FAST else 'gpt-4o')
+
+
+def test_long_questions_go_to_capable_model():
+    assert _route('변수의 값은 몇인가요', tokens=41).reason == 'long'
+    # 긴 메시지는 감사 인사로 시작해도 잡담으로 보지 않음
+    assert _route('감사합니다 그런데 ' + '질문 ' * 40, tokens=42).reason == 'long'
+
+
+def test_fast_model_defaults_to_model_name():
+    router = HeuristicRouter({'MODEL_NAME': 'gpt-4o', 'FAST_MODEL_NAME': ''})
+
+    assert router.select('감사합니다', {'user_message_tokens': 1}).model == 'gpt-4o'
+
+
+def test_router_error_falls_back_to_capable_model():
+    route = FailingRouter(CONFIG).select('질문', {'user_message_tokens': 1})
+
+    assert (route.model, route.reason) == ('gpt-4o', 'router_error')
+
+
+def test_load_router_by_name_and_path():
+    assert type(load_router(CONFIG)) is HeuristicRouter
+    assert type(load_router({**CONFIG, 'MODEL_ROUTER': 'single'})) is SingleModelRouter
+    router = load_router({**CONFIG, 'MODEL_ROUTER': f'{__name__}:FailingRouter'})
+    assert type(router).__name__ == 'FailingRouter'
+
+
+@pytest.mark.parametrize('path', [
+    'no_such_module:Router',
+    'app.services.model_router:NoSuchRouter',
+    'app.services.model_router',
+    'app.services.model_router:ModelRoute',
+])
+def test_load_router_rejects_bad_path(path):
+    with pytest.raises(ValueError, match='MODEL_ROUTER'):
+        load_router({**CONFIG, 'MODEL_ROUTER': path})
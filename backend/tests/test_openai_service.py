@@ -0,0 +1,232 @@
+from datetime import datetime
+
+from app import db
+from app.models.chat_message import ChatMessage
+from app.models.chat_session import ChatSession
+from app.services.openai_service import OpenAIService
+
+
+def _add_messages(session, contents):
+    messages = []
+    for index, content in enumerate(contents):
+        message = ChatMessage(session_id=session.id, role='user' if index % 2 == 0 else 'assistant', content=content)
+        db.session.add(message)
+        db.session.flush()
+        messages.append(message)
+    return messages
+
+
+def test_connection_pool_limits_from_config(make_app):
+    flask_app = make_app(OPENAI_MAX_CONNECTIONS=7, OPENAI_MAX_KEEPALIVE_CONNECTIONS=3, OPENAI_KEEPALIVE_EXPIRY=15)
+    service = OpenAIService(flask_app.config)
+    try:
+        assert service.limits.max_connections == 7
+        assert service.limits.max_keepalive_connections == 3
+        assert service.limits.keepalive_expiry == 15
+    finally:
+        service.close()
+
+
+def test_completion_through_pooled_client(make_app, fake_openai):
+    base_url, state = fake_openai
+    flask_app = make_app(OPENAI_BASE_URL=base_url)
+    service = OpenAIService(flask_app.config)
+    try:
+        response = service.client.chat.completions.create(
+            model=service.model_name,
+            messages=[{'role': 'user', 'content': '안녕하세요'}],
+            max_tokens=10
+        )
+        assert response.choices[0].message.content
+        assert service.get_pool_stats()['requests_total'] == 1
+        assert state.snapshot()['requests'] == 1
+    finally:
+        service.close()
+
+
+def test_fill_token_counts_encodes_only_missing_and_persists(make_app, user, video, monkeypatch):
+    flask_app = make_app()
+    service = OpenAIService(flask_app.config)
+    batches = []
+    count_tokens_batch = service.count_tokens_batch
+
+    def spy(texts):
+        batches.append(list(texts))
+        return count_tokens_batch(texts)
+
+    monkeypatch.setattr(service, 'count_tokens_batch', spy)
+    try:
+        with flask_app.app_context():
+            session = ChatSession(user_id=user, video_id=video)
+            db.session.add(session)
+            db.session.flush()
+            counted, missing = _add_messages(session, ['이미 센 메시지', '아직 세지 않은 메시지 입니다'])
+            counted.token_count = 99
+            db.session.commit()
+
+            service.fill_token_counts([counted, missing])
+            db.session.commit()
+            db.session.expire_all()
+
+            assert batches == [['아직 세지 않은 메시지 입니다']]
+            assert db.session.get(ChatMessage, counted.id).token_count == 99
+            assert db.session.get(ChatMessage, missing.id).token_count == 5
+
+            # 저장된 토큰 수는 다음 턴에 다시 인코딩하지 않음
+            service.fill_token_counts(ChatMessage.query.filter_by(session_id=session.id).all())
+            assert len(batches) == 1
+    finally:
+        service.close()
+
+
+def test_build_messages_skips_messages_before_watermark(make_app, user, video):
+    flask_app = make_app()
+    service = OpenAIService(flask_app.config)
+    try:
+        with flask_app.app_context():
+            session = ChatSession(user_id=user, video_id=video, summary='기존 요약')
+            db.session.add(session)
+            db.session.flush()
+            messages = _add_messages(session, [f'메시지 {index}' for index in range(4)])
+            session.summary_message_id = messages[1].id
+            db.session.commit()
+
+            context = service.build_messages(session, '새 질문', '시스템 프롬프트')
+
+            sent = [message['content'] for message in context['messages']]
+            assert sent == ['시스템 프롬프트', '메시지 2', '메시지 3', '위 대화 이전에 나눈 대화 요약:\n기존 요약', '새 질문']
+            assert context['summarize_through_id'] is None
+    finally:
+        service.close()
+
+
+def test_summary_target_excludes_kept_tail_but_window_is_sent(make_app, user, video):
+    flask_app = make_app(SUMMARY_TRIGGER_TOKENS=20, SUMMARY_TARGET_TOKENS=10)
+    service = OpenAIService(flask_app.config)
+    try:
+        with flask_app.app_context():
+            session = ChatSession(user_id=user, video_id=video, summary='기존 요약')
+            db.session.add(session)
+            db.session.flush()
+            messages = _add_messages(session, [f'메시지 {index} ' + '내용 ' * 5 for index in range(6)])
+            session.summary_message_id = messages[1].id
+            db.session.commit()
+
+            context = service.build_messages(session, '새 질문', '시스템 프롬프트')
+
+            # 워터마크 이후 밀려난 메시지까지만 요약 대상, 최근 메시지는 원문으로 남김
+            assert context['summarize_through_id'] == messages[3].id
+            # 요약이 반영되기 전까지는 요약 대상 메시지도 원문으로 보냄
+            sent = [message['content'] for message in context['messages']]
+            assert sent[1:-2] == [message.content for message in messages[2:]]
+            assert sent[-1] == '새 질문'
+    finally:
+        service.close()
+
+
+def test_load_recent_messages_limits_after_watermark_newest_first(app, user, video):
+    with app.app_context():
+        session = ChatSession(user_id=user, video_id=video)
+        db.session.add(session)
+        db.session.flush()
+        created_at = datetime(2026, 1, 1, 9, 0, 0)
+        messages = []
+        for index in range(6):
+            # 같은 시각에 저장된 메시지는 id로 순서를 정함
+            message = ChatMessage(session_id=session.id, role='user', content=f'메시지 {index}', created_at=created_at)
+            db.session.add(message)
+            db.session.flush()
+            messages.append(message)
+        session.summary_message_id = messages[1].id
+        db.session.commit()
+
+        loaded = OpenAIService._load_recent_messages(session, 3)
+
+        assert [message.id for message in loaded] == [messages[5].id, messages[4].id, messages[3].id]
+        assert len(OpenAIService._load_recent_messages(session, 10)) == 4
+
+
+def test_build_messages_keeps_window_until_summary_lands(make_app, user, video):
+    flask_app = make_app(CONTEXT_WINDOW_MESSAGES=4)
+    service = OpenAIService(flask_app.config)
+    try:
+        with flask_app.app_context():
+            session = ChatSession(user_id=user, video_id=video)
+            db.session.add(session)
+            db.session.flush()
+            contents = [f'질문과 답변 {index}' for index in range(6)]
+            _add_messages(session, contents)
+            db.session.commit()
+
+            context = service.build_messages(session, '새 질문', '시스템 프롬프트')
+
+            # 창 밖으로 밀려난 메시지가 있으면 요약을 예약하고, 창 안의 원문은 요약이 반영될 때까지 모두 보냄
+            assert context['summarize_through_id'] is not None
+            sent = [message['content'] for message in context['messages']]
+            assert sent[1:5] == contents[2:]
+            assert sent[-1] == '새 질문'
+    finally:
+        service.close()
+
+
+def test_oversized_history_message_is_truncated(make_app, user, video):
+    flask_app = make_app(CONTEXT_MESSAGE_MAX_TOKENS=10)
+    service = OpenAIService(flask_app.config)
+    try:
+        with flask_app.app_context():
+            session = ChatSession(user_id=user, video_id=video)
+            db.session.add(session)
+            db.session.flush()
+            _add_messages(session, ['단어 ' * 50, '짧은 답변'])
+            db.session.commit()
+
+            context = service.build_messages(session, '새 질문', '시스템 프롬프트')
+
+            long_message = context['messages'][1]['content']
+            assert long_message.endswith(OpenAIService.TRUNCATION_MARKER)
+            assert service.count_tokens(long_message) <= 10
+            assert context['messages'][2]['content'] == '짧은 답변'
+    finally:
+        service.close()
+
+
+def test_pack_history_drops_oldest_first_without_gaps(make_app, user, video):
+    # 고정 부분: 시스템 2 + 요약 2 + 질문 2 + 응답 시작 3 + 형식 4 * 3 = 21토큰
+    # 최근 두 메시지(각 3 + 4)까지만 들어가고 남은 10토큰에는 긴 메시지(8 + 4)가 들어가지 않음
+    flask_app = make_app(MAX_TOKENS_PER_REQUEST=45)
+    service = OpenAIService(flask_app.config)
+    try:
+        with flask_app.app_context():
+            session = ChatSession(user_id=user, video_id=video, summary='기존 요약')
+            db.session.add(session)
+            db.session.flush()
+            _add_messages(session, ['메시지 0 내용', '메시지 1 내용', '긴 ' * 8, '메시지 3 내용', '메시지 4 내용'])
+            db.session.commit()
+
+            context = service.build_messages(session, '새 질문', '시스템 프롬프트')
+
+            sent = [message['content'] for message in context['messages']]
+            # 더 오래된 '메시지 1'은 예산에 들어가더라도 빈틈이 생기므로 제외
+            assert sent == ['시스템 프롬프트', '메시지 3 내용', '메시지 4 내용', '위 대화 이전에 나눈 대화 요약:\n기존 요약', '새 질문']
+            assert context['prompt_tokens_estimate'] == 21 + 14
+    finally:
+        service.close()
+
+
+def test_system_summary_and_current_turn_survive_exhausted_budget(make_app, user, video):
+    flask_app = make_app(MAX_TOKENS_PER_REQUEST=5)
+    service = OpenAIService(flask_app.config)
+    try:
+        with flask_app.app_context():
+            session = ChatSession(user_id=user, video_id=video, summary='기존 요약')
+            db.session.add(session)
+            db.session.flush()
+            _add_messages(session, ['이전 질문', '이전 답변'])
+            db.session.commit()
+
+            context = service.build_messages(session, '새 질문', '시스템 프롬프트')
+
+            sent = [message['content'] for message in context['messages']]
+            assert sent == ['시스템 프롬프트', '위 대화 이전에 나눈 대화 요약:\n기존 요약', '새 질문']
+    finally:
+        service.close()
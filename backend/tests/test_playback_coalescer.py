@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.event_log import EventLog
+from app.models.watch_interval import WatchInterval
+from app.services.event_ingestor import EventIngestor
+from app.services.playback_coalescer import PlaybackCoalescer
+
+T0 = datetime(2026, 3, 1, 12, 0, 0)
+
+
+def _event(event_type, seconds, user_id=1, video_id=1, **data):
+    return {
+        'user_id': user_id,
+        'video_id': video_id,
+        'event_type': event_type,
+        'event_data': data,
+        'created_at': T0 + timedelta(seconds=seconds)
+    }
+
+
+def test_play_pause_merges_into_one_interval():
+    coalescer = PlaybackCoalescer(window_seconds=30, max_interval_seconds=3600)
+
+    assert coalescer.add(_event('video_play', 0, timestamp=10.0)) == []
+    assert coalescer.add(_event('video_seek', 20, from_timestamp=30.0, to_timestamp=90.0)) == []
+    assert coalescer.add(_event('video_pause', 50, timestamp=120.0)) == []
+    assert coalescer.open_count == 1
+
+    # 일시정지 후 window_seconds가 지나면 닫힘
+    assert coalescer.sweep(now=T0 + timedelta(seconds=70)) == []
+    [row] = coalescer.sweep(now=T0 + timedelta(seconds=81))
+
+    assert row['start_position'] == 10.0
+    assert row['end_position'] == 120.0
+    assert row['watched_seconds'] == 50.0
+    assert (row['play_count'], row['pause_count'], row['seek_count']) == (1, 1, 1)
+    assert row['event_count'] == 3
+    assert row['started_at'] == T0
+    assert row['ended_at'] == T0 + timedelta(seconds=50)
+    assert row['completed'] is False
+    assert coalescer.open_count == 0
+
+
+def test_playing_interval_waits_for_max_interval():
+    coalescer = PlaybackCoalescer(window_seconds=30, max_interval_seconds=600)
+    coalescer.add(_event('video_play', 0, timestamp=0.0))
+
+    # 재생 중에는 이벤트가 없어도 닫지 않음
+    assert coalescer.sweep(now=T0 + timedelta(seconds=300)) == []
+    [row] = coalescer.sweep(now=T0 + timedelta(seconds=601))
+    assert row['play_count'] == 1
+
+
+def test_new_event_after_idle_window_starts_new_interval():
+    coalescer = PlaybackCoalescer(window_seconds=30, max_interval_seconds=3600)
+    coalescer.add(_event('video_pause', 0, timestamp=5.0))
+
+    [closed] = coalescer.add(_event('video_play', 60, timestamp=5.0))
+
+    assert closed['pause_count'] == 1
+    assert coalescer.open_count == 1
+
+
+def test_complete_closes_interval():
+    coalescer = PlaybackCoalescer(window_seconds=30, max_interval_seconds=3600)
+    coalescer.add(_event('video_play', 0, timestamp=290.0))
+
+    [row] = coalescer.add(_event('video_complete', 10, timestamp=300.0))
+
+    assert row['completed'] is True
+    assert row['watched_seconds'] == 10.0
+    assert row['end_position'] == 300.0
+
+
+def test_out_of_order_event_adds_no_watch_time():
+    coalescer = PlaybackCoalescer(window_seconds=30, max_interval_seconds=3600)
+    coalescer.add(_event('video_play', 10, timestamp=0.0))
+    coalescer.add(_event('video_pause', 5, timestamp=0.0))
+
+    [row] = coalescer.sweep(force=True)
+    assert row['watched_seconds'] == 0.0
+    assert row['ended_at'] == T0 + timedelta(seconds=10)
+
+
+def test_users_and_videos_are_kept_apart():
+    coalescer = PlaybackCoalescer(window_seconds=30, max_interval_seconds=3600)
+    coalescer.add(_event('video_play', 0, user_id=1, video_id=1))
+    coalescer.add(_event('video_play', 0, user_id=1, video_id=2))
+    coalescer.add(_event('video_play', 0, user_id=2, video_id=1))
+
+    assert coalescer.open_count == 3
+    assert len(coalescer.sweep(force=True)) == 3
+
+
+def test_ingestor_writes_intervals_and_sampled_raw_events(make_app, user, video):
+    flask_app = make_app(EVENT_RAW_SAMPLE_RATE=0.0, EVENT_FLUSH_INTERVAL_MS=50)
+    ingestor = EventIngestor(flask_app)
+    for seconds, event_type in ((0, 'video_play'), (5, 'video_seek'), (9, 'video_pause')):
+        ingestor.enqueue(user, video, event_type, {'timestamp': float(seconds)}, '127.0.0.1', 'pytest',
+                         created_at=T0 + timedelta(seconds=seconds))
+    ingestor.enqueue(user, video, 'step_navigation', {'step': 1}, '127.0.0.1', 'pytest')
+    # 종료 시 열린 구간도 모두 기록
+    ingestor.close()
+
+    with flask_app.app_context():
+        assert [row.event_type for row in EventLog.query.all()] == ['step_navigation']
+        [interval] = WatchInterval.query.all()
+        assert interval.event_count == 3
+        assert interval.watched_seconds == 9.0
+        db.session.remove()
+    stats = ingestor.get_stats()
+    assert stats['coalesced'] == 3
+    assert stats['sampled_out'] == 3
+    assert stats['intervals_written'] == 1
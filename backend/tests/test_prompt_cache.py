@@ -0,0 +1,66 @@
+import pytest
+
+from app import db
+from app.models.chat_prompt_template import ChatPromptTemplate
+from app.services import prompt_cache as prompt_cache_module
+from app.services.prompt_cache import PromptCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(prompt_cache_module, 'time', fake)
+    return fake
+
+
+@pytest.fixture
+def template_id(app):
+    with app.app_context():
+        template = ChatPromptTemplate(name='기본', system_prompt='첫 번째 프롬프트', is_default=True)
+        db.session.add(template)
+        db.session.commit()
+        return template.id
+
+
+def test_resolve_hits_cache_without_queries(app, video, template_id, clock):
+    cache = PromptCache()
+    with app.app_context():
+        first = cache.resolve(video, 'user')
+        second = cache.resolve(video, 'user')
+
+    assert first is second
+    assert first.text == '첫 번째 프롬프트'
+    assert first.template_id == template_id
+    assert cache.get_stats()['hits'] == 1
+    assert cache.get_stats()['misses'] == 1
+
+
+def test_admin_update_reaches_other_worker_after_check_interval(app, video, template_id, admin_headers, clock):
+    # 다른 워커 프로세스의 캐시 (관리자 요청을 처리한 워커만 즉시 비워짐)
+    other_worker = PromptCache()
+    interval = app.config['PROMPT_CACHE_VERSION_CHECK_SECONDS']
+    with app.app_context():
+        assert other_worker.resolve(video, 'user').text == '첫 번째 프롬프트'
+
+    response = app.test_client().put(
+        f'/api/admin/prompts/{template_id}', json={'system_prompt': '수정된 프롬프트'}, headers=admin_headers
+    )
+    assert response.status_code == 200
+
+    with app.app_context():
+        # 확인 주기 안에서는 이전 프롬프트를 그대로 사용
+        clock.now += interval - 1
+        assert other_worker.resolve(video, 'user').text == '첫 번째 프롬프트'
+
+        clock.now += 2
+        resolved = other_worker.resolve(video, 'user')
+        assert resolved.text == '수정된 프롬프트'
+        assert resolved.template_version == 2
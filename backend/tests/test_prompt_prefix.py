@@ -0,0 +1,106 @@
+import json
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import db, get_openai_service
+from app.models.chat_message import ChatMessage
+from app.models.chat_prompt_template import ChatPromptTemplate
+from app.models.chat_session import ChatSession
+from app.models.user import User
+
+# 가짜 서버는 1024토큰 이상의 같은 시스템 프롬프트를 두 번째 요청부터 캐시 적중으로 응답
+LONG_PROMPT = '개념 ' * 1100
+
+
+@pytest.fixture
+def cache_app(make_app, fake_openai):
+    base_url, _ = fake_openai
+    flask_app = make_app(OPENAI_BASE_URL=base_url)
+    with flask_app.app_context():
+        db.session.add(ChatPromptTemplate(name='기본', system_prompt=LONG_PROMPT, is_default=True))
+        db.session.commit()
+    return flask_app
+
+
+@pytest.fixture
+def sent_requests(cache_app, monkeypatch):
+    """API로 보낸 요청 인자 기록 (가짜 서버로 그대로 전달)"""
+    requests = []
+    with cache_app.app_context():
+        completions = get_openai_service().client.chat.completions
+        create = completions.create
+
+        def spy(**kwargs):
+            requests.append(kwargs)
+            return create(**kwargs)
+
+        monkeypatch.setattr(completions, 'create', spy)
+    return requests
+
+
+def _headers(flask_app, student_id):
+    with flask_app.app_context():
+        account = User(student_id=student_id, name=f'학생 {student_id}', password_hash='x')
+        db.session.add(account)
+        db.session.commit()
+        return {'Authorization': f'Bearer {create_access_token(identity=str(account.id))}'}
+
+
+def _send(client, headers, video_id, message, session_id=None):
+    if session_id is None:
+        session_id = client.post('/api/chat/sessions', json={'video_id': video_id}, headers=headers).get_json()['id']
+    response = client.post(f'/api/chat/sessions/{session_id}/messages', json={'message': message}, headers=headers)
+    assert response.status_code == 200
+    return session_id, response.get_json()['message']
+
+
+def test_prefix_is_byte_identical_across_sessions_of_same_video(cache_app, video, sent_requests):
+    client = cache_app.test_client()
+    first_headers = _headers(cache_app, 2024000101)
+    second_headers = _headers(cache_app, 2024000102)
+
+    session_id, _ = _send(client, first_headers, video, '첫 번째 학생의 질문')
+    with cache_app.app_context():
+        # 요약이 생겨도 앞부분(시스템 프롬프트 + 대화)은 바뀌지 않아야 함
+        ChatSession.query.filter_by(id=session_id).update({'summary': '앞선 대화 요약'})
+        db.session.commit()
+    _send(client, first_headers, video, '이어지는 질문', session_id=session_id)
+    _send(client, second_headers, video, '두 번째 학생의 질문')
+
+    first, follow_up, other = sent_requests
+    assert first['prompt_cache_key'] == other['prompt_cache_key'] == follow_up['prompt_cache_key']
+    assert first['prompt_cache_key'].startswith(f'video-{video}-')
+
+    def encoded(messages):
+        return json.dumps(messages, ensure_ascii=False).encode('utf-8')
+
+    # 다른 세션도 시스템 프롬프트까지 같은 바이트로 시작
+    assert encoded(other['messages'][:1]) == encoded(first['messages'][:1])
+    # 같은 세션의 다음 턴은 이전 요청(현재 질문 포함) 전체를 앞부분으로 그대로 포함
+    assert encoded(follow_up['messages'][:len(first['messages'])]) == encoded(first['messages'])
+
+
+def test_cached_tokens_are_stored_and_feed_video_ratio(cache_app, video, sent_requests, admin_headers):
+    client = cache_app.test_client()
+    _, first = _send(client, _headers(cache_app, 2024000101), video, '첫 번째 학생의 질문')
+    _, second = _send(client, _headers(cache_app, 2024000102), video, '두 번째 학생의 질문')
+
+    with cache_app.app_context():
+        assert db.session.get(ChatMessage, first['id']).cached_tokens == 0
+        stored = db.session.get(ChatMessage, second['id'])
+        assert stored.cached_tokens == 1024
+        prompt_tokens = db.session.query(db.func.sum(ChatMessage.prompt_tokens)).filter(
+            ChatMessage.role == 'assistant'
+        ).scalar()
+
+    response = client.get('/api/logs/prompt-cache-stats', headers=admin_headers)
+
+    assert response.status_code == 200
+    stats = response.get_json()['videos'][0]
+    assert stats['video_id'] == video
+    assert stats['responses'] == 2
+    assert stats['prefix_hits'] == 1
+    assert stats['prefix_hit_rate'] == 0.5
+    assert stats['cached_tokens'] == 1024
+    assert stats['cached_token_ratio'] == round(1024 / prompt_tokens, 4)
@@ -0,0 +1,134 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app import db
+from app.models.chat_message import ChatMessage
+from app.models.chat_session import ChatSession
+from app.services.openai_service import OpenAIService
+from app.services.summary_worker import SummaryWorker
+
+
+def _wait_finished(worker, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = worker.get_stats()
+        if stats['queued'] == 0 and stats['running'] == 0:
+            return stats
+        time.sleep(0.02)
+    raise AssertionError('summary job did not finish')
+
+
+@pytest.fixture
+def session_with_messages(app, user, video):
+    with app.app_context():
+        session = ChatSession(user_id=user, video_id=video)
+        db.session.add(session)
+        db.session.flush()
+        for index in range(4):
+            db.session.add(ChatMessage(
+                session_id=session.id,
+                role='user' if index % 2 == 0 else 'assistant',
+                content=f'메시지 {index}'
+            ))
+            db.session.flush()
+        db.session.commit()
+        last_id = db.session.query(db.func.max(ChatMessage.id)).scalar()
+        return session.id, last_id
+
+
+class FakeCompletions:
+    """요약 호출 인자를 기록하는 chat.completions 대체 (model은 SDK처럼 필수 키워드 인자)"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def create(self, *, model, messages, **kwargs):
+        self.calls.append({'model': model, 'messages': messages, **kwargs})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='요약된 대화'))])
+
+
+@pytest.fixture
+def completions():
+    return FakeCompletions()
+
+
+@pytest.fixture
+def worker(make_app, completions, monkeypatch):
+    flask_app = make_app()
+    service = OpenAIService(flask_app.config)
+    monkeypatch.setattr(service.client.chat, 'completions', completions)
+    yield SummaryWorker(flask_app, service)
+    service.close()
+
+
+def test_summary_job_stores_summary_and_moves_watermark(app, worker, completions, session_with_messages):
+    session_id, last_id = session_with_messages
+
+    assert worker.submit(session_id, last_id)
+    stats = _wait_finished(worker)
+
+    assert stats['succeeded'] == 1
+    assert stats['failed'] == 0
+    assert [call['model'] for call in completions.calls] == [worker.openai_service.model_name]
+    with app.app_context():
+        session = db.session.get(ChatSession, session_id)
+        assert session.summary == '요약된 대화'
+        assert session.summary_tokens > 0
+        assert session.summary_message_id == last_id
+        assert session.summary_updated_at is not None
+
+
+def test_failed_summary_keeps_watermark(app, worker, session_with_messages, monkeypatch):
+    session_id, last_id = session_with_messages
+
+    def fail(messages, previous_summary=None):
+        raise RuntimeError('provider down')
+
+    monkeypatch.setattr(worker.openai_service, '_generate_summary', fail)
+    assert worker.submit(session_id, last_id)
+    stats = _wait_finished(worker)
+
+    assert stats['failed'] == 1
+    assert stats['succeeded'] == 0
+    with app.app_context():
+        session = db.session.get(ChatSession, session_id)
+        assert session.summary is None
+        assert session.summary_message_id is None
+
+
+def test_stale_watermark_is_discarded(app, worker, session_with_messages):
+    session_id, last_id = session_with_messages
+    with app.app_context():
+        db.session.get(ChatSession, session_id).summary_message_id = last_id
+        db.session.commit()
+
+    assert worker.submit(session_id, last_id)
+    stats = _wait_finished(worker)
+
+    assert stats['discarded_stale'] == 1
+
+
+def test_summary_finished_after_watermark_moved_is_discarded(app, worker, session_with_messages, monkeypatch):
+    session_id, last_id = session_with_messages
+
+    def summarize_while_other_worker_wins(messages, previous_summary=None):
+        # LLM 호출 중에 다른 워커 프로세스가 먼저 요약을 반영함
+        with app.app_context():
+            ChatSession.query.filter_by(id=session_id).update({
+                'summary': '다른 워커의 요약', 'summary_message_id': last_id - 1
+            })
+            db.session.commit()
+            db.session.remove()
+        return '늦게 끝난 요약'
+
+    monkeypatch.setattr(worker.openai_service, '_generate_summary', summarize_while_other_worker_wins)
+    assert worker.submit(session_id, last_id)
+    stats = _wait_finished(worker)
+
+    assert stats['discarded_stale'] == 1
+    with app.app_context():
+        session = db.session.get(ChatSession, session_id)
+        assert session.summary == '다른 워커의 요약'
+        assert session.summary_message_id == last_id - 1
@@ -0,0 +1,126 @@
+import threading
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.token_usage_reservation import TokenUsageReservation
+from app.services.token_ledger import TokenLedger
+
+LIMIT = 1000
+
+
+def test_reconcile_moves_reservation_to_used(app, user):
+    with app.app_context():
+        reservation, error = TokenLedger.reserve(user, 300, LIMIT)
+        assert error is None
+        assert TokenLedger.get_usage_today(user, LIMIT)['reserved_tokens'] == 300
+
+        TokenLedger.reconcile(reservation, 120)
+        db.session.commit()
+
+        usage = TokenLedger.get_usage_today(user, LIMIT)
+        assert usage['used_tokens'] == 120
+        assert usage['reserved_tokens'] == 0
+        assert usage['remaining_tokens'] == LIMIT - 120
+
+
+def test_release_returns_reserved_tokens(app, user):
+    with app.app_context():
+        reservation, _ = TokenLedger.reserve(user, 300, LIMIT)
+
+        TokenLedger.release(reservation)
+
+        usage = TokenLedger.get_usage_today(user, LIMIT)
+        assert usage['used_tokens'] == 0
+        assert usage['reserved_tokens'] == 0
+
+
+def test_reserve_refused_once_limit_is_reached(app, user):
+    with app.app_context():
+        reservation, _ = TokenLedger.reserve(user, 400, LIMIT)
+        TokenLedger.reconcile(reservation, LIMIT)
+        db.session.commit()
+
+        reservation, error = TokenLedger.reserve(user, 10, LIMIT)
+
+        assert reservation is None
+        assert '한도를 초과' in error
+        assert TokenLedger.get_usage_today(user, LIMIT)['reserved_tokens'] == 0
+
+
+def test_usage_endpoint_reports_ledger(app, user, auth_headers):
+    with app.app_context():
+        reservation, _ = TokenLedger.reserve(user, 50, app.config['DAILY_TOKEN_LIMIT'])
+        TokenLedger.reconcile(reservation, 30)
+        db.session.commit()
+
+    response = app.test_client().get('/api/chat/usage', headers=auth_headers)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['used_tokens'] == 30
+    assert body['remaining_tokens'] == app.config['DAILY_TOKEN_LIMIT'] - 30
+
+
+def test_first_reservation_over_limit_is_rejected(app, user):
+    with app.app_context():
+        reservation, error = TokenLedger.reserve(user, LIMIT + 1, LIMIT)
+
+        assert reservation is None and error
+        assert TokenUsageReservation.query.count() == 0
+
+
+def test_reservations_accumulate_up_to_limit(app, user):
+    with app.app_context():
+        assert TokenLedger.reserve(user, 400, LIMIT)[1] is None
+        assert TokenLedger.reserve(user, 600, LIMIT)[1] is None
+
+        reservation, error = TokenLedger.reserve(user, 1, LIMIT)
+
+        assert reservation is None and error
+        assert TokenLedger.get_usage_today(user, LIMIT)['reserved_tokens'] == LIMIT
+        assert TokenUsageReservation.query.count() == 2
+
+
+def test_concurrent_reservations_do_not_overshoot_limit(app, user):
+    results = []
+    start = threading.Barrier(4)
+
+    def reserve():
+        with app.app_context():
+            start.wait()
+            results.append(TokenLedger.reserve(user, 300, LIMIT)[0])
+            db.session.remove()
+
+    threads = [threading.Thread(target=reserve) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len([reservation for reservation in results if reservation]) == 3
+    with app.app_context():
+        assert TokenLedger.get_usage_today(user, LIMIT)['reserved_tokens'] == 900
+
+
+def test_each_reservation_expires_on_its_own(app, user):
+    with app.app_context():
+        stale, _ = TokenLedger.reserve(user, 700, LIMIT)
+        ttl = app.config['TOKEN_RESERVATION_TTL_SECONDS']
+        TokenUsageReservation.query.filter_by(id=stale.id).update({
+            'reserved_at': datetime.utcnow() - timedelta(seconds=ttl + 1)
+        })
+        db.session.commit()
+        live, _ = TokenLedger.reserve(user, 200, LIMIT)
+
+        # 만료된 예약만 제외되고 이후의 예약은 그대로 합산
+        assert TokenLedger.get_usage_today(user, LIMIT)['reserved_tokens'] == 200
+        assert TokenLedger.reserve(user, 800, LIMIT)[1] is None
+        assert TokenLedger.reserve(user, 1, LIMIT)[0] is None
+
+        assert TokenLedger.cleanup_stale_reservations() == 1
+        # 정리된 예약을 늦게 정산해도 사용량만 반영
+        TokenLedger.reconcile(stale, 50)
+        TokenLedger.release(live)
+        usage = TokenLedger.get_usage_today(user, LIMIT)
+        assert usage['used_tokens'] == 50
+        assert usage['reserved_tokens'] == 800
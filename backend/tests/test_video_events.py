@@ -0,0 +1,50 @@
+import io
+import json
+
+from werkzeug.test import EnvironBuilder
+
+
+def _batch(auth_headers, video, events=None):
+    return {
+        'events': events or [{'video_id': video, 'event_type': 'video_play', 'event_data': {'timestamp': 1.0}}],
+        'access_token': auth_headers['Authorization'].split(' ', 1)[1]
+    }
+
+
+def test_batch_accepts_beacon_body(app, auth_headers, video):
+    response = app.test_client().post(
+        '/api/videos/events/batch',
+        data=json.dumps(_batch(auth_headers, video)),
+        content_type='text/plain'
+    )
+
+    assert response.status_code == 202
+    assert response.get_json()['rejected'] == []
+
+
+def test_batch_without_content_length_is_411(app, auth_headers, video):
+    body = json.dumps(_batch(auth_headers, video)).encode()
+    builder = EnvironBuilder(
+        path='/api/videos/events/batch', method='POST',
+        input_stream=io.BytesIO(body), content_type='text/plain',
+        headers={'Transfer-Encoding': 'chunked'}
+    )
+    environ = builder.get_environ()
+    environ.pop('CONTENT_LENGTH', None)
+
+    response = app.test_client().open(environ)
+
+    assert response.status_code == 411
+
+
+def test_batch_over_byte_limit_is_413(make_app, auth_headers, video):
+    flask_app = make_app(EVENT_BATCH_MAX_BYTES=200)
+    events = [{'video_id': video, 'event_type': 'video_play', 'event_data': {'note': '가' * 100}}]
+
+    response = flask_app.test_client().post(
+        '/api/videos/events/batch',
+        data=json.dumps(_batch(auth_headers, video, events), ensure_ascii=False).encode(),
+        content_type='text/plain'
+    )
+
+    assert response.status_code == 413
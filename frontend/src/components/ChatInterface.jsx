@@ -1,6 +1,6 @@
 import { useState, useEffect, useRef, memo } from 'react'
 import { motion } from 'framer-motion'
-import { HiPaperAirplane, HiUser, HiChip, HiInformationCircle, HiSparkles } from 'react-icons/hi'
+import { HiPaperAirplane, HiUser, HiChip, HiInformationCircle, HiSparkles, HiStop } from 'react-icons/hi'
 import { useChat } from '../hooks'
 import { security, formatters } from '../utils'
 import { APP_CONFIG } from '../constants'
@@ -42,10 +42,19 @@ const Message = memo(({ message, index }) => {
               : 'bg-white/80 backdrop-blur-sm text-gray-800 rounded-tl-md border border-gray-200'
           }`}
         >
-          <p 
-            className="whitespace-pre-wrap break-words text-sm leading-relaxed"
-            dangerouslySetInnerHTML={{ __html: security.sanitizeHTML(message.content) }}
-          />
+          {message.queuePosition ? (
+            <p className="text-sm text-gray-500">
+              질문이 많아 잠시 대기 중입니다 (대기 순서 {message.queuePosition}번)
+            </p>
+          ) : (
+            <p 
+              className="whitespace-pre-wrap break-words text-sm leading-relaxed"
+              dangerouslySetInnerHTML={{ __html: security.sanitizeHTML(message.content) }}
+            />
+          )}
+          {message.cancelled && (
+            <p className="mt-1 text-xs text-gray-400">응답이 중지되었습니다</p>
+          )}
         </motion.div>
       </div>
     </motion.div>
@@ -100,9 +109,21 @@ const ChatInterface = ({ videoId }) => {
     sending,
     error,
     createOrGetSession,
-    sendMessage: sendChatMessage,
+    sendMessageStream: sendChatMessage,
+    cancelGeneration,
     setError
   } = useChat()
+  
+  // 화면을 떠날 때 진행 중인 응답 생성 중지
+  const sessionIdRef = useRef(null)
+  sessionIdRef.current = session?.id
+  useEffect(() => {
+    return () => {
+      if (sessionIdRef.current) {
+        cancelGeneration(sessionIdRef.current)
+      }
+    }
+  }, [cancelGeneration])
 
   useEffect(() => {
     if (videoId) {
@@ -210,19 +231,32 @@ const ChatInterface = ({ videoId }) => {
               </div>
             )}
           </div>
-          <motion.button
-            whileHover={{ scale: 1.05 }}
-            whileTap={{ scale: 0.95 }}
-            type="submit"
-            className={`p-3 rounded-2xl transition-all shadow-md ${
-              sending || !input.trim()
-                ? 'bg-gray-200 text-gray-400 cursor-not-allowed'
-                : 'bg-gradient-to-br from-primary-600 to-primary-500 text-white hover:shadow-lg'
-            }`}
-            disabled={sending || !input.trim()}
-          >
-            <HiPaperAirplane className="text-xl transform rotate-90" />
-          </motion.button>
+          {sending ? (
+            <motion.button
+              whileHover={{ scale: 1.05 }}
+              whileTap={{ scale: 0.95 }}
+              type="button"
+              onClick={() => cancelGeneration(session.id)}
+              className="p-3 rounded-2xl transition-all shadow-md bg-gray-700 text-white hover:shadow-lg"
+              title="응답 중지"
+            >
+              <HiStop className="text-xl" />
+            </motion.button>
+          ) : (
+            <motion.button
+              whileHover={{ scale: 1.05 }}
+              whileTap={{ scale: 0.95 }}
+              type="submit"
+              className={`p-3 rounded-2xl transition-all shadow-md ${
+                sending || !input.trim()
+                  ? 'bg-gray-200 text-gray-400 cursor-not-allowed'
+                  : 'bg-gradient-to-br from-primary-600 to-primary-500 text-white hover:shadow-lg'
+              }`}
+              disabled={sending || !input.trim()}
+            >
+              <HiPaperAirplane className="text-xl transform rotate-90" />
+            </motion.button>
+          )}
         </div>
       </form>
     </div>
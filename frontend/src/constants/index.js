@@ -11,6 +11,7 @@ export const API_ENDPOINTS = {
     LIST: '/videos',
     DETAIL: (videoId) => `/videos/${videoId}`,
     EVENT: (videoId) => `/videos/${videoId}/event`,
+    EVENTS_BATCH: '/videos/events/batch',
     SCAFFOLDING_RESPOND: (videoId, scaffoldingId) => 
       `/videos/${videoId}/scaffoldings/${scaffoldingId}/respond`,
   },
@@ -18,6 +19,8 @@ export const API_ENDPOINTS = {
     SESSIONS: '/chat/sessions',
     SESSION_DETAIL: (sessionId) => `/chat/sessions/${sessionId}`,
     MESSAGES: (sessionId) => `/chat/sessions/${sessionId}/messages`,
+    MESSAGES_STREAM: (sessionId) => `/chat/sessions/${sessionId}/messages/stream`,
+    CANCEL: (sessionId) => `/chat/sessions/${sessionId}/cancel`,
   },
   ADMIN: {
     USERS: '/admin/users',
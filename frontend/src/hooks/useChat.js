@@ -1,9 +1,13 @@
 /**
  * 채팅 관련 커스텀 훅
  */
-import { useState, useCallback } from 'react'
-import api from '../services/api'
+import { useState, useCallback, useRef } from 'react'
+import api, { postEventStream } from '../services/api'
 import { API_ENDPOINTS } from '../constants'
+import { createIdempotencyKey } from '../utils'
+
+// 네트워크 오류로 응답을 받지 못했을 때 같은 Idempotency-Key로 다시 보내는 횟수
+const NETWORK_RETRIES = 1
 
 export const useChat = () => {
   const [session, setSession] = useState(null)
@@ -11,6 +15,8 @@ export const useChat = () => {
   const [loading, setLoading] = useState(false)
   const [sending, setSending] = useState(false)
   const [error, setError] = useState(null)
+  // 진행 중인 스트리밍 요청 (중지 시 연결을 끊음)
+  const streamControllerRef = useRef(null)
 
   /**
    * 채팅 세션 생성 또는 가져오기
@@ -49,10 +55,21 @@ export const useChat = () => {
       const userMessage = { role: 'user', content: message }
       setMessages(prev => [...prev, userMessage])
       
-      const response = await api.post(
-        API_ENDPOINTS.CHAT.MESSAGES(sessionId),
-        { message }
-      )
+      // 재전송해도 서버가 LLM을 다시 호출하지 않도록 같은 키를 사용
+      const idempotencyKey = createIdempotencyKey()
+      let response
+      for (let attempt = 0; ; attempt++) {
+        try {
+          response = await api.post(
+            API_ENDPOINTS.CHAT.MESSAGES(sessionId),
+            { message },
+            { headers: { 'Idempotency-Key': idempotencyKey } }
+          )
+          break
+        } catch (err) {
+          if (err.response || attempt >= NETWORK_RETRIES) throw err
+        }
+      }
       
       // AI 응답 추가
       setMessages(prev => [...prev, response.data.message])
@@ -79,6 +96,113 @@ export const useChat = () => {
     }
   }, [])
 
+  /**
+   * 메시지 전송 (스트리밍)
+   * 토큰이 도착하는 대로 AI 응답을 화면에 표시
+   */
+  const sendMessageStream = useCallback(async (sessionId, message) => {
+    try {
+      setSending(true)
+      setError(null)
+      
+      // 사용자 메시지와 비어 있는 AI 응답 자리를 즉시 UI에 추가
+      setMessages(prev => [
+        ...prev,
+        { role: 'user', content: message },
+        { role: 'assistant', content: '', streaming: true }
+      ])
+      
+      let result = null
+      const idempotencyKey = createIdempotencyKey()
+      const controller = new AbortController()
+      streamControllerRef.current = controller
+      const handleEvent = (event, data) => {
+        if (event === 'queued') {
+          // 요청이 많아 서버 대기열에서 기다리는 중 (대기 순서 표시)
+          setMessages(prev => {
+            const last = prev[prev.length - 1]
+            return [...prev.slice(0, -1), { ...last, queuePosition: data.position }]
+          })
+        } else if (event === 'delta') {
+          setMessages(prev => {
+            const last = prev[prev.length - 1]
+            return [...prev.slice(0, -1), { ...last, content: last.content + data.content, queuePosition: null }]
+          })
+        } else if (event === 'done') {
+          result = data
+          setMessages(prev => [...prev.slice(0, -1), data.message])
+          if (data.session) {
+            setSession(prev => ({
+              ...prev,
+              ...data.session
+            }))
+          }
+        } else if (event === 'error') {
+          const error = new Error(data.error)
+          error.fromServer = true
+          throw error
+        }
+      }
+      
+      // 응답이 끝나기 전에 연결이 끊기면 같은 키로 다시 요청 (서버는 저장된 응답을 돌려줌)
+      for (let attempt = 0; ; attempt++) {
+        try {
+          await postEventStream(
+            API_ENDPOINTS.CHAT.MESSAGES_STREAM(sessionId),
+            { message },
+            handleEvent,
+            { headers: { 'Idempotency-Key': idempotencyKey }, signal: controller.signal }
+          )
+          break
+        } catch (err) {
+          if (result || err.response || err.fromServer || err.name === 'AbortError' || attempt >= NETWORK_RETRIES) throw err
+          setMessages(prev => {
+            const last = prev[prev.length - 1]
+            return [...prev.slice(0, -1), { ...last, content: '', queuePosition: null }]
+          })
+        }
+      }
+      
+      return result
+    } catch (err) {
+      if (err.name === 'AbortError') {
+        // 중지: 받은 부분까지는 서버에 저장되므로 화면에도 남기고, 받은 내용이 없으면 질문도 제거
+        setMessages(prev => {
+          const last = prev[prev.length - 1]
+          if (!last?.content) return prev.slice(0, -2)
+          return [...prev.slice(0, -1), { ...last, streaming: false, queuePosition: null, cancelled: true }]
+        })
+        return null
+      }
+      
+      const errorMessage = err.userMessage || err.message || '메시지 전송 실패'
+      setError(errorMessage)
+      
+      // 실패 시 사용자 메시지와 AI 응답 자리 제거
+      setMessages(prev => prev.slice(0, -2))
+      
+      throw err
+    } finally {
+      streamControllerRef.current = null
+      setSending(false)
+    }
+  }, [])
+
+  /**
+   * 진행 중인 응답 생성 중지
+   * 연결을 끊고 서버에도 중지를 요청하여 공급자 호출을 바로 멈춤 (받은 부분까지 저장됨)
+   */
+  const cancelGeneration = useCallback(async (sessionId) => {
+    if (!streamControllerRef.current) return
+    streamControllerRef.current.abort()
+    try {
+      await api.post(API_ENDPOINTS.CHAT.CANCEL(sessionId))
+    } catch (err) {
+      // 연결을 끊은 것만으로도 서버는 생성을 멈추므로 무시
+      console.error('Failed to cancel generation:', err)
+    }
+  }, [])
+
   /**
    * 세션 초기화
    */
@@ -96,6 +220,8 @@ export const useChat = () => {
     error,
     createOrGetSession,
     sendMessage,
+    sendMessageStream,
+    cancelGeneration,
     resetSession,
     setError,
   }
@@ -4,6 +4,7 @@
 import { useState, useCallback } from 'react'
 import api from '../services/api'
 import { API_ENDPOINTS } from '../constants'
+import { queueVideoEvent } from '../services/eventQueue'
 
 export const useVideo = () => {
   const [videos, setVideos] = useState([])
@@ -59,16 +60,9 @@ export const useVideo = () => {
   /**
    * 비디오 이벤트 로그
    */
-  const logEvent = useCallback(async (videoId, eventType, eventData = {}) => {
-    try {
-      await api.post(API_ENDPOINTS.VIDEOS.EVENT(videoId), {
-        event_type: eventType,
-        event_data: eventData
-      })
-    } catch (err) {
-      console.error('Failed to log event:', err)
-      // 이벤트 로그 실패는 조용히 처리
-    }
+  const logEvent = useCallback((videoId, eventType, eventData = {}) => {
+    // 모아서 일괄 전송 (이벤트 로그 실패는 조용히 처리)
+    queueVideoEvent(videoId, eventType, eventData)
   }, [])
 
   return {
@@ -10,7 +10,9 @@ const AdminLogs = () => {
   const [filters, setFilters] = useState({
     event_type: '',
     user_id: '',
-    video_id: ''
+    video_id: '',
+    position_min: '',
+    position_max: ''
   })
   const [expandedLog, setExpandedLog] = useState(null)
   const [users, setUsers] = useState([])
@@ -287,6 +289,31 @@ const AdminLogs = () => {
               ))}
             </select>
           </div>
+          
+          {activeTab === 'events' && (
+            <div className="form-group">
+              <label className="form-label">재생 위치 (초)</label>
+              <div style={{ display: 'flex', gap: '6px', alignItems: 'center' }}>
+                <input
+                  type="number"
+                  min="0"
+                  className="form-input"
+                  placeholder="부터"
+                  value={filters.position_min}
+                  onChange={(e) => setFilters({ ...filters, position_min: e.target.value })}
+                />
+                <span>~</span>
+                <input
+                  type="number"
+                  min="0"
+                  className="form-input"
+                  placeholder="까지"
+                  value={filters.position_max}
+                  onChange={(e) => setFilters({ ...filters, position_max: e.target.value })}
+                />
+              </div>
+            </div>
+          )}
         </div>
         
         <div style={{ display: 'flex', gap: '10px', marginTop: '15px' }}>
@@ -302,7 +329,7 @@ const AdminLogs = () => {
           </button>
           <button
             onClick={() => {
-              setFilters({ event_type: '', user_id: '', video_id: '' })
+              setFilters({ event_type: '', user_id: '', video_id: '', position_min: '', position_max: '' })
               setPage(1)
             }}
             className="btn btn-secondary"
@@ -3,6 +3,7 @@ import { useParams } from 'react-router-dom'
 import YouTube from 'react-youtube'
 import { motion, AnimatePresence } from 'framer-motion'
 import api from '../services/api'
+import { queueVideoEvent } from '../services/eventQueue'
 import ChatInterface from '../components/ChatInterface'
 import ScaffoldingInterface from '../components/ScaffoldingInterface'
 import { 
@@ -90,10 +91,7 @@ const LearningInterface = () => {
 
   const handleVideoEvent = (eventType, eventData) => {
     console.log(`Video Event: ${eventType}`, eventData)
-    api.post(`/videos/${videoId}/event`, {
-      event_type: eventType,
-      event_data: eventData
-    }).catch(err => console.error('Failed to log event:', err))
+    queueVideoEvent(videoId, eventType, eventData)
   }
 
   const handlePlayerReady = (event) => {
@@ -90,6 +90,67 @@ api.interceptors.response.use(
     }
 )
 
+// ============================================================================
+// 스트리밍 API (Server-Sent Events)
+// ============================================================================
+
+/**
+ * SSE 응답을 반환하는 POST 요청
+ * axios는 브라우저에서 응답 스트리밍을 지원하지 않으므로 fetch를 사용
+ *
+ * @param {string} url - API 경로 (baseURL 기준)
+ * @param {object} body - 요청 본문
+ * @param {(event: string, data: object) => void} onEvent - 이벤트 수신 콜백
+ * @param {object} [options]
+ * @param {object} [options.headers] - 추가 요청 헤더 (예: Idempotency-Key)
+ * @param {AbortSignal} [options.signal] - 중지 시 연결을 끊어 서버가 생성을 멈추도록 함
+ */
+export const postEventStream = async (url, body, onEvent, { headers = {}, signal } = {}) => {
+    const token = storage.get('token')
+    const response = await fetch(`${api.defaults.baseURL}${url}`, {
+        method: 'POST',
+        signal,
+        headers: {
+            'Content-Type': 'application/json',
+            Accept: 'text/event-stream',
+            ...(token ? { Authorization: `Bearer ${token}` } : {}),
+            ...headers,
+        },
+        body: JSON.stringify(body),
+    })
+
+    if (!response.ok) {
+        const data = await response.json().catch(() => ({}))
+        const error = new Error(data.error || ERROR_MESSAGES.SERVER_ERROR)
+        error.userMessage = data.error || ERROR_MESSAGES.SERVER_ERROR
+        error.response = { status: response.status, data }
+        throw error
+    }
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+
+    while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+
+        buffer += decoder.decode(value, { stream: true })
+        const frames = buffer.split('\n\n')
+        buffer = frames.pop()
+
+        for (const frame of frames) {
+            let event = 'message'
+            let data = ''
+            for (const line of frame.split('\n')) {
+                if (line.startsWith('event: ')) event = line.slice(7)
+                else if (line.startsWith('data: ')) data += line.slice(6)
+            }
+            if (data) onEvent(event, JSON.parse(data))
+        }
+    }
+}
+
 // ============================================================================
 // 설문조사 API
 // ============================================================================
@@ -0,0 +1,92 @@
+import api from './api'
+import { API_ENDPOINTS } from '../constants'
+import { storage } from '../utils'
+
+// 이 개수가 모이거나 첫 이벤트 후 이 시간이 지나면 한 번에 전송
+const FLUSH_SIZE = 20
+const FLUSH_INTERVAL_MS = 10000
+// 서버 일괄 기록 한도 (요청당 이벤트 수, sendBeacon 본문 64KB)
+const MAX_BATCH_EVENTS = 200
+const MAX_BEACON_BYTES = 60000
+
+let pending = []
+let flushTimer = null
+
+const takeBatch = () => {
+  const batch = pending.slice(0, MAX_BATCH_EVENTS)
+  pending = pending.slice(batch.length)
+  return batch
+}
+
+/**
+ * 모은 이벤트 전송 (실패한 이벤트는 버림, 기록 실패는 학습을 방해하지 않도록 조용히 처리)
+ */
+export const flushEvents = () => {
+  clearTimeout(flushTimer)
+  flushTimer = null
+  while (pending.length > 0) {
+    const events = takeBatch()
+    api.post(API_ENDPOINTS.VIDEOS.EVENTS_BATCH, { events })
+      .catch(err => console.error('Failed to log events:', err))
+  }
+}
+
+/**
+ * 페이지를 떠날 때 남은 이벤트 전송
+ * sendBeacon은 헤더를 지정할 수 없으므로 토큰을 본문에 담고,
+ * preflight 없이 보내도록 text/plain으로 전송 (서버는 Content-Type과 관계없이 JSON으로 읽음)
+ */
+const flushWithBeacon = () => {
+  if (pending.length === 0) return
+  const token = storage.get('token')
+  if (!token || typeof navigator === 'undefined' || !navigator.sendBeacon) {
+    flushEvents()
+    return
+  }
+
+  clearTimeout(flushTimer)
+  flushTimer = null
+  const url = `${api.defaults.baseURL}${API_ENDPOINTS.VIDEOS.EVENTS_BATCH}`
+  while (pending.length > 0) {
+    let events = takeBatch()
+    let body = new Blob([JSON.stringify({ events, access_token: token })], { type: 'text/plain' })
+    // 본문 한도(UTF-8 바이트 수)를 넘으면 절반씩 줄여 나머지는 다음 비콘으로 보냄
+    while (body.size > MAX_BEACON_BYTES && events.length > 1) {
+      const half = Math.ceil(events.length / 2)
+      pending = events.slice(half).concat(pending)
+      events = events.slice(0, half)
+      body = new Blob([JSON.stringify({ events, access_token: token })], { type: 'text/plain' })
+    }
+    navigator.sendBeacon(url, body)
+  }
+}
+
+/**
+ * 비디오 이벤트 기록 (모아서 POST /videos/events/batch로 전송)
+ *
+ * @param {number|string} videoId - 비디오 ID
+ * @param {string} eventType - 이벤트 타입
+ * @param {object} [eventData] - 이벤트 데이터
+ */
+export const queueVideoEvent = (videoId, eventType, eventData = {}) => {
+  pending.push({
+    video_id: Number(videoId),
+    event_type: eventType,
+    event_data: eventData,
+    client_ts: Date.now(),
+  })
+
+  if (pending.length >= FLUSH_SIZE) {
+    flushEvents()
+  } else if (!flushTimer) {
+    flushTimer = setTimeout(flushEvents, FLUSH_INTERVAL_MS)
+  }
+}
+
+if (typeof window !== 'undefined') {
+  // 탭 전환/닫기 시 남은 이벤트 전송 (모바일은 unload 대신 pagehide/visibilitychange만 보장됨)
+  window.addEventListener('pagehide', flushWithBeacon)
+  document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') flushWithBeacon()
+  })
+}
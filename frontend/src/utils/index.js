@@ -182,6 +182,16 @@ export const strings = {
   },
 }
 
+/**
+ * 요청 재전송 시 서버가 같은 요청으로 알아볼 수 있는 Idempotency-Key 생성
+ */
+export const createIdempotencyKey = () => {
+  if (typeof crypto !== 'undefined' && crypto.randomUUID) {
+    return crypto.randomUUID()
+  }
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`
+}
+
 /**
  * 디바운스 함수
  */